@@ -14,6 +14,8 @@ import base64
 import mimetypes
 from pathlib import Path
 
+from metrics import instrumented
+
 
 class _LegacyChatClient:
     """Adapter for the legacy openai.ChatCompletion API."""
@@ -88,6 +90,7 @@ class AIAssistant:
         openai.api_key = api_key
         return _LegacyOpenAIWrapper()
 
+    @instrumented("ai")
     def chat(self, message: str) -> str:
         """General conversational assistant used by the chat bar"""
         clean_message = (message or "").strip()
@@ -126,6 +129,7 @@ class AIAssistant:
 
         return self._fallback_chat(clean_message)
 
+    @instrumented("ai")
     def analyze_code(self, code: str, parse_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze Verilog code and provide AI-powered insights
@@ -171,6 +175,7 @@ Format each suggestion as: {{"title": "...", "description": "...", "severity": "
         except Exception as e:
             print(f"AI Analysis error: {e}")
             return self._fallback_analysis(code, parse_result)
+    @instrumented("ai")
     def debug_code(self, code: str, error_message: str = "") -> Dict[str, Any]:
         """
         Provide debugging assistance for Verilog code
@@ -213,6 +218,7 @@ Format each suggestion as: {{"optimization": "...", "benefit": "...", "explanati
             print(f"AI Debug error: {e}")
             return self._fallback_debug(code, error_message)
 
+    @instrumented("ai")
     def optimize_code(self, code: str, goals: List[str]) -> Dict[str, Any]:
         """Provide code optimization suggestions."""
         if not self.client:
@@ -229,6 +235,7 @@ Format each suggestion as: {{"optimization": "...", "benefit": "...", "explanati
             print(f"AI Optimize error: {e}")
             return self._fallback_optimize(code, goals)
     
+    @instrumented("ai")
     def explain_concept(self, code: str = "", concept: str = "") -> Dict[str, Any]:
         """
         Explain Verilog concepts and code snippets
@@ -251,6 +258,7 @@ Format each suggestion as: {{"optimization": "...", "benefit": "...", "explanati
             print(f"AI Explain error: {e}")
             return self._fallback_explain(code, concept)
 
+    @instrumented("ai")
     def analyze_upload(self, file_path: str) -> str:
         """Generate an AI response tailored to an uploaded asset (image or code file)."""
         file_path = Path(file_path)
@@ -1,18 +1,31 @@
-from flask import Flask, request, jsonify, send_from_directory, redirect, session, url_for
+from flask import Flask, Response, g, request, jsonify, send_from_directory, redirect, session, url_for
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import json
+import mimetypes
 from datetime import datetime
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 import requests
 import secrets
+import threading
+import time
 from urllib.parse import urlencode
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
 from verilog_parser import VerilogParser
 from ai_assistant import AIAssistant
+from metrics import REGISTRY, begin_request_timings, end_request_timings, instrumented
+from sim_executor import SimulationQueueFull, default_executor
+from sim_jobs import JobStore, TERMINAL_STATUSES
+from regression import run_regression
 from simulator import VerilogSimulator
+from uploads_manager import UploadsManager, UploadsPolicy
 from verilog_templates import TEMPLATES
+from vcd_index import load_signals, load_vcd_index
+from waveform_codec import is_compressed, iter_decompressed
+from waveform_pyramid import load_pyramid
 
 
 BASE_DIR_PATH = Path(__file__).resolve().parent
@@ -27,7 +40,8 @@ else:
     cors_origins = [origin.strip() for origin in raw_allowed_origins.split(",") if origin.strip()]
     cors_supports_credentials = True
 
-app = Flask(__name__, static_folder="uploads")
+# No static route: /uploads is served by uploaded_file, which knows about compressed waveforms.
+app = Flask(__name__, static_folder=None)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "change-this-secret")
 
 if cors_supports_credentials:
@@ -56,6 +70,7 @@ FACEBOOK_OAUTH_VERSION = os.getenv("FACEBOOK_OAUTH_VERSION", "v19.0")
 
 BASE_DIR = str(BASE_DIR_PATH)
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+JOBS_FOLDER = os.getenv("SIM_JOBS_DIR", os.path.join(BASE_DIR, "jobs"))
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB
 
@@ -67,13 +82,49 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 verilog_parser = VerilogParser()
 ai_assistant = AIAssistant(api_key=os.getenv("OPENAI_API_KEY"))
-simulator = VerilogSimulator()
+sim_executor = default_executor()
+job_store = JobStore(JOBS_FOLDER, UPLOAD_FOLDER)
+job_store.start_sweeper(
+    int(float(os.getenv("SIM_JOBS_TTL_HOURS", "24")) * 3600),
+    int(os.getenv("SIM_JOBS_SWEEP_SECONDS", "600")),
+)
+stream_simulator = VerilogSimulator()
+uploads_manager = UploadsManager(UPLOAD_FOLDER, UploadsPolicy.from_env())
+uploads_manager.start()
+
+HTTP_REQUESTS = "vlsi_http_requests_total"
+HTTP_SECONDS = "vlsi_http_request_duration_seconds"
+REGISTRY.describe(HTTP_REQUESTS, "counter", "HTTP requests handled, by route, method and status.")
+REGISTRY.describe(HTTP_SECONDS, "histogram", "Time to build an HTTP response, by route.")
+REGISTRY.describe("vlsi_simulation_workers", "gauge", "Simulation worker processes.")
+REGISTRY.describe("vlsi_simulations_in_flight", "gauge", "Simulations running or waiting for a worker.")
+REGISTRY.describe("vlsi_simulations_queued", "gauge", "Simulations waiting for a worker.")
+REGISTRY.describe("vlsi_simulations_total", "counter", "Simulations by outcome of admission and run.")
+REGISTRY.describe("vlsi_result_cache_lookups_total", "counter", "Simulation result cache lookups by outcome.")
+REGISTRY.describe("vlsi_result_cache_memory_bytes", "gauge", "Waveform bytes held by the in-memory result cache.")
+REGISTRY.describe("vlsi_uploads_bytes", "gauge", "Bytes stored under uploads/.")
 
 
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _current_owner() -> Optional[str]:
+    """Quota key for the signed-in user, or None for anonymous requests."""
+
+    user = session.get("user")
+    if not user or not user.get("sub"):
+        return None
+    return f"{session.get('provider', 'user')}:{user['sub']}"
+
+
+def _record_upload(filename: Optional[str], owner: Optional[str] = None) -> None:
+    """Give the reference this request took on ``filename`` to ``owner`` (see UploadsManager.record)."""
+
+    if filename:
+        uploads_manager.record(filename, owner)
+
+
 def _github_not_configured_response():
     return jsonify({"error": "GitHub OAuth is not configured"}), 500
 
@@ -82,6 +133,65 @@ def _facebook_not_configured_response():
     return jsonify({"error": "Facebook OAuth is not configured"}), 500
 
 
+def _queue_full_response(exc: SimulationQueueFull):
+    response = jsonify({"success": False, "error": "Simulation queue is full, please retry shortly"})
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, 503
+
+
+def _failure_payload(sim_result: Dict[str, Any]) -> Dict[str, Any]:
+    payload = {"success": False, "error": sim_result.get("error", "Simulation failed")}
+    if sim_result.get("budget_exceeded"):
+        payload["budget_exceeded"] = sim_result["budget_exceeded"]
+    return payload
+
+
+@instrumented("app", "serialize_waveform")
+def _waveform_payload(sim_result: Dict[str, Any], waveform_format: str = "points") -> Dict[str, Any]:
+    """Serialise the simulator's WaveformStore into the requested response shape."""
+
+    waveform = sim_result.get("waveform")
+    if waveform is None:
+        return {"waveform_data": []}
+    if waveform_format == "columnar":
+        return {"waveform": waveform.to_columnar()}
+    return {"waveform_data": waveform.to_waveform_data()}
+
+
+def _timings_requested() -> bool:
+    if request.args.get("timings", "").lower() in ("1", "true"):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and data.get("timings") is True
+
+
+@app.before_request
+def _start_request_timing():
+    g.request_started = time.perf_counter()
+    g.request_timings = begin_request_timings()
+
+
+@app.after_request
+def _finish_request_timing(response: Response):
+    """Record the request in the registry; add phase timings to the body when asked for."""
+
+    if "request_started" not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    timings = end_request_timings(g.pop("request_timings"))
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REGISTRY.inc(HTTP_REQUESTS, {"route": route, "method": request.method, "status": str(response.status_code)})
+    REGISTRY.observe(HTTP_SECONDS, elapsed, {"route": route})
+
+    if response.is_json and not response.direct_passthrough and _timings_requested():
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body["timings"] = {phase: round(seconds, 6) for phase, seconds in timings.items()}
+            body["timings"]["total"] = round(elapsed, 6)
+            response.set_data(app.json.dumps(body))
+    return response
+
+
 @app.route("/api/auth/github", methods=["GET"])
 def github_login():
     if not GITHUB_CLIENT_ID or not GITHUB_CLIENT_SECRET:
@@ -282,10 +392,31 @@ def health_check():
             "status": "healthy",
             "service": "VLSI Design Assistant API",
             "version": "1.0.0",
+            "simulation_queue": sim_executor.metrics(),
+            "uploads": uploads_manager.usage(),
         }
     )
 
 
+@app.route("/api/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Every metric in the Prometheus text exposition format."""
+
+    queue = sim_executor.metrics()
+    REGISTRY.set("vlsi_simulation_workers", queue["workers"])
+    REGISTRY.set("vlsi_simulations_in_flight", queue["in_flight"])
+    REGISTRY.set("vlsi_simulations_queued", queue["queued"])
+    for outcome in ("submitted", "rejected", "completed", "failed"):
+        REGISTRY.set("vlsi_simulations_total", queue[outcome], {"outcome": outcome})
+    cache = queue["result_cache"]
+    if cache is not None:
+        for outcome, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses")):
+            REGISTRY.set("vlsi_result_cache_lookups_total", cache[key], {"outcome": outcome})
+        REGISTRY.set("vlsi_result_cache_memory_bytes", cache["memory_bytes"])
+    REGISTRY.set("vlsi_uploads_bytes", uploads_manager.usage()["bytes"])
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.route("/api/analyze", methods=["POST"])
 def analyze_code():
     try:
@@ -298,15 +429,16 @@ def analyze_code():
         parse_result = verilog_parser.parse(code)
         ai_analysis = ai_assistant.analyze_code(code, parse_result)
         testbench = data.get("testbench", "")
-        sim_result = simulator.simulate(
+        sim_result = sim_executor.simulate(
             code,
             testbench_code=testbench,
             persist_waveform_dir=app.config["UPLOAD_FOLDER"],
         )
         simulation_section: Dict[str, Any]
         if sim_result.get("success"):
+            _record_upload(sim_result.get("waveform_file"), _current_owner())
             simulation_section = {
-                "waveform_data": sim_result.get("waveform_data", []),
+                **_waveform_payload(sim_result, data.get("waveform_format", "points")),
                 "signals": sim_result.get("signals", []),
                 "waveform_url": sim_result.get("waveform_url"),
                 "simulation_log": sim_result.get("log", ""),
@@ -329,6 +461,8 @@ def analyze_code():
 
         return jsonify(response_body)
 
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
     except Exception as exc:
         return jsonify({"success": False, "error": str(exc)}), 500
 
@@ -393,28 +527,294 @@ def simulate_code():
         if not code:
             return jsonify({"error": "No code provided"}), 400
 
-        sim_result = simulator.simulate(
+        sim_result = sim_executor.simulate(
             code,
             testbench,
             persist_waveform_dir=app.config["UPLOAD_FOLDER"],
         )
         if not sim_result.get("success"):
-            return jsonify({"success": False, "error": sim_result.get("error", "Simulation failed")}), 400
+            return jsonify(_failure_payload(sim_result)), 400
+        _record_upload(sim_result.get("waveform_file"), _current_owner())
 
         return jsonify(
             {
                 "success": True,
-                "waveform_data": sim_result.get("waveform_data", []),
+                **_waveform_payload(sim_result, data.get("waveform_format", "points")),
                 "simulation_log": sim_result.get("log", ""),
                 "signals": sim_result.get("signals", []),
                 "waveform_file": sim_result.get("waveform_file"),
                 "waveform_url": sim_result.get("waveform_url"),
             }
         )
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
+    except Exception as exc:
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+
+BATCH_MAX_TESTBENCHES = 16
+
+
+@app.route("/api/simulate/batch", methods=["POST"])
+def simulate_code_batch():
+    """Run several testbenches against one design in a single compile and simulator run."""
+
+    try:
+        data = request.get_json(silent=True) or {}
+        code = data.get("code", "")
+        testbenches = data.get("testbenches") or []
+
+        if not code:
+            return jsonify({"error": "No code provided"}), 400
+        if not isinstance(testbenches, list) or not all(isinstance(tb, str) for tb in testbenches):
+            return jsonify({"error": "testbenches must be a list of strings"}), 400
+        if not testbenches or len(testbenches) > BATCH_MAX_TESTBENCHES:
+            return jsonify({"error": f"Provide between 1 and {BATCH_MAX_TESTBENCHES} testbenches"}), 400
+
+        batch_result = sim_executor.simulate_batch(
+            code,
+            testbenches,
+            persist_waveform_dir=app.config["UPLOAD_FOLDER"],
+        )
+        if "results" not in batch_result:
+            return jsonify({"success": False, "error": batch_result.get("error", "Simulation failed")}), 400
+
+        waveform_format = data.get("waveform_format", "points")
+        owner = _current_owner()
+        results = []
+        for sim_result in batch_result["results"]:
+            if not sim_result.get("success"):
+                results.append(_failure_payload(sim_result))
+                continue
+            _record_upload(sim_result.get("waveform_file"), owner)
+            results.append(
+                {
+                    "success": True,
+                    **_waveform_payload(sim_result, waveform_format),
+                    "simulation_log": sim_result.get("log", ""),
+                    "signals": sim_result.get("signals", []),
+                    "waveform_file": sim_result.get("waveform_file"),
+                    "waveform_url": sim_result.get("waveform_url"),
+                }
+            )
+
+        return jsonify(
+            {
+                "success": batch_result["success"],
+                "results": results,
+                "batched": batch_result.get("batched", []),
+                "simulation_log": batch_result.get("log", ""),
+            }
+        )
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
+    except Exception as exc:
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+
+def _sse_event(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route("/api/simulate/stream", methods=["POST"])
+def simulate_code_stream():
+    """Server-Sent Events version of /api/simulate (read it with fetch, not EventSource)."""
+
+    data = request.get_json(silent=True) or {}
+    code = data.get("code", "")
+    testbench = data.get("testbench", "")
+
+    if not code:
+        return jsonify({"error": "No code provided"}), 400
+
+    try:
+        started_at = sim_executor.acquire_slot()
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
+
+    upload_folder = app.config["UPLOAD_FOLDER"]
+    owner = _current_owner()
+
+    def generate() -> Iterator[str]:
+        succeeded = False
+        try:
+            for event, payload in stream_simulator.simulate_stream(
+                code,
+                testbench,
+                persist_waveform_dir=upload_folder,
+            ):
+                succeeded = event == "done"
+                if succeeded:
+                    _record_upload(payload.get("waveform_file"), owner)
+                yield _sse_event(event, payload)
+        except Exception as exc:  # noqa: BLE001
+            yield _sse_event("error", {"error": f"Simulation error: {exc}"})
+        finally:
+            sim_executor.release_slot(started_at, succeeded)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+TRUTH_TABLE_PAGE_LIMIT = 4096
+
+
+@app.route("/api/truth-table", methods=["POST"])
+def truth_table():
+    try:
+        data = request.get_json(silent=True) or {}
+        code = data.get("code", "")
+
+        if not code:
+            return jsonify({"error": "No code provided"}), 400
+
+        offset = max(0, int(data.get("offset", 0)))
+        limit = max(0, min(int(data.get("limit", 256)), TRUTH_TABLE_PAGE_LIMIT))
+        # Up to TRUTH_TABLE_MAX_INPUTS input bits are evaluated exhaustively, so the
+        # table is built in a pool worker under the same admission as a simulation.
+        result = sim_executor.truth_table(
+            code,
+            top=data.get("top"),
+            offset=offset,
+            limit=limit,
+            persist_waveform_dir=app.config["UPLOAD_FOLDER"],
+        )
+        if not result.get("success"):
+            return jsonify({"success": False, "error": result.get("error", "Truth table failed")}), 400
+
+        _record_upload(result.get("waveform_file"), _current_owner())
+        return jsonify(
+            {
+                "success": True,
+                "module": result["module"],
+                "inputs": result["inputs"],
+                "outputs": result["outputs"],
+                "total_rows": result["total_rows"],
+                "offset": offset,
+                "rows": result["rows"],
+                "waveform_file": result.get("waveform_file"),
+                "waveform_url": result.get("waveform_url"),
+            }
+        )
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
+    except Exception as exc:
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+
+@app.route("/api/regression", methods=["POST"])
+def regression():
+    """Simulate the bundled templates (or ``templates``) against their golden waveforms."""
+
+    data = request.get_json(silent=True) or {}
+    names = data.get("templates") or None
+    if names is not None and (not isinstance(names, list) or not all(isinstance(name, str) for name in names)):
+        return jsonify({"error": "templates must be a list of template names"}), 400
+
+    try:
+        # Each template takes its own slot in the shared simulation pool.
+        report = run_regression(names, executor=sim_executor)
+        return jsonify({"success": report["summary"]["passed"], **report})
+    except SimulationQueueFull as exc:
+        return _queue_full_response(exc)
+    except KeyError as exc:
+        return jsonify({"success": False, "error": exc.args[0]}), 400
     except Exception as exc:
         return jsonify({"success": False, "error": str(exc)}), 500
 
 
+@app.route("/api/jobs", methods=["POST"])
+def submit_simulation_job():
+    data = request.get_json(silent=True) or {}
+    code = data.get("code", "")
+    testbench = data.get("testbench", "")
+
+    if not code:
+        return jsonify({"error": "No code provided"}), 400
+
+    job = job_store.create()
+    try:
+        sim_executor.submit_job(
+            JOBS_FOLDER,
+            job["id"],
+            code,
+            testbench,
+            persist_waveform_dir=app.config["UPLOAD_FOLDER"],
+        )
+    except SimulationQueueFull as exc:
+        job_store.discard(job["id"])
+        return _queue_full_response(exc)
+    except Exception as exc:
+        job_store.discard(job["id"])
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+    return (
+        jsonify(
+            {
+                "success": True,
+                "job_id": job["id"],
+                "status": job["status"],
+                "status_url": url_for("simulation_job_status", job_id=job["id"]),
+                "result_url": url_for("simulation_job_result", job_id=job["id"]),
+            }
+        ),
+        202,
+    )
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def simulation_job_status(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"success": True, "job": JobStore.public_view(job)})
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def simulation_job_result(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] not in TERMINAL_STATUSES:
+        return jsonify({"success": False, "error": "Job has not finished", "job": JobStore.public_view(job)}), 409
+    if job["status"] != "succeeded":
+        error = job.get("error") or f"Job {job['status']}"
+        return jsonify({"success": False, "error": error, "job": JobStore.public_view(job)}), 400
+
+    sim_result = job_store.load_result(job_id)
+    if sim_result is None:
+        return jsonify({"success": False, "error": "Job result is no longer available"}), 410
+    if sim_result.get("waveform_file"):
+        # The worker's reference stays with the job; this response takes its own.
+        try:
+            uploads_manager.blobs.acquire(sim_result["waveform_file"])
+        except FileNotFoundError:
+            return jsonify({"success": False, "error": "Job result is no longer available"}), 410
+        _record_upload(sim_result["waveform_file"], _current_owner())
+
+    return jsonify(
+        {
+            "success": True,
+            **_waveform_payload(sim_result, request.args.get("waveform_format", "points")),
+            "simulation_log": sim_result.get("log", ""),
+            "signals": sim_result.get("signals", []),
+            "waveform_file": sim_result.get("waveform_file"),
+            "waveform_url": sim_result.get("waveform_url"),
+            "job": JobStore.public_view(job),
+        }
+    )
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_simulation_job(job_id: str):
+    job = job_store.request_cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"success": True, "job": JobStore.public_view(job)})
+
+
 @app.route("/api/explain", methods=["POST"])
 def explain_concept():
     try:
@@ -476,25 +876,33 @@ def upload_file():
     unique_name = f"{int(datetime.now().timestamp())}_{filename}"
     filepath = os.path.join(app.config["UPLOAD_FOLDER"], unique_name)
     file.save(filepath)
+    owner = _current_owner()
+    _record_upload(unique_name, owner)
     ai_summary = ai_assistant.analyze_upload(filepath)
     is_hdl = filepath.lower().endswith((".v", ".sv"))
     waveform_payload: Dict[str, Any] = {}
     if is_hdl:
         try:
             code = Path(filepath).read_text(encoding="utf-8", errors="ignore")
-            sim_result = simulator.simulate(
+            sim_result = sim_executor.simulate(
                 code,
                 persist_waveform_dir=app.config["UPLOAD_FOLDER"],
             )
             if sim_result.get("success"):
+                _record_upload(sim_result.get("waveform_file"), owner)
                 waveform_payload = {
-                    "waveform_data": sim_result.get("waveform_data", []),
+                    **_waveform_payload(sim_result, request.form.get("waveform_format", "points")),
                     "signals": sim_result.get("signals", []),
                     "waveform_url": sim_result.get("waveform_url"),
                     "simulation_log": sim_result.get("log", ""),
                 }
             else:
                 waveform_payload = {"simulation_error": sim_result.get("error", "Simulation failed")}
+        except SimulationQueueFull as exc:
+            waveform_payload = {
+                "simulation_error": "Simulation queue is full, please retry shortly",
+                "retry_after": exc.retry_after,
+            }
         except Exception as exc:
             waveform_payload = {"simulation_error": f"Simulation error: {exc}"}
     response_body = {
@@ -509,12 +917,123 @@ def upload_file():
     
 
 
+def _uploaded_waveform_path(filename: str) -> Optional[str]:
+    safe_name = secure_filename(filename)
+    if safe_name != filename or not safe_name.endswith(".vcd"):
+        return None
+    path = os.path.join(app.config["UPLOAD_FOLDER"], safe_name)
+    return path if os.path.isfile(path) else None
+
+
+@app.route("/api/waveforms/<filename>/signals", methods=["GET"])
+def waveform_signals(filename: str):
+    path = _uploaded_waveform_path(filename)
+    if not path:
+        return jsonify({"error": "Waveform not found"}), 404
+    uploads_manager.accessed(filename)
+
+    try:
+        index = load_vcd_index(path)
+        return jsonify(
+            {
+                "success": True,
+                "signals": index["signals"],
+                "timescale": index["timescale"],
+                "end_time": index["end_time"],
+            }
+        )
+    except Exception as exc:
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+
+@app.route("/api/waveforms/<filename>", methods=["GET"])
+def waveform_window(filename: str):
+    path = _uploaded_waveform_path(filename)
+    if not path:
+        return jsonify({"error": "Waveform not found"}), 404
+    uploads_manager.accessed(filename)
+
+    try:
+        index = load_vcd_index(path)
+        names = [name for name in request.args.get("signals", "").split(",") if name]
+        if not names:
+            names = list(dict.fromkeys(entry["name"] for entry in index["signals"]))
+        start = request.args.get("start", type=int)
+        end = request.args.get("end", type=int)
+        pixel_width = request.args.get("width", type=int)
+
+        if pixel_width:
+            all_names = list(dict.fromkeys(entry["name"] for entry in index["signals"]))
+            pyramid = load_pyramid(path, lambda: load_signals(path, all_names, index=index))
+            window_start = start if start is not None else 0
+            window_end = end if end is not None else pyramid.end_time
+            try:
+                decimated = pyramid.query(names, window_start, window_end, pixel_width)
+            except KeyError as exc:
+                return jsonify({"success": False, "error": f"Unknown signal: {exc.args[0]}"}), 400
+            return jsonify(
+                {
+                    "success": True,
+                    "start": window_start,
+                    "end": window_end,
+                    "end_time": pyramid.end_time,
+                    "decimated": decimated,
+                }
+            )
+
+        try:
+            waveform = load_signals(path, names, start, end, index)
+        except KeyError as exc:
+            return jsonify({"success": False, "error": f"Unknown signal: {exc.args[0]}"}), 400
+
+        response_body = {
+            "success": True,
+            "signals": waveform.signals,
+            "start": start,
+            "end": end,
+        }
+        response_body.update(
+            _waveform_payload({"waveform": waveform}, request.args.get("waveform_format", "points"))
+        )
+        return jsonify(response_body)
+    except Exception as exc:
+        return jsonify({"success": False, "error": str(exc)}), 500
+
+
 @app.route("/uploads/<path:filename>")
 def uploaded_file(filename: str):
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+    path = safe_join(app.config["UPLOAD_FOLDER"], filename)
+    if path and os.path.isfile(path):
+        uploads_manager.accessed(filename)
+    if not path or not os.path.isfile(path) or not is_compressed(path):
+        return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+
+    # Waveforms are stored gzip-compressed: hand the bytes over as-is when the client
+    # can decode them, otherwise inflate while streaming.
+    if request.accept_encodings.quality("gzip") > 0:
+        response = send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = Response(iter_decompressed(path), mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _build_template_artifacts() -> None:
+    """Precompute missing template results so matching requests skip the simulator."""
+
+    try:
+        report = sim_executor.build_template_artifacts()
+        if report:
+            print(f"Built {report['built']} template artifacts for {report['engine']} in {report['seconds']}s")
+    except Exception as exc:  # noqa: BLE001
+        print(f"Template artifact build error: {exc}")
 
 
 if __name__ == "__main__":
+    # Other deployments build them once with ``python template_artifacts.py --missing``.
+    threading.Thread(target=_build_template_artifacts, name="template-artifacts", daemon=True).start()
     port = int(os.getenv("PORT", 5000))
     debug_mode = os.getenv("FLASK_DEBUG", "false").lower() == "true"
     app.run(debug=debug_mode, host="0.0.0.0", port=port)
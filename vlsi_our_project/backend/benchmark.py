@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from simulator import VerilogSimulator
+from verilog_parser import VerilogParser
+
+
+# Input sizes per profile. "full" covers the ranges we size hardware for; "quick"
+# finishes in well under a minute and is what to run between commits.
+PROFILES: Dict[str, Dict[str, List[Any]]] = {
+    "quick": {
+        "verilog_lines": [100, 1_000, 2_000],
+        "vcd": [(10, 1_000), (100, 10_000), (1_000, 100_000)],
+        "testbench_ports": [10, 100, 1_000],
+        "simulate": [(10, 1_000), (100, 10_000)],
+    },
+    "full": {
+        "verilog_lines": [100, 1_000, 10_000, 100_000],
+        "vcd": [(10, 1_000), (1_000, 100_000), (10_000, 1_000_000), (100_000, 10_000_000)],
+        "testbench_ports": [10, 100, 1_000, 10_000],
+        "simulate": [(10, 1_000), (1_000, 100_000), (10_000, 1_000_000)],
+    },
+}
+DEFAULT_THRESHOLD = 0.2
+# Cases slower than this are timed once instead of ``repeat`` times.
+SLOW_CASE_SECONDS = 10.0
+
+
+# -- synthetic inputs --------------------------------------------------------------------
+
+
+def synthetic_verilog(lines: int) -> str:
+    """Roughly ``lines`` lines of small registered adder modules."""
+
+    chunks: List[str] = []
+    written = 0
+    index = 0
+    while written < lines:
+        chunks.append(
+            f"module unit{index}(input clk, input [7:0] a{index}, input [7:0] b{index}, output reg [7:0] y{index});\n"
+            f"    wire [7:0] s{index};\n"
+            f"    assign s{index} = a{index} + b{index};\n"
+            f"    always @(posedge clk) begin\n"
+            f"        y{index} <= s{index} ^ b{index};\n"
+            f"    end\n"
+            f"endmodule\n"
+            f"\n"
+        )
+        written += 8
+        index += 1
+    return "".join(chunks)
+
+
+def synthetic_ports(ports: int) -> str:
+    """A combinational module with ``ports`` inputs and as many outputs."""
+
+    declarations = [f"    input in{index}" for index in range(ports)]
+    declarations += [f"    output out{index}" for index in range(ports)]
+    assigns = [f"    assign out{index} = ~in{index};" for index in range(ports)]
+    return "module wide(\n" + ",\n".join(declarations) + "\n);\n" + "\n".join(assigns) + "\nendmodule\n"
+
+
+def _id_code(index: int) -> str:
+    code = ""
+    index += 1
+    while index:
+        index, digit = divmod(index - 1, 94)
+        code += chr(33 + digit)
+    return code
+
+
+def write_synthetic_vcd(path: str, signals: int, transitions: int) -> None:
+    """A VCD with ``signals`` variables (every fourth one 8 bits wide) and ``transitions`` changes."""
+
+    codes = [_id_code(index) for index in range(signals)]
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("$timescale 1ns $end\n$scope module bench $end\n")
+        for index, code in enumerate(codes):
+            width = 8 if index % 4 == 3 else 1
+            handle.write(f"$var wire {width} {code} sig{index} $end\n")
+        handle.write("$upscope $end\n$enddefinitions $end\n")
+
+        per_step = min(signals, 64)
+        written = 0
+        step = 0
+        cursor = 0
+        while written < transitions:
+            lines = [f"#{step * 10}\n"]
+            for _ in range(min(per_step, transitions - written)):
+                index = cursor % signals
+                bit = (cursor // signals + step) & 1
+                if index % 4 == 3:
+                    lines.append(f"b{(cursor * 37) & 0xFF:08b} {codes[index]}\n")
+                else:
+                    lines.append(f"{bit}{codes[index]}\n")
+                cursor += 1
+                written += 1
+            handle.write("".join(lines))
+            step += 1
+
+
+def _write_stub_toolchain(directory: str, vcd_file: str) -> Tuple[str, str]:
+    """Executables standing in for iverilog/vvp: compile is a copy, run drops ``vcd_file``."""
+
+    iverilog = os.path.join(directory, "iverilog")
+    vvp = os.path.join(directory, "vvp")
+    with open(iverilog, "w", encoding="utf-8") as handle:
+        handle.write(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            "args = sys.argv[1:]\n"
+            "if '-v' in args or '-V' in args:\n"
+            "    print('Icarus Verilog version 0.0 (benchmark stub)')\n"
+            "    sys.exit(0)\n"
+            "open(args[args.index('-o') + 1], 'w').write('stub')\n"
+        )
+    with open(vvp, "w", encoding="utf-8") as handle:
+        handle.write(
+            f"#!{sys.executable}\n"
+            "import shutil\n"
+            f"shutil.copyfile({vcd_file!r}, 'waveform.vcd')\n"
+            "print('stub run')\n"
+        )
+    os.chmod(iverilog, 0o755)
+    os.chmod(vvp, 0o755)
+    return iverilog, vvp
+
+
+# -- cases ------------------------------------------------------------------------------
+
+
+def _time(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+        if samples[-1] > SLOW_CASE_SECONDS:
+            break
+    return {"median": statistics.median(samples), "min": min(samples), "repeat": len(samples)}
+
+
+def _cases(
+    profile: Dict[str, List[Any]],
+    workdir: str,
+    only: Optional[str] = None,
+) -> Iterator[Tuple[str, Dict[str, Any], Callable[[], Any]]]:
+    """Yield ``(case id, parameters, callable)`` for every selected benchmark in ``profile``.
+
+    Inputs are generated lazily, so ``only`` also skips building the big ones.
+    """
+
+    def selected(case_id: str) -> bool:
+        return not only or only in case_id
+
+    parser = VerilogParser()
+    for lines in profile["verilog_lines"]:
+        case_id = f"verilog_parser.parse[{lines}]"
+        if selected(case_id):
+            code = synthetic_verilog(lines)
+            yield case_id, {"lines": lines}, lambda code=code: parser.parse(code)
+
+    simulator = VerilogSimulator()
+    for ports in profile["testbench_ports"]:
+        case_id = f"simulator.generate_basic_testbench[{ports}]"
+        if selected(case_id):
+            design = synthetic_ports(ports)
+            yield (
+                case_id,
+                {"ports": ports, "lines": design.count("\n")},
+                lambda design=design: simulator._generate_basic_testbench(design, "waveform.vcd"),
+            )
+
+    for signals, transitions in profile["vcd"]:
+        case_id = f"simulator.parse_vcd[{signals}x{transitions}]"
+        if selected(case_id):
+            path = os.path.join(workdir, f"parse_{signals}_{transitions}.vcd")
+            write_synthetic_vcd(path, signals, transitions)
+            yield (
+                case_id,
+                {"signals": signals, "transitions": transitions, "bytes": os.path.getsize(path)},
+                lambda path=path: simulator._parse_vcd(path),
+            )
+            os.remove(path)
+
+    for signals, transitions in profile["simulate"]:
+        case_id = f"simulator.simulate[stub,{signals}x{transitions}]"
+        if not selected(case_id):
+            continue
+        case_dir = tempfile.mkdtemp(dir=workdir)
+        vcd_file = os.path.join(case_dir, "source.vcd")
+        write_synthetic_vcd(vcd_file, signals, transitions)
+        stubbed = VerilogSimulator()
+        stubbed.iverilog_path, stubbed.vvp_path = _write_stub_toolchain(case_dir, vcd_file)
+        stubbed.engine = "auto"
+        stubbed.compile_cache = None
+        design = synthetic_verilog(100)
+        yield (
+            case_id,
+            {"signals": signals, "transitions": transitions},
+            lambda stubbed=stubbed, design=design: stubbed.simulate(design, "module tb; endmodule\n"),
+        )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return result.stdout.strip() or None
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def run_benchmarks(profile_name: str = "quick", repeat: int = 3, only: Optional[str] = None) -> Dict[str, Any]:
+    """Run every case of a profile and return a JSON-serialisable baseline."""
+
+    profile = PROFILES[profile_name]
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for case_id, parameters, function in _cases(profile, workdir, only):
+            timing = _time(function, repeat)
+            results[case_id] = {"params": parameters, **{key: round(value, 6) for key, value in timing.items()}}
+            print(f"{case_id:<48} {timing['median'] * 1000:10.2f}ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "profile": profile_name,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Cases present in both runs, with ``regressed`` set when the median slowed by more than ``threshold``."""
+
+    rows = []
+    for case_id, entry in current["results"].items():
+        previous = baseline.get("results", {}).get(case_id)
+        if previous is None or not previous.get("median"):
+            continue
+        ratio = entry["median"] / previous["median"]
+        rows.append(
+            {
+                "case": case_id,
+                "baseline": previous["median"],
+                "current": entry["median"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the parsers and simulator on synthetic inputs.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported")
+    parser.add_argument("--only", help="run only cases whose id contains this text")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.profile, max(1, args.repeat), args.only)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+    if not args.compare:
+        if not args.output:
+            print(json.dumps(report, indent=2, sort_keys=True))
+        return 0
+
+    with open(args.compare, "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    rows = compare(baseline, report, args.threshold)
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['case']:<48} {row['baseline'] * 1000:10.2f}ms -> {row['current'] * 1000:10.2f}ms "
+            f"x{row['ratio']:.2f}{flag}"
+        )
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+
+class CompileCache:
+    """Disk-backed LRU cache of compiled ``.vvp`` images keyed by content hash."""
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(design_code: str, testbench_code: str, toolchain: str, flags: Iterable[str]) -> str:
+        """Hash everything that influences the compiled image."""
+
+        digest = hashlib.sha256()
+        for part in (design_code, testbench_code, toolchain, "\0".join(flags)):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.vvp")
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """Materialise a cached image at ``destination``; returns False on a miss."""
+
+        entry = self._entry_path(key)
+        try:
+            self._link_or_copy(entry, destination)
+            os.utime(entry)
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as exc:  # noqa: BLE001
+            print(f"Compile cache read error: {exc}")
+            return False
+
+    def store(self, key: str, compiled_file: str) -> None:
+        """Insert a freshly compiled image and evict least recently used entries."""
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, staging = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(compiled_file, staging)
+            os.replace(staging, self._entry_path(key))
+            self._evict()
+        except Exception as exc:  # noqa: BLE001
+            print(f"Compile cache write error: {exc}")
+
+    def _evict(self) -> None:
+        entries: List[Tuple[float, int, str]] = []
+        total = 0
+        with os.scandir(self.cache_dir) as listing:
+            for item in listing:
+                if not item.name.endswith(".vvp"):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def _link_or_copy(source: str, destination: str) -> None:
+        try:
+            os.link(source, destination)
+        except OSError as exc:
+            if isinstance(exc, FileNotFoundError):
+                raise
+            shutil.copyfile(source, destination)
+
+
+def default_compile_cache() -> Optional[CompileCache]:
+    """Build the cache from environment settings; ``SIM_CACHE_MAX_MB=0`` disables it."""
+
+    max_mb = float(os.getenv("SIM_CACHE_MAX_MB", "256"))
+    if max_mb <= 0:
+        return None
+    cache_dir = os.getenv(
+        "SIM_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "vlsi_assistant", "vvp_cache"),
+    )
+    return CompileCache(cache_dir, int(max_mb * 1024 * 1024))
@@ -0,0 +1,498 @@
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from logic4 import Logic
+
+
+# Generated factories are keyed by expression shape, so identical assigns in different
+# designs (or instances) share one compiled code object.
+CODEGEN_CACHE_SIZE = int(os.getenv("SIM_CODEGEN_CACHE_SIZE", "4096"))
+
+
+class _Unknown(Exception):
+    """Raised by generated code when a two-state evaluation would produce x."""
+
+
+class _NotCompilable(Exception):
+    """The expression or statement uses something the code generator leaves to the interpreter."""
+
+
+def _mask(width: int) -> int:
+    return (1 << width) - 1
+
+
+def _to_signed(value: int, width: int) -> int:
+    half = 1 << (width - 1)
+    return (value ^ half) - half
+
+
+# -- runtime helpers used by generated code -----------------------------------------------
+
+
+def _div(left: int, right: int, width: int, signed: bool) -> int:
+    if right == 0:
+        raise _Unknown()
+    if not signed:
+        return left // right
+    left, right = _to_signed(left, width), _to_signed(right, width)
+    quotient = abs(left) // abs(right)
+    return (-quotient if (left < 0) != (right < 0) else quotient) & _mask(width)
+
+
+def _mod(left: int, right: int, width: int, signed: bool) -> int:
+    if right == 0:
+        raise _Unknown()
+    if not signed:
+        return left % right
+    left, right = _to_signed(left, width), _to_signed(right, width)
+    remainder = abs(left) % abs(right)
+    return (-remainder if left < 0 else remainder) & _mask(width)
+
+
+def _pow(base: int, exponent: int, width: int, base_signed: bool, exponent_signed: bool, exponent_width: int) -> int:
+    if base_signed:
+        base = _to_signed(base, width)
+    if exponent_signed:
+        exponent = _to_signed(exponent, exponent_width)
+    if exponent < 0:
+        if base == 0:
+            raise _Unknown()
+        if base in (1, -1):
+            return (1 if base == 1 or exponent % 2 == 0 else -1) & _mask(width)
+        return 0
+    return pow(base, exponent, 1 << width)
+
+
+def _shl(value: int, amount: int, width: int) -> int:
+    return 0 if amount >= width else (value << amount) & _mask(width)
+
+
+def _offset(index: int, msb: int, lsb: int) -> int:
+    return index - lsb if msb >= lsb else lsb - index
+
+
+def _bit(value: int, index: int, msb: int, lsb: int, width: int) -> int:
+    offset = _offset(index, msb, lsb)
+    if not 0 <= offset < width:
+        raise _Unknown()
+    return (value >> offset) & 1
+
+
+def _ipart(value: int, base: int, select_width: int, ascending: bool, msb: int, lsb: int, width: int) -> int:
+    other = base + select_width - 1 if ascending else base - select_width + 1
+    offset = min(_offset(base, msb, lsb), _offset(other, msb, lsb))
+    if offset < 0 or offset + select_width > width:
+        raise _Unknown()
+    return (value >> offset) & _mask(select_width)
+
+
+_HELPERS = {
+    "_Logic": Logic,
+    "_Unknown": _Unknown,
+    "_div": _div,
+    "_mod": _mod,
+    "_pow": _pow,
+    "_shl": _shl,
+    "_bit": _bit,
+    "_ipart": _ipart,
+}
+
+
+# -- shapes ------------------------------------------------------------------------------
+
+
+def _shape(node: Any, signals: Dict[Any, int]) -> Any:
+    """Hashable structure of a bound expression with signals replaced by slot numbers."""
+
+    if isinstance(node, tuple) and hasattr(node, "_fields") and hasattr(node, "op"):
+        return (node.op, node.width, node.signed, tuple(_shape(arg, signals) for arg in node.args))
+    if isinstance(node, Logic):
+        return ("$const", node.width, node.aval, node.bval, node.signed)
+    if hasattr(node, "aval") and hasattr(node, "drivers"):
+        slot = signals.setdefault(node, len(signals))
+        return ("$sig", slot, node.width, node.signed, node.msb, node.lsb)
+    return node
+
+
+def _resize(code: str, width: int, signed: bool, target_width: int, target_signed: bool) -> str:
+    if target_width > width and signed and target_signed:
+        half = 1 << (width - 1)
+        return f"((({code} ^ {half}) - {half}) & {_mask(target_width)})"
+    if target_width < width:
+        return f"({code} & {_mask(target_width)})"
+    return code
+
+
+def _as_signed(code: str, width: int) -> str:
+    half = 1 << (width - 1)
+    return f"(({code} ^ {half}) - {half})"
+
+
+class _ExpressionWriter:
+    """Turns an expression shape into a Python expression over ``v<slot>`` locals.
+
+    The generated code mirrors ``NativeSimulator._eval`` for operands without x/z
+    bits; anything that would produce x raises ``_Unknown`` at run time.
+    """
+
+    def __init__(self) -> None:
+        self.slots: Dict[int, Any] = {}
+
+    def expression(self, node: Any, width: int, signed: bool) -> str:
+        op, node_width, node_signed, args = node
+        if op == "sig":
+            return _resize(self._signal(args[0]), args[0][2], args[0][3], width, signed)
+        if op in ("const", "str"):
+            _, const_width, aval, bval, const_signed = args[0] if op == "const" else args[1]
+            if bval:
+                raise _NotCompilable()
+            value = Logic(const_width, aval, 0, const_signed).resize(width, signed)
+            return str(value.aval)
+        if op == "binary":
+            return self._binary(args, width, signed)
+        if op == "unary":
+            return self._unary(args, width, signed)
+        if op == "cond":
+            cond, then, other = args
+            condition = self.expression(cond, cond[1], cond[2])
+            return f"({self.expression(then, width, signed)} if {condition} else {self.expression(other, width, signed)})"
+        if op == "concat":
+            parts = []
+            shift = node_width
+            for item in args:
+                shift -= item[1]
+                code = self.expression(item, item[1], item[2])
+                parts.append(f"({code} << {shift})" if shift else code)
+            return _resize(f"({' | '.join(parts)})", node_width, False, width, signed)
+        if op in ("bit", "part", "ipart"):
+            return _resize(self._select(op, node_width, args), node_width, False, width, signed)
+        if op in ("signed", "unsigned"):
+            operand = args[0]
+            code = self.expression(operand, operand[1], operand[2])
+            return _resize(code, operand[1], op == "signed", width, signed)
+        raise _NotCompilable()
+
+    def _signal(self, slot_shape: Any) -> str:
+        self.slots[slot_shape[1]] = slot_shape
+        return f"v{slot_shape[1]}"
+
+    def _select(self, op: str, width: int, args: Any) -> str:
+        signal = args[0]
+        _, _, signal_width, _, msb, lsb = signal
+        value = self._signal(signal)
+        if op == "part":
+            offset = args[1]
+            if offset < 0 or offset + width > signal_width:
+                raise _NotCompilable()
+            return f"(({value} >> {offset}) & {_mask(width)})"
+
+        index = args[1]
+        if index[0] == "const" and not index[3][0][3]:
+            constant = Logic(*index[3][0][1:]).to_int()
+            ascending = op == "bit" or args[2]
+            other = constant + width - 1 if ascending else constant - width + 1
+            offset = min(_offset(constant, msb, lsb), _offset(other, msb, lsb))
+            if offset < 0 or offset + width > signal_width:
+                raise _NotCompilable()
+            return f"(({value} >> {offset}) & {_mask(width)})"
+
+        code = self.expression(index, index[1], index[2])
+        if index[2]:
+            code = _as_signed(code, index[1])
+        if op == "bit":
+            return f"_bit({value}, {code}, {msb}, {lsb}, {signal_width})"
+        return f"_ipart({value}, {code}, {width}, {args[2]}, {msb}, {lsb}, {signal_width})"
+
+    def _binary(self, args: Any, width: int, signed: bool) -> str:
+        name, left, right = args
+        mask = _mask(width)
+        if name in ("+", "-", "*", "&", "|", "^", "~^", "^~", "/", "%"):
+            lhs = self.expression(left, width, signed)
+            rhs = self.expression(right, width, signed)
+            if name in ("+", "-", "*"):
+                return f"(({lhs} {name} {rhs}) & {mask})"
+            if name in ("&", "|", "^"):
+                return f"({lhs} {name} {rhs})"
+            if name in ("~^", "^~"):
+                return f"(~({lhs} ^ {rhs}) & {mask})"
+            helper = "_div" if name == "/" else "_mod"
+            return f"{helper}({lhs}, {rhs}, {width}, {signed})"
+
+        if name in ("==", "!=", "===", "!==", "<", "<=", ">", ">="):
+            operand_width = max(left[1], right[1])
+            operand_signed = left[2] and right[2]
+            lhs = self.expression(left, operand_width, operand_signed)
+            rhs = self.expression(right, operand_width, operand_signed)
+            if operand_signed and name not in ("==", "!=", "===", "!=="):
+                lhs, rhs = _as_signed(lhs, operand_width), _as_signed(rhs, operand_width)
+            operator = {"===": "==", "!==": "!="}.get(name, name)
+            return f"(1 if {lhs} {operator} {rhs} else 0)"
+
+        if name in ("&&", "||"):
+            lhs = self.expression(left, left[1], left[2])
+            rhs = self.expression(right, right[1], right[2])
+            operator = "and" if name == "&&" else "or"
+            return f"(1 if ({lhs} {operator} {rhs}) else 0)"
+
+        if name == "**":
+            base = self.expression(left, width, signed)
+            exponent = self.expression(right, right[1], right[2])
+            return f"_pow({base}, {exponent}, {width}, {signed}, {right[2]}, {right[1]})"
+
+        value = self.expression(left, width, signed)
+        amount = self.expression(right, right[1], False)
+        if name in ("<<", "<<<"):
+            return f"_shl({value}, {amount}, {width})"
+        if name == ">>>" and signed:
+            return f"(({_as_signed(value, width)} >> {amount}) & {mask})"
+        return f"({value} >> {amount})"
+
+    def _unary(self, args: Any, width: int, signed: bool) -> str:
+        name, operand = args
+        if name in ("~", "-", "+"):
+            code = self.expression(operand, width, signed)
+            if name == "~":
+                return f"(~{code} & {_mask(width)})"
+            if name == "-":
+                return f"(-{code} & {_mask(width)})"
+            return code
+
+        code = self.expression(operand, operand[1], operand[2])
+        operand_mask = _mask(operand[1])
+        if name == "!":
+            return f"(0 if {code} else 1)"
+        if name == "&":
+            return f"(1 if {code} == {operand_mask} else 0)"
+        if name == "~&":
+            return f"(0 if {code} == {operand_mask} else 1)"
+        if name == "|":
+            return f"(1 if {code} else 0)"
+        if name == "~|":
+            return f"(0 if {code} else 1)"
+        if name == "^":
+            return f"({code}.bit_count() & 1)"
+        return f"(1 - ({code}.bit_count() & 1))"
+
+
+@lru_cache(maxsize=CODEGEN_CACHE_SIZE)
+def _expression_factory(
+    shape: Any,
+    width: int,
+    signed: bool,
+    result_width: int,
+    result_signed: bool,
+) -> Optional[Callable[..., Callable[[], Logic]]]:
+    writer = _ExpressionWriter()
+    try:
+        body = _resize(writer.expression(shape, width, signed), width, False, result_width, False)
+    except _NotCompilable:
+        return None
+
+    slots = sorted(writer.slots)
+    parameters = ", ".join([f"s{slot}" for slot in slots] + ["_fallback"])
+    lines = [f"def _factory({parameters}):", "    def evaluate():"]
+    if slots:
+        lines.append(f"        if {' or '.join(f's{slot}.bval' for slot in slots)}:")
+        lines.append("            return _fallback()")
+        for slot in slots:
+            lines.append(f"        v{slot} = s{slot}.aval")
+    lines += [
+        "        try:",
+        f"            return _Logic({result_width}, {body}, 0, {result_signed})",
+        "        except _Unknown:",
+        "            return _fallback()",
+        "    return evaluate",
+    ]
+    namespace = dict(_HELPERS)
+    exec(compile("\n".join(lines), "<verilog-expr>", "exec"), namespace)  # noqa: S102
+    return namespace["_factory"]
+
+
+def compile_expr(
+    simulator: Any,
+    expr: Any,
+    width: int,
+    signed: bool,
+    result_width: int,
+    result_signed: bool = False,
+) -> Callable[[], Logic]:
+    """Closure returning ``expr`` evaluated at ``width``/``signed`` and cut to ``result_width``.
+
+    Equivalent to ``simulator._eval(expr, width, signed).resize(result_width, result_signed)``;
+    values with x/z bits (and shapes the generator does not handle) take that path.
+    """
+
+    def fallback() -> Logic:
+        return simulator._eval(expr, width, signed).resize(result_width, result_signed)
+
+    signals: Dict[Any, int] = {}
+    shape = _shape(expr, signals)
+    factory = _expression_factory(shape, width, signed, result_width, result_signed)
+    if factory is None:
+        return fallback
+    used = _used_slots(shape)
+    ordered = sorted(signals.items(), key=lambda item: item[1])
+    return factory(*[signal for signal, slot in ordered if slot in used], fallback)
+
+
+def _used_slots(shape: Any) -> set:
+    found = set()
+    stack = [shape]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple):
+            if node and node[0] == "$sig":
+                found.add(node[1])
+            else:
+                stack.extend(node)
+    return found
+
+
+# -- statements ----------------------------------------------------------------------------
+
+
+class _StatementWriter:
+    """Flattens a bound combinational statement into Python source.
+
+    Expressions become calls to closures from :func:`compile_expr`; assignment
+    targets and system tasks are passed in as constants.
+    """
+
+    def __init__(self, simulator: Any) -> None:
+        self.simulator = simulator
+        self.closures: List[Callable[[], Logic]] = []
+        self.targets: List[Any] = []
+        self.tasks: List[Any] = []
+        self.temporaries = 0
+
+    def _expr(self, expr: Any, width: int, signed: bool, result_width: int, result_signed: bool = False) -> str:
+        self.closures.append(compile_expr(self.simulator, expr, width, signed, result_width, result_signed))
+        return f"e{len(self.closures) - 1}()"
+
+    def _target(self, lhs: Any) -> str:
+        self.targets.append(lhs)
+        return f"t{len(self.targets) - 1}"
+
+    def _condition(self, expr: Any) -> str:
+        return f"{self._expr(expr, expr.width, expr.signed, expr.width)}.truth()"
+
+    def statement(self, stmt: Any, indent: str) -> List[str]:
+        if stmt is None:
+            return [f"{indent}pass"]
+        op = stmt[0]
+        if op == "block":
+            lines = [line for item in stmt[1] for line in self.statement(item, indent)]
+            return lines or [f"{indent}pass"]
+        if op == "assign":
+            _, lhs, rhs, blocking, delay, width, _ = stmt
+            if delay is not None:
+                raise _NotCompilable()
+            value = self._expr(rhs, max(width, rhs.width), rhs.signed, width)
+            helper = "_assign" if blocking else "_nba"
+            return [f"{indent}{helper}({self._target(lhs)}, {value})"]
+        if op == "if":
+            lines = [f"{indent}if {self._condition(stmt[1])}:"]
+            lines += self.statement(stmt[2], indent + "    ")
+            if stmt[3] is not None:
+                lines.append(f"{indent}else:")
+                lines += self.statement(stmt[3], indent + "    ")
+            return lines
+        if op == "case":
+            _, kind, subject, items, default, width, signed = stmt
+            self.temporaries += 1
+            value = f"c{self.temporaries}"
+            lines = [f"{indent}{value} = {self._expr(subject, width, signed, width)}"]
+            keyword = "if"
+            for labels, body in items:
+                tests = " or ".join(
+                    f"_match({kind!r}, {value}, {self._expr(label, width, signed, width)})" for label in labels
+                )
+                lines.append(f"{indent}{keyword} {tests}:")
+                lines += self.statement(body, indent + "    ")
+                keyword = "elif"
+            if default is not None:
+                if keyword == "if":
+                    return lines + self.statement(default, indent)
+                lines.append(f"{indent}else:")
+                lines += self.statement(default, indent + "    ")
+            return lines
+        if op == "for":
+            _, init, cond, step, body = stmt
+            lines = self.statement(init, indent)
+            lines.append(f"{indent}while {self._condition(cond)}:")
+            lines.append(f"{indent}    _tick()")
+            lines += self.statement(body, indent + "    ")
+            lines += self.statement(step, indent + "    ")
+            return lines
+        if op == "while":
+            lines = [f"{indent}while {self._condition(stmt[1])}:", f"{indent}    _tick()"]
+            return lines + self.statement(stmt[2], indent + "    ")
+        if op == "repeat":
+            count = stmt[1]
+            lines = [
+                f"{indent}for _ in range(_count({self._expr(count, count.width, count.signed, count.width, count.signed)})):",
+                f"{indent}    _tick()",
+            ]
+            return lines + self.statement(stmt[2], indent + "    ")
+        if op == "task":
+            self.tasks.append(stmt)
+            return [
+                f"{indent}_task(k{len(self.tasks) - 1})",
+                f"{indent}if _simulator.finished:",
+                f"{indent}    return",
+            ]
+        raise _NotCompilable()
+
+
+def _repeat_count(value: Logic) -> int:
+    return 0 if value.bval else max(value.to_int(), 0)
+
+
+def compile_block(simulator: Any, stmt: Any) -> Optional[Callable[[], None]]:
+    """Compile a timing-free statement (the body of ``always @*``) into a function.
+
+    Returns None when the body contains something only the interpreter can run.
+    """
+
+    writer = _StatementWriter(simulator)
+    try:
+        body = writer.statement(stmt, "        ")
+    except _NotCompilable:
+        return None
+
+    names = (
+        [f"e{index}" for index in range(len(writer.closures))]
+        + [f"t{index}" for index in range(len(writer.targets))]
+        + [f"k{index}" for index in range(len(writer.tasks))]
+    )
+    factory = _block_factory(tuple(names), tuple(body))
+
+    def assign(lhs: Any, value: Logic) -> None:
+        simulator._write_targets(simulator._resolve_lhs(lhs), value)
+
+    def nonblocking(lhs: Any, value: Logic) -> None:
+        simulator._nba.append((simulator._resolve_lhs(lhs), value))
+
+    return factory(
+        *writer.closures,
+        *writer.targets,
+        *writer.tasks,
+        _assign=assign,
+        _nba=nonblocking,
+        _match=simulator._case_matches,
+        _task=simulator._system_task,
+        _tick=simulator._tick,
+        _count=_repeat_count,
+        _simulator=simulator,
+    )
+
+
+@lru_cache(maxsize=CODEGEN_CACHE_SIZE)
+def _block_factory(names: Tuple[str, ...], body: Tuple[str, ...]) -> Callable[..., Callable[[], None]]:
+    runtime = ("_assign", "_nba", "_match", "_task", "_tick", "_count", "_simulator")
+    parameters = ", ".join(list(names) + ["*"] + list(runtime)) if names else "*, " + ", ".join(runtime)
+    source = "\n".join([f"def _factory({parameters}):", "    def run():", *body, "    return run"])
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<verilog-block>", "exec"), namespace)  # noqa: S102
+    return namespace["_factory"]
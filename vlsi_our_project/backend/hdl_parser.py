@@ -0,0 +1,917 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from logic4 import Logic, parse_number
+
+
+class VerilogSyntaxError(Exception):
+    """The source is not valid Verilog (or uses syntax the parser does not know)."""
+
+
+class UnsupportedConstruct(Exception):
+    """Valid Verilog that the native simulator does not implement."""
+
+
+# ---------------------------------------------------------------------------
+# Syntax tree
+# ---------------------------------------------------------------------------
+
+
+class Num(NamedTuple):
+    value: Logic
+    sized: bool
+
+
+class Str(NamedTuple):
+    text: str
+
+
+class Name(NamedTuple):
+    ident: str
+    line: int
+
+
+class Index(NamedTuple):
+    target: Any
+    index: Any
+
+
+class Range(NamedTuple):
+    target: Any
+    msb: Any
+    lsb: Any
+
+
+class IndexedRange(NamedTuple):
+    target: Any
+    base: Any
+    width: Any
+    ascending: bool
+
+
+class Concat(NamedTuple):
+    items: Tuple[Any, ...]
+
+
+class Replicate(NamedTuple):
+    count: Any
+    items: Tuple[Any, ...]
+
+
+class Unary(NamedTuple):
+    op: str
+    operand: Any
+
+
+class Binary(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+class Cond(NamedTuple):
+    cond: Any
+    then: Any
+    other: Any
+
+
+class SysFunc(NamedTuple):
+    name: str
+    args: Tuple[Any, ...]
+    line: int
+
+
+class Block(NamedTuple):
+    name: Optional[str]
+    stmts: Tuple[Any, ...]
+
+
+class Assign(NamedTuple):
+    lhs: Any
+    rhs: Any
+    blocking: bool
+    delay: Any
+    line: int
+
+
+class If(NamedTuple):
+    cond: Any
+    then: Any
+    other: Any
+
+
+class CaseItem(NamedTuple):
+    labels: Tuple[Any, ...]  # empty for ``default``
+    body: Any
+
+
+class Case(NamedTuple):
+    kind: str
+    subject: Any
+    items: Tuple[CaseItem, ...]
+
+
+class For(NamedTuple):
+    init: Assign
+    cond: Any
+    step: Assign
+    body: Any
+
+
+class While(NamedTuple):
+    cond: Any
+    body: Any
+
+
+class RepeatLoop(NamedTuple):
+    count: Any
+    body: Any
+
+
+class Forever(NamedTuple):
+    body: Any
+
+
+class DelayStmt(NamedTuple):
+    amount: Any
+    body: Any
+
+
+class EventStmt(NamedTuple):
+    events: Optional[Tuple[Tuple[str, Any], ...]]  # None for @*
+    body: Any
+
+
+class WaitStmt(NamedTuple):
+    cond: Any
+    body: Any
+
+
+class SysTask(NamedTuple):
+    name: str
+    args: Tuple[Any, ...]
+    line: int
+
+
+class Decl(NamedTuple):
+    name: str
+    kind: Optional[str]  # wire, reg, integer, time, supply0, supply1; None for a bare port
+    direction: Optional[str]
+    msb: Any
+    lsb: Any
+    signed: bool
+    init: Any
+    line: int
+
+
+class Param(NamedTuple):
+    name: str
+    value: Any
+    local: bool
+    msb: Any
+    lsb: Any
+    signed: bool
+
+
+class ContAssign(NamedTuple):
+    lhs: Any
+    rhs: Any
+    delay: Any
+    line: int
+
+
+class Process(NamedTuple):
+    kind: str  # initial / always
+    body: Any
+    line: int
+
+
+class Instance(NamedTuple):
+    module: str
+    name: str
+    params: Tuple[Tuple[Optional[str], Any], ...]
+    ports: Tuple[Tuple[Optional[str], Any], ...]
+    line: int
+
+
+class Gate(NamedTuple):
+    kind: str
+    name: Optional[str]
+    delay: Any
+    terminals: Tuple[Any, ...]
+    line: int
+
+
+class Module(NamedTuple):
+    name: str
+    ports: Tuple[str, ...]
+    items: Tuple[Any, ...]
+    timescale: Optional[Tuple[int, int]]  # (unit, precision) as powers of ten of a second
+    line: int
+
+
+# ---------------------------------------------------------------------------
+# Lexer
+# ---------------------------------------------------------------------------
+
+
+class Token(NamedTuple):
+    kind: str  # id, sys, num, str, op, directive, eof
+    text: str
+    line: int
+
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<newline>\n)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<attribute>\(\*(?!\s*\)).*?\*\))
+  | (?P<str>"(?:[^"\\\n]|\\.)*")
+  | (?P<directive>`[A-Za-z_]\w*[^\n]*)
+  | (?P<real>\d[\d_]*\.\d[\d_]*(?:[eE][+-]?\d+)?|\d[\d_]*[eE][+-]?\d+)
+  | (?P<num>(?:\d[\d_]*\s*)?'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ?_]+|\d[\d_]*)
+  | (?P<sys>\$[A-Za-z_]\w*)
+  | (?P<id>[A-Za-z_]\w*)
+  | (?P<op><<<|>>>|===|!==|~&|~\||~\^|\^~|==|!=|<=|>=|&&|\|\||<<|>>|\*\*|\+:|-:|->|[-+*/%<>!~&|^=?:;,.()\[\]{}#@])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"', "a": "\a", "v": "\v", "f": "\f"}
+
+_TIME_UNITS = {"s": 0, "ms": -3, "us": -6, "ns": -9, "ps": -12, "fs": -15}
+_TIMESCALE_RE = re.compile(r"`timescale\s+(1|10|100)\s*([munpf]?s)\s*/\s*(1|10|100)\s*([munpf]?s)")
+_IGNORED_DIRECTIVES = {"`default_nettype", "`resetall", "`celldefine", "`endcelldefine"}
+
+
+def _variable_range(kind: str) -> Tuple[Num, Num]:
+    return Num(Logic.of(_VARIABLE_TYPES[kind] - 1), False), Num(Logic.of(0), False)
+
+
+def _unescape(body: str) -> str:
+    def replace(match: "re.Match[str]") -> str:
+        code = match.group(1)
+        if code[0] in "01234567":
+            return chr(int(code, 8) & 0xFF)
+        return _ESCAPES.get(code, code)
+
+    return re.sub(r"\\([0-7]{1,3}|.)", replace, body)
+
+
+def _timescale_exponent(magnitude: str, unit: str) -> int:
+    return _TIME_UNITS[unit] + len(magnitude) - 1
+
+
+def tokenize(source: str) -> List[Token]:
+    tokens: List[Token] = []
+    line = 1
+    position = 0
+    length = len(source)
+    while position < length:
+        match = _TOKEN_RE.match(source, position)
+        if match is None:
+            raise VerilogSyntaxError(f"line {line}: unexpected character {source[position]!r}")
+        kind = match.lastgroup
+        text = match.group()
+        position = match.end()
+
+        if kind == "newline":
+            line += 1
+        elif kind in ("space", "line_comment", "attribute"):
+            pass
+        elif kind == "block_comment":
+            line += text.count("\n")
+        elif kind == "str":
+            tokens.append(Token("str", _unescape(text[1:-1]), line))
+        elif kind == "real":
+            raise UnsupportedConstruct(f"line {line}: real number literals are not supported")
+        else:
+            tokens.append(Token(kind or "op", text, line))
+
+    tokens.append(Token("eof", "", line))
+    return tokens
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+_DIRECTIONS = {"input", "output", "inout"}
+_NET_TYPES = {"wire", "reg", "tri", "logic", "supply0", "supply1", "wand", "wor"}
+_VARIABLE_TYPES = {"integer": 32, "time": 64}
+GATE_TYPES = {"and", "nand", "or", "nor", "xor", "xnor", "not", "buf"}
+_UNSUPPORTED_ITEMS = {
+    "function", "task", "generate", "genvar", "specify", "defparam", "event",
+    "real", "realtime", "primitive", "fork", "bufif0", "bufif1", "notif0", "notif1",
+    "pullup", "pulldown", "tran", "rtran", "nmos", "pmos", "cmos",
+}
+_UNSUPPORTED_STATEMENTS = {"fork", "disable", "force", "release", "assign", "deassign", "->"}
+
+_BINARY_PRECEDENCE: Dict[str, int] = {
+    "||": 1,
+    "&&": 2,
+    "|": 3,
+    "^": 4, "~^": 4, "^~": 4,
+    "&": 5,
+    "==": 6, "!=": 6, "===": 6, "!==": 6,
+    "<": 7, "<=": 7, ">": 7, ">=": 7,
+    "<<": 8, ">>": 8, "<<<": 8, ">>>": 8,
+    "+": 9, "-": 9,
+    "*": 10, "/": 10, "%": 10,
+    "**": 11,
+}
+_UNARY_OPS = {"+", "-", "!", "~", "&", "|", "^", "~&", "~|", "~^", "^~"}
+
+
+class Parser:
+    """Recursive-descent parser for the synthesisable/testbench subset of Verilog-2001."""
+
+    def __init__(self, source: str) -> None:
+        self.tokens = tokenize(source)
+        self.position = 0
+        self.timescale: Optional[Tuple[int, int]] = None
+
+    # -- token helpers -----------------------------------------------------
+
+    @property
+    def token(self) -> Token:
+        return self.tokens[self.position]
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.position + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def at(self, *texts: str) -> bool:
+        token = self.token
+        return token.kind in ("op", "id") and token.text in texts
+
+    def accept(self, text: str) -> bool:
+        if self.at(text):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, text: str) -> Token:
+        if not self.at(text):
+            self.error(f"expected '{text}'")
+        return self.advance()
+
+    def expect_ident(self) -> Token:
+        if self.token.kind != "id":
+            self.error("expected identifier")
+        return self.advance()
+
+    def error(self, message: str) -> None:
+        token = self.token
+        found = token.text or "end of input"
+        raise VerilogSyntaxError(f"line {token.line}: {message}, found '{found}'")
+
+    def unsupported(self, what: str) -> None:
+        raise UnsupportedConstruct(f"line {self.token.line}: {what} is not supported")
+
+    # -- compilation unit --------------------------------------------------
+
+    def parse(self) -> List[Module]:
+        modules: List[Module] = []
+        while self.token.kind != "eof":
+            if self.token.kind == "directive":
+                self.directive()
+            elif self.at("module", "macromodule"):
+                modules.append(self.module())
+            else:
+                self.error("expected 'module'")
+        return modules
+
+    def directive(self) -> None:
+        token = self.advance()
+        name = token.text.split()[0]
+        if name == "`timescale":
+            match = _TIMESCALE_RE.match(token.text)
+            if not match:
+                raise VerilogSyntaxError(f"line {token.line}: malformed `timescale")
+            self.timescale = (
+                _timescale_exponent(match.group(1), match.group(2)),
+                _timescale_exponent(match.group(3), match.group(4)),
+            )
+        elif name not in _IGNORED_DIRECTIVES:
+            raise UnsupportedConstruct(f"line {token.line}: compiler directive {name} is not supported")
+
+    def module(self) -> Module:
+        start = self.advance()
+        name = self.expect_ident().text
+        items: List[Any] = []
+        ports: List[str] = []
+
+        if self.accept("#"):
+            self.expect("(")
+            while not self.at(")"):
+                self.accept("parameter")
+                items.extend(self.param_assignments(local=False, terminators=(",", ")")))
+                if not self.accept(","):
+                    break
+            self.expect(")")
+
+        if self.accept("("):
+            if self.at(*_DIRECTIONS):
+                items.extend(self.ansi_ports(ports))
+            else:
+                while not self.at(")"):
+                    ports.append(self.expect_ident().text)
+                    if not self.accept(","):
+                        break
+            self.expect(")")
+        self.expect(";")
+
+        while not self.at("endmodule"):
+            if self.token.kind == "eof":
+                self.error("missing 'endmodule'")
+            if self.token.kind == "directive":
+                self.directive()
+                continue
+            items.extend(self.module_item())
+        self.advance()
+        return Module(name, tuple(ports), tuple(items), self.timescale, start.line)
+
+    def ansi_ports(self, ports: List[str]) -> List[Decl]:
+        decls: List[Decl] = []
+        direction, kind, signed, msb, lsb = "input", None, False, None, None
+        while not self.at(")"):
+            if self.at(*_DIRECTIONS):
+                direction = self.advance().text
+                kind, signed, msb, lsb = None, False, None, None
+                if self.at(*_NET_TYPES) or self.at(*_VARIABLE_TYPES):
+                    kind = self.net_kind()
+                if self.accept("signed"):
+                    signed = True
+                if self.at("["):
+                    msb, lsb = self.range()
+                if kind in _VARIABLE_TYPES:
+                    msb, lsb = _variable_range(kind)
+                    signed = kind == "integer"
+            token = self.expect_ident()
+            ports.append(token.text)
+            decls.append(Decl(token.text, kind, direction, msb, lsb, signed, None, token.line))
+            if not self.accept(","):
+                break
+        return decls
+
+    def net_kind(self) -> str:
+        kind = self.advance().text
+        return "reg" if kind == "logic" else "wire" if kind in ("tri", "wand", "wor") else kind
+
+    def range(self) -> Tuple[Any, Any]:
+        self.expect("[")
+        msb = self.expression()
+        self.expect(":")
+        lsb = self.expression()
+        self.expect("]")
+        return msb, lsb
+
+    def module_item(self) -> List[Any]:
+        token = self.token
+        text = token.text
+        if token.kind != "id":
+            if self.accept(";"):
+                return []
+            self.error("expected module item")
+
+        if text in _DIRECTIONS or text in _NET_TYPES or text in _VARIABLE_TYPES:
+            return self.declaration()
+        if text in ("parameter", "localparam"):
+            self.advance()
+            items = self.param_assignments(local=text == "localparam", terminators=(";",))
+            self.expect(";")
+            return items
+        if text == "assign":
+            return self.continuous_assign()
+        if text in ("always", "initial"):
+            self.advance()
+            return [Process(text, self.statement(), token.line)]
+        if text in GATE_TYPES:
+            return self.gates()
+        if text in _UNSUPPORTED_ITEMS:
+            self.unsupported(f"'{text}'")
+        if self.peek().kind == "id" or self.peek().text == "#":
+            return self.instances()
+        self.error("expected module item")
+        return []
+
+    def declaration(self) -> List[Decl]:
+        direction: Optional[str] = None
+        kind: Optional[str] = None
+        signed = False
+        msb = lsb = None
+
+        if self.at(*_DIRECTIONS):
+            direction = self.advance().text
+        if self.at(*_NET_TYPES) or self.at(*_VARIABLE_TYPES):
+            kind = self.net_kind()
+        if self.accept("signed"):
+            signed = True
+        if kind in _VARIABLE_TYPES:
+            msb, lsb = _variable_range(kind)
+            signed = kind == "integer"
+        elif self.at("["):
+            msb, lsb = self.range()
+
+        decls: List[Decl] = []
+        while True:
+            token = self.expect_ident()
+            if self.at("["):
+                self.unsupported("memory arrays")
+            init = self.expression() if self.accept("=") else None
+            decls.append(Decl(token.text, kind, direction, msb, lsb, signed, init, token.line))
+            if not self.accept(","):
+                break
+        self.expect(";")
+        return decls
+
+    def param_assignments(self, local: bool, terminators: Tuple[str, ...]) -> List[Param]:
+        signed = False
+        msb = lsb = None
+        if self.at("integer"):
+            self.advance()
+            signed = True
+        if self.accept("signed"):
+            signed = True
+        if self.at("["):
+            msb, lsb = self.range()
+
+        params: List[Param] = []
+        while True:
+            name = self.expect_ident().text
+            self.expect("=")
+            params.append(Param(name, self.expression(), local, msb, lsb, signed))
+            if not (self.at(",") and self.peek().kind == "id" and self.peek(2).text == "="):
+                break
+            self.advance()
+        if not self.at(*terminators):
+            self.error("expected parameter terminator")
+        return params
+
+    def continuous_assign(self) -> List[ContAssign]:
+        token = self.advance()
+        delay = self.delay_value() if self.accept("#") else None
+        assigns: List[ContAssign] = []
+        while True:
+            lhs = self.lvalue()
+            self.expect("=")
+            assigns.append(ContAssign(lhs, self.expression(), delay, token.line))
+            if not self.accept(","):
+                break
+        self.expect(";")
+        return assigns
+
+    def gates(self) -> List[Gate]:
+        token = self.advance()
+        delay = self.delay_value() if self.accept("#") else None
+        gates: List[Gate] = []
+        while True:
+            name = self.advance().text if self.token.kind == "id" else None
+            if self.at("["):
+                self.unsupported("gate instance arrays")
+            self.expect("(")
+            terminals = [self.expression()]
+            while self.accept(","):
+                terminals.append(self.expression())
+            self.expect(")")
+            if len(terminals) < 2:
+                raise VerilogSyntaxError(f"line {token.line}: gate needs an output and an input")
+            gates.append(Gate(token.text, name, delay, tuple(terminals), token.line))
+            if not self.accept(","):
+                break
+        self.expect(";")
+        return gates
+
+    def instances(self) -> List[Instance]:
+        module_token = self.advance()
+        params: List[Tuple[Optional[str], Any]] = []
+        if self.accept("#"):
+            self.expect("(")
+            params = self.connections()
+            self.expect(")")
+
+        instances: List[Instance] = []
+        while True:
+            name = self.expect_ident().text
+            if self.at("["):
+                self.unsupported("instance arrays")
+            self.expect("(")
+            ports = self.connections()
+            self.expect(")")
+            instances.append(Instance(module_token.text, name, tuple(params), tuple(ports), module_token.line))
+            if not self.accept(","):
+                break
+        self.expect(";")
+        return instances
+
+    def connections(self) -> List[Tuple[Optional[str], Any]]:
+        connections: List[Tuple[Optional[str], Any]] = []
+        while not self.at(")"):
+            if self.accept("."):
+                name = self.expect_ident().text
+                self.expect("(")
+                expr = None if self.at(")") else self.expression()
+                self.expect(")")
+                connections.append((name, expr))
+            elif self.at(","):
+                connections.append((None, None))
+            else:
+                connections.append((None, self.expression()))
+            if not self.accept(","):
+                break
+        return connections
+
+    # -- statements --------------------------------------------------------
+
+    def statement(self) -> Any:
+        token = self.token
+        text = token.text
+
+        if token.kind == "op":
+            if self.accept(";"):
+                return None
+            if self.accept("#"):
+                amount = self.delay_value()
+                return DelayStmt(amount, self.statement())
+            if self.accept("@"):
+                events = self.event_control()
+                return EventStmt(events, self.statement())
+            if self.at("{"):
+                return self.assignment()
+            if text == "->":
+                self.unsupported("named events")
+            self.error("expected statement")
+
+        if token.kind == "sys":
+            return self.system_task()
+
+        if token.kind != "id":
+            self.error("expected statement")
+
+        if text == "begin":
+            return self.block()
+        if text == "if":
+            self.advance()
+            self.expect("(")
+            cond = self.expression()
+            self.expect(")")
+            then = self.statement()
+            other = self.statement() if self.accept("else") else None
+            return If(cond, then, other)
+        if text in ("case", "casex", "casez"):
+            return self.case_statement()
+        if text == "for":
+            self.advance()
+            self.expect("(")
+            init = self.assignment(terminated=False)
+            self.expect(";")
+            cond = self.expression()
+            self.expect(";")
+            step = self.assignment(terminated=False)
+            self.expect(")")
+            return For(init, cond, step, self.statement())
+        if text in ("while", "repeat"):
+            self.advance()
+            self.expect("(")
+            cond = self.expression()
+            self.expect(")")
+            body = self.statement()
+            return While(cond, body) if text == "while" else RepeatLoop(cond, body)
+        if text == "forever":
+            self.advance()
+            return Forever(self.statement())
+        if text == "wait":
+            self.advance()
+            self.expect("(")
+            cond = self.expression()
+            self.expect(")")
+            return WaitStmt(cond, self.statement())
+        if text in _UNSUPPORTED_STATEMENTS:
+            self.unsupported(f"'{text}' statements")
+        if self.peek().text == "(" and self.peek().kind == "op":
+            self.unsupported("task calls")
+        return self.assignment()
+
+    def block(self) -> Block:
+        self.expect("begin")
+        name = self.expect_ident().text if self.accept(":") else None
+        stmts: List[Any] = []
+        while not self.at("end"):
+            if self.token.kind == "eof":
+                self.error("missing 'end'")
+            if self.at("integer", "reg") and name is not None:
+                self.unsupported("block-local declarations")
+            stmt = self.statement()
+            if stmt is not None:
+                stmts.append(stmt)
+        self.advance()
+        return Block(name, tuple(stmts))
+
+    def case_statement(self) -> Case:
+        kind = self.advance().text
+        self.expect("(")
+        subject = self.expression()
+        self.expect(")")
+        items: List[CaseItem] = []
+        while not self.at("endcase"):
+            if self.token.kind == "eof":
+                self.error("missing 'endcase'")
+            if self.accept("default"):
+                self.accept(":")
+                items.append(CaseItem((), self.statement()))
+                continue
+            labels = [self.expression()]
+            while self.accept(","):
+                labels.append(self.expression())
+            self.expect(":")
+            items.append(CaseItem(tuple(labels), self.statement()))
+        self.advance()
+        return Case(kind, subject, tuple(items))
+
+    def assignment(self, terminated: bool = True) -> Assign:
+        line = self.token.line
+        lhs = self.lvalue()
+        if self.accept("="):
+            blocking = True
+        elif self.accept("<="):
+            blocking = False
+        else:
+            self.error("expected '=' or '<='")
+        delay = None
+        if self.accept("#"):
+            delay = self.delay_value()
+        elif self.at("@"):
+            self.unsupported("intra-assignment event controls")
+        rhs = self.expression()
+        if terminated:
+            self.expect(";")
+        return Assign(lhs, rhs, blocking, delay, line)
+
+    def system_task(self) -> SysTask:
+        token = self.advance()
+        args: List[Any] = []
+        if self.accept("("):
+            while not self.at(")"):
+                args.append(None if self.at(",") else self.expression())
+                if not self.accept(","):
+                    break
+            self.expect(")")
+        self.expect(";")
+        return SysTask(token.text, tuple(args), token.line)
+
+    def delay_value(self) -> Any:
+        if self.accept("("):
+            value = self.expression()
+            self.expect(")")
+            return value
+        token = self.token
+        if token.kind == "num":
+            self.advance()
+            return Num(parse_number(token.text), "'" in token.text)
+        if token.kind == "id":
+            self.advance()
+            return Name(token.text, token.line)
+        self.error("expected delay value")
+        return None
+
+    def event_control(self) -> Optional[Tuple[Tuple[str, Any], ...]]:
+        if self.accept("*"):
+            return None
+        if self.token.kind == "id":
+            token = self.advance()
+            return (("any", Name(token.text, token.line)),)
+        self.expect("(")
+        if self.accept("*"):
+            self.expect(")")
+            return None
+        events: List[Tuple[str, Any]] = []
+        while True:
+            edge = "any"
+            if self.at("posedge", "negedge"):
+                edge = self.advance().text
+            events.append((edge, self.expression()))
+            if not (self.accept("or") or self.accept(",")):
+                break
+        self.expect(")")
+        return tuple(events)
+
+    # -- expressions -------------------------------------------------------
+
+    def lvalue(self) -> Any:
+        if self.at("{"):
+            self.advance()
+            items = [self.lvalue()]
+            while self.accept(","):
+                items.append(self.lvalue())
+            self.expect("}")
+            return Concat(tuple(items))
+        token = self.expect_ident()
+        if self.at("."):
+            self.unsupported("hierarchical references")
+        return self.selects(Name(token.text, token.line))
+
+    def selects(self, target: Any) -> Any:
+        if not self.accept("["):
+            return target
+        first = self.expression()
+        if self.accept(":"):
+            result: Any = Range(target, first, self.expression())
+        elif self.at("+:", "-:"):
+            ascending = self.advance().text == "+:"
+            result = IndexedRange(target, first, self.expression(), ascending)
+        else:
+            result = Index(target, first)
+        self.expect("]")
+        if self.at("["):
+            self.unsupported("multi-dimensional selects")
+        return result
+
+    def expression(self) -> Any:
+        cond = self.binary(1)
+        if self.accept("?"):
+            then = self.expression()
+            self.expect(":")
+            return Cond(cond, then, self.expression())
+        return cond
+
+    def binary(self, min_precedence: int) -> Any:
+        left = self.unary()
+        while True:
+            token = self.token
+            precedence = _BINARY_PRECEDENCE.get(token.text) if token.kind == "op" else None
+            if precedence is None or precedence < min_precedence:
+                return left
+            self.advance()
+            # ``**`` is left-associative in Verilog-2001 like every other binary operator.
+            right = self.binary(precedence + 1)
+            left = Binary(token.text, left, right)
+
+    def unary(self) -> Any:
+        token = self.token
+        if token.kind == "op" and token.text in _UNARY_OPS:
+            self.advance()
+            return Unary(token.text, self.unary())
+        return self.primary()
+
+    def primary(self) -> Any:
+        token = self.token
+        if token.kind == "num":
+            self.advance()
+            try:
+                return Num(parse_number(token.text), "'" in token.text)
+            except ValueError as exc:
+                raise VerilogSyntaxError(f"line {token.line}: {exc}") from exc
+        if token.kind == "str":
+            self.advance()
+            return Str(token.text)
+        if token.kind == "sys":
+            self.advance()
+            args: List[Any] = []
+            if self.accept("("):
+                while not self.at(")"):
+                    args.append(self.expression())
+                    if not self.accept(","):
+                        break
+                self.expect(")")
+            return SysFunc(token.text, tuple(args), token.line)
+        if token.kind == "id":
+            self.advance()
+            if self.at("("):
+                self.unsupported("function calls")
+            if self.at("."):
+                self.unsupported("hierarchical references")
+            return self.selects(Name(token.text, token.line))
+        if self.accept("("):
+            inner = self.expression()
+            self.expect(")")
+            return inner
+        if self.accept("{"):
+            first = self.expression()
+            if self.at("{"):
+                self.advance()
+                items = [self.expression()]
+                while self.accept(","):
+                    items.append(self.expression())
+                self.expect("}")
+                self.expect("}")
+                return Replicate(first, tuple(items))
+            items = [first]
+            while self.accept(","):
+                items.append(self.expression())
+            self.expect("}")
+            return Concat(tuple(items))
+        self.error("expected expression")
+        return None
+
+
+def parse_source(source: str) -> List[Module]:
+    """Parse a compilation unit. Raises VerilogSyntaxError or UnsupportedConstruct."""
+
+    return Parser(source).parse()
@@ -0,0 +1,417 @@
+from typing import Iterable, Optional
+
+
+# Four-state bits use the same two planes as waveform_store (VPI aval/bval):
+#   0 -> (0, 0)   1 -> (1, 0)   z -> (0, 1)   x -> (1, 1)
+_BIT_CHARS = "01zx"
+
+
+class Logic:
+    """Immutable four-state bit vector used by the native simulator."""
+
+    __slots__ = ("width", "aval", "bval", "signed")
+
+    def __init__(self, width: int, aval: int = 0, bval: int = 0, signed: bool = False) -> None:
+        mask = (1 << width) - 1
+        self.width = width
+        self.aval = aval & mask
+        self.bval = bval & mask
+        self.signed = signed
+
+    @classmethod
+    def of(cls, value: int, width: int = 32, signed: bool = False) -> "Logic":
+        return cls(width, value, 0, signed)
+
+    @classmethod
+    def unknown(cls, width: int, signed: bool = False) -> "Logic":
+        mask = (1 << width) - 1
+        return cls(width, mask, mask, signed)
+
+    @classmethod
+    def high_z(cls, width: int) -> "Logic":
+        return cls(width, 0, (1 << width) - 1)
+
+    @property
+    def mask(self) -> int:
+        return (1 << self.width) - 1
+
+    def is_known(self) -> bool:
+        return not self.bval
+
+    def to_int(self) -> int:
+        """Integer value of the ``aval`` plane, two's complement when signed."""
+
+        if self.signed and self.width and (self.aval >> (self.width - 1)) & 1:
+            return self.aval - (1 << self.width)
+        return self.aval
+
+    def truth(self) -> Optional[bool]:
+        """Truth value for conditions: True/False, or None when unknown."""
+
+        if self.aval & ~self.bval:
+            return True
+        if not self.bval:
+            return False
+        return None
+
+    def resize(self, width: int, signed: bool = False) -> "Logic":
+        """Truncate or extend to ``width``; sign-extends only when both the value
+        and the requested context are signed."""
+
+        if width == self.width:
+            return self if signed == self.signed else Logic(width, self.aval, self.bval, signed)
+        if width < self.width:
+            return Logic(width, self.aval, self.bval, signed)
+
+        aval, bval = self.aval, self.bval
+        if signed and self.signed and self.width:
+            top = self.width - 1
+            extension = ((1 << width) - 1) ^ ((1 << self.width) - 1)
+            if (aval >> top) & 1:
+                aval |= extension
+            if (bval >> top) & 1:
+                bval |= extension
+        return Logic(width, aval, bval, signed)
+
+    def bits(self) -> str:
+        """MSB-first ``01xz`` string, the format the waveform API uses."""
+
+        aval, bval = self.aval, self.bval
+        return "".join(
+            _BIT_CHARS[((aval >> bit) & 1) + 2 * ((bval >> bit) & 1)]
+            for bit in range(self.width - 1, -1, -1)
+        )
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Logic)
+            and self.width == other.width
+            and self.aval == other.aval
+            and self.bval == other.bval
+            and self.signed == other.signed
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.width, self.aval, self.bval, self.signed))
+
+    def __repr__(self) -> str:
+        return f"Logic({self.width}'{'s' if self.signed else ''}b{self.bits()})"
+
+
+ONE = Logic(1, 1)
+ZERO = Logic(1, 0)
+X1 = Logic.unknown(1)
+
+
+def from_truth(value: Optional[bool]) -> Logic:
+    if value is None:
+        return X1
+    return ONE if value else ZERO
+
+
+def parse_number(text: str) -> Logic:
+    """Parse a Verilog integer literal (``12``, ``4'b10x1``, ``'hF``, ``8'sd3``).
+
+    Unsized literals are 32 bits wide. Raises ValueError for malformed literals.
+    """
+
+    text = text.replace("_", "").replace(" ", "").replace("\t", "")
+    if "'" not in text:
+        return Logic(32, int(text, 10), 0, signed=True)
+
+    size_text, _, rest = text.partition("'")
+    width = int(size_text) if size_text else 32
+    if width <= 0:
+        raise ValueError(f"invalid literal size in {text!r}")
+    signed = rest[:1] in ("s", "S")
+    if signed:
+        rest = rest[1:]
+    base, digits = rest[:1].lower(), rest[1:].lower()
+    if not digits:
+        raise ValueError(f"missing digits in {text!r}")
+
+    if base == "d":
+        if digits in ("x", "z", "?"):
+            value = Logic.unknown(width) if digits == "x" else Logic.high_z(width)
+            return Logic(width, value.aval, value.bval, signed)
+        return Logic(width, int(digits, 10), 0, signed)
+
+    bits_per_digit = {"b": 1, "o": 3, "h": 4}.get(base)
+    if bits_per_digit is None:
+        raise ValueError(f"invalid base in {text!r}")
+
+    digit_mask = (1 << bits_per_digit) - 1
+    aval = bval = 0
+    for char in digits:
+        aval <<= bits_per_digit
+        bval <<= bits_per_digit
+        if char == "x":
+            aval |= digit_mask
+            bval |= digit_mask
+        elif char in ("z", "?"):
+            bval |= digit_mask
+        else:
+            digit = int(char, 16)
+            if digit > digit_mask:
+                raise ValueError(f"digit {char!r} out of range in {text!r}")
+            aval |= digit
+
+    given = len(digits) * bits_per_digit
+    if given < width and digits[0] in "xz?":
+        extension = ((1 << width) - 1) ^ ((1 << given) - 1)
+        bval |= extension
+        if digits[0] == "x":
+            aval |= extension
+    return Logic(width, aval, bval, signed)
+
+
+# ---------------------------------------------------------------------------
+# Operators. Binary operands are expected to be the same width already; the
+# evaluator applies Verilog's expression sizing before calling these.
+# ---------------------------------------------------------------------------
+
+
+def _known_planes(value: Logic):
+    mask = value.mask
+    ones = value.aval & ~value.bval
+    zeros = ~(value.aval | value.bval) & mask
+    return ones, zeros
+
+
+def bit_and(a: Logic, b: Logic) -> Logic:
+    a1, a0 = _known_planes(a)
+    b1, b0 = _known_planes(b)
+    one, zero = a1 & b1, a0 | b0
+    unknown = a.mask & ~(one | zero)
+    return Logic(a.width, one | unknown, unknown, a.signed and b.signed)
+
+
+def bit_or(a: Logic, b: Logic) -> Logic:
+    a1, a0 = _known_planes(a)
+    b1, b0 = _known_planes(b)
+    one, zero = a1 | b1, a0 & b0
+    unknown = a.mask & ~(one | zero)
+    return Logic(a.width, one | unknown, unknown, a.signed and b.signed)
+
+
+def bit_xor(a: Logic, b: Logic) -> Logic:
+    unknown = a.bval | b.bval
+    return Logic(a.width, (a.aval ^ b.aval) | unknown, unknown, a.signed and b.signed)
+
+
+def bit_xnor(a: Logic, b: Logic) -> Logic:
+    unknown = a.bval | b.bval
+    return Logic(a.width, ~(a.aval ^ b.aval) | unknown, unknown, a.signed and b.signed)
+
+
+def bit_not(a: Logic) -> Logic:
+    return Logic(a.width, ~a.aval | a.bval, a.bval, a.signed)
+
+
+def _arith(a: Logic, b: Logic, value: Optional[int]) -> Logic:
+    signed = a.signed and b.signed
+    if value is None:
+        return Logic.unknown(a.width, signed)
+    return Logic(a.width, value, 0, signed)
+
+
+def add(a: Logic, b: Logic) -> Logic:
+    return _arith(a, b, None if a.bval or b.bval else a.aval + b.aval)
+
+
+def sub(a: Logic, b: Logic) -> Logic:
+    return _arith(a, b, None if a.bval or b.bval else a.aval - b.aval)
+
+
+def mul(a: Logic, b: Logic) -> Logic:
+    return _arith(a, b, None if a.bval or b.bval else a.aval * b.aval)
+
+
+def div(a: Logic, b: Logic) -> Logic:
+    if a.bval or b.bval or not b.aval:
+        return _arith(a, b, None)
+    if a.signed and b.signed:
+        left, right = a.to_int(), b.to_int()
+        quotient = abs(left) // abs(right)
+        return _arith(a, b, -quotient if (left < 0) != (right < 0) else quotient)
+    return _arith(a, b, a.aval // b.aval)
+
+
+def mod(a: Logic, b: Logic) -> Logic:
+    if a.bval or b.bval or not b.aval:
+        return _arith(a, b, None)
+    if a.signed and b.signed:
+        left, right = a.to_int(), b.to_int()
+        remainder = abs(left) % abs(right)
+        return _arith(a, b, -remainder if left < 0 else remainder)
+    return _arith(a, b, a.aval % b.aval)
+
+
+def power(a: Logic, b: Logic) -> Logic:
+    """``a ** b``; ``b`` is self-determined so it may have any width."""
+
+    if a.bval or b.bval:
+        return Logic.unknown(a.width, a.signed)
+    base, exponent = a.to_int(), b.to_int()
+    if exponent < 0:
+        if base == 0:
+            return Logic.unknown(a.width, a.signed)
+        if base in (1, -1):
+            return Logic(a.width, 1 if base == 1 or exponent % 2 == 0 else -1, 0, a.signed)
+        return Logic(a.width, 0, 0, a.signed)
+    return Logic(a.width, pow(base, exponent, 1 << a.width), 0, a.signed)
+
+
+def negate(a: Logic) -> Logic:
+    if a.bval:
+        return Logic.unknown(a.width, a.signed)
+    return Logic(a.width, -a.aval, 0, a.signed)
+
+
+def logical_eq(a: Logic, b: Logic) -> Logic:
+    unknown = a.bval | b.bval
+    if (a.aval ^ b.aval) & ~unknown:
+        return ZERO
+    return X1 if unknown else ONE
+
+
+def logical_ne(a: Logic, b: Logic) -> Logic:
+    return logical_not(logical_eq(a, b))
+
+
+def case_eq(a: Logic, b: Logic) -> Logic:
+    return ONE if a.aval == b.aval and a.bval == b.bval else ZERO
+
+
+def case_ne(a: Logic, b: Logic) -> Logic:
+    return ZERO if a.aval == b.aval and a.bval == b.bval else ONE
+
+
+def _ordered(a: Logic, b: Logic):
+    if a.signed and b.signed:
+        return a.to_int(), b.to_int()
+    return a.aval, b.aval
+
+
+def less(a: Logic, b: Logic) -> Logic:
+    if a.bval or b.bval:
+        return X1
+    left, right = _ordered(a, b)
+    return ONE if left < right else ZERO
+
+
+def less_eq(a: Logic, b: Logic) -> Logic:
+    if a.bval or b.bval:
+        return X1
+    left, right = _ordered(a, b)
+    return ONE if left <= right else ZERO
+
+
+def greater(a: Logic, b: Logic) -> Logic:
+    return less(b, a)
+
+
+def greater_eq(a: Logic, b: Logic) -> Logic:
+    return less_eq(b, a)
+
+
+def logical_not(a: Logic) -> Logic:
+    truth = a.truth()
+    return X1 if truth is None else (ZERO if truth else ONE)
+
+
+def logical_and(a: Logic, b: Logic) -> Logic:
+    left, right = a.truth(), b.truth()
+    if left is False or right is False:
+        return ZERO
+    if left and right:
+        return ONE
+    return X1
+
+
+def logical_or(a: Logic, b: Logic) -> Logic:
+    left, right = a.truth(), b.truth()
+    if left or right:
+        return ONE
+    if left is False and right is False:
+        return ZERO
+    return X1
+
+
+def reduce_and(a: Logic) -> Logic:
+    _, zeros = _known_planes(a)
+    if zeros:
+        return ZERO
+    return X1 if a.bval else ONE
+
+
+def reduce_or(a: Logic) -> Logic:
+    ones, _ = _known_planes(a)
+    if ones:
+        return ONE
+    return X1 if a.bval else ZERO
+
+
+def reduce_xor(a: Logic) -> Logic:
+    if a.bval:
+        return X1
+    return ONE if bin(a.aval).count("1") & 1 else ZERO
+
+
+def shift_left(a: Logic, amount: Logic) -> Logic:
+    if amount.bval:
+        return Logic.unknown(a.width, a.signed)
+    count = min(amount.aval, a.width)
+    return Logic(a.width, a.aval << count, a.bval << count, a.signed)
+
+
+def shift_right(a: Logic, amount: Logic) -> Logic:
+    if amount.bval:
+        return Logic.unknown(a.width, a.signed)
+    count = amount.aval
+    return Logic(a.width, a.aval >> count, a.bval >> count, a.signed)
+
+
+def shift_right_arith(a: Logic, amount: Logic) -> Logic:
+    if not a.signed:
+        return shift_right(a, amount)
+    if amount.bval:
+        return Logic.unknown(a.width, True)
+    count = min(amount.aval, a.width)
+    top = a.width - 1
+    fill = a.mask ^ (a.mask >> count)
+    aval = (a.aval >> count) | (fill if (a.aval >> top) & 1 else 0)
+    bval = (a.bval >> count) | (fill if (a.bval >> top) & 1 else 0)
+    return Logic(a.width, aval, bval, True)
+
+
+def merge(a: Logic, b: Logic) -> Logic:
+    """Result of ``c ? a : b`` when ``c`` is unknown: agreeing bits survive, others are x."""
+
+    agree = ~(a.aval ^ b.aval) & ~(a.bval | b.bval) & a.mask
+    disagree = a.mask & ~agree
+    return Logic(a.width, (a.aval & agree) | disagree, disagree, a.signed and b.signed)
+
+
+def concat(values: Iterable[Logic]) -> Logic:
+    """Concatenate MSB-first."""
+
+    width = aval = bval = 0
+    for value in values:
+        aval = (aval << value.width) | value.aval
+        bval = (bval << value.width) | value.bval
+        width += value.width
+    return Logic(width, aval, bval)
+
+
+def select(value: Logic, offset: int, width: int) -> Logic:
+    """Bits ``[offset + width - 1 : offset]``; positions outside the vector read as x."""
+
+    aval = value.aval >> offset if offset >= 0 else value.aval << -offset
+    bval = value.bval >> offset if offset >= 0 else value.bval << -offset
+    outside = 0
+    for bit in range(width):
+        position = offset + bit
+        if position < 0 or position >= value.width:
+            outside |= 1 << bit
+    return Logic(width, aval | outside, bval | outside)
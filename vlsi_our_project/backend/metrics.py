@@ -0,0 +1,191 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; spans a cached lookup (sub-millisecond) to a long simulation or AI call.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PHASE_SECONDS = "vlsi_phase_duration_seconds"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Metrics are declared once with :meth:`describe` and keyed by label values
+    afterwards. Everything is process-local; numbers produced in simulation
+    worker processes reach it through the results they return.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._values: Dict[str, Dict[Labels, Any]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        with self._lock:
+            if name not in self._meta:
+                self._meta[name] = (kind, help_text, buckets)
+                self._values[name] = {}
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._values[name][_labels(labels)] = float(value)
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._meta[name][2])
+            histogram.observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text, _) in sorted(self._meta.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._values[name].items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {value.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value.total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe(PHASE_SECONDS, "histogram", "Time spent in one phase of handling a request.")
+
+# Phase durations of the request being handled on this thread, when it asked for them.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def record_phase(component: str, phase: str, seconds: float) -> None:
+    REGISTRY.observe(PHASE_SECONDS, seconds, {"component": component, "phase": phase})
+    timings = _request_timings.get()
+    if timings is not None:
+        key = f"{component}.{phase}"
+        timings[key] = timings.get(key, 0.0) + seconds
+
+
+def record_phases(component: str, timings: Dict[str, float]) -> None:
+    for phase, seconds in timings.items():
+        record_phase(component, phase, seconds)
+
+
+@contextmanager
+def timed(component: str, phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(component, phase, time.perf_counter() - started)
+
+
+def instrumented(component: str, phase: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of :func:`timed`; the phase defaults to the function name."""
+
+    def decorate(function: Callable[..., Any]) -> Callable[..., Any]:
+        name = phase or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timed(component, name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def begin_request_timings() -> Token:
+    """Collect the phases recorded on this thread until :func:`end_request_timings`."""
+
+    return _request_timings.set({})
+
+
+def end_request_timings(token: Token) -> Dict[str, float]:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+class PhaseTimer:
+    """Splits a run into consecutive phases: :meth:`start` ends the one in progress."""
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+        self._phase: Optional[str] = None
+        self._started = 0.0
+
+    def start(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._close(now)
+        self._phase, self._started = phase, now
+
+    def finish(self) -> Dict[str, float]:
+        self._close(time.perf_counter())
+        self._phase = None
+        return self.timings
+
+    def _close(self, now: float) -> None:
+        if self._phase is not None:
+            self.timings[self._phase] = self.timings.get(self._phase, 0.0) + now - self._started
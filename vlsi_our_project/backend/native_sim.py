@@ -0,0 +1,1542 @@
+import heapq
+import os
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Generator, List, NamedTuple, Optional, Set, Tuple
+
+import logic4
+from expr_codegen import compile_block, compile_expr
+from hdl_parser import (
+    Assign,
+    Binary,
+    Block,
+    Case,
+    Concat,
+    Cond,
+    ContAssign,
+    Decl,
+    DelayStmt,
+    EventStmt,
+    For,
+    Forever,
+    Gate,
+    If,
+    Index,
+    IndexedRange,
+    Instance,
+    Module,
+    Name,
+    Num,
+    Param,
+    Process,
+    Range,
+    RepeatLoop,
+    Replicate,
+    Str,
+    SysFunc,
+    SysTask,
+    Unary,
+    UnsupportedConstruct,
+    VerilogSyntaxError,
+    WaitStmt,
+    While,
+    parse_source,
+)
+from logic4 import Logic
+from sim_limits import SimulationBudgetExceeded
+
+
+DEFAULT_DUMPFILE = "dump.vcd"
+MAX_INSTANCE_DEPTH = 64
+# Statements executed between wall-clock checks.
+DEADLINE_CHECK_INTERVAL = 4096
+
+
+class ElaborationError(VerilogSyntaxError):
+    """The design parses but cannot be elaborated (unknown module, undeclared name, ...)."""
+
+
+class SimulationTimeout(Exception):
+    """The simulation did not finish within its wall-clock budget."""
+
+
+class NativeResult(NamedTuple):
+    log: str
+    vcd_file: Optional[str]
+    end_time: int
+    finished: bool
+
+
+# ---------------------------------------------------------------------------
+# Elaborated objects
+# ---------------------------------------------------------------------------
+
+
+class Signal:
+    """A net or variable of the flattened design with its current value."""
+
+    __slots__ = (
+        "name", "scope", "kind", "width", "msb", "lsb", "signed",
+        "aval", "bval", "drivers", "waiters", "vcd_code",
+    )
+
+    def __init__(self, name: str, scope: Tuple[str, ...], kind: str, msb: int, lsb: int, signed: bool) -> None:
+        self.name = name
+        self.scope = scope
+        self.kind = kind
+        self.msb = msb
+        self.lsb = lsb
+        self.width = abs(msb - lsb) + 1
+        self.signed = signed
+        mask = (1 << self.width) - 1
+        # Variables start as x, undriven nets as z.
+        self.aval = mask if kind in ("reg", "integer", "time") else 0
+        self.bval = mask
+        self.drivers: List["Driver"] = []
+        self.waiters: List["Waiter"] = []
+        self.vcd_code: Optional[str] = None
+
+    @property
+    def value(self) -> Logic:
+        return Logic(self.width, self.aval, self.bval, self.signed)
+
+    def offset_of(self, index: int) -> int:
+        return index - self.lsb if self.msb >= self.lsb else self.lsb - index
+
+    def __repr__(self) -> str:
+        return f"Signal({'.'.join(self.scope + (self.name,))})"
+
+
+class Expr(NamedTuple):
+    """Bound expression node annotated with its self-determined width and signedness."""
+
+    op: str
+    width: int
+    signed: bool
+    args: Tuple[Any, ...]
+
+
+class Scope:
+    """Names visible inside one module instance."""
+
+    def __init__(self, path: Tuple[str, ...], module: Module, time_factor: int) -> None:
+        self.path = path
+        self.module = module
+        self.time_factor = time_factor
+        self.names: Dict[str, Any] = {}  # Signal or Logic (parameter)
+        self.directions: Dict[str, str] = {}
+        self.children: Dict[str, "Scope"] = {}
+
+    @property
+    def dotted(self) -> str:
+        return ".".join(self.path)
+
+
+class Driver:
+    """A continuous assignment (``assign``, gate, or port connection)."""
+
+    __slots__ = ("lhs", "rhs", "width", "delay", "pending", "evaluate")
+
+    def __init__(self, lhs: Any, rhs: Expr, width: int, delay: int) -> None:
+        self.lhs = lhs
+        self.rhs = rhs
+        self.width = width
+        self.delay = delay
+        self.pending = False
+        self.evaluate: Optional[Callable[[], Logic]] = None
+
+
+class Waiter:
+    """A process suspended on an event control or ``wait``."""
+
+    __slots__ = ("process", "specs", "signals", "condition")
+
+    def __init__(self, process: "ProcessState", specs: List[List[Any]], condition: Optional[Expr] = None) -> None:
+        self.process = process
+        self.specs = specs  # [edge, expr, last value]
+        self.condition = condition
+        self.signals: Set[Signal] = set()
+
+
+class ProcessState:
+    __slots__ = ("generator", "scope", "name", "body")
+
+    def __init__(self, generator: Generator, scope: Scope, name: str, body: Any) -> None:
+        self.generator = generator
+        self.scope = scope
+        self.name = name
+        self.body = body
+
+
+# ---------------------------------------------------------------------------
+# Simulator
+# ---------------------------------------------------------------------------
+
+_CONTEXT_OPS: Dict[str, Callable[[Logic, Logic], Logic]] = {
+    "+": logic4.add,
+    "-": logic4.sub,
+    "*": logic4.mul,
+    "/": logic4.div,
+    "%": logic4.mod,
+    "&": logic4.bit_and,
+    "|": logic4.bit_or,
+    "^": logic4.bit_xor,
+    "~^": logic4.bit_xnor,
+    "^~": logic4.bit_xnor,
+}
+_COMPARE_OPS: Dict[str, Callable[[Logic, Logic], Logic]] = {
+    "==": logic4.logical_eq,
+    "!=": logic4.logical_ne,
+    "===": logic4.case_eq,
+    "!==": logic4.case_ne,
+    "<": logic4.less,
+    "<=": logic4.less_eq,
+    ">": logic4.greater,
+    ">=": logic4.greater_eq,
+}
+_LOGICAL_OPS: Dict[str, Callable[[Logic, Logic], Logic]] = {
+    "&&": logic4.logical_and,
+    "||": logic4.logical_or,
+}
+_SHIFT_OPS: Dict[str, Callable[[Logic, Logic], Logic]] = {
+    "<<": logic4.shift_left,
+    "<<<": logic4.shift_left,
+    ">>": logic4.shift_right,
+    ">>>": logic4.shift_right_arith,
+}
+_REDUCTION_OPS: Dict[str, Callable[[Logic], Logic]] = {
+    "&": logic4.reduce_and,
+    "|": logic4.reduce_or,
+    "^": logic4.reduce_xor,
+    "~&": lambda value: logic4.logical_not(logic4.reduce_and(value)),
+    "~|": lambda value: logic4.logical_not(logic4.reduce_or(value)),
+    "~^": lambda value: logic4.logical_not(logic4.reduce_xor(value)),
+    "^~": lambda value: logic4.logical_not(logic4.reduce_xor(value)),
+}
+_GATE_OPS = {"and": "&", "nand": "&", "or": "|", "nor": "|", "xor": "^", "xnor": "^"}
+_FORMAT_RE = re.compile(r"%([-0]?)(\d*)([a-zA-Z%])")
+_POSEDGE = {("0", "1"), ("0", "x"), ("0", "z"), ("x", "1"), ("z", "1")}
+_NEGEDGE = {("1", "0"), ("1", "x"), ("1", "z"), ("x", "0"), ("z", "0")}
+_VCD_TYPES = {"reg": "reg", "integer": "integer", "time": "time"}
+_TIMESCALE_NAMES = {0: "s", -3: "ms", -6: "us", -9: "ns", -12: "ps", -15: "fs"}
+
+
+def _const(value: Logic) -> Expr:
+    return Expr("const", value.width, value.signed, (value,))
+
+
+def _lsb_char(value: Logic) -> str:
+    return "01zx"[(value.aval & 1) + 2 * (value.bval & 1)]
+
+
+def _timescale_text(exponent: int) -> str:
+    for unit_exponent in sorted(_TIMESCALE_NAMES, reverse=True):
+        if exponent >= unit_exponent:
+            return f"{10 ** (exponent - unit_exponent)}{_TIMESCALE_NAMES[unit_exponent]}"
+    return "1fs"
+
+
+class NativeSimulator:
+    """Event-driven interpreter for the Verilog subset used by the templates.
+
+    The scheduler follows the standard stratified event queue: active events
+    (processes and continuous assignments), ``#0`` inactive events, non-blocking
+    updates, then the end-of-timestep work ($strobe, $monitor and VCD sampling).
+    """
+
+    def __init__(
+        self,
+        source: str,
+        workdir: str,
+        timeout: float = 10.0,
+        seed: int = 0,
+        max_log_bytes: int = 0,
+        max_dump_bytes: int = 0,
+    ) -> None:
+        self.workdir = workdir
+        self.timeout = timeout
+        # 0 disables a limit; see sim_limits.ResourceLimits.
+        self.max_log_bytes = max_log_bytes
+        self.max_dump_bytes = max_dump_bytes
+        self.random = random.Random(seed)
+
+        self.time = 0
+        self.finished = False
+        self.signals: List[Signal] = []
+        self.scopes: List[Scope] = []
+        self.drivers: List[Driver] = []
+        self.processes: List[ProcessState] = []
+
+        self._active: Deque[Any] = deque()
+        self._inactive: Deque[Any] = deque()
+        self._nba: List[Tuple[List[Tuple[Signal, int, int]], Logic]] = []
+        self._future: List[Tuple[int, int, str, Any]] = []
+        self._sequence = 0
+        self._steps = 0
+        self._deadline = 0.0
+
+        self._output: List[str] = []
+        self._output_bytes = 0
+        self._strobes: List[Tuple[Tuple[Any, ...], Scope]] = []
+        self._monitor: Optional[Tuple[Tuple[Any, ...], Scope]] = None
+        self._monitor_last: Optional[Tuple[Tuple[int, int], ...]] = None
+        self._monitor_enabled = True
+
+        self._dumpfile: Optional[str] = None
+        self._dump_requests: List[Tuple[int, Optional[Tuple[str, ...]], Optional[Signal]]] = []
+        self._dump_started = False
+        self._dump_handle: Optional[Any] = None
+        self._dump_path: Optional[str] = None
+        self._dump_signals: List[Signal] = []
+        self._dump_last: Dict[Signal, Tuple[int, int]] = {}
+        self._dump_time: Optional[int] = None
+        self._dumping = True
+        self._dump_bytes = 0
+
+        modules = parse_source(source)
+        if not modules:
+            raise VerilogSyntaxError("no modules found")
+        self._elaborate(modules)
+
+    # -- elaboration -------------------------------------------------------
+
+    def _elaborate(self, modules: List[Module]) -> None:
+        self.modules: Dict[str, Module] = {}
+        for module in modules:
+            if module.name in self.modules:
+                raise ElaborationError(f"line {module.line}: module {module.name} is already declared")
+            self.modules[module.name] = module
+
+        instantiated = {
+            item.module for module in modules for item in module.items if isinstance(item, Instance)
+        }
+        roots = [module for module in modules if module.name not in instantiated]
+        if not roots:
+            raise ElaborationError("no top-level module (every module is instantiated somewhere)")
+
+        scales = [module.timescale or (0, 0) for module in modules]
+        self.precision = min(precision for _, precision in scales)
+        self.root_names = {module.name for module in roots}
+        for module in roots:
+            self._instantiate(module, (module.name,), {}, [], depth=0)
+
+    def _time_factor(self, module: Module) -> int:
+        unit = (module.timescale or (0, 0))[0]
+        return 10 ** max(unit - self.precision, 0)
+
+    def _instantiate(
+        self,
+        module: Module,
+        path: Tuple[str, ...],
+        named_overrides: Dict[str, Logic],
+        ordered_overrides: List[Logic],
+        depth: int,
+    ) -> Scope:
+        if depth > MAX_INSTANCE_DEPTH:
+            raise ElaborationError(f"instance hierarchy deeper than {MAX_INSTANCE_DEPTH} at {'.'.join(path)}")
+
+        scope = Scope(path, module, self._time_factor(module))
+        self.scopes.append(scope)
+
+        overridable = [item.name for item in module.items if isinstance(item, Param) and not item.local]
+        overrides = dict(zip(overridable, ordered_overrides))
+        for name, value in named_overrides.items():
+            if name not in overridable:
+                raise ElaborationError(f"module {module.name} has no parameter {name}")
+            overrides[name] = value
+
+        decls: Dict[str, Dict[str, Any]] = {}
+        for item in module.items:
+            if isinstance(item, Param):
+                value = overrides.get(item.name) if not item.local else None
+                if value is None:
+                    value = self._constant(item.value, scope)
+                if item.msb is not None:
+                    width = abs(self._constant_int(item.msb, scope) - self._constant_int(item.lsb, scope)) + 1
+                    value = value.resize(width, item.signed)
+                elif item.signed:
+                    value = Logic(value.width, value.aval, value.bval, True)
+                scope.names[item.name] = value
+            elif isinstance(item, Decl):
+                self._merge_decl(decls, item, scope)
+
+        for name in module.ports:
+            if name not in decls or decls[name]["direction"] is None:
+                raise ElaborationError(f"line {module.line}: port {name} of {module.name} has no direction")
+
+        initial_values: List[Tuple[Signal, Any]] = []
+        for name, info in decls.items():
+            kind = info["kind"] or "wire"
+            if kind in ("supply0", "supply1"):
+                signal = Signal(name, path, "wire", info["msb"], info["lsb"], info["signed"])
+                signal.aval = signal.bval = 0
+                if kind == "supply1":
+                    signal.aval = (1 << signal.width) - 1
+            else:
+                signal = Signal(name, path, kind, info["msb"], info["lsb"], info["signed"])
+            self.signals.append(signal)
+            scope.names[name] = signal
+            if info["direction"]:
+                scope.directions[name] = info["direction"]
+            if info["init"] is not None:
+                initial_values.append((signal, info["init"]))
+
+        for signal, init in initial_values:
+            if signal.kind == "wire":
+                self._add_driver(("sig", signal), signal.width, self._bind(init, scope), 0)
+            else:
+                value = self._constant(init, scope).resize(signal.width, signal.signed)
+                signal.aval, signal.bval = value.aval, value.bval
+
+        for item in module.items:
+            if isinstance(item, ContAssign):
+                self._declare_implicit(item.lhs, scope)
+                lhs, width = self._bind_lhs(item.lhs, scope)
+                delay = self._delay_ticks(item.delay, scope) if item.delay is not None else 0
+                self._add_driver(lhs, width, self._bind(item.rhs, scope), delay)
+            elif isinstance(item, Process):
+                body = self._bind_stmt(item.body, scope)
+                self._add_process(item.kind, body, scope)
+            elif isinstance(item, Gate):
+                self._add_gate(item, scope)
+            elif isinstance(item, Instance):
+                self._add_instance(item, scope, depth)
+
+        return scope
+
+    def _merge_decl(self, decls: Dict[str, Dict[str, Any]], item: Decl, scope: Scope) -> None:
+        msb = lsb = 0
+        if item.msb is not None:
+            msb = self._constant_int(item.msb, scope)
+            lsb = self._constant_int(item.lsb, scope)
+        info = decls.get(item.name)
+        if info is None:
+            decls[item.name] = {
+                "kind": item.kind,
+                "direction": item.direction,
+                "msb": msb,
+                "lsb": lsb,
+                "signed": item.signed,
+                "init": item.init,
+                "ranged": item.msb is not None,
+            }
+            return
+        if item.kind is not None:
+            if info["kind"] is not None and info["kind"] != item.kind and item.direction is None:
+                raise ElaborationError(f"line {item.line}: {item.name} is already declared")
+            info["kind"] = item.kind
+        if item.direction is not None:
+            info["direction"] = item.direction
+        if item.msb is not None:
+            info["msb"], info["lsb"], info["ranged"] = msb, lsb, True
+        info["signed"] = info["signed"] or item.signed
+        if item.init is not None:
+            info["init"] = item.init
+
+    def _declare_implicit(self, target: Any, scope: Scope) -> None:
+        """Create the implicit 1-bit nets Verilog allows in port connections and assign targets."""
+
+        if isinstance(target, Name) and target.ident not in scope.names:
+            signal = Signal(target.ident, scope.path, "wire", 0, 0, False)
+            self.signals.append(signal)
+            scope.names[target.ident] = signal
+        elif isinstance(target, Concat):
+            for item in target.items:
+                self._declare_implicit(item, scope)
+
+    def _add_driver(self, lhs: Any, width: int, rhs: Expr, delay: int) -> None:
+        driver = Driver(lhs, rhs, width, delay)
+        driver.evaluate = compile_expr(self, rhs, max(width, rhs.width), rhs.signed, width)
+        self.drivers.append(driver)
+        for signal in self._read_signals_expr(rhs):
+            signal.drivers.append(driver)
+
+    def _add_process(self, kind: str, body: Any, scope: Scope) -> None:
+        if kind == "always":
+            if body is None or not self._has_timing(body):
+                raise UnsupportedConstruct("always blocks without a timing control never yield")
+            compiled = self._compile_combinational(body)
+            if compiled is not None:
+                generator = self._run_compiled(body[1], compiled)
+            else:
+                generator = self._run_always(body, scope)
+        else:
+            generator = self._run_block(body, scope)
+        self.processes.append(ProcessState(generator, scope, kind, body))
+
+    def _add_gate(self, gate: Gate, scope: Scope) -> None:
+        for terminal in gate.terminals:
+            self._declare_implicit(terminal, scope)
+        delay = self._delay_ticks(gate.delay, scope) if gate.delay is not None else 0
+
+        if gate.kind in ("not", "buf"):
+            source = self._bind(gate.terminals[-1], scope)
+            rhs = Expr("unary", source.width, False, ("~", source)) if gate.kind == "not" else source
+            for output in gate.terminals[:-1]:
+                lhs, width = self._bind_lhs(output, scope)
+                self._add_driver(lhs, width, rhs, delay)
+            return
+
+        op = _GATE_OPS[gate.kind]
+        inputs = [self._bind(terminal, scope) for terminal in gate.terminals[1:]]
+        rhs = inputs[0]
+        for operand in inputs[1:]:
+            rhs = Expr("binary", max(rhs.width, operand.width), False, (op, rhs, operand))
+        if gate.kind in ("nand", "nor", "xnor"):
+            rhs = Expr("unary", rhs.width, False, ("~", rhs))
+        lhs, width = self._bind_lhs(gate.terminals[0], scope)
+        self._add_driver(lhs, width, rhs, delay)
+
+    def _add_instance(self, instance: Instance, scope: Scope, depth: int) -> None:
+        module = self.modules.get(instance.module)
+        if module is None:
+            raise ElaborationError(f"line {instance.line}: unknown module type: {instance.module}")
+        if instance.name in scope.children or instance.name in scope.names:
+            raise ElaborationError(f"line {instance.line}: {instance.name} is already declared")
+
+        named: Dict[str, Logic] = {}
+        ordered: List[Logic] = []
+        for name, expr in instance.params:
+            value = self._constant(expr, scope)
+            if name is None:
+                ordered.append(value)
+            else:
+                named[name] = value
+
+        child = self._instantiate(module, scope.path + (instance.name,), named, ordered, depth + 1)
+        scope.children[instance.name] = child
+
+        connections: List[Tuple[str, Any]] = []
+        if any(name is not None for name, _ in instance.ports):
+            for name, expr in instance.ports:
+                if name not in module.ports:
+                    raise ElaborationError(f"line {instance.line}: module {module.name} has no port {name}")
+                connections.append((name, expr))
+        else:
+            if len(instance.ports) > len(module.ports):
+                raise ElaborationError(f"line {instance.line}: too many ports for {module.name}")
+            connections = [(name, expr) for name, (_, expr) in zip(module.ports, instance.ports)]
+
+        for port, expr in connections:
+            if expr is None:
+                continue
+            signal = child.names[port]
+            direction = child.directions[port]
+            if direction == "input":
+                self._declare_implicit(expr, scope)
+                self._add_driver(("sig", signal), signal.width, self._bind(expr, scope), 0)
+            elif direction == "output":
+                self._declare_implicit(expr, scope)
+                lhs, width = self._bind_lhs(expr, scope)
+                self._add_driver(lhs, width, Expr("sig", signal.width, signal.signed, (signal,)), 0)
+            else:
+                raise UnsupportedConstruct(f"line {instance.line}: inout ports are not supported")
+
+    # -- binding -----------------------------------------------------------
+
+    def _lookup(self, name: Name, scope: Scope) -> Any:
+        try:
+            return scope.names[name.ident]
+        except KeyError:
+            raise ElaborationError(f"line {name.line}: unable to bind '{name.ident}' in {scope.dotted}") from None
+
+    def _constant(self, expr: Any, scope: Scope) -> Logic:
+        bound = self._bind(expr, scope)
+        if self._read_signals_expr(bound):
+            raise ElaborationError("expression must be constant")
+        return self._eval(bound, bound.width, bound.signed)
+
+    def _constant_int(self, expr: Any, scope: Scope) -> int:
+        value = self._constant(expr, scope)
+        if value.bval:
+            raise ElaborationError("constant expression has x/z bits")
+        return value.to_int()
+
+    def _delay_ticks(self, expr: Any, scope: Scope) -> int:
+        return self._constant_int(expr, scope) * scope.time_factor
+
+    def _bind(self, expr: Any, scope: Scope) -> Expr:
+        if isinstance(expr, Num):
+            return _const(expr.value)
+        if isinstance(expr, Name):
+            target = self._lookup(expr, scope)
+            if isinstance(target, Logic):
+                return _const(target)
+            return Expr("sig", target.width, target.signed, (target,))
+        if isinstance(expr, Str):
+            data = expr.text.encode("latin-1", "replace")
+            value = Logic(max(8 * len(data), 8), int.from_bytes(data, "big") if data else 0)
+            return Expr("str", value.width, False, (expr.text, value))
+        if isinstance(expr, Binary):
+            left, right = self._bind(expr.left, scope), self._bind(expr.right, scope)
+            op = expr.op
+            if op in _CONTEXT_OPS:
+                return Expr("binary", max(left.width, right.width), left.signed and right.signed, (op, left, right))
+            if op in _COMPARE_OPS or op in _LOGICAL_OPS:
+                return Expr("binary", 1, False, (op, left, right))
+            return Expr("binary", left.width, left.signed, (op, left, right))
+        if isinstance(expr, Unary):
+            operand = self._bind(expr.operand, scope)
+            if expr.op in ("+", "-", "~"):
+                return Expr("unary", operand.width, operand.signed, (expr.op, operand))
+            return Expr("unary", 1, False, (expr.op, operand))
+        if isinstance(expr, Cond):
+            cond, then, other = (self._bind(part, scope) for part in expr)
+            return Expr("cond", max(then.width, other.width), then.signed and other.signed, (cond, then, other))
+        if isinstance(expr, Concat):
+            items = tuple(self._bind(item, scope) for item in expr.items)
+            return Expr("concat", sum(item.width for item in items), False, items)
+        if isinstance(expr, Replicate):
+            count = self._constant_int(expr.count, scope)
+            items = tuple(self._bind(item, scope) for item in expr.items)
+            if count < 0:
+                raise ElaborationError("negative replication count")
+            return Expr("concat", count * sum(item.width for item in items), False, items * count)
+        if isinstance(expr, (Index, Range, IndexedRange)):
+            return self._bind_select(expr, scope)
+        if isinstance(expr, SysFunc):
+            return self._bind_sysfunc(expr, scope)
+        raise UnsupportedConstruct(f"expression {type(expr).__name__} is not supported")
+
+    def _bind_select(self, expr: Any, scope: Scope) -> Expr:
+        if not isinstance(expr.target, Name):
+            raise UnsupportedConstruct("selects of expressions are not supported")
+        target = self._lookup(expr.target, scope)
+        if isinstance(target, Logic):
+            # Selects of parameters behave like selects of a [width-1:0] vector.
+            signal = Signal(expr.target.ident, scope.path, "param", target.width - 1, 0, False)
+            signal.aval, signal.bval = target.aval, target.bval
+            target = signal
+
+        if isinstance(expr, Index):
+            return Expr("bit", 1, False, (target, self._bind(expr.index, scope)))
+        if isinstance(expr, Range):
+            msb = self._constant_int(expr.msb, scope)
+            lsb = self._constant_int(expr.lsb, scope)
+            offset = min(target.offset_of(msb), target.offset_of(lsb))
+            width = abs(msb - lsb) + 1
+            return Expr("part", width, False, (target, offset))
+        width = self._constant_int(expr.width, scope)
+        return Expr("ipart", width, False, (target, self._bind(expr.base, scope), expr.ascending))
+
+    def _bind_sysfunc(self, expr: SysFunc, scope: Scope) -> Expr:
+        name = expr.name
+        if name in ("$time", "$stime", "$realtime"):
+            return Expr("time", 64 if name != "$stime" else 32, False, (scope.time_factor,))
+        if name == "$random":
+            return Expr("random", 32, True, ())
+        if name in ("$signed", "$unsigned") and len(expr.args) == 1:
+            operand = self._bind(expr.args[0], scope)
+            return Expr(name[1:], operand.width, name == "$signed", (operand,))
+        if name == "$clog2" and len(expr.args) == 1:
+            value = self._constant_int(expr.args[0], scope)
+            return _const(Logic.of(max(value - 1, 0).bit_length(), 32, True))
+        raise UnsupportedConstruct(f"line {expr.line}: system function {name} is not supported")
+
+    def _bind_lhs(self, expr: Any, scope: Scope) -> Tuple[Any, int]:
+        if isinstance(expr, Concat):
+            parts = [self._bind_lhs(item, scope) for item in expr.items]
+            return ("concat", tuple(part for part, _ in parts)), sum(width for _, width in parts)
+        if isinstance(expr, Name):
+            target = self._lookup(expr, scope)
+            if isinstance(target, Logic):
+                raise ElaborationError(f"line {expr.line}: cannot assign to parameter {expr.ident}")
+            return ("sig", target), target.width
+        if isinstance(expr, (Index, Range, IndexedRange)) and isinstance(expr.target, Name):
+            bound = self._bind_select(expr, scope)
+            if bound.op == "bit":
+                return ("bit", bound.args[0], bound.args[1]), 1
+            if bound.op == "part":
+                return ("part", bound.args[0], bound.args[1], bound.width), bound.width
+            return ("ipart", bound.args[0], bound.args[1], bound.width, bound.args[2]), bound.width
+        raise ElaborationError("invalid assignment target")
+
+    def _bind_events(self, events: Any, body: Any, scope: Scope) -> List[Tuple[str, Expr]]:
+        if events is None:
+            return [("any", Expr("sig", signal.width, signal.signed, (signal,))) for signal in self._read_signals_stmt(body)]
+        return [(edge, self._bind(expr, scope)) for edge, expr in events]
+
+    def _bind_stmt(self, stmt: Any, scope: Scope) -> Any:
+        if stmt is None:
+            return None
+        if isinstance(stmt, Block):
+            return ("block", tuple(self._bind_stmt(item, scope) for item in stmt.stmts if item is not None))
+        if isinstance(stmt, Assign):
+            lhs, width = self._bind_lhs(stmt.lhs, scope)
+            delay = self._bind(stmt.delay, scope) if stmt.delay is not None else None
+            return ("assign", lhs, self._bind(stmt.rhs, scope), stmt.blocking, delay, width, scope.time_factor)
+        if isinstance(stmt, If):
+            return ("if", self._bind(stmt.cond, scope), self._bind_stmt(stmt.then, scope), self._bind_stmt(stmt.other, scope))
+        if isinstance(stmt, Case):
+            subject = self._bind(stmt.subject, scope)
+            items = []
+            default = None
+            width, signed = subject.width, subject.signed
+            for item in stmt.items:
+                body = self._bind_stmt(item.body, scope)
+                if not item.labels:
+                    default = ("default", body)
+                    continue
+                labels = tuple(self._bind(label, scope) for label in item.labels)
+                for label in labels:
+                    width = max(width, label.width)
+                    signed = signed and label.signed
+                items.append((labels, body))
+            return ("case", stmt.kind, subject, tuple(items), default[1] if default else None, width, signed)
+        if isinstance(stmt, For):
+            return ("for", self._bind_stmt(stmt.init, scope), self._bind(stmt.cond, scope), self._bind_stmt(stmt.step, scope), self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, While):
+            return ("while", self._bind(stmt.cond, scope), self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, RepeatLoop):
+            return ("repeat", self._bind(stmt.count, scope), self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, Forever):
+            return ("forever", self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, DelayStmt):
+            return ("delay", self._bind(stmt.amount, scope), scope.time_factor, self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, EventStmt):
+            body = self._bind_stmt(stmt.body, scope)
+            return ("event", self._bind_events(stmt.events, body, scope), body)
+        if isinstance(stmt, WaitStmt):
+            cond = self._bind(stmt.cond, scope)
+            return ("wait", cond, self._bind_stmt(stmt.body, scope))
+        if isinstance(stmt, SysTask):
+            return self._bind_task(stmt, scope)
+        raise UnsupportedConstruct(f"statement {type(stmt).__name__} is not supported")
+
+    def _bind_task(self, stmt: SysTask, scope: Scope) -> Any:
+        name = stmt.name
+        if name == "$dumpvars":
+            levels = self._constant_int(stmt.args[0], scope) if stmt.args and stmt.args[0] is not None else 0
+            targets = []
+            for arg in stmt.args[1:]:
+                targets.append(self._bind_dump_target(arg, scope))
+            return ("task", name, (levels, tuple(targets)), scope)
+        if name == "$dumpfile":
+            if len(stmt.args) != 1 or not isinstance(stmt.args[0], Str):
+                raise ElaborationError(f"line {stmt.line}: $dumpfile expects a file name")
+            return ("task", name, (stmt.args[0].text,), scope)
+        args = tuple(None if arg is None else self._bind(arg, scope) for arg in stmt.args)
+        if name in (
+            "$display", "$write", "$strobe", "$monitor", "$finish", "$stop",
+            "$monitoron", "$monitoroff", "$dumpon", "$dumpoff", "$dumpflush",
+            "$dumpall", "$timeformat", "$dumplimit",
+        ):
+            return ("task", name, args, scope)
+        for suffix in ("b", "h", "o"):
+            if name in (f"$display{suffix}", f"$write{suffix}", f"$strobe{suffix}", f"$monitor{suffix}"):
+                return ("task", name[:-1], args, scope, suffix)
+        raise UnsupportedConstruct(f"line {stmt.line}: system task {name} is not supported")
+
+    def _bind_dump_target(self, arg: Any, scope: Scope) -> Tuple[Optional[Tuple[str, ...]], Optional[Signal]]:
+        if not isinstance(arg, Name):
+            raise UnsupportedConstruct("$dumpvars targets must be module or signal names")
+        if arg.ident in scope.children:
+            return scope.children[arg.ident].path, None
+        if arg.ident in self.root_names and arg.ident not in scope.names:
+            return (arg.ident,), None
+        target = self._lookup(arg, scope)
+        if isinstance(target, Logic):
+            raise ElaborationError(f"line {arg.line}: cannot dump parameter {arg.ident}")
+        return None, target
+
+    # -- static analysis ---------------------------------------------------
+
+    def _read_signals_expr(self, expr: Optional[Expr], into: Optional[Dict[Signal, None]] = None) -> List[Signal]:
+        found: Dict[Signal, None] = {} if into is None else into
+        if expr is None:
+            return list(found)
+        op = expr.op
+        if op == "sig":
+            found[expr.args[0]] = None
+        elif op in ("bit", "part", "ipart"):
+            if expr.args[0].kind != "param":
+                found[expr.args[0]] = None
+            if op != "part":
+                self._read_signals_expr(expr.args[1], found)
+        else:
+            for arg in expr.args:
+                if isinstance(arg, Expr):
+                    self._read_signals_expr(arg, found)
+        return list(found)
+
+    def _read_signals_stmt(self, stmt: Any, into: Optional[Dict[Signal, None]] = None) -> List[Signal]:
+        """Signals a bound statement reads; this is the sensitivity list of ``@*``."""
+
+        found: Dict[Signal, None] = {} if into is None else into
+        if stmt is None:
+            return list(found)
+        op = stmt[0]
+        if op == "block":
+            for item in stmt[1]:
+                self._read_signals_stmt(item, found)
+        elif op == "assign":
+            self._read_lhs_indices(stmt[1], found)
+            self._read_signals_expr(stmt[2], found)
+        elif op == "if":
+            self._read_signals_expr(stmt[1], found)
+            self._read_signals_stmt(stmt[2], found)
+            self._read_signals_stmt(stmt[3], found)
+        elif op == "case":
+            self._read_signals_expr(stmt[2], found)
+            for labels, body in stmt[3]:
+                for label in labels:
+                    self._read_signals_expr(label, found)
+                self._read_signals_stmt(body, found)
+            self._read_signals_stmt(stmt[4], found)
+        elif op == "for":
+            self._read_signals_stmt(stmt[1], found)
+            self._read_signals_expr(stmt[2], found)
+            self._read_signals_stmt(stmt[3], found)
+            self._read_signals_stmt(stmt[4], found)
+        elif op in ("while", "repeat", "wait"):
+            self._read_signals_expr(stmt[1], found)
+            self._read_signals_stmt(stmt[2], found)
+        elif op == "forever":
+            self._read_signals_stmt(stmt[1], found)
+        elif op == "delay":
+            self._read_signals_stmt(stmt[3], found)
+        elif op == "event":
+            self._read_signals_stmt(stmt[2], found)
+        elif op == "task" and stmt[1] in ("$display", "$write"):
+            for arg in stmt[2]:
+                self._read_signals_expr(arg, found)
+        return list(found)
+
+    def _read_lhs_indices(self, lhs: Any, found: Dict[Signal, None]) -> None:
+        if lhs[0] == "concat":
+            for part in lhs[1]:
+                self._read_lhs_indices(part, found)
+        elif lhs[0] in ("bit", "ipart"):
+            self._read_signals_expr(lhs[2], found)
+
+    def _has_timing(self, stmt: Any) -> bool:
+        if stmt is None:
+            return False
+        op = stmt[0]
+        if op in ("delay", "event", "wait"):
+            return True
+        if op == "assign":
+            return stmt[4] is not None
+        if op == "block":
+            return any(self._has_timing(item) for item in stmt[1])
+        if op == "if":
+            return self._has_timing(stmt[2]) or self._has_timing(stmt[3])
+        if op == "case":
+            return any(self._has_timing(body) for _, body in stmt[3]) or self._has_timing(stmt[4])
+        if op in ("for",):
+            return self._has_timing(stmt[4])
+        if op in ("while", "repeat"):
+            return self._has_timing(stmt[2])
+        if op == "forever":
+            return self._has_timing(stmt[1])
+        return False
+
+    # -- expression evaluation ----------------------------------------------
+
+    def _eval(self, expr: Expr, width: int, signed: bool) -> Logic:
+        op = expr.op
+        args = expr.args
+        if op == "sig":
+            signal = args[0]
+            return Logic(signal.width, signal.aval, signal.bval, signal.signed).resize(width, signed)
+        if op == "const":
+            return args[0].resize(width, signed)
+        if op == "binary":
+            name, left, right = args
+            if name in _CONTEXT_OPS:
+                return _CONTEXT_OPS[name](self._eval(left, width, signed), self._eval(right, width, signed))
+            if name in _COMPARE_OPS:
+                operand_width = max(left.width, right.width)
+                operand_signed = left.signed and right.signed
+                result = _COMPARE_OPS[name](
+                    self._eval(left, operand_width, operand_signed),
+                    self._eval(right, operand_width, operand_signed),
+                )
+                return result.resize(width, False)
+            if name in _LOGICAL_OPS:
+                result = _LOGICAL_OPS[name](
+                    self._eval(left, left.width, left.signed),
+                    self._eval(right, right.width, right.signed),
+                )
+                return result.resize(width, False)
+            if name == "**":
+                return logic4.power(self._eval(left, width, signed), self._eval(right, right.width, right.signed))
+            return _SHIFT_OPS[name](self._eval(left, width, signed), self._eval(right, right.width, False))
+        if op == "unary":
+            name, operand = args
+            if name == "~":
+                return logic4.bit_not(self._eval(operand, width, signed))
+            if name == "-":
+                return logic4.negate(self._eval(operand, width, signed))
+            if name == "+":
+                return self._eval(operand, width, signed)
+            value = self._eval(operand, operand.width, operand.signed)
+            if name == "!":
+                return logic4.logical_not(value).resize(width, False)
+            return _REDUCTION_OPS[name](value).resize(width, False)
+        if op == "cond":
+            cond, then, other = args
+            truth = self._eval(cond, cond.width, cond.signed).truth()
+            if truth is None:
+                return logic4.merge(self._eval(then, width, signed), self._eval(other, width, signed))
+            return self._eval(then if truth else other, width, signed)
+        if op == "concat":
+            return logic4.concat(self._eval(item, item.width, item.signed) for item in args).resize(width, False)
+        if op == "bit":
+            signal, index_expr = args
+            index = self._eval(index_expr, index_expr.width, index_expr.signed)
+            if index.bval:
+                return Logic.unknown(1).resize(width, False)
+            return logic4.select(signal.value, signal.offset_of(index.to_int()), 1).resize(width, False)
+        if op == "part":
+            signal, offset = args
+            return logic4.select(signal.value, offset, expr.width).resize(width, False)
+        if op == "ipart":
+            signal, base_expr, ascending = args
+            offset = self._indexed_offset(signal, base_expr, expr.width, ascending)
+            if offset is None:
+                return Logic.unknown(expr.width).resize(width, False)
+            return logic4.select(signal.value, offset, expr.width).resize(width, False)
+        if op == "time":
+            return Logic(expr.width, self.time // args[0]).resize(width, signed)
+        if op == "random":
+            return Logic(32, self.random.getrandbits(32), 0, True).resize(width, signed)
+        if op in ("signed", "unsigned"):
+            value = self._eval(args[0], args[0].width, args[0].signed)
+            return Logic(value.width, value.aval, value.bval, op == "signed").resize(width, signed)
+        if op == "str":
+            return args[1].resize(width, False)
+        raise UnsupportedConstruct(f"expression {op} is not supported")
+
+    def _indexed_offset(self, signal: Signal, base_expr: Expr, width: int, ascending: bool) -> Optional[int]:
+        base = self._eval(base_expr, base_expr.width, base_expr.signed)
+        if base.bval:
+            return None
+        start = base.to_int()
+        other = start + width - 1 if ascending else start - width + 1
+        return min(signal.offset_of(start), signal.offset_of(other))
+
+    # -- assignment --------------------------------------------------------
+
+    def _resolve_lhs(self, lhs: Any) -> List[Tuple[Signal, int, int]]:
+        """Evaluate the target's indices now: ``(signal, offset, width)`` MSB part first.
+
+        Targets with unknown indices resolve to ``offset=None`` and are skipped on write.
+        """
+
+        kind = lhs[0]
+        if kind == "sig":
+            return [(lhs[1], 0, lhs[1].width)]
+        if kind == "bit":
+            index = self._eval(lhs[2], lhs[2].width, lhs[2].signed)
+            offset = None if index.bval else lhs[1].offset_of(index.to_int())
+            return [(lhs[1], offset, 1)]
+        if kind == "part":
+            return [(lhs[1], lhs[2], lhs[3])]
+        if kind == "ipart":
+            return [(lhs[1], self._indexed_offset(lhs[1], lhs[2], lhs[3], lhs[4]), lhs[3])]
+        targets: List[Tuple[Signal, int, int]] = []
+        for part in lhs[1]:
+            targets.extend(self._resolve_lhs(part))
+        return targets
+
+    def _write_targets(self, targets: List[Tuple[Signal, Optional[int], int]], value: Logic) -> None:
+        position = 0
+        for signal, offset, width in reversed(targets):
+            if offset is not None:
+                part = logic4.select(value, position, width)
+                self._write(signal, offset, width, part.aval, part.bval)
+            position += width
+
+    def _write(self, signal: Signal, offset: int, width: int, aval: int, bval: int) -> None:
+        if offset < 0:
+            aval >>= -offset
+            bval >>= -offset
+            width += offset
+            offset = 0
+        width = min(width, signal.width - offset)
+        if width <= 0:
+            return
+        field = ((1 << width) - 1) << offset
+        new_aval = (signal.aval & ~field) | ((aval << offset) & field)
+        new_bval = (signal.bval & ~field) | ((bval << offset) & field)
+        if new_aval == signal.aval and new_bval == signal.bval:
+            return
+        old = Logic(signal.width, signal.aval, signal.bval, signal.signed)
+        signal.aval, signal.bval = new_aval, new_bval
+        self._changed(signal, old)
+
+    def _changed(self, signal: Signal, old: Logic) -> None:
+        for driver in signal.drivers:
+            if not driver.pending:
+                driver.pending = True
+                self._active.append(driver)
+        if signal.waiters:
+            for waiter in list(signal.waiters):
+                if self._triggered(waiter, signal, old):
+                    self._wake(waiter)
+
+    # -- processes ---------------------------------------------------------
+
+    def _triggered(self, waiter: Waiter, signal: Signal, old: Logic) -> bool:
+        if waiter.condition is not None:
+            condition = waiter.condition
+            return bool(self._eval(condition, condition.width, condition.signed).truth())
+        for spec in waiter.specs:
+            edge, expr, last = spec
+            if expr.op == "sig" and expr.args[0] is not signal:
+                continue
+            current = self._eval(expr, expr.width, expr.signed)
+            if current == last:
+                continue
+            spec[2] = current
+            if edge == "any":
+                return True
+            transition = (_lsb_char(last), _lsb_char(current))
+            if transition in (_POSEDGE if edge == "posedge" else _NEGEDGE):
+                return True
+        return False
+
+    def _wake(self, waiter: Waiter) -> None:
+        for signal in waiter.signals:
+            signal.waiters.remove(waiter)
+        waiter.signals.clear()
+        self._active.append(waiter.process)
+
+    def _suspend(self, process: ProcessState, command: Tuple[Any, ...]) -> None:
+        kind = command[0]
+        if kind == "delay":
+            ticks = command[1]
+            if ticks <= 0:
+                self._inactive.append(process)
+            else:
+                self._schedule(self.time + ticks, "resume", process)
+        elif kind == "event":
+            specs = [[edge, expr, self._eval(expr, expr.width, expr.signed)] for edge, expr in command[1]]
+            waiter = Waiter(process, specs)
+            for _, expr in command[1]:
+                for signal in self._read_signals_expr(expr):
+                    if waiter not in signal.waiters:
+                        signal.waiters.append(waiter)
+                    waiter.signals.add(signal)
+            if not waiter.signals:
+                # Nothing can ever trigger it; the process simply never resumes.
+                return
+        elif kind == "wait":
+            condition = command[1]
+            waiter = Waiter(process, [], condition)
+            for signal in self._read_signals_expr(condition):
+                signal.waiters.append(waiter)
+                waiter.signals.add(signal)
+
+    def _schedule(self, when: int, kind: str, payload: Any) -> None:
+        self._sequence += 1
+        heapq.heappush(self._future, (when, self._sequence, kind, payload))
+
+    def _compile_combinational(self, body: Any) -> Optional[Callable[[], None]]:
+        """Compiled body of an ``always @(...)`` block without edges or inner timing."""
+
+        if body[0] != "event" or any(edge != "any" for edge, _ in body[1]):
+            return None
+        if self._has_timing(body[2]):
+            return None
+        return compile_block(self, body[2])
+
+    def _run_compiled(self, events: List[Tuple[str, Expr]], compiled: Callable[[], None]) -> Generator:
+        while True:
+            yield ("event", events)
+            self._tick()
+            compiled()
+            if self.finished:
+                yield ("finish",)
+
+    def _run_always(self, body: Any, scope: Scope) -> Generator:
+        while True:
+            yield from self._exec(body, scope)
+
+    def _run_block(self, body: Any, scope: Scope) -> Generator:
+        yield from self._exec(body, scope)
+
+    def _tick(self) -> None:
+        self._steps += 1
+        if self._steps % DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() > self._deadline:
+            raise SimulationTimeout("simulation exceeded its time budget")
+
+    def _exec(self, stmt: Any, scope: Scope) -> Generator:
+        if stmt is None:
+            return
+        self._tick()
+        op = stmt[0]
+        if op == "assign":
+            _, lhs, rhs, blocking, delay, width, factor = stmt
+            value = self._eval(rhs, max(width, rhs.width), rhs.signed).resize(width, False)
+            if blocking:
+                if delay is not None:
+                    yield ("delay", self._eval_int(delay) * factor)
+                self._write_targets(self._resolve_lhs(lhs), value)
+            else:
+                targets = self._resolve_lhs(lhs)
+                if delay is not None:
+                    self._schedule(self.time + self._eval_int(delay) * factor, "nba", (targets, value))
+                else:
+                    self._nba.append((targets, value))
+        elif op == "block":
+            for item in stmt[1]:
+                yield from self._exec(item, scope)
+                if self.finished:
+                    return
+        elif op == "if":
+            cond = stmt[1]
+            if self._eval(cond, cond.width, cond.signed).truth():
+                yield from self._exec(stmt[2], scope)
+            else:
+                yield from self._exec(stmt[3], scope)
+        elif op == "case":
+            yield from self._exec(self._select_case(stmt), scope)
+        elif op == "for":
+            _, init, cond, step, body = stmt
+            yield from self._exec(init, scope)
+            while self._eval(cond, cond.width, cond.signed).truth():
+                yield from self._exec(body, scope)
+                if self.finished:
+                    return
+                yield from self._exec(step, scope)
+        elif op == "while":
+            _, cond, body = stmt
+            while self._eval(cond, cond.width, cond.signed).truth():
+                self._tick()
+                yield from self._exec(body, scope)
+                if self.finished:
+                    return
+        elif op == "repeat":
+            _, count_expr, body = stmt
+            count = self._eval(count_expr, count_expr.width, count_expr.signed)
+            for _ in range(0 if count.bval else max(count.to_int(), 0)):
+                yield from self._exec(body, scope)
+                if self.finished:
+                    return
+        elif op == "forever":
+            while not self.finished:
+                self._tick()
+                yield from self._exec(stmt[1], scope)
+        elif op == "delay":
+            _, amount, factor, body = stmt
+            yield ("delay", self._eval_int(amount) * factor)
+            yield from self._exec(body, scope)
+        elif op == "event":
+            yield ("event", stmt[1])
+            yield from self._exec(stmt[2], scope)
+        elif op == "wait":
+            cond = stmt[1]
+            if not self._eval(cond, cond.width, cond.signed).truth():
+                yield ("wait", cond)
+            yield from self._exec(stmt[2], scope)
+        elif op == "task":
+            self._system_task(stmt)
+            if self.finished:
+                yield ("finish",)
+
+    def _eval_int(self, expr: Expr) -> int:
+        value = self._eval(expr, expr.width, expr.signed)
+        return 0 if value.bval else max(value.to_int(), 0)
+
+    def _select_case(self, stmt: Any) -> Any:
+        _, kind, subject, items, default, width, signed = stmt
+        value = self._eval(subject, width, signed)
+        for labels, body in items:
+            for label in labels:
+                if self._case_matches(kind, value, self._eval(label, width, signed)):
+                    return body
+        return default
+
+    @staticmethod
+    def _case_matches(kind: str, value: Logic, candidate: Logic) -> bool:
+        if kind == "case":
+            return candidate.aval == value.aval and candidate.bval == value.bval
+        # casez ignores z bits, casex ignores x and z bits, in either operand.
+        if kind == "casez":
+            ignore = (candidate.bval & ~candidate.aval) | (value.bval & ~value.aval)
+        else:
+            ignore = candidate.bval | value.bval
+        care = ~ignore & value.mask
+        return (candidate.aval & care) == (value.aval & care) and (candidate.bval & care) == (value.bval & care)
+
+    # -- system tasks --------------------------------------------------------
+
+    def _system_task(self, stmt: Any) -> None:
+        name, args, scope = stmt[1], stmt[2], stmt[3]
+        radix = stmt[4] if len(stmt) > 4 else "d"
+        if name in ("$display", "$write"):
+            text = self._format(args, scope, radix)
+            self._emit(text + "\n" if name == "$display" else text)
+        elif name == "$strobe":
+            self._strobes.append((args, scope, radix))
+        elif name == "$monitor":
+            self._monitor = (args, scope, radix)
+            self._monitor_last = None
+        elif name == "$monitoron":
+            self._monitor_enabled = True
+            self._monitor_last = None
+        elif name == "$monitoroff":
+            self._monitor_enabled = False
+        elif name in ("$finish", "$stop"):
+            self.finished = True
+        elif name == "$dumpfile":
+            # Like vvp, the file is fixed once the first $dumpvars has run.
+            if not self._dump_requests:
+                self._dumpfile = args[0]
+        elif name == "$dumpvars":
+            levels, targets = args
+            if not targets:
+                self._dump_requests.append((levels, None, None))
+            for path, signal in targets:
+                self._dump_requests.append((levels, path, signal))
+        elif name == "$dumpoff":
+            self._dumping = False
+        elif name == "$dumpon":
+            self._dumping = True
+
+    def _format(self, args: Tuple[Any, ...], scope: Scope, radix: str = "d") -> str:
+        pieces: List[str] = []
+        queue = list(args)
+        while queue:
+            arg = queue.pop(0)
+            if arg is None:
+                pieces.append(" ")
+                continue
+            if arg.op != "str":
+                pieces.append(self._format_value(radix, arg, "", "", scope))
+                continue
+
+            text = arg.args[0]
+            position = 0
+            for match in _FORMAT_RE.finditer(text):
+                pieces.append(text[position:match.start()])
+                position = match.end()
+                flag, width, code = match.groups()
+                if code == "%":
+                    pieces.append("%")
+                elif code in "mM":
+                    pieces.append(scope.dotted)
+                elif not queue:
+                    pieces.append(match.group())
+                else:
+                    value_arg = queue.pop(0)
+                    pieces.append(self._format_value(code.lower(), value_arg, flag, width, scope))
+            pieces.append(text[position:])
+        return "".join(pieces)
+
+    def _format_value(self, code: str, arg: Optional[Expr], flag: str, width_text: str, scope: Scope) -> str:
+        if arg is None:
+            return ""
+        if code == "s" and arg.op == "str":
+            text = arg.args[0]
+            return text.rjust(int(width_text)) if width_text else text
+
+        value = self._eval(arg, arg.width, arg.signed)
+        if flag == "0":
+            width_text = "0" + width_text
+        minimum = int(width_text) if width_text else None
+
+        if code == "t":
+            body = "x" if value.bval else str(value.to_int() * scope.time_factor)
+            field = 20 if minimum is None else minimum
+            return body.ljust(field) if flag == "-" else body.rjust(field)
+        if code in ("d", "i"):
+            body = self._decimal_text(value)
+            if minimum is None:
+                limit = -(1 << (value.width - 1)) if value.signed else (1 << value.width) - 1
+                minimum = len(str(limit))
+            return body.ljust(minimum) if flag == "-" else body.rjust(minimum)
+        if code in ("b", "h", "x", "o"):
+            bits = {"b": 1, "o": 3}.get(code, 4)
+            body = self._radix_text(value, bits)
+            if minimum == 0:
+                body = body.lstrip("0") or "0"
+            elif minimum is not None:
+                body = body.rjust(minimum, "0")
+            return body
+        if code == "c":
+            return chr(value.aval & 0xFF)
+        if code == "s":
+            data = value.aval.to_bytes((value.width + 7) // 8, "big").lstrip(b"\0")
+            return data.decode("latin-1")
+        if code in ("e", "f", "g"):
+            number = float(value.to_int())
+            return format(number, code if minimum is None else f"{minimum}{code}")
+        raise UnsupportedConstruct(f"format %{code} is not supported")
+
+    @staticmethod
+    def _decimal_text(value: Logic) -> str:
+        if not value.bval:
+            return str(value.to_int())
+        all_bits = value.mask
+        if value.bval == all_bits:
+            return "z" if value.aval == 0 else "x" if value.aval == all_bits else "X"
+        return "X" if value.aval & value.bval else "Z"
+
+    @staticmethod
+    def _radix_text(value: Logic, bits: int) -> str:
+        digits = []
+        for start in range(0, value.width, bits):
+            width = min(bits, value.width - start)
+            mask = ((1 << width) - 1) << start
+            aval = (value.aval & mask) >> start
+            bval = (value.bval & mask) >> start
+            full = (1 << width) - 1
+            if not bval:
+                digits.append("0123456789abcdef"[aval])
+            elif bval == full and aval == full:
+                digits.append("x")
+            elif bval == full and aval == 0:
+                digits.append("z")
+            elif aval & bval:
+                digits.append("X")
+            else:
+                digits.append("Z")
+        return "".join(reversed(digits))
+
+    def _emit(self, text: str) -> None:
+        self._output.append(text)
+        self._output_bytes += len(text)
+        if self.max_log_bytes and self._output_bytes > self.max_log_bytes:
+            raise SimulationBudgetExceeded("log_bytes", self.max_log_bytes)
+
+    def _write_dump(self, text: str) -> None:
+        self._dump_handle.write(text)
+        self._dump_bytes += len(text)
+        if self.max_dump_bytes and self._dump_bytes > self.max_dump_bytes:
+            raise SimulationBudgetExceeded("waveform_bytes", self.max_dump_bytes)
+
+    # -- end of timestep ---------------------------------------------------
+
+    def _end_of_timestep(self) -> None:
+        strobes, self._strobes = self._strobes, []
+        for args, scope, radix in strobes:
+            self._emit(self._format(args, scope, radix) + "\n")
+
+        if self._monitor is not None and self._monitor_enabled:
+            args, scope, radix = self._monitor
+            snapshot = tuple(
+                (value.aval, value.bval)
+                for value in (
+                    self._eval(arg, arg.width, arg.signed)
+                    for arg in args
+                    if arg is not None and arg.op not in ("time", "str")
+                )
+            )
+            if snapshot != self._monitor_last:
+                self._monitor_last = snapshot
+                self._emit(self._format(args, scope, radix) + "\n")
+
+        self._sample_dump()
+
+    def _selected_dump_signals(self) -> List[Signal]:
+        selected: Dict[Signal, None] = {}
+        for levels, path, signal in self._dump_requests:
+            if signal is not None:
+                selected[signal] = None
+                continue
+            for candidate in self.signals:
+                if path is not None and candidate.scope[: len(path)] != path:
+                    continue
+                depth = len(candidate.scope) - (len(path) if path is not None else 1)
+                if levels and depth >= levels:
+                    continue
+                selected[candidate] = None
+        return list(selected)
+
+    def _sample_dump(self) -> None:
+        if not self._dump_requests:
+            return
+        if not self._dump_started:
+            self._start_dump()
+            return
+        if not self._dumping or self._dump_handle is None:
+            return
+
+        changes = []
+        for signal in self._dump_signals:
+            current = (signal.aval, signal.bval)
+            if self._dump_last[signal] != current:
+                self._dump_last[signal] = current
+                changes.append(self._dump_value(signal))
+        if changes:
+            self._write_dump(f"#{self.time}\n" + "\n".join(changes) + "\n")
+            self._dump_time = self.time
+
+    def _start_dump(self) -> None:
+        self._dump_started = True
+        self._dump_signals = self._selected_dump_signals()
+        path = os.path.join(self.workdir, self._dumpfile or DEFAULT_DUMPFILE)
+        self._dump_handle = open(path, "w", encoding="utf-8")
+        self._dump_path = path
+
+        handle = self._dump_handle
+        handle.write(f"$date\n\t{datetime.now().strftime('%a %b %d %H:%M:%S %Y')}\n$end\n")
+        handle.write("$version\n\tvlsi-assistant native simulator\n$end\n")
+        handle.write(f"$timescale\n\t{_timescale_text(self.precision)}\n$end\n")
+
+        for index, signal in enumerate(self._dump_signals):
+            signal.vcd_code = self._vcd_code(index)
+
+        by_scope: Dict[Tuple[str, ...], List[Signal]] = {}
+        for signal in self._dump_signals:
+            by_scope.setdefault(signal.scope, []).append(signal)
+
+        open_scopes: List[str] = []
+        for scope in self.scopes:
+            members = by_scope.get(scope.path)
+            if not members:
+                continue
+            common = 0
+            while common < min(len(open_scopes), len(scope.path)) and open_scopes[common] == scope.path[common]:
+                common += 1
+            while len(open_scopes) > common:
+                handle.write("$upscope $end\n")
+                open_scopes.pop()
+            for name in scope.path[common:]:
+                handle.write(f"$scope module {name} $end\n")
+                open_scopes.append(name)
+            for signal in members:
+                var_type = _VCD_TYPES.get(signal.kind, "wire")
+                reference = signal.name
+                if signal.width > 1 and var_type in ("reg", "wire"):
+                    reference += f" [{signal.msb}:{signal.lsb}]"
+                handle.write(f"$var {var_type} {signal.width} {signal.vcd_code} {reference} $end\n")
+        while open_scopes:
+            handle.write("$upscope $end\n")
+            open_scopes.pop()
+        handle.write("$enddefinitions $end\n")
+
+        handle.write(f"#{self.time}\n$dumpvars\n")
+        for signal in self._dump_signals:
+            self._dump_last[signal] = (signal.aval, signal.bval)
+            handle.write(self._dump_value(signal) + "\n")
+        handle.write("$end\n")
+        self._dump_time = self.time
+
+    @staticmethod
+    def _vcd_code(index: int) -> str:
+        code = ""
+        index += 1
+        while index:
+            index -= 1
+            code += chr(33 + index % 94)
+            index //= 94
+        return code
+
+    @staticmethod
+    def _dump_value(signal: Signal) -> str:
+        bits = Logic(signal.width, signal.aval, signal.bval).bits()
+        if signal.width == 1:
+            return f"{bits}{signal.vcd_code}"
+        return f"b{bits} {signal.vcd_code}"
+
+    # -- main loop -----------------------------------------------------------
+
+    def run(self) -> NativeResult:
+        self._deadline = time.monotonic() + self.timeout
+        for driver in self.drivers:
+            driver.pending = True
+            self._active.append(driver)
+        # always blocks reach their first event control before initial blocks start driving.
+        self._active.extend(process for process in self.processes if process.name == "always")
+        self._active.extend(process for process in self.processes if process.name != "always")
+
+        try:
+            while True:
+                self._run_timestep()
+                self._end_of_timestep()
+                if self.finished or not self._future:
+                    break
+                self.time = self._future[0][0]
+                while self._future and self._future[0][0] == self.time:
+                    _, _, kind, payload = heapq.heappop(self._future)
+                    if kind == "resume":
+                        self._active.append(payload)
+                    elif kind == "nba":
+                        self._nba.append(payload)
+                    else:
+                        self._active.append(payload)
+        finally:
+            vcd_file = self._close_dump()
+
+        return NativeResult("".join(self._output), vcd_file, self.time, self.finished)
+
+    def _run_timestep(self) -> None:
+        active, inactive = self._active, self._inactive
+        while not self.finished:
+            if active:
+                item = active.popleft()
+                if isinstance(item, Driver):
+                    self._run_driver(item)
+                else:
+                    self._resume(item)
+            elif inactive:
+                active.extend(inactive)
+                inactive.clear()
+            elif self._nba:
+                updates, self._nba = self._nba, []
+                for targets, value in updates:
+                    self._write_targets(targets, value)
+            else:
+                return
+
+    def _run_driver(self, driver: Driver) -> None:
+        driver.pending = False
+        self._tick()
+        value = driver.evaluate()
+        if driver.delay:
+            self._schedule(self.time + driver.delay, "write", _DelayedWrite(self, driver.lhs, value))
+        else:
+            self._write_targets(self._resolve_lhs(driver.lhs), value)
+
+    def _resume(self, process: Any) -> None:
+        if isinstance(process, _DelayedWrite):
+            process.apply()
+            return
+        try:
+            command = process.generator.send(None)
+        except StopIteration:
+            return
+        if command[0] != "finish":
+            self._suspend(process, command)
+
+    def _close_dump(self) -> Optional[str]:
+        if self._dump_handle is None:
+            return None
+        if self._dump_time is not None and self.time > self._dump_time:
+            self._dump_handle.write(f"#{self.time}\n")
+        self._dump_handle.close()
+        self._dump_handle = None
+        return self._dump_path
+
+
+class _DelayedWrite:
+    """A continuous-assignment update scheduled ``#delay`` after its inputs changed."""
+
+    __slots__ = ("simulator", "lhs", "value")
+
+    def __init__(self, simulator: NativeSimulator, lhs: Any, value: Logic) -> None:
+        self.simulator = simulator
+        self.lhs = lhs
+        self.value = value
+
+    def apply(self) -> None:
+        self.simulator._write_targets(self.simulator._resolve_lhs(self.lhs), self.value)
+
+
+
+def run_native(source: str, workdir: str, timeout: float = 10.0) -> NativeResult:
+    """Parse, elaborate and run ``source``; the VCD (if any) is written inside ``workdir``.
+
+    Raises VerilogSyntaxError (including ElaborationError) for invalid designs,
+    UnsupportedConstruct for valid Verilog outside the supported subset and
+    SimulationTimeout when the run exceeds ``timeout`` seconds.
+    """
+
+    return NativeSimulator(source, workdir, timeout=timeout).run()
@@ -0,0 +1,234 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from simulator import VerilogSimulator
+from vcd_index import load_signals, load_vcd_index
+from verilog_templates import TEMPLATES
+
+
+GOLDEN_DIR = os.getenv(
+    "REGRESSION_GOLDEN_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden"),
+)
+PHASES = ("compile", "run", "parse")
+
+
+class TemplateResult(NamedTuple):
+    """Outcome of simulating one template.
+
+    ``status`` is "pass", "fail" (waveform differs from the golden), "error" (the
+    simulation itself failed), "missing" (no golden stored) or "updated".
+    """
+
+    name: str
+    status: str
+    timings: Dict[str, float]
+    total: float
+    detail: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "timings": {phase: round(seconds, 6) for phase, seconds in self.timings.items()},
+            "total": round(self.total, 6),
+            "detail": self.detail,
+        }
+
+
+_worker_simulator: Optional[VerilogSimulator] = None
+
+
+def _golden_path(name: str, golden_dir: str) -> str:
+    return os.path.join(golden_dir, f"{name}.json")
+
+
+def canonical_waveform(vcd_file: str) -> Dict[str, Any]:
+    """Columnar waveform keyed by hierarchical path, independent of the engine.
+
+    Identifier codes and how many of them alias one net differ between iverilog and
+    the native engine, so every declared path is read on its own; per path only the
+    last value at each timestamp is kept and repeats of the previous value dropped.
+    """
+
+    index = load_vcd_index(vcd_file)
+    paths = list(dict.fromkeys(entry["path"] for entry in index["signals"]))
+    columnar = load_signals(vcd_file, paths, index=index).to_columnar()
+    signals: Dict[str, Any] = {}
+    for path, trace in columnar["signals"].items():
+        times: List[int] = []
+        values: List[Any] = []
+        for time_point, value in zip(trace["times"], trace["values"]):
+            if times and times[-1] == time_point:
+                times.pop()
+                values.pop()
+            if values and values[-1] == value:
+                continue
+            times.append(time_point)
+            values.append(value)
+        signals[path] = {"width": trace["width"], "times": times, "values": values}
+    return {"end_time": index["end_time"], "signals": signals}
+
+
+def _compare(expected: Dict[str, Any], actual: Dict[str, Any]) -> Optional[str]:
+    """First difference between two columnar waveforms, or None when they match."""
+
+    expected_signals, actual_signals = expected.get("signals", {}), actual.get("signals", {})
+    if set(expected_signals) != set(actual_signals):
+        missing = sorted(set(expected_signals) - set(actual_signals))
+        extra = sorted(set(actual_signals) - set(expected_signals))
+        return f"signal set differs (missing {missing}, unexpected {extra})"
+    for name in sorted(expected_signals):
+        want, got = expected_signals[name], actual_signals[name]
+        if want == got:
+            continue
+        for index, (time_point, value) in enumerate(zip(want["times"], want["values"])):
+            if index >= len(got["times"]) or (got["times"][index], got["values"][index]) != (time_point, value):
+                return f"{name} differs at t={time_point}"
+        return f"{name} has extra transitions after t={want['times'][-1] if want['times'] else 0}"
+    if expected.get("end_time") != actual.get("end_time"):
+        return f"end time {actual.get('end_time')} != {expected.get('end_time')}"
+    return None
+
+
+def run_template(name: str, golden_dir: str = GOLDEN_DIR, update_golden: bool = False) -> TemplateResult:
+    """Simulate one template, timing each phase, and check it against its golden waveform."""
+
+    global _worker_simulator
+    if _worker_simulator is None:
+        _worker_simulator = VerilogSimulator()
+        # Check real simulations, not the prebuilt template results.
+        _worker_simulator.template_artifacts = None
+
+    template = TEMPLATES[name]
+    with tempfile.TemporaryDirectory(prefix="regression_") as persist_dir:
+        started = time.perf_counter()
+        result = _worker_simulator.simulate(template["code"], template["testbench"], persist_waveform_dir=persist_dir)
+        total = time.perf_counter() - started
+        timings: Dict[str, float] = result.get("timings", {})
+
+        if not result.get("success"):
+            return TemplateResult(name, "error", timings, total, result.get("error", "Simulation failed"))
+        if not result.get("waveform_file"):
+            return TemplateResult(name, "error", timings, total, "no waveform was produced")
+        waveform = canonical_waveform(os.path.join(persist_dir, result["waveform_file"]))
+
+    path = _golden_path(name, golden_dir)
+    if update_golden:
+        os.makedirs(golden_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(waveform, handle, sort_keys=True)
+        return TemplateResult(name, "updated", timings, total)
+    if not os.path.exists(path):
+        return TemplateResult(name, "missing", timings, total, "no golden waveform stored")
+
+    with open(path, "r", encoding="utf-8") as handle:
+        expected = json.load(handle)
+    difference = _compare(expected, json.loads(json.dumps(waveform)))
+    return TemplateResult(name, "fail" if difference else "pass", timings, total, difference)
+
+
+def run_regression(
+    names: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    golden_dir: str = GOLDEN_DIR,
+    update_golden: bool = False,
+    executor: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Simulate the chosen templates (all by default) across a process pool.
+
+    With ``executor`` (a :class:`sim_executor.SimulationExecutor`) the templates
+    run in its pool, one admission slot each, and ``workers`` is ignored;
+    otherwise a pool of ``workers`` processes is started for this run.
+    Returns per-template results plus a summary with status counts, per-phase
+    latency statistics and aggregate simulations per second.
+    """
+
+    selected = list(names) if names else list(TEMPLATES)
+    unknown = [name for name in selected if name not in TEMPLATES]
+    if unknown:
+        raise KeyError(f"Unknown templates: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    if executor is not None:
+        workers = min(executor.workers, len(selected))
+        results = executor.run_templates(selected, golden_dir, update_golden)
+    else:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(selected)))
+        context = multiprocessing.get_context(os.getenv("SIM_START_METHOD", "spawn"))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(run_template, name, golden_dir, update_golden) for name in selected]
+            results = [future.result() for future in futures]
+    wall_time = time.perf_counter() - started
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+
+    phases: Dict[str, Dict[str, float]] = {}
+    for phase in PHASES + ("total",):
+        samples = [result.total if phase == "total" else result.timings.get(phase, 0.0) for result in results]
+        phases[phase] = {
+            "mean": round(sum(samples) / len(samples), 6),
+            "max": round(max(samples), 6),
+        }
+
+    return {
+        "templates": [result.to_dict() for result in results],
+        "summary": {
+            "total": len(results),
+            "counts": counts,
+            "passed": counts.get("pass", 0) + counts.get("updated", 0) == len(results),
+            "workers": workers,
+            "wall_time": round(wall_time, 6),
+            "simulations_per_second": round(len(results) / wall_time, 3) if wall_time else None,
+            "phases": phases,
+        },
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"{'template':<28} {'status':<8} " + " ".join(f"{phase:>9}" for phase in PHASES + ("total",)))
+    for entry in report["templates"]:
+        columns = [entry["timings"].get(phase, 0.0) for phase in PHASES] + [entry["total"]]
+        line = f"{entry['name']:<28} {entry['status']:<8} " + " ".join(f"{value * 1000:8.1f}ms" for value in columns)
+        print(line + (f"  {entry['detail']}" if entry["detail"] and entry["status"] != "pass" else ""))
+    summary = report["summary"]
+    print(
+        f"\n{summary['total']} simulations on {summary['workers']} workers in {summary['wall_time']:.3f}s "
+        f"({summary['simulations_per_second']} sims/s); "
+        + ", ".join(f"{status}: {count}" for status, count in sorted(summary["counts"].items()))
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate the bundled templates against golden waveforms.")
+    parser.add_argument("templates", nargs="*", help="template names (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR, help="directory holding <template>.json goldens")
+    parser.add_argument("--update-golden", action="store_true", help="store the current waveforms as goldens")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_regression(args.templates, args.workers, args.golden_dir, args.update_golden)
+    except KeyError as exc:
+        print(exc.args[0], file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0 if report["summary"]["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
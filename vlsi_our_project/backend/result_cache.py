@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from waveform_binary import binary_path_for, read_binary_waveform
+from waveform_blobs import SIDECAR_SUFFIXES, WaveformBlobStore
+
+RESULT_SUFFIX = ".result.json"
+
+
+class ResultCache:
+    """Memoised ``simulate()`` results: an in-process LRU over a disk tier shared by the host.
+
+    Only successful results are kept, keyed on the sources and the simulator
+    identity (engine, toolchain, limits, testbench generation settings). The memory
+    tier holds the parsed ``WaveformStore`` and is bounded by its size in bytes. The
+    disk tier keeps the signal list and log as ``<key>.result.json`` next to a
+    :class:`WaveformBlobStore` of the persisted waveform, hard-linked from the
+    uploads directory. A disk hit is decoded from the waveform's memory-mapped
+    binary sidecar. Either tier's hit links the waveform back into the uploads
+    directory (taking a reference) when the caller persists waveforms.
+    """
+
+    def __init__(self, directory: Optional[str], memory_bytes: int, disk_bytes: int) -> None:
+        self.directory = directory if disk_bytes > 0 else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.blobs = WaveformBlobStore(self.directory) if self.directory else None
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    @staticmethod
+    def make_key(design_code: str, testbench_code: str, identity: str) -> str:
+        digest = hashlib.sha256()
+        for part in (identity, design_code, testbench_code):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def fetch(self, key: str, persist_waveform_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The cached result for ``key``, or None on a miss."""
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+        if cached is not None:
+            response = self._materialise(cached[0], persist_waveform_dir)
+            if response is not None:
+                self._count("memory_hits")
+                return response
+
+        entry = self._load_disk(key)
+        if entry is not None:
+            response = self._materialise(entry, persist_waveform_dir)
+            if response is not None:
+                self._remember(key, entry)
+                self._count("disk_hits")
+                return response
+
+        self._count("misses")
+        return None
+
+    def store(self, key: str, result: Dict[str, Any], persist_waveform_dir: Optional[str] = None) -> None:
+        """Keep a successful result; ``waveform_file`` must live in ``persist_waveform_dir``."""
+
+        if not result.get("success") or result.get("waveform") is None:
+            return
+        entry = {
+            "waveform": result["waveform"],
+            "signals": result.get("signals", []),
+            "log": result.get("log", ""),
+            "waveform_file": result.get("waveform_file") if persist_waveform_dir else None,
+        }
+        self._remember(key, entry)
+        self._count("stores")
+        if self.blobs is not None and entry["waveform_file"]:
+            self._store_disk(key, entry, persist_waveform_dir)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_used
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _materialise(self, entry: Dict[str, Any], persist_waveform_dir: Optional[str]) -> Optional[Dict[str, Any]]:
+        response: Dict[str, Any] = {
+            "success": True,
+            "waveform": entry["waveform"],
+            "signals": entry["signals"],
+            "log": entry["log"],
+        }
+        if not persist_waveform_dir:
+            return response
+        filename = entry.get("waveform_file")
+        if not filename:
+            return None
+        target = WaveformBlobStore(persist_waveform_dir)
+        try:
+            if self.blobs is not None and os.path.exists(self.blobs.path_for(filename)):
+                target.adopt(self.blobs, filename)
+            else:
+                target.acquire(filename)
+        except FileNotFoundError:
+            # Evicted from uploads/ and not on disk here: simulate again.
+            return None
+        response["waveform_file"], response["waveform_url"] = filename, f"/uploads/{filename}"
+        return response
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        size = entry["waveform"].nbytes()
+        if self.memory_bytes <= 0 or size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= previous[1]
+            self._memory[key] = (entry, size)
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_used -= evicted
+                self._stats["memory_evictions"] += 1
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.directory or "", key + RESULT_SUFFIX)
+
+    def _load_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.blobs is None:
+            return None
+        path = self._meta_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                meta = json.load(handle)
+            waveform = read_binary_waveform(binary_path_for(self.blobs.path_for(meta["waveform_file"])))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"Result cache read error: {exc}")
+            return None
+        return {**meta, "waveform": waveform}
+
+    def _store_disk(self, key: str, entry: Dict[str, Any], persist_waveform_dir: Optional[str]) -> None:
+        path = self._meta_path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+        try:
+            self.blobs.adopt(WaveformBlobStore(persist_waveform_dir), entry["waveform_file"])
+            staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(staging, "w", encoding="utf-8") as handle:
+                json.dump(
+                    {"waveform_file": entry["waveform_file"], "signals": entry["signals"], "log": entry["log"]},
+                    handle,
+                )
+            try:
+                os.link(staging, path)
+            except FileExistsError:
+                # Another process stored the same result first; drop our reference.
+                self.blobs.release(entry["waveform_file"])
+            finally:
+                os.remove(staging)
+            self._evict_disk()
+        except Exception as exc:  # noqa: BLE001
+            print(f"Result cache write error: {exc}")
+
+    def _evict_disk(self) -> None:
+        metas: List[Tuple[float, int, str]] = []
+        total = 0
+        with os.scandir(self.directory) as listing:
+            for item in listing:
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                if item.name.endswith(RESULT_SUFFIX):
+                    metas.append((stat.st_mtime, stat.st_size, item.path))
+
+        metas.sort()
+        for _, size, path in metas:
+            if total <= self.disk_bytes:
+                break
+            try:
+                with open(path, "r", encoding="utf-8") as handle:
+                    filename = json.load(handle).get("waveform_file")
+                os.remove(path)
+            except (OSError, ValueError):
+                continue
+            total -= size
+            self._count("disk_evictions")
+            if filename:
+                blob = self.blobs.path_for(filename)
+                blob_size = sum(os.path.getsize(blob + suffix) for suffix in SIDECAR_SUFFIXES
+                                if os.path.exists(blob + suffix))
+                if self.blobs.release(filename) == 0:
+                    total -= blob_size
+
+
+def default_result_cache() -> Optional[ResultCache]:
+    """Build the cache from environment settings; both sizes at 0 disable it."""
+
+    memory_mb = float(os.getenv("SIM_RESULT_CACHE_MEMORY_MB", "64"))
+    disk_mb = float(os.getenv("SIM_RESULT_CACHE_MAX_MB", "256"))
+    if memory_mb <= 0 and disk_mb <= 0:
+        return None
+    directory = os.getenv(
+        "SIM_RESULT_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "vlsi_assistant", "results"),
+    )
+    return ResultCache(directory, int(memory_mb * 1024 * 1024), int(disk_mb * 1024 * 1024))
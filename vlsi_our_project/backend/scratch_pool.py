@@ -0,0 +1,111 @@
+import atexit
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ScratchPool:
+    """Reusable scratch directories for simulation runs, ideally on a tmpfs.
+
+    Directories are created once per process and handed out by :meth:`lease`. A
+    returned directory is emptied by a background thread before it goes back to the
+    free list, so neither creating nor deleting a work directory sits on the request
+    path. When every directory is in use a fresh one is made; it joins the pool on
+    release if there is room and is removed otherwise. A ``size`` of 0 falls back to
+    one ``TemporaryDirectory`` per run.
+    """
+
+    def __init__(self, root: str, size: int) -> None:
+        self.root = root
+        self.size = size
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._base = ""
+        self._free: "queue.Queue[str]" = queue.Queue()
+        self._dirty: "queue.Queue[str]" = queue.Queue()
+
+    def _ensure_started(self) -> None:
+        # Keyed on the pid so a forked worker builds its own pool and cleaner thread.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._free = queue.Queue()
+            self._dirty = queue.Queue()
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                self._base = tempfile.mkdtemp(prefix=f"pool-{os.getpid()}-", dir=self.root)
+            except OSError as exc:
+                print(f"Scratch pool unavailable under {self.root}: {exc}")
+                self._base = tempfile.mkdtemp(prefix=f"pool-{os.getpid()}-")
+            for _ in range(self.size):
+                self._free.put(tempfile.mkdtemp(dir=self._base))
+            threading.Thread(target=self._clean_loop, name="scratch-cleaner", daemon=True).start()
+            atexit.register(shutil.rmtree, self._base, True)
+            self._pid = os.getpid()
+
+    @contextmanager
+    def lease(self) -> Iterator[str]:
+        """An empty directory for the duration of the ``with`` block."""
+
+        if self.size <= 0:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                yield tmpdir
+            return
+        self._ensure_started()
+        try:
+            path = self._free.get_nowait()
+        except queue.Empty:
+            path = tempfile.mkdtemp(dir=self._base)
+        try:
+            yield path
+        finally:
+            self._dirty.put(path)
+
+    def _clean_loop(self) -> None:
+        while True:
+            path = self._dirty.get()
+            if self._free.qsize() < self.size and self._empty(path):
+                self._free.put(path)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _empty(path: str) -> bool:
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.remove(entry.path)
+            return True
+        except Exception as exc:  # noqa: BLE001
+            print(f"Scratch directory cleanup error: {exc}")
+            return False
+
+
+_default_pool: Optional[ScratchPool] = None
+
+
+def _default_root() -> str:
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return os.path.join("/dev/shm", "vlsi_assistant")
+    return os.path.join(tempfile.gettempdir(), "vlsi_assistant", "scratch")
+
+
+def default_scratch_pool() -> ScratchPool:
+    """The process-wide pool from environment settings; ``SIM_SCRATCH_POOL_SIZE=0`` disables it."""
+
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ScratchPool(
+            os.getenv("SIM_SCRATCH_DIR", _default_root()),
+            int(os.getenv("SIM_SCRATCH_POOL_SIZE", "4")),
+        )
+    return _default_pool
@@ -0,0 +1,317 @@
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+from vcd_reader import VcdVar, iter_vcd_events
+
+
+# Every merged testbench becomes an instance of this wrapper so the batch runs as
+# one elaboration, one compile and one vvp process.
+BATCH_TOP = "__batch"
+DONE_PORT = "__batch_done"
+RUN_MARKER = "<<batch-run:{}>>"
+END_MARKER = RUN_MARKER.format("end")
+# Written where a run's $finish was: anything the run prints afterwards is dropped.
+DONE_MARKER = "<<batch-done:{}>>"
+
+_MARKER_RE = re.compile(r"<<batch-(run|done):(\d+|end)>>")
+_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\\n])*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\\n])*"')
+_MODULE_RE = re.compile(r"\bmodule\s+([A-Za-z_]\w*)")
+_FINISH_RE = re.compile(r"\$(?:finish|stop)\b\s*(?:\([^;]*\))?\s*;")
+_DUMPFILE_RE = re.compile(r'\$dumpfile\b\s*(?:\((?:"(?:\\.|[^"\\\n])*"|[^;])*\))?\s*;')
+_DUMPVARS_RE = re.compile(r"\$dumpvars\b\s*(?:\(([^;]*)\))?\s*;")
+_OUTPUT_RE = re.compile(r'(\$(?:display|write|strobe|monitor)[bho]?)\b(\s*\()?(\s*[")])?')
+
+
+class BatchRun(NamedTuple):
+    """One testbench merged into a batch."""
+
+    index: int
+    top: str
+    instance: str
+    dump_levels: Optional[int]
+
+
+class BatchPlan(NamedTuple):
+    """Merged testbench source plus the runs it contains and the ones that must run alone."""
+
+    testbench: str
+    runs: List[BatchRun]
+    solo: List[int]
+
+
+def strip_comments(code: str) -> str:
+    """Blank out comments, keeping string literals and line numbers intact."""
+
+    def replace(match: "re.Match[str]") -> str:
+        text = match.group()
+        if text.startswith('"'):
+            return text
+        return " " if text.startswith("//") else "\n" * text.count("\n") or " "
+
+    return _TOKEN_RE.sub(replace, code)
+
+
+def _outside_strings(code: str, pattern: "re.Pattern[str]", replacement: str) -> str:
+    pieces: List[str] = []
+    position = 0
+    for match in _STRING_RE.finditer(code):
+        pieces.append(pattern.sub(replacement, code[position:match.start()]))
+        pieces.append(match.group())
+        position = match.end()
+    pieces.append(pattern.sub(replacement, code[position:]))
+    return "".join(pieces)
+
+
+def _find_top(testbench: str, design: str) -> Tuple[List[str], List[str]]:
+    """Modules the testbench defines and the ones nothing instantiates."""
+
+    defined = _MODULE_RE.findall(testbench)
+    bodies = _MODULE_RE.sub("module", _STRING_RE.sub('""', design + "\n" + testbench))
+    tops = [
+        name
+        for name in defined
+        if not re.search(rf"\b{re.escape(name)}\b\s*(?:#|[A-Za-z_]\w*\s*[(\[])", bodies)
+    ]
+    return defined, tops
+
+
+def _dump_levels(testbench: str, top: str) -> Tuple[bool, Optional[int]]:
+    """Depth of the testbench's ``$dumpvars`` on itself; False when it dumps anything else."""
+
+    levels: Optional[int] = None
+    for match in _DUMPVARS_RE.finditer(testbench):
+        args = [arg.strip() for arg in (match.group(1) or "").split(",") if arg.strip()]
+        if not args:
+            depth = 0
+        elif len(args) == 2 and args[0].isdigit() and args[1] == top:
+            depth = int(args[0])
+        else:
+            return False, None
+        # Depth 0 means the whole hierarchy, so it wins over any limited depth.
+        levels = depth if levels is None or depth == 0 else (0 if levels == 0 else max(levels, depth))
+    return True, levels
+
+
+def _tag_output(testbench: str, index: int) -> str:
+    """Prefix everything a run prints with its marker so the log can be split afterwards."""
+
+    marker = RUN_MARKER.format(index)
+
+    def replace(match: "re.Match[str]") -> str:
+        task, paren, following = match.groups()
+        if paren is None or (following or "").strip() == ")":
+            return f'{task}("{marker}")'
+        if following:
+            return f'{task}("{marker}'
+        return f'{task}("{marker}", '
+
+    return _OUTPUT_RE.sub(replace, testbench)
+
+
+def _rewrite(testbench: str, defined: List[str], top: str, index: int) -> str:
+    code = _DUMPFILE_RE.sub("begin end", testbench)
+    code = _DUMPVARS_RE.sub("begin end", code)
+    code = _tag_output(code, index)
+    done = DONE_MARKER.format(index)
+    code = _FINISH_RE.sub(f'begin $write("{done}"); {DONE_PORT} = 1\'b1; wait (1\'b0); end', code)
+    for name in defined:
+        code = _outside_strings(code, re.compile(rf"\b{re.escape(name)}\b"), f"{name}__run{index}")
+    header = re.compile(rf"\bmodule\s+{re.escape(top)}__run{index}\s*(?:\(\s*\))?\s*;")
+    return header.sub(
+        f"module {top}__run{index}(output reg {DONE_PORT});\n    initial {DONE_PORT} = 1'b0;",
+        code,
+        count=1,
+    )
+
+
+def plan_batch(design_code: str, testbenches: List[str], vcd_file: str) -> BatchPlan:
+    """Merge the testbenches that can share one simulation; the rest run alone.
+
+    A testbench can be merged when it has a single top module without ports, ends
+    with ``$finish``/``$stop``, dumps (if at all) only its own hierarchy, and does not
+    compete with another run for the single active ``$monitor``. Merged runs dump
+    from time 0 and report ``%m`` relative to the batch wrapper.
+    """
+
+    design = strip_comments(design_code)
+    runs: List[BatchRun] = []
+    solo: List[int] = []
+    sources: List[str] = []
+    monitor_taken = False
+
+    for index, testbench_code in enumerate(testbenches):
+        testbench = strip_comments(testbench_code or "")
+        defined, tops = _find_top(testbench, design)
+        if len(tops) != 1 or not re.search(rf"\bmodule\s+{re.escape(tops[0])}\s*(?:\(\s*\))?\s*;", testbench):
+            solo.append(index)
+            continue
+        dumps_self, levels = _dump_levels(testbench, tops[0])
+        uses_monitor = "$monitor" in testbench
+        if not dumps_self or not _FINISH_RE.search(testbench) or (uses_monitor and monitor_taken):
+            solo.append(index)
+            continue
+        monitor_taken = monitor_taken or uses_monitor
+        runs.append(BatchRun(index, tops[0], f"run{index}", levels))
+        sources.append(_rewrite(testbench, defined, tops[0], index))
+
+    if len(runs) < 2:
+        return BatchPlan("", [], sorted(solo + [run.index for run in runs]))
+
+    lines = [f"module {BATCH_TOP};"]
+    lines.extend(f"    wire {DONE_PORT}_{run.index};" for run in runs)
+    lines.extend(f"    {run.top}__run{run.index} {run.instance}(.{DONE_PORT}({DONE_PORT}_{run.index}));" for run in runs)
+    dumped = [run for run in runs if run.dump_levels is not None]
+    if dumped:
+        lines += ["", "    initial begin", f'        $dumpfile("{vcd_file}");']
+        for run in dumped:
+            lines.append(f"        $dumpvars({run.dump_levels}, {run.instance});")
+            lines.append(f"        $dumpvars(0, {DONE_PORT}_{run.index});")
+        lines.append("    end")
+    done = " && ".join(f"{DONE_PORT}_{run.index}" for run in runs)
+    lines += [
+        "",
+        "    initial begin",
+        f"        wait ({done});",
+        f'        $write("{END_MARKER}");',
+        "        $finish;",
+        "    end",
+        "endmodule",
+        "",
+    ]
+    return BatchPlan("\n".join(sources + ["\n".join(lines)]), runs, solo)
+
+
+def split_log(log: str, runs: List[BatchRun]) -> Tuple[str, Dict[int, str]]:
+    """Hand each run the output it printed up to its ``$finish``.
+
+    Untagged simulator chatter is returned separately. A finished run's other
+    processes (clocks, ``$monitor``, ``$strobe``) keep running while the rest of
+    the batch does; what they print is dropped, as a run of its own would have
+    ended there.
+    """
+
+    logs: Dict[int, List[str]] = {run.index: [] for run in runs}
+    shared: List[str] = []
+    finished: Set[int] = set()
+    owner: Optional[int] = None
+    position = 0
+
+    def take(text: str) -> None:
+        if owner is None:
+            shared.append(text)
+        elif owner not in finished:
+            logs[owner].append(text)
+
+    for match in _MARKER_RE.finditer(log):
+        take(log[position:match.start()])
+        kind, run = match.groups()
+        if kind == "done":
+            finished.add(int(run))
+        owner = None if kind == "done" or run == "end" else int(run)
+        position = match.end()
+    take(log[position:])
+    return "".join(shared), {index: "".join(pieces) for index, pieces in logs.items()}
+
+
+class _VcdSplitter:
+    """Streams the batch VCD into one file per dumped run, from ``vcd_reader``'s events."""
+
+    def __init__(self, runs: List[BatchRun], workdir: str) -> None:
+        self.runs = {run.instance: run for run in runs if run.dump_levels is not None}
+        self.workdir = workdir
+        self.paths: Dict[int, str] = {}
+        self.handles: Dict[int, TextIO] = {}
+        self.preamble: List[str] = []
+        self.scope: List[str] = []
+        self.owners: Dict[str, List[int]] = {}
+        self.done_codes: Dict[str, int] = {}
+        self.cut: Dict[int, int] = {}
+        self.written: Dict[int, int] = {}
+        self.current_time = 0
+
+    def split(self, vcd_file: str) -> Dict[int, str]:
+        try:
+            for event in iter_vcd_events(vcd_file):
+                kind = event[0]
+                if kind == "change":
+                    self._change(event[1], event[2])
+                elif kind == "time":
+                    self.current_time = event[1]
+                elif kind == "scope":
+                    self._enter(event[1], event[2])
+                elif kind == "upscope":
+                    self._leave()
+                elif kind == "var":
+                    self._var(event[1])
+                elif kind == "timescale":
+                    self.preamble.append(f"$timescale {event[1]} $end\n")
+                elif kind == "enddefinitions":
+                    for index in self.handles:
+                        self._write(index, "$enddefinitions $end\n")
+            for index, handle in self.handles.items():
+                end_time = self.cut.get(index, self.current_time)
+                if self.written.get(index, -1) < end_time:
+                    handle.write(f"#{end_time}\n")
+        finally:
+            for handle in self.handles.values():
+                handle.close()
+        return self.paths
+
+    def _write(self, index: int, text: str) -> None:
+        handle = self.handles.get(index)
+        if handle is None:
+            self.paths[index] = os.path.join(self.workdir, f"run{index}.vcd")
+            handle = self.handles[index] = open(self.paths[index], "w", encoding="utf-8")
+            handle.write("".join(self.preamble))
+        handle.write(text)
+
+    def _run_in_scope(self) -> Optional[BatchRun]:
+        if len(self.scope) > 1 and self.scope[0] == BATCH_TOP:
+            return self.runs.get(self.scope[1])
+        return None
+
+    def _enter(self, scope_type: str, name: str) -> None:
+        run = self._run_in_scope()
+        self.scope.append(name)
+        entered = self._run_in_scope() if len(self.scope) == 2 else None
+        if entered is not None:
+            self._write(entered.index, f"$scope module {entered.top} $end\n")
+        elif run is not None:
+            self._write(run.index, f"$scope {scope_type} {name} $end\n")
+
+    def _leave(self) -> None:
+        run = self._run_in_scope()
+        if self.scope:
+            self.scope.pop()
+        if run is not None:
+            self._write(run.index, "$upscope $end\n")
+
+    def _var(self, var: VcdVar) -> None:
+        run = self._run_in_scope()
+        if run is not None and var.name != DONE_PORT:
+            self.owners.setdefault(var.id_code, []).append(run.index)
+            reference = f"{var.name} {var.select}" if var.select else var.name
+            self._write(run.index, f"$var {var.var_type} {var.width} {var.id_code} {reference} $end\n")
+        elif self.scope == [BATCH_TOP] and var.name.startswith(f"{DONE_PORT}_"):
+            self.done_codes[var.id_code] = int(var.name[len(DONE_PORT) + 1:])
+
+    def _change(self, code: str, value: str) -> None:
+        now = self.current_time
+        for index in self.owners.get(code, ()):
+            if index in self.cut and now > self.cut[index]:
+                continue
+            if self.written.get(index) != now:
+                self.handles[index].write(f"#{now}\n")
+                self.written[index] = now
+            self.handles[index].write(f"{value}{code}\n" if len(value) == 1 else f"{value} {code}\n")
+        index = self.done_codes.get(code)
+        if index is not None and value == "1" and index not in self.cut:
+            self.cut[index] = now
+
+
+def split_vcd(vcd_file: str, runs: List[BatchRun], workdir: str) -> Dict[int, str]:
+    """Write one VCD per dumped run, re-rooted at its testbench and cut at its ``$finish``."""
+
+    return _VcdSplitter(runs, workdir).split(vcd_file)
@@ -0,0 +1,405 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import record_phase, record_phases, timed
+from regression import TemplateResult, run_template
+from result_cache import ResultCache, default_result_cache
+from sim_jobs import run_job
+from simulator import VerilogSimulator
+from template_artifacts import ensure_built
+from verilog_templates import TEMPLATES
+
+
+class SimulationQueueFull(Exception):
+    """Raised when every worker is busy and the admission queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Simulation queue is full")
+        self.retry_after = retry_after
+
+
+_worker_simulator: Optional[VerilogSimulator] = None
+
+
+def _get_worker_simulator() -> VerilogSimulator:
+    global _worker_simulator
+    if _worker_simulator is None:
+        _worker_simulator = VerilogSimulator()
+    return _worker_simulator
+
+
+def _run_in_worker(submitted_at: float, request: Dict[str, Any]) -> Tuple[float, float, Dict[str, Any]]:
+    """Entry point inside a pool process; one simulator (and compile cache) per worker."""
+
+    started_at = time.time()
+    result = _get_worker_simulator().simulate(**request)
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def _run_batch_in_worker(submitted_at: float, request: Dict[str, Any]) -> Tuple[float, float, Dict[str, Any]]:
+    started_at = time.time()
+    result = _get_worker_simulator().simulate_batch(**request)
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def _truth_table_in_worker(
+    submitted_at: float,
+    request: Dict[str, Any],
+    offset: int,
+    limit: int,
+) -> Tuple[float, float, Dict[str, Any]]:
+    started_at = time.time()
+    result = _get_worker_simulator().truth_table(**request)
+    table = result.pop("table", None)
+    if table is not None:
+        result.update(
+            module=table.module,
+            inputs=[{"name": name, "width": width} for name, width in table.inputs],
+            outputs=[{"name": name, "width": width} for name, width in table.outputs],
+            total_rows=table.row_count,
+            rows=table.rows(offset, limit),
+        )
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def _run_template_in_worker(
+    submitted_at: float,
+    name: str,
+    golden_dir: str,
+    update_golden: bool,
+) -> Tuple[float, float, TemplateResult]:
+    started_at = time.time()
+    result = run_template(name, golden_dir, update_golden)
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def _build_artifacts_in_worker(submitted_at: float) -> Tuple[float, float, Dict[str, Any]]:
+    started_at = time.time()
+    report = ensure_built(_get_worker_simulator()) or {}
+    return started_at - submitted_at, time.time() - started_at, report
+
+
+def _run_job_in_worker(
+    submitted_at: float,
+    jobs_dir: str,
+    job_id: str,
+    request: Dict[str, Any],
+) -> Tuple[float, float, Dict[str, Any]]:
+    started_at = time.time()
+    result = run_job(_get_worker_simulator(), jobs_dir, job_id, request)
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def _record_job_timings(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    queue_wait, _, result = future.result()
+    record_phase("executor", "queue_wait", queue_wait)
+    record_phases("simulator", result.get("timings", {}))
+
+
+class SimulationExecutor:
+    """Runs simulations on a process pool behind a bounded admission queue.
+
+    At most ``workers`` simulations run at once (never more than the machine has
+    cores) and at most ``queue_size`` more may wait; anything beyond that is
+    rejected immediately with :class:`SimulationQueueFull` instead of tying up a
+    request thread. Runs outside the pool (:meth:`acquire_slot`) cannot wait in
+    the queue, so they are also capped at ``workers`` at once. :meth:`simulate` answers repeated requests from ``result_cache``
+    without taking a slot.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        result_timeout: float = 60.0,
+        result_cache: Optional[ResultCache] = None,
+    ) -> None:
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self.queue_size = max(0, queue_size)
+        self.result_timeout = result_timeout
+        self.result_cache = result_cache
+        self._identity: Optional[str] = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._local_slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats: Dict[str, float] = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "run_time_total": 0.0,
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(os.getenv("SIM_START_METHOD", "spawn"))
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def _acquire(self, timeout: Optional[float] = None) -> None:
+        acquired = self._slots.acquire(blocking=False) if timeout is None else self._slots.acquire(timeout=timeout)
+        if not acquired:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise SimulationQueueFull(self._retry_after())
+
+    def _admit(
+        self,
+        worker_fn: Any,
+        *args: Any,
+        slot_timeout: Optional[float] = None,
+    ) -> "Future[Tuple[float, float, Any]]":
+        self._acquire(slot_timeout)
+        try:
+            future = self._get_pool().submit(worker_fn, time.time(), *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["in_flight"] += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def submit(
+        self,
+        design_code: str,
+        testbench_code: str = "",
+        persist_waveform_dir: Optional[str] = None,
+    ) -> "Future[Tuple[float, float, Dict[str, Any]]]":
+        request = {
+            "design_code": design_code,
+            "testbench_code": testbench_code,
+            "persist_waveform_dir": persist_waveform_dir,
+        }
+        return self._admit(_run_in_worker, request)
+
+    def submit_job(
+        self,
+        jobs_dir: str,
+        job_id: str,
+        design_code: str,
+        testbench_code: str = "",
+        persist_waveform_dir: Optional[str] = None,
+    ) -> "Future[Tuple[float, float, Dict[str, Any]]]":
+        """Queue a job created in a :class:`sim_jobs.JobStore`; progress goes to the store."""
+
+        request = {
+            "design_code": design_code,
+            "testbench_code": testbench_code,
+            "persist_waveform_dir": persist_waveform_dir,
+        }
+        future = self._admit(_run_job_in_worker, jobs_dir, job_id, request)
+        future.add_done_callback(_record_job_timings)
+        return future
+
+    def acquire_slot(self) -> float:
+        """Take an admission slot for a simulation run outside the pool (streaming).
+
+        Such a run starts at once rather than waiting for a worker, so besides the
+        admission slot it needs one of ``workers`` local run slots. Raises
+        :class:`SimulationQueueFull` like :meth:`submit` when either is taken;
+        returns the start time to hand back to :meth:`release_slot`.
+        """
+
+        self._acquire()
+        if not self._local_slots.acquire(blocking=False):
+            self._slots.release()
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise SimulationQueueFull(self._retry_after())
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["in_flight"] += 1
+        return time.time()
+
+    def release_slot(self, started_at: float, succeeded: bool = True) -> None:
+        self._local_slots.release()
+        self._slots.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if not succeeded:
+                self._stats["failed"] += 1
+                return
+            self._stats["completed"] += 1
+            self._stats["run_time_total"] += time.time() - started_at
+
+    def simulate(
+        self,
+        design_code: str,
+        testbench_code: str = "",
+        persist_waveform_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Blocking helper with the same contract as ``VerilogSimulator.simulate``.
+
+        The worker's phase timings, the queue wait and the result cache lookup are
+        recorded in :data:`metrics.REGISTRY`.
+        """
+
+        cache_key: Optional[str] = None
+        if self.result_cache is not None:
+            with timed("executor", "result_cache"):
+                cache_key = self.result_cache.make_key(design_code, testbench_code, self._simulator_identity())
+                cached = self.result_cache.fetch(cache_key, persist_waveform_dir)
+            if cached is not None:
+                return cached
+
+        future = self.submit(design_code, testbench_code, persist_waveform_dir)
+        try:
+            queue_wait, _, result = future.result(timeout=self.result_timeout)
+            record_phase("executor", "queue_wait", queue_wait)
+            record_phases("simulator", result.get("timings", {}))
+            if cache_key is not None:
+                self.result_cache.store(cache_key, result, persist_waveform_dir)
+            return result
+        except FutureTimeoutError:
+            return {"success": False, "error": "Simulation timeout - worker did not respond"}
+        except Exception as exc:  # noqa: BLE001
+            return {"success": False, "error": f"Simulation error: {exc}"}
+
+    def simulate_batch(
+        self,
+        design_code: str,
+        testbenches: List[str],
+        persist_waveform_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Blocking helper for ``VerilogSimulator.simulate_batch``; the batch takes one slot."""
+
+        request = {
+            "design_code": design_code,
+            "testbenches": testbenches,
+            "persist_waveform_dir": persist_waveform_dir,
+        }
+        future = self._admit(_run_batch_in_worker, request)
+        try:
+            return future.result(timeout=self.result_timeout * max(1, len(testbenches)))[2]
+        except FutureTimeoutError:
+            return {"success": False, "error": "Simulation timeout - worker did not respond"}
+        except Exception as exc:  # noqa: BLE001
+            return {"success": False, "error": f"Simulation error: {exc}"}
+
+    def truth_table(
+        self,
+        design_code: str,
+        top: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 256,
+        persist_waveform_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Blocking helper for ``VerilogSimulator.truth_table`` returning one page of rows.
+
+        The table is built in a worker and only ``limit`` rows from ``offset`` come
+        back: ``table`` is replaced by ``module``, ``inputs``, ``outputs``,
+        ``total_rows`` and ``rows``. Raises :class:`SimulationQueueFull` like :meth:`submit`.
+        """
+
+        request = {"design_code": design_code, "persist_waveform_dir": persist_waveform_dir, "top": top}
+        future = self._admit(_truth_table_in_worker, request, offset, limit)
+        try:
+            return future.result(timeout=self.result_timeout)[2]
+        except FutureTimeoutError:
+            return {"success": False, "error": "Truth table timeout - worker did not respond"}
+        except Exception as exc:  # noqa: BLE001
+            return {"success": False, "error": f"Truth table error: {exc}"}
+
+    def run_templates(self, names: List[str], golden_dir: str, update_golden: bool = False) -> List[TemplateResult]:
+        """Run ``regression.run_template`` for each of ``names`` in the pool, one slot each.
+
+        The first template is admitted like :meth:`submit` and raises
+        :class:`SimulationQueueFull`; the rest wait up to ``result_timeout`` for a
+        slot, so a regression larger than the queue runs as slots come free.
+        """
+
+        futures = [
+            self._admit(
+                _run_template_in_worker,
+                name,
+                golden_dir,
+                update_golden,
+                slot_timeout=None if index == 0 else self.result_timeout,
+            )
+            for index, name in enumerate(names)
+        ]
+        return [future.result(timeout=self.result_timeout * len(names))[2] for future in futures]
+
+    def build_template_artifacts(self) -> Dict[str, Any]:
+        """Build the missing template artifacts in a worker (see ``template_artifacts.ensure_built``).
+
+        The build takes one admission slot and raises :class:`SimulationQueueFull`
+        like :meth:`submit`; returns the build report, empty when nothing was missing.
+        """
+
+        future = self._admit(_build_artifacts_in_worker)
+        return future.result(timeout=self.result_timeout * len(TEMPLATES))[2]
+
+    def _simulator_identity(self) -> str:
+        # Workers build their simulator from the same environment, so one here
+        # (never used to simulate) reports the same identity without a round trip.
+        if self._identity is None:
+            self._identity = VerilogSimulator().cache_identity()
+        return self._identity
+
+    def _on_done(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._stats["failed"] += 1
+                return
+            queue_wait, run_time, _ = future.result()
+            self._stats["completed"] += 1
+            self._stats["queue_wait_total"] += queue_wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+            self._stats["run_time_total"] += run_time
+
+    def _retry_after(self) -> int:
+        with self._lock:
+            completed = self._stats["completed"]
+            average_run = self._stats["run_time_total"] / completed if completed else 1.0
+        backlog = self.workers + self.queue_size
+        return max(1, int(round(average_run * backlog / self.workers)))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats["completed"]
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": int(stats["in_flight"]),
+            "queued": max(0, int(stats["in_flight"]) - self.workers),
+            "submitted": int(stats["submitted"]),
+            "rejected": int(stats["rejected"]),
+            "completed": int(completed),
+            "failed": int(stats["failed"]),
+            "queue_wait_avg_seconds": stats["queue_wait_total"] / completed if completed else 0.0,
+            "queue_wait_max_seconds": stats["queue_wait_max"],
+            "run_time_avg_seconds": stats["run_time_total"] / completed if completed else 0.0,
+            "result_cache": self.result_cache.metrics() if self.result_cache is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def default_executor() -> SimulationExecutor:
+    workers = int(os.getenv("SIM_WORKERS", str(os.cpu_count() or 1)))
+    queue_size = int(os.getenv("SIM_QUEUE_SIZE", str(2 * workers)))
+    result_timeout = float(os.getenv("SIM_RESULT_TIMEOUT", "60"))
+    return SimulationExecutor(workers, queue_size, result_timeout, default_result_cache())
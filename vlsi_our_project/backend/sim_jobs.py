@@ -0,0 +1,294 @@
+import json
+import os
+import pickle
+import subprocess
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from simulator import SimulationCancelled, VerilogSimulator
+from waveform_blobs import WaveformBlobStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised.
+    fcntl = None  # type: ignore[assignment]
+
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+PUBLIC_FIELDS = (
+    "id",
+    "status",
+    "phase",
+    "phases",
+    "submitted_at",
+    "started_at",
+    "finished_at",
+    "error",
+    "budget_exceeded",
+)
+LOCK_NAME = ".jobs.lock"
+JOB_SUFFIXES = (".json", ".result.pkl", ".cancel")
+CANCEL_POLL_INTERVAL = 0.1
+
+_thread_lock = threading.Lock()
+
+
+class JobStore:
+    """Simulation job state kept as small JSON documents in a shared directory.
+
+    Web processes and pool workers on the same host all read and write the same
+    files, so any web worker can answer a poll or cancel for any job; every
+    read-modify-write of a record holds :meth:`locked`. Jobs whose record has not
+    changed for a while are removed by :meth:`sweep`, which also releases the
+    reference a finished job holds on its persisted waveform in ``uploads_dir``.
+    """
+
+    def __init__(self, jobs_dir: str, uploads_dir: Optional[str] = None) -> None:
+        self.jobs_dir = jobs_dir
+        self.uploads = WaveformBlobStore(uploads_dir) if uploads_dir else None
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str = ".json") -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}{suffix}")
+
+    def create(self) -> Dict[str, Any]:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "phase": None,
+            "phases": {},
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        with self.locked():
+            job = self.get(job_id) or {"id": job_id}
+            job.update(fields)
+            self._write(job)
+        return job
+
+    def mark_running(self, job_id: str) -> bool:
+        """Move a queued job to running; False if it was cancelled before a worker got to it."""
+
+        with self.locked():
+            job = self.get(job_id) or {"id": job_id}
+            if self.is_cancel_requested(job_id) or job.get("status") in TERMINAL_STATUSES:
+                if job.get("status") not in TERMINAL_STATUSES:
+                    job.update(status="cancelled", finished_at=time.time())
+                    self._write(job)
+                return False
+            job.update(status="running", started_at=time.time())
+            self._write(job)
+        return True
+
+    def discard(self, job_id: str) -> None:
+        for suffix in JOB_SUFFIXES:
+            try:
+                os.remove(self._path(job_id, suffix))
+            except OSError:
+                pass
+
+    def sweep(self, ttl_seconds: int) -> int:
+        """Remove jobs whose record is older than ``ttl_seconds``; returns how many.
+
+        Running jobs rewrite their record at every phase, so only finished or
+        abandoned ones get that old. Leftover temporaries go the same way.
+        """
+
+        cutoff = time.time() - ttl_seconds
+        try:
+            names = os.listdir(self.jobs_dir)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for name in names:
+            path = os.path.join(self.jobs_dir, name)
+            if name.endswith(".tmp"):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".json"):
+                continue
+            job_id = name[: -len(".json")]
+            with self.locked():
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except OSError:
+                    continue
+                result = self.load_result(job_id)
+                self.discard(job_id)
+            removed += 1
+            if result and result.get("waveform_file") and self.uploads is not None:
+                try:
+                    self.uploads.release(result["waveform_file"])
+                except OSError as exc:
+                    print(f"Could not release waveform of job {job_id}: {exc}")
+        return removed
+
+    def start_sweeper(self, ttl_seconds: int, sweep_seconds: int) -> None:
+        """Run :meth:`sweep` every ``sweep_seconds`` in the background (0 for either disables it)."""
+
+        if ttl_seconds <= 0 or sweep_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._sweep_loop, args=(ttl_seconds, sweep_seconds), name="jobs-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def _sweep_loop(self, ttl_seconds: int, sweep_seconds: int) -> None:
+        while True:
+            try:
+                self.sweep(ttl_seconds)
+            except Exception as exc:  # noqa: BLE001
+                print(f"Jobs sweep error: {exc}")
+            time.sleep(sweep_seconds)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Serialise record updates across threads and processes (see ``WaveformBlobStore.locked``)."""
+
+        with _thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.jobs_dir, LOCK_NAME), "a", encoding="utf-8") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        staging = self._path(job["id"], f".{os.getpid()}.tmp")
+        with open(staging, "w", encoding="utf-8") as handle:
+            json.dump(job, handle)
+        os.replace(staging, self._path(job["id"]))
+
+    def save_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        staging = self._path(job_id, f".result.{os.getpid()}.tmp")
+        with open(staging, "wb") as handle:
+            pickle.dump(result, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(staging, self._path(job_id, ".result.pkl"))
+
+    def load_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # Result files are only ever written by save_result in our own workers.
+        try:
+            with open(self._path(job_id, ".result.pkl"), "rb") as handle:
+                return pickle.load(handle)
+        except OSError:
+            return None
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, ".cancel"))
+
+    def request_cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Flag the job; its worker kills the running iverilog/vvp process it started.
+
+        A queued job is marked cancelled straight away and never starts.
+        """
+
+        with self.locked():
+            job = self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                return job
+            with open(self._path(job_id, ".cancel"), "w", encoding="utf-8") as handle:
+                handle.write(str(time.time()))
+            if job["status"] == "queued":
+                job.update(status="cancelled", finished_at=time.time())
+                self._write(job)
+        return job
+
+    @staticmethod
+    def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: job.get(field) for field in PUBLIC_FIELDS}
+
+
+def run_job(
+    simulator: VerilogSimulator,
+    jobs_dir: str,
+    job_id: str,
+    request: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Execute a queued job inside a pool worker, recording per-phase progress."""
+
+    store = JobStore(jobs_dir)
+    if not store.mark_running(job_id):
+        return {"success": False, "cancelled": True}
+
+    phases: Dict[str, Dict[str, float]] = {}
+
+    def progress(phase: str, process: Any) -> None:
+        if store.is_cancel_requested(job_id):
+            raise SimulationCancelled()
+        now = time.time()
+        if process is None:
+            for entry in phases.values():
+                entry.setdefault("finished_at", now)
+            phases.setdefault(phase, {"started_at": now})
+        store.update(job_id, phase=phase, phases=phases)
+        if process is not None:
+            threading.Thread(target=_kill_on_cancel, args=(store, job_id, process), daemon=True).start()
+
+    result = simulator.simulate(progress=progress, **request)
+    finished_at = time.time()
+    for entry in phases.values():
+        entry.setdefault("finished_at", finished_at)
+
+    error = None
+    if result.get("cancelled") or store.is_cancel_requested(job_id):
+        status, error = "cancelled", "Simulation cancelled"
+    elif result.get("success"):
+        status = "succeeded"
+        store.save_result(job_id, result)
+    else:
+        status, error = "failed", result.get("error", "Simulation failed")
+    if status != "succeeded" and result.get("waveform_file") and request.get("persist_waveform_dir"):
+        # Nobody will fetch this result: give back the reference persisting it took.
+        WaveformBlobStore(request["persist_waveform_dir"]).release(result["waveform_file"])
+
+    store.update(
+        job_id,
+        status=status,
+        phase=None,
+        phases=phases,
+        finished_at=finished_at,
+        error=error,
+        budget_exceeded=result.get("budget_exceeded"),
+    )
+    return {"success": status == "succeeded", "status": status, "timings": result.get("timings", {})}
+
+
+def _kill_on_cancel(store: JobStore, job_id: str, process: subprocess.Popen) -> None:
+    """Kill ``process`` once the job is cancelled, through its own handle.
+
+    ``Popen.kill`` does nothing after the process has been reaped, so a pid the
+    system has since handed to another process is never signalled.
+    """
+
+    while process.poll() is None:
+        if store.is_cancel_requested(job_id):
+            process.kill()
+            return
+        time.sleep(CANCEL_POLL_INTERVAL)
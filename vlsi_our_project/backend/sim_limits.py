@@ -0,0 +1,238 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: only the watchdog limits apply.
+    resource = None  # type: ignore[assignment]
+
+
+WATCHDOG_INTERVAL = 0.05
+READ_CHUNK = 64 * 1024
+# Sets the rlimits named in argv[1] ("RLIMIT_CPU:soft:hard,...") and execs argv[2:].
+# The interpreter ignores SIGPIPE and SIGXFSZ, and ignored signals survive exec.
+_RLIMIT_SHIM = (
+    "import os, resource, signal, sys\n"
+    "for spec in sys.argv[1].split(','):\n"
+    "    kind, soft, hard = spec.split(':')\n"
+    "    resource.setrlimit(getattr(resource, kind), (int(soft), int(hard)))\n"
+    "signal.signal(signal.SIGPIPE, signal.SIG_DFL)\n"
+    "signal.signal(signal.SIGXFSZ, signal.SIG_DFL)\n"
+    "os.execvp(sys.argv[2], sys.argv[2:])\n"
+)
+
+
+class SimulationBudgetExceeded(Exception):
+    """A simulation went over one of its resource limits and was stopped early."""
+
+    def __init__(self, limit: str, value: int) -> None:
+        super().__init__(f"{limit} limit of {value} exceeded")
+        self.limit = limit
+        self.value = value
+
+    def to_result(self) -> Dict[str, Any]:
+        """The structured failure returned by ``VerilogSimulator.simulate``."""
+
+        return {
+            "success": False,
+            "budget_exceeded": {"limit": self.limit, "value": self.value},
+            "error": f"Simulation budget exceeded: {self}",
+        }
+
+
+class ResourceLimits(NamedTuple):
+    """Per-simulation budget for the iverilog/vvp processes and the built-in engine.
+
+    ``cpu_seconds``, ``memory_bytes`` and ``file_bytes`` become rlimits of the child
+    process (where the platform has them), set before it execs; ``log_bytes`` and
+    ``waveform_bytes`` are enforced by the watchdog while it runs. A value of 0
+    disables that limit. The rlimits cannot apply to the native engine, which runs
+    inside the worker process: only the log and waveform budgets and the
+    simulation timeout bound it.
+    """
+
+    cpu_seconds: int
+    memory_bytes: int
+    file_bytes: int
+    log_bytes: int
+    waveform_bytes: int
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        return cls(
+            cpu_seconds=int(os.getenv("SIM_CPU_SECONDS", "30")),
+            memory_bytes=int(os.getenv("SIM_MEMORY_MB", "1024")) * 1024 * 1024,
+            file_bytes=int(os.getenv("SIM_MAX_FILE_MB", "256")) * 1024 * 1024,
+            log_bytes=int(os.getenv("SIM_MAX_LOG_KB", "1024")) * 1024,
+            waveform_bytes=int(os.getenv("SIM_MAX_WAVEFORM_MB", "128")) * 1024 * 1024,
+        )
+
+    def scaled(self, factor: int) -> "ResourceLimits":
+        """The budget for ``factor`` simulations sharing one process (batched runs)."""
+
+        return self._replace(
+            cpu_seconds=self.cpu_seconds * factor,
+            log_bytes=self.log_bytes * factor,
+            waveform_bytes=self.waveform_bytes * factor,
+        )
+
+    def rlimits(self) -> List[Tuple[str, int, int]]:
+        """``(RLIMIT_* name, soft, hard)`` for every rlimit this budget sets in the child.
+
+        Limits are capped at the current hard limit, which an unprivileged child
+        cannot raise. The CPU hard limit is left a second above the soft one: at the
+        hard limit the kernel sends SIGKILL, and only SIGXCPU tells
+        :meth:`exit_reason` which budget ran out.
+        """
+
+        if resource is None:
+            return []
+        limits = []
+        for name, value in (
+            ("RLIMIT_CPU", self.cpu_seconds),
+            ("RLIMIT_AS", self.memory_bytes),
+            ("RLIMIT_FSIZE", self.file_bytes),
+        ):
+            if value and hasattr(resource, name):
+                kind = getattr(resource, name)
+                ceiling = resource.getrlimit(kind)[1]
+                hard = value + 1 if name == "RLIMIT_CPU" else value
+                if ceiling != resource.RLIM_INFINITY:
+                    value, hard = min(value, ceiling), min(hard, ceiling)
+                limits.append((name, value, hard))
+        return limits
+
+    def command(self, args: List[str]) -> Tuple[List[str], Optional[Callable[[], None]]]:
+        """``(args, preexec_fn)`` for a ``Popen`` that runs ``args`` under the rlimits.
+
+        A single-threaded process (a pool worker) sets them in a ``preexec_fn``.
+        ``preexec_fn`` can deadlock the child when other threads are running, so
+        there (the threaded web server) ``args`` are run through a small Python
+        shim that sets the rlimits and execs them instead.
+        """
+
+        limits = self.rlimits()
+        if not limits:
+            return args, None
+        if threading.active_count() > 1:
+            specs = ",".join(f"{name}:{soft}:{hard}" for name, soft, hard in limits)
+            return [sys.executable, "-c", _RLIMIT_SHIM, specs, *args], None
+
+        def set_limits() -> None:
+            for name, soft, hard in limits:
+                resource.setrlimit(getattr(resource, name), (soft, hard))
+
+        return args, set_limits
+
+    def exit_reason(self, returncode: int) -> Optional[SimulationBudgetExceeded]:
+        """Map a death by SIGXCPU/SIGXFSZ back to the rlimit that caused it."""
+
+        if returncode == -getattr(signal, "SIGXCPU", 0) and self.cpu_seconds:
+            return SimulationBudgetExceeded("cpu_seconds", self.cpu_seconds)
+        if returncode == -getattr(signal, "SIGXFSZ", 0) and self.file_bytes:
+            return SimulationBudgetExceeded("file_bytes", self.file_bytes)
+        return None
+
+
+def waveform_size(workdir: str) -> int:
+    """Bytes of VCD output currently in ``workdir``."""
+
+    total = 0
+    try:
+        with os.scandir(workdir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".vcd"):
+                    total += entry.stat().st_size
+    except OSError:
+        return 0
+    return total
+
+
+class _BoundedReader(threading.Thread):
+    """Drains one pipe, keeping at most ``limit`` bytes and flagging anything beyond."""
+
+    def __init__(self, stream: IO[bytes], limit: int) -> None:
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.limit = limit
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.overflow = False
+
+    def run(self) -> None:
+        for chunk in iter(lambda: self.stream.read1(READ_CHUNK), b""):
+            if self.overflow:
+                continue
+            self.size += len(chunk)
+            if self.limit and self.size > self.limit:
+                self.overflow = True
+                continue
+            self.chunks.append(chunk)
+
+    def text(self) -> str:
+        return b"".join(self.chunks).decode("utf-8", "replace")
+
+
+def _check_watchdog(readers: List[_BoundedReader], workdir: str, limits: ResourceLimits) -> None:
+    if any(reader.overflow for reader in readers):
+        raise SimulationBudgetExceeded("log_bytes", limits.log_bytes)
+    if limits.waveform_bytes and waveform_size(workdir) > limits.waveform_bytes:
+        raise SimulationBudgetExceeded("waveform_bytes", limits.waveform_bytes)
+
+
+def run_limited(
+    args: List[str],
+    workdir: str,
+    limits: ResourceLimits,
+    timeout: float,
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+) -> subprocess.CompletedProcess:
+    """``subprocess.run`` with rlimits and a watchdog on log and VCD growth.
+
+    Raises ``subprocess.TimeoutExpired`` after ``timeout`` seconds and
+    :class:`SimulationBudgetExceeded` as soon as a limit trips; the process is
+    killed in both cases (and when ``on_start`` raises).
+    """
+
+    command, preexec_fn = limits.command(args)
+    with subprocess.Popen(
+        command,
+        cwd=workdir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        preexec_fn=preexec_fn,
+    ) as process:
+        try:
+            readers = [_BoundedReader(process.stdout, limits.log_bytes), _BoundedReader(process.stderr, limits.log_bytes)]
+            for reader in readers:
+                reader.start()
+            if on_start is not None:
+                on_start(process)
+
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    process.wait(timeout=WATCHDOG_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    if time.monotonic() > deadline:
+                        raise subprocess.TimeoutExpired(args, timeout) from None
+                _check_watchdog(readers, workdir, limits)
+
+            for reader in readers:
+                reader.join()
+            _check_watchdog(readers, workdir, limits)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+    exceeded = limits.exit_reason(process.returncode)
+    if exceeded is not None:
+        raise exceeded
+    return subprocess.CompletedProcess(args, process.returncode, readers[0].text(), readers[1].text())
@@ -1,10 +1,95 @@
 ﻿import os
+import queue
 import re
 import shutil
 import subprocess
-import tempfile
+import threading
+import time
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from compile_cache import default_compile_cache
+from hdl_parser import UnsupportedConstruct, VerilogSyntaxError
+from metrics import PhaseTimer
+from native_sim import NativeSimulator, SimulationTimeout
+from scratch_pool import default_scratch_pool
+from sim_batch import BatchPlan, plan_batch, split_log, split_vcd
+from sim_limits import ResourceLimits, SimulationBudgetExceeded, run_limited, waveform_size
+from stimulus import StimulusSettings, generate_testbench
+from template_artifacts import default_template_artifacts
+from truth_table import MAX_VCD_ROWS, build_truth_table
+from vcd_index import write_vcd_index
+from vcd_reader import REAL_VAR_TYPES, VcdEvent, VcdTail, iter_vcd_events
+from waveform_pyramid import write_pyramid
+from waveform_binary import binary_path_for, write_binary_waveform
+from waveform_blobs import WaveformBlobStore
+from waveform_store import SignalChannel, WaveformBuilder, WaveformStore, format_value
+
+
+VCD_FILENAME = "waveform.vcd"
+STREAM_POLL_INTERVAL = 0.05
+SIMULATION_TIMEOUT = 10
+# Bump when the waveform a given VCD parses into changes (keys cached results).
+RESULT_FORMAT = 2
+
+# Called with the phase name ("compile", "run", "parse", "persist") when it starts and
+# again with the spawned process for the phases that run a tool. Raising
+# SimulationCancelled from the callback aborts the simulation.
+ProgressCallback = Callable[[str, Optional[subprocess.Popen]], None]
+
+
+# (event name, JSON payload) pairs produced by VerilogSimulator.simulate_stream.
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+
+class SimulationCancelled(Exception):
+    """Raised by a progress callback to stop a simulation between phases."""
+
+
+def _pump_lines(stream: IO[str], lines: "queue.Queue[Optional[str]]") -> None:
+    for line in stream:
+        lines.put(line.rstrip("\n"))
+    lines.put(None)
+
+
+class _StreamDecoder:
+    """Turns tokenizer events from a growing VCD into ``signals``/``changes`` payloads."""
+
+    def __init__(self) -> None:
+        self.signals: List[Dict[str, Any]] = []
+        self.current_time = 0
+        self._vars: Dict[str, List[Tuple[str, int, bool]]] = {}
+        self._header_sent = False
+
+    def decode(self, events: List[VcdEvent]) -> Iterator[StreamEvent]:
+        changes: List[List[Any]] = []
+        for event in events:
+            kind = event[0]
+            if kind == "change":
+                for name, width, real in self._vars.get(event[1], ()):
+                    try:
+                        changes.append([self.current_time, name, format_value(event[2], width, real)])
+                    except ValueError:
+                        continue
+            elif kind == "time":
+                self.current_time = event[1]
+            elif kind == "var":
+                var = event[1]
+                if all(var.name != entry["name"] for entry in self.signals):
+                    self._vars.setdefault(var.id_code, []).append(
+                        (var.name, var.width, var.var_type in REAL_VAR_TYPES)
+                    )
+                    self.signals.append({"name": var.name, "id": var.id_code, "width": var.width})
+            elif kind == "enddefinitions" and not self._header_sent:
+                self._header_sent = True
+                yield ("signals", {"signals": self.signals})
+        if changes:
+            yield ("changes", {"changes": changes})
+
+
+def _budget_error(exc: SimulationBudgetExceeded) -> Dict[str, Any]:
+    result = exc.to_result()
+    return {"error": result["error"], "budget_exceeded": result["budget_exceeded"]}
 
 
 class VerilogSimulator:
@@ -13,92 +98,645 @@ class VerilogSimulator:
     def __init__(self) -> None:
         self.iverilog_path = os.getenv("IVERILOG_PATH", "iverilog")
         self.vvp_path = os.getenv("VVP_PATH", "vvp")
+        self.iverilog_flags = os.getenv("IVERILOG_FLAGS", "").split()
+        # "auto": iverilog when installed, else the built-in simulator; "native": built-in first.
+        self.engine = os.getenv("SIM_ENGINE", "auto").lower()
+        self.compile_cache = default_compile_cache()
+        self.scratch = default_scratch_pool()
+        self.limits = ResourceLimits.from_env()
+        self.stimulus = StimulusSettings.from_env()
+        self.template_artifacts = default_template_artifacts()
+        self._toolchain_version: Optional[str] = None
+        self._engine_tag: Optional[str] = None
 
     def simulate(
         self,
         design_code: str,
         testbench_code: str = "",
         persist_waveform_dir: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
     ) -> Dict[str, Any]:
-        """Run the HDL simulation and optionally persist the waveform file."""
+        """Run the HDL simulation and optionally persist the waveform file.
+
+        The result's ``timings`` maps each phase reached ("setup" for the engine and
+        template artifact lookup, then the progress phases) to its duration in seconds.
+        """
+
+        timer = PhaseTimer()
+
+        def report(phase: str, process: Optional[subprocess.Popen] = None) -> None:
+            if process is None:
+                timer.start(phase)
+            if progress is not None:
+                progress(phase, process)
+
+        timer.start("setup")
+        result = self._simulate(design_code, testbench_code, persist_waveform_dir, report)
+        result["timings"] = timer.finish()
+        return result
 
-        if not self._check_iverilog_available():
-            return self._mock_simulation(design_code, testbench_code, persist_waveform_dir)
+    def _simulate(
+        self,
+        design_code: str,
+        testbench_code: str,
+        persist_waveform_dir: Optional[str],
+        report: ProgressCallback,
+    ) -> Dict[str, Any]:
+        prebuilt = self._prebuilt_result(design_code, testbench_code, persist_waveform_dir)
+        if prebuilt is not None:
+            return prebuilt
+
+        iverilog_available = self._check_iverilog_available()
+        if self.engine == "native" or not iverilog_available:
+            native_result = self._native_simulation(
+                design_code, testbench_code, persist_waveform_dir, report
+            )
+            if native_result is not None:
+                return native_result
+            if not iverilog_available:
+                return self._mock_simulation(design_code, testbench_code, persist_waveform_dir)
 
         try:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                design_file = os.path.join(tmpdir, "design.v")
-                testbench_file = os.path.join(tmpdir, "testbench.v")
-                vcd_file = os.path.join(tmpdir, "waveform.vcd")
+            with self.scratch.lease() as tmpdir:
                 compiled_file = os.path.join(tmpdir, "compiled.vvp")
 
-                with open(design_file, "w", encoding="utf-8") as design_handle:
-                    design_handle.write(design_code)
+                if not testbench_code:
+                    testbench_code = self._generate_basic_testbench(design_code, VCD_FILENAME)
 
-                if testbench_code:
-                    with open(testbench_file, "w", encoding="utf-8") as tb_handle:
-                        tb_handle.write(testbench_code)
-                else:
-                    auto_testbench = self._generate_basic_testbench(design_code, vcd_file)
-                    with open(testbench_file, "w", encoding="utf-8") as tb_handle:
-                        tb_handle.write(auto_testbench)
-
-                compile_result = subprocess.run(
-                    [self.iverilog_path, "-o", compiled_file, design_file, testbench_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
+                report("compile")
+                compile_error = self._compile_cached(
+                    tmpdir, design_code, testbench_code, compiled_file, report
                 )
-                if compile_result.returncode != 0:
+                if compile_error is not None:
                     return {
                         "success": False,
-                        "error": f"Compilation error: {compile_result.stderr}",
+                        "error": f"Compilation error: {compile_error}",
                     }
 
-                sim_result = subprocess.run(
-                    [self.vvp_path, compiled_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                )
+                report("run")
+                sim_result = self._run_tool([self.vvp_path, compiled_file], tmpdir, "run", report)
                 if sim_result.returncode != 0:
                     return {
                         "success": False,
                         "error": f"Simulation error: {sim_result.stderr}",
                     }
 
-                waveform_data: List[Dict[str, Any]] = []
-                signals: List[Dict[str, Any]] = []
-                persisted: Optional[Tuple[str, str]] = None
+                return self._collect_result(tmpdir, sim_result.stdout, persist_waveform_dir, report)
 
-                if os.path.exists(vcd_file):
-                    waveform_data, signals = self._parse_vcd(vcd_file)
-                    if persist_waveform_dir:
-                        persisted = self._persist_waveform(vcd_file, persist_waveform_dir)
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "error": "Simulation timeout - possible infinite loop",
+            }
+        except SimulationBudgetExceeded as exc:
+            return exc.to_result()
+        except SimulationCancelled:
+            return {
+                "success": False,
+                "cancelled": True,
+                "error": "Simulation cancelled",
+            }
+        except Exception as exc:  # noqa: BLE001
+            return {
+                "success": False,
+                "error": f"Simulation error: {exc}",
+            }
 
-                response: Dict[str, Any] = {
-                    "success": True,
-                    "waveform_data": waveform_data,
-                    "signals": signals,
-                    "log": sim_result.stdout,
-                }
+    def _native_simulation(
+        self,
+        design_code: str,
+        testbench_code: str,
+        persist_waveform_dir: Optional[str],
+        report: ProgressCallback,
+    ) -> Optional[Dict[str, Any]]:
+        """Run the built-in event-driven simulator (see ``native_sim``).
+
+        Returns None when the sources use Verilog outside the supported subset, so the
+        caller can fall back to iverilog or the mock.
+        """
 
-                if persisted:
-                    response["waveform_file"], response["waveform_url"] = persisted
+        try:
+            with self.scratch.lease() as tmpdir:
+                if not testbench_code:
+                    testbench_code = self._generate_basic_testbench(design_code, VCD_FILENAME)
+
+                report("compile")
+                try:
+                    simulator = NativeSimulator(
+                        design_code + "\n" + testbench_code,
+                        tmpdir,
+                        timeout=SIMULATION_TIMEOUT,
+                        max_log_bytes=self.limits.log_bytes,
+                        max_dump_bytes=self.limits.waveform_bytes,
+                    )
+                except VerilogSyntaxError as exc:
+                    return {
+                        "success": False,
+                        "error": f"Compilation error: {exc}",
+                    }
 
-                return response
+                report("run")
+                log = simulator.run().log
+                return self._collect_result(tmpdir, log, persist_waveform_dir, report)
 
-        except subprocess.TimeoutExpired:
+        except UnsupportedConstruct as exc:
+            print(f"Native simulator fallback: {exc}")
+            return None
+        except SimulationTimeout:
             return {
                 "success": False,
                 "error": "Simulation timeout - possible infinite loop",
             }
+        except SimulationBudgetExceeded as exc:
+            return exc.to_result()
+        except SimulationCancelled:
+            return {
+                "success": False,
+                "cancelled": True,
+                "error": "Simulation cancelled",
+            }
         except Exception as exc:  # noqa: BLE001
             return {
                 "success": False,
                 "error": f"Simulation error: {exc}",
             }
 
+    def simulate_batch(
+        self,
+        design_code: str,
+        testbenches: List[str],
+        persist_waveform_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Run several testbenches against one design with a single compile and run.
+
+        Testbenches that :func:`sim_batch.plan_batch` cannot merge, and every run of a
+        batch that fails as a whole, are simulated one by one so each still gets its
+        own result (and its own error message). ``results`` follows the input order.
+        """
+
+        plan = plan_batch(design_code, testbenches, VCD_FILENAME)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(testbenches)
+        shared_log = ""
+        if plan.runs:
+            merged = self._simulate_merged(design_code, plan, persist_waveform_dir)
+            if merged is not None:
+                shared_log, run_results = merged
+                for index, run_result in run_results.items():
+                    results[index] = run_result
+
+        batched = [index for index, result in enumerate(results) if result is not None]
+        for index, testbench in enumerate(testbenches):
+            if results[index] is None:
+                results[index] = self.simulate(design_code, testbench, persist_waveform_dir)
+
+        return {
+            "success": all(result["success"] for result in results),
+            "results": results,
+            "batched": batched,
+            "log": shared_log,
+        }
+
+    def _simulate_merged(
+        self,
+        design_code: str,
+        plan: BatchPlan,
+        persist_waveform_dir: Optional[str],
+    ) -> Optional[Tuple[str, Dict[int, Dict[str, Any]]]]:
+        """Simulate a merged batch; None when it has to be retried run by run."""
+
+        def report(phase: str, process: Optional[subprocess.Popen] = None) -> None:
+            return None
+
+        timeout = SIMULATION_TIMEOUT * len(plan.runs)
+        limits = self.limits.scaled(len(plan.runs))
+        try:
+            with self.scratch.lease() as tmpdir:
+                if self.engine == "native" or not self._check_iverilog_available():
+                    simulator = NativeSimulator(
+                        design_code + "\n" + plan.testbench,
+                        tmpdir,
+                        timeout=timeout,
+                        max_log_bytes=limits.log_bytes,
+                        max_dump_bytes=limits.waveform_bytes,
+                    )
+                    log = simulator.run().log
+                else:
+                    compiled_file = os.path.join(tmpdir, "compiled.vvp")
+                    if self._compile_cached(tmpdir, design_code, plan.testbench, compiled_file) is not None:
+                        return None
+                    sim_result = self._run_tool(
+                        [self.vvp_path, compiled_file], tmpdir, "run", report, timeout, limits
+                    )
+                    if sim_result.returncode != 0:
+                        return None
+                    log = sim_result.stdout
+
+                shared_log, logs = split_log(log, plan.runs)
+                vcd_file = self._locate_vcd(tmpdir)
+                vcd_files = split_vcd(vcd_file, plan.runs, tmpdir) if vcd_file else {}
+                results = {
+                    run.index: self._result_from_vcd(
+                        vcd_files.get(run.index), logs[run.index], persist_waveform_dir, report
+                    )
+                    for run in plan.runs
+                }
+                return shared_log, results
+
+        except Exception as exc:  # noqa: BLE001
+            print(f"Batched simulation fallback: {exc}")
+            return None
+
+    def truth_table(
+        self,
+        design_code: str,
+        persist_waveform_dir: Optional[str] = None,
+        top: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Evaluate a combinational design for every input combination at once.
+
+        On success ``table`` holds a :class:`truth_table.TruthTable`; tables small
+        enough to dump are also persisted as a VCD like a regular simulation.
+        """
+
+        try:
+            table = build_truth_table(design_code, top)
+        except VerilogSyntaxError as exc:
+            return {
+                "success": False,
+                "error": f"Compilation error: {exc}",
+            }
+        except UnsupportedConstruct as exc:
+            return {
+                "success": False,
+                "error": f"Truth table unavailable: {exc}",
+            }
+
+        response: Dict[str, Any] = {"success": True, "table": table}
+        if persist_waveform_dir and table.row_count <= MAX_VCD_ROWS:
+            with self.scratch.lease() as tmpdir:
+                vcd_file = os.path.join(tmpdir, VCD_FILENAME)
+                table.write_vcd(vcd_file)
+                persisted = self._persist_waveform(vcd_file, persist_waveform_dir)
+            if persisted:
+                response["waveform_file"], response["waveform_url"] = persisted
+        return response
+
+    def _collect_result(
+        self,
+        workdir: str,
+        log: str,
+        persist_waveform_dir: Optional[str],
+        report: ProgressCallback,
+    ) -> Dict[str, Any]:
+        """Parse (and optionally persist) the VCD a finished run left in ``workdir``."""
+
+        return self._result_from_vcd(self._locate_vcd(workdir), log, persist_waveform_dir, report)
+
+    def _result_from_vcd(
+        self,
+        vcd_file: Optional[str],
+        log: str,
+        persist_waveform_dir: Optional[str],
+        report: ProgressCallback,
+    ) -> Dict[str, Any]:
+        waveform = WaveformStore()
+        persisted: Optional[Tuple[str, str]] = None
+
+        if vcd_file:
+            report("parse")
+            waveform = self._parse_vcd(vcd_file)
+            if persist_waveform_dir:
+                report("persist")
+                persisted = self._persist_waveform(vcd_file, persist_waveform_dir, waveform)
+
+        response: Dict[str, Any] = {
+            "success": True,
+            "waveform": waveform,
+            "signals": waveform.signals,
+            "log": log,
+        }
+
+        if persisted:
+            response["waveform_file"], response["waveform_url"] = persisted
+
+        return response
+
+    def simulate_stream(
+        self,
+        design_code: str,
+        testbench_code: str = "",
+        persist_waveform_dir: Optional[str] = None,
+        timeout: float = 10,
+    ) -> Iterator[StreamEvent]:
+        """Run the simulation and yield events while ``vvp`` is still running.
+
+        Events are ``phase``, ``log`` (new stdout lines), ``signals`` (once the VCD
+        header is complete), ``changes`` (``[time, name, value]`` rows appended to the
+        VCD since the last poll) and finally ``done`` or ``error``. Changes appear as
+        fast as vvp flushes its dump. Closing the generator kills the simulation.
+        """
+
+        prebuilt = self._prebuilt_result(design_code, testbench_code, persist_waveform_dir)
+        if prebuilt is not None:
+            yield from self._replay_result(prebuilt)
+            return
+
+        if self.engine == "native" or not self._check_iverilog_available():
+            # The built-in simulator runs in-process, so its result is replayed in one go.
+            yield from self._replay_result(
+                self.simulate(design_code, testbench_code, persist_waveform_dir)
+            )
+            return
+
+        with self.scratch.lease() as tmpdir:
+            compiled_file = os.path.join(tmpdir, "compiled.vvp")
+            if not testbench_code:
+                testbench_code = self._generate_basic_testbench(design_code, VCD_FILENAME)
+
+            yield ("phase", {"phase": "compile"})
+            try:
+                compile_error = self._compile_cached(tmpdir, design_code, testbench_code, compiled_file)
+            except subprocess.TimeoutExpired:
+                yield ("error", {"error": "Compilation timeout"})
+                return
+            except SimulationBudgetExceeded as exc:
+                yield ("error", _budget_error(exc))
+                return
+            if compile_error is not None:
+                yield ("error", {"error": f"Compilation error: {compile_error}"})
+                return
+
+            yield ("phase", {"phase": "run"})
+            args = [self.vvp_path, compiled_file]
+            stdbuf = shutil.which("stdbuf")
+            if stdbuf:
+                # vvp block-buffers stdout when it is a pipe; ask for line buffering.
+                args = [stdbuf, "-oL", *args]
+
+            lines: "queue.Queue[Optional[str]]" = queue.Queue()
+            log: List[str] = []
+            decoder = _StreamDecoder()
+            tail: Optional[VcdTail] = None
+            command, preexec_fn = self.limits.command(args)
+            process = subprocess.Popen(
+                command,
+                cwd=tmpdir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                preexec_fn=preexec_fn,
+            )
+            try:
+                threading.Thread(target=_pump_lines, args=(process.stdout, lines), daemon=True).start()
+                deadline = time.monotonic() + timeout
+                stdout_open = True
+                log_bytes = 0
+
+                while stdout_open or process.poll() is None:
+                    if time.monotonic() > deadline:
+                        yield ("error", {"error": "Simulation timeout - possible infinite loop"})
+                        return
+                    exceeded = self._stream_budget(tmpdir, log_bytes)
+                    if exceeded is not None:
+                        yield ("error", _budget_error(exceeded))
+                        return
+
+                    new_lines: List[str] = []
+                    try:
+                        line = lines.get(timeout=STREAM_POLL_INTERVAL)
+                        while True:
+                            if line is None:
+                                stdout_open = False
+                                break
+                            new_lines.append(line)
+                            line = lines.get_nowait()
+                    except queue.Empty:
+                        pass
+                    if new_lines:
+                        log.extend(new_lines)
+                        log_bytes += sum(len(line) + 1 for line in new_lines)
+                        yield ("log", {"lines": new_lines})
+
+                    if tail is None:
+                        vcd_file = self._locate_vcd(tmpdir)
+                        tail = VcdTail(vcd_file) if vcd_file else None
+                    if tail is not None:
+                        yield from decoder.decode(tail.poll())
+
+                returncode = process.wait()
+                if tail is None:
+                    vcd_file = self._locate_vcd(tmpdir)
+                    tail = VcdTail(vcd_file) if vcd_file else None
+                if tail is not None:
+                    yield from decoder.decode(tail.close())
+
+                exceeded = self.limits.exit_reason(returncode) or self._stream_budget(tmpdir, log_bytes)
+                if exceeded is not None:
+                    yield ("error", _budget_error(exceeded))
+                    return
+                if returncode != 0:
+                    yield ("error", {"error": "Simulation error: " + "\n".join(log)})
+                    return
+
+                done: Dict[str, Any] = {
+                    "success": True,
+                    "signals": decoder.signals,
+                    "end_time": decoder.current_time,
+                    "simulation_log": "\n".join(log),
+                }
+                if tail is not None and persist_waveform_dir:
+                    waveform = self._parse_vcd(tail.vcd_file)
+                    persisted = self._persist_waveform(tail.vcd_file, persist_waveform_dir, waveform)
+                    if persisted:
+                        done["waveform_file"], done["waveform_url"] = persisted
+                yield ("done", done)
+
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                if tail is not None:
+                    tail.close()
+
+    def _stream_budget(self, workdir: str, log_bytes: int) -> Optional[SimulationBudgetExceeded]:
+        if self.limits.log_bytes and log_bytes > self.limits.log_bytes:
+            return SimulationBudgetExceeded("log_bytes", self.limits.log_bytes)
+        if self.limits.waveform_bytes and waveform_size(workdir) > self.limits.waveform_bytes:
+            return SimulationBudgetExceeded("waveform_bytes", self.limits.waveform_bytes)
+        return None
+
+    def _replay_result(self, result: Dict[str, Any]) -> Iterator[StreamEvent]:
+        """Emit a finished ``simulate()`` result as stream events."""
+
+        if not result.get("success"):
+            error: Dict[str, Any] = {"error": result.get("error", "Simulation failed")}
+            if "budget_exceeded" in result:
+                error["budget_exceeded"] = result["budget_exceeded"]
+            yield ("error", error)
+            return
+
+        waveform: WaveformStore = result["waveform"]
+        log = result.get("log", "")
+        if log:
+            yield ("log", {"lines": log.splitlines()})
+        yield ("signals", {"signals": result.get("signals", [])})
+
+        changes = [
+            [timestamp, name, value]
+            for name in waveform.names
+            for timestamp, value in zip(waveform.times(name).tolist(), waveform.values(name))
+        ]
+        if changes:
+            changes.sort(key=lambda change: change[0])
+            yield ("changes", {"changes": changes})
+
+        done: Dict[str, Any] = {
+            "success": True,
+            "signals": result.get("signals", []),
+            "end_time": waveform.end_time,
+            "simulation_log": log,
+        }
+        if result.get("waveform_file"):
+            done["waveform_file"] = result["waveform_file"]
+            done["waveform_url"] = result.get("waveform_url")
+        yield ("done", done)
+
+    def _run_tool(
+        self,
+        args: List[str],
+        workdir: str,
+        phase: str,
+        report: ProgressCallback,
+        timeout: float = 10,
+        limits: Optional[ResourceLimits] = None,
+    ) -> subprocess.CompletedProcess:
+        """``subprocess.run`` equivalent that hands the live process to ``report``.
+
+        The process runs under ``limits`` (the simulator's budget by default); see
+        :func:`sim_limits.run_limited` for how a tripped limit is reported.
+        """
+
+        return run_limited(
+            args,
+            workdir,
+            limits or self.limits,
+            timeout,
+            on_start=lambda process: report(phase, process),
+        )
+
+    def _compile_cached(
+        self,
+        workdir: str,
+        design_code: str,
+        testbench_code: str,
+        compiled_file: str,
+        report: Optional[ProgressCallback] = None,
+    ) -> Optional[str]:
+        """Fetch the compiled image from the cache or compile and store it."""
+
+        cache_key: Optional[str] = None
+        if self.compile_cache is not None:
+            cache_key = self.compile_cache.make_key(
+                design_code,
+                testbench_code,
+                self._get_toolchain_version(),
+                self.iverilog_flags,
+            )
+            if self.compile_cache.fetch(cache_key, compiled_file):
+                return None
+
+        compile_error = self._compile(workdir, design_code, testbench_code, compiled_file, report)
+        if compile_error is None and cache_key is not None:
+            self.compile_cache.store(cache_key, compiled_file)
+        return compile_error
+
+    def _compile(
+        self,
+        workdir: str,
+        design_code: str,
+        testbench_code: str,
+        compiled_file: str,
+        report: Optional[ProgressCallback] = None,
+    ) -> Optional[str]:
+        """Compile the sources inside ``workdir``; returns stderr on failure."""
+
+        # Relative source names keep the compiled image independent of the scratch path,
+        # which is what makes it safe to reuse from the compile cache.
+        with open(os.path.join(workdir, "design.v"), "w", encoding="utf-8") as design_handle:
+            design_handle.write(design_code)
+        with open(os.path.join(workdir, "testbench.v"), "w", encoding="utf-8") as tb_handle:
+            tb_handle.write(testbench_code)
+
+        compile_result = self._run_tool(
+            [self.iverilog_path, *self.iverilog_flags, "-o", compiled_file, "design.v", "testbench.v"],
+            workdir,
+            "compile",
+            report or (lambda phase, process: None),
+        )
+        if compile_result.returncode != 0:
+            return compile_result.stderr
+        return None
+
+    def _locate_vcd(self, workdir: str) -> Optional[str]:
+        default_vcd = os.path.join(workdir, VCD_FILENAME)
+        if os.path.exists(default_vcd):
+            return default_vcd
+        dumped = sorted(name for name in os.listdir(workdir) if name.endswith(".vcd"))
+        return os.path.join(workdir, dumped[0]) if dumped else None
+
+    def _get_toolchain_version(self) -> str:
+        if self._toolchain_version is None:
+            try:
+                result = subprocess.run(
+                    [self.iverilog_path, "-V"],
+                    capture_output=True,
+                    text=True,
+                    timeout=5,
+                )
+                banner = (result.stdout or result.stderr).strip().splitlines()
+                self._toolchain_version = banner[0] if banner else self.iverilog_path
+            except Exception:  # noqa: BLE001
+                self._toolchain_version = self.iverilog_path
+        return self._toolchain_version
+
+    def engine_tag(self) -> str:
+        """What runs a simulation here: ``native`` or the iverilog version and flags.
+
+        Determined once per simulator, so serving a template artifact spawns nothing.
+        """
+
+        if self._engine_tag is None:
+            if self.engine == "native" or not self._check_iverilog_available():
+                self._engine_tag = "native"
+            else:
+                self._engine_tag = f"iverilog:{self._get_toolchain_version()}:{' '.join(self.iverilog_flags)}"
+        return self._engine_tag
+
+    def cache_identity(self) -> str:
+        """Everything besides the sources that determines a :meth:`simulate` result."""
+
+        return "|".join(
+            [
+                self.engine_tag(),
+                f"format={RESULT_FORMAT}",
+                f"timeout={SIMULATION_TIMEOUT}",
+                repr(tuple(self.limits)),
+                repr(tuple(self.stimulus)),
+            ]
+        )
+
+    def _prebuilt_result(
+        self,
+        design_code: str,
+        testbench_code: str,
+        persist_waveform_dir: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        """The template artifact for exactly these sources (see ``template_artifacts``)."""
+
+        if self.template_artifacts is None or not testbench_code:
+            return None
+        return self.template_artifacts.serve(design_code, testbench_code, self.engine_tag(), persist_waveform_dir)
+
     def _check_iverilog_available(self) -> bool:
         try:
             result = subprocess.run(
@@ -112,162 +750,86 @@ class VerilogSimulator:
             return False
 
     def _generate_basic_testbench(self, design_code: str, vcd_file: str) -> str:
-        module_match = re.search(r"module\s+(\w+)\s*\(([^)]+)\)", design_code, re.DOTALL)
-        if not module_match:
-            return ""
+        return generate_testbench(design_code, vcd_file, self.stimulus)
 
-        module_name = module_match.group(1)
-        ports_str = module_match.group(2)
+    def _parse_vcd(self, vcd_file: str) -> WaveformStore:
+        """Read a VCD into one trace per signal name.
 
-        inputs: List[str] = []
-        outputs: List[str] = []
-        for segment in ports_str.split(","):
-            token = segment.strip()
-            if "input" in token:
-                match = re.search(r"(\w+)\s*$", token)
-                if match:
-                    inputs.append(match.group(1))
-            elif "output" in token:
-                match = re.search(r"(\w+)\s*$", token)
-                if match:
-                    outputs.append(match.group(1))
-
-        port_lines = [f"        .{name}({name})" for name in [*inputs, *outputs]]
-
-        lines = [
-            "module testbench;",
-            "    // Inputs",
-        ]
-        lines.extend([f"    reg {name};" for name in inputs])
-        lines.append("")
-        lines.append("    // Outputs")
-        lines.extend([f"    wire {name};" for name in outputs])
-        lines.extend(
-            [
-                "",
-                "    // Instantiate the module",
-                f"    {module_name} uut (",
-                ",\n".join(port_lines),
-                "    );",
-                "",
-                "    initial begin",
-                "        // Initialize VCD dump",
-                f"        $dumpfile(\"{vcd_file}\");",
-                "        $dumpvars(0, testbench);",
-                "",
-                "        // Initialize inputs",
-            ]
-        )
-        lines.extend([f"        {name} = 0;" for name in inputs])
-        lines.extend(
-            [
-                "",
-                "        // Test cases",
-                "        #10;",
-            ]
-        )
-
-        for value in range(min(4, 2 ** len(inputs))):
-            for bit, name in enumerate(inputs):
-                lines.append(f"        {name} = {(value >> bit) & 1};")
-            lines.append("        #10;")
-
-        monitor_items = [f"{name}=%b" for name in inputs + outputs]
-        monitor_signature = " ".join(monitor_items)
-        monitor_signals = ", ".join(["$time", *inputs, *outputs])
-
-        lines.extend(
-            [
-                "",
-                "        // Finish simulation",
-                "        #10;",
-                "        $finish;",
-                "    end",
-                "",
-                "    // Monitor outputs",
-                "    initial begin",
-                f"        $monitor(\"Time=%0t: {monitor_signature}\", {monitor_signals});",
-                "    end",
-                "endmodule",
-                "",
-            ]
-        )
-
-        return "\n".join(lines)
+        Results are keyed by bare name, so a name belongs to the first identifier that
+        declares it (the testbench's ``data`` rather than ``uut.data``); later
+        identifiers with the same name are skipped instead of being merged into it.
+        """
 
-    def _parse_vcd(self, vcd_file: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-        waveform_data: List[Dict[str, Any]] = []
-        signals: List[Dict[str, Any]] = []
-        signal_map: Dict[str, str] = {}
+        builder = WaveformBuilder()
+        signal_map: Dict[str, List[SignalChannel]] = {}
         current_time = 0
 
         try:
-            with open(vcd_file, "r", encoding="utf-8") as handle:
-                lines = handle.readlines()
-
-            in_var_section = False
-            for line in lines:
-                if "$var" in line:
-                    in_var_section = True
-                    parts = line.split()
-                    if len(parts) >= 5:
-                        signal_id = parts[3]
-                        signal_name = parts[4]
-                        signal_map[signal_id] = signal_name
-                        if all(signal_name != entry["name"] for entry in signals):
-                            signals.append({"name": signal_name, "id": signal_id})
-                elif "$enddefinitions" in line:
-                    in_var_section = False
-
-            time_data: Dict[int, Dict[str, str]] = {}
-            for raw_line in lines:
-                stripped = raw_line.strip()
-                if not stripped:
-                    continue
-
-                if stripped.startswith("#"):
-                    current_time = int(stripped[1:])
-                    time_data.setdefault(current_time, {})
-                elif len(stripped) >= 2:
-                    value = stripped[0]
-                    signal_id = stripped[1:]
-                    if signal_id in signal_map:
-                        time_data.setdefault(current_time, {})[signal_map[signal_id]] = value
-
-            for timestamp in sorted(time_data):
-                data_point: Dict[str, Any] = {"time": timestamp}
-                data_point.update(time_data[timestamp])
-                waveform_data.append(data_point)
+            for event in iter_vcd_events(vcd_file):
+                kind = event[0]
+                if kind == "change":
+                    for channel in signal_map.get(event[1], ()):
+                        channel.append(current_time, event[2])
+                elif kind == "time":
+                    current_time = event[1]
+                    builder.advance(current_time)
+                elif kind == "var":
+                    var = event[1]
+                    if all(var.name != entry["name"] for entry in builder.signals):
+                        is_real = var.var_type in REAL_VAR_TYPES
+                        signal_map.setdefault(var.id_code, []).append(
+                            builder.channel(var.name, var.width, is_real)
+                        )
+                        builder.signals.append(
+                            {"name": var.name, "id": var.id_code, "width": var.width}
+                        )
 
         except Exception as exc:  # noqa: BLE001
             print(f"VCD parsing error: {exc}")
 
-        return waveform_data, signals
+        return builder.build()
+
+    def _persist_waveform(
+        self,
+        source_vcd: str,
+        target_dir: str,
+        waveform: Optional[WaveformStore] = None,
+    ) -> Optional[Tuple[str, str]]:
+        """Store the VCD content-addressed in ``target_dir``; identical waveforms share one file."""
 
-    def _persist_waveform(self, source_vcd: str, target_dir: str) -> Optional[Tuple[str, str]]:
         try:
-            os.makedirs(target_dir, exist_ok=True)
-            filename = f"waveform_{uuid.uuid4().hex}.vcd"
-            destination = os.path.join(target_dir, filename)
-            shutil.copyfile(source_vcd, destination)
+            store = WaveformBlobStore(target_dir)
+            filename, created = store.add(source_vcd)
+            if created:
+                self._index_waveform(store.path_for(filename), waveform)
             return filename, f"/uploads/{filename}"
         except Exception as exc:  # noqa: BLE001
             print(f"Waveform persistence error: {exc}")
             return None
 
+    def _index_waveform(self, vcd_file: str, waveform: Optional[WaveformStore] = None) -> None:
+        try:
+            if waveform is None:
+                waveform = self._parse_vcd(vcd_file)
+            write_vcd_index(vcd_file)
+            write_pyramid(vcd_file, waveform)
+            write_binary_waveform(binary_path_for(vcd_file), waveform)
+        except Exception as exc:  # noqa: BLE001
+            print(f"Waveform index error: {exc}")
+
     def _persist_mock_waveform(
         self,
         waveform_data: List[Dict[str, Any]],
         signals: List[Dict[str, Any]],
         target_dir: Optional[str],
+        waveform: Optional[WaveformStore] = None,
     ) -> Optional[Tuple[str, str]]:
         if not target_dir or not waveform_data or not signals:
             return None
 
         try:
             os.makedirs(target_dir, exist_ok=True)
-            filename = f"waveform_{uuid.uuid4().hex}.vcd"
-            destination = os.path.join(target_dir, filename)
+            destination = os.path.join(target_dir, f".mock_{uuid.uuid4().hex}.vcd")
 
             symbols: Dict[str, str] = {}
             base_char_code = 33
@@ -292,7 +854,10 @@ class VerilogSimulator:
                         last_values[name] = value
                         handle.write(f"{value}{symbol}\n")
 
-            return filename, f"/uploads/{filename}"
+            try:
+                return self._persist_waveform(destination, target_dir, waveform)
+            finally:
+                os.remove(destination)
         except Exception as exc:  # noqa: BLE001
             print(f"Mock waveform persistence error: {exc}")
             return None
@@ -394,11 +959,14 @@ class VerilogSimulator:
                 unique_signals.append(signal)
                 seen_names.add(name)
 
-        persisted = self._persist_mock_waveform(waveform_data, unique_signals, persist_waveform_dir)
+        waveform = WaveformStore.from_waveform_data(waveform_data, unique_signals)
+        persisted = self._persist_mock_waveform(
+            waveform_data, unique_signals, persist_waveform_dir, waveform
+        )
 
         response: Dict[str, Any] = {
             "success": True,
-            "waveform_data": waveform_data,
+            "waveform": waveform,
             "signals": unique_signals,
             "log": "Simulation completed successfully with mock data.",
         }
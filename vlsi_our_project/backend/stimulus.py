@@ -0,0 +1,350 @@
+import os
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from hdl_parser import UnsupportedConstruct, VerilogSyntaxError
+from native_sim import NativeSimulator
+
+
+PERIOD = 10
+RESET_CYCLES = 2
+# Free-running cycles for sequential designs without data inputs.
+IDLE_CYCLES = 16
+# Above this many vectors the per-change $monitor would dwarf the waveform; a
+# coverage summary is printed instead.
+MONITOR_MAX_VECTORS = 64
+
+_CLOCK_RE = re.compile(r"^(clk|clock)\w*$|^\w*_(clk|clock)$", re.IGNORECASE)
+_RESET_RE = re.compile(r"^n?(rst|reset|areset|arst|clr|clear)\w*$|^\w*_(rst|reset)(_?n|_b)?$", re.IGNORECASE)
+_ACTIVE_LOW_RE = re.compile(r"(_n|_b|n)$|^n", re.IGNORECASE)
+_EDGE_RE = re.compile(r"\b(?:pos|neg)edge\s+(\w+)")
+
+
+class StimulusSettings(NamedTuple):
+    """Knobs of the generated testbench; see ``generate_testbench``."""
+
+    exhaustive_bits: int
+    max_vectors: int
+    stall_vectors: int
+    seed: int
+
+    @classmethod
+    def from_env(cls) -> "StimulusSettings":
+        return cls(
+            exhaustive_bits=int(os.getenv("AUTO_TB_EXHAUSTIVE_BITS", "10")),
+            max_vectors=int(os.getenv("AUTO_TB_MAX_VECTORS", "256")),
+            stall_vectors=int(os.getenv("AUTO_TB_STALL_VECTORS", "32")),
+            seed=int(os.getenv("AUTO_TB_SEED", "1")),
+        )
+
+
+class Port(NamedTuple):
+    name: str
+    direction: str
+    msb: int
+    lsb: int
+
+    @property
+    def width(self) -> int:
+        return abs(self.msb - self.lsb) + 1
+
+    @property
+    def declaration(self) -> str:
+        return f"[{self.msb}:{self.lsb}] {self.name}" if self.width > 1 else self.name
+
+
+class DesignPorts(NamedTuple):
+    module: str
+    ports: List[Port]
+    clock: Optional[str]
+    reset: Optional[str]
+    reset_active_low: bool
+
+    @property
+    def data_inputs(self) -> List[Port]:
+        return [port for port in self.ports if port.direction == "input" and port.name not in (self.clock, self.reset)]
+
+    @property
+    def outputs(self) -> List[Port]:
+        return [port for port in self.ports if port.direction != "input"]
+
+
+def _elaborated_ports(design_code: str) -> Optional[Tuple[str, List[Port]]]:
+    """Module under test and its port widths from the built-in elaborator (parameters resolved).
+
+    That is the first uninstantiated module with ports. Sources that bring their own
+    (portless) testbench have none; the first module with ports, at its shallowest
+    instance, is used instead, as the header scan would.
+    """
+
+    try:
+        simulator = NativeSimulator(design_code, "")
+    except (UnsupportedConstruct, VerilogSyntaxError, ValueError, KeyError):
+        return None
+    candidates = [scope for scope in simulator.scopes if scope.module.ports]
+    if not candidates:
+        return None
+    roots = [scope for scope in candidates if len(scope.path) == 1]
+    if roots:
+        scope = min(roots, key=lambda root: root.module.line)
+    else:
+        scope = min(candidates, key=lambda candidate: (candidate.module.line, len(candidate.path)))
+    ports = []
+    for name in scope.module.ports:
+        signal = scope.names[name]
+        ports.append(Port(name, scope.directions[name], signal.msb, signal.lsb))
+    return scope.module.name, ports
+
+
+def _scanned_ports(design_code: str) -> Optional[Tuple[str, List[Port]]]:
+    """Fallback for sources outside the elaborator's subset: ANSI headers with literal ranges."""
+
+    headers = re.finditer(r"module\s+(\w+)\s*(?:#\s*\(.*?\)\s*)?\(([^;]*)\)\s*;", design_code, re.DOTALL)
+    module_match = next((header for header in headers if header.group(2).strip()), None)
+    if not module_match:
+        return None
+    ports: List[Port] = []
+    direction, msb, lsb = None, 0, 0
+    for segment in module_match.group(2).split(","):
+        token = segment.strip()
+        header = re.match(r"(input|output|inout)\b(?:\s+(?:wire|reg|logic|signed))*\s*(?:\[\s*(\d+)\s*:\s*(\d+)\s*\])?", token)
+        if header:
+            direction = header.group(1)
+            msb, lsb = (int(header.group(2)), int(header.group(3))) if header.group(2) else (0, 0)
+        name = re.search(r"(\w+)\s*$", token)
+        if direction and name:
+            ports.append(Port(name.group(1), direction, msb, lsb))
+    return module_match.group(1), ports
+
+
+def describe_ports(design_code: str) -> Optional[DesignPorts]:
+    """Ports of the module under test (see ``_elaborated_ports``) with its clock and reset, if any."""
+
+    found = _elaborated_ports(design_code) or _scanned_ports(design_code)
+    if found is None:
+        return None
+    module, ports = found
+    single_inputs = [port.name for port in ports if port.direction == "input" and port.width == 1]
+    clock = next((name for name in single_inputs if _CLOCK_RE.match(name)), None)
+    if clock is None:
+        edges = set(_EDGE_RE.findall(design_code))
+        clock = next((name for name in single_inputs if name in edges and not _RESET_RE.match(name)), None)
+    reset = next((name for name in single_inputs if name != clock and _RESET_RE.match(name)), None)
+    active_low = False
+    if reset is not None:
+        if re.search(rf"\bnegedge\s+{reset}\b|\bif\s*\(\s*(!|~)\s*{reset}\s*\)", design_code):
+            active_low = True
+        elif not re.search(rf"\bposedge\s+{reset}\b|\bif\s*\(\s*{reset}\s*\)", design_code):
+            active_low = bool(_ACTIVE_LOW_RE.search(reset))
+    return DesignPorts(module, ports, clock, reset, active_low)
+
+
+def generate_testbench(design_code: str, vcd_file: str, settings: Optional[StimulusSettings] = None) -> str:
+    """A self-checking-free testbench that toggles every input bit of the design.
+
+    The clock (if detected) runs with a ``PERIOD`` period and inputs change on its
+    falling edge; an active reset is held for ``RESET_CYCLES`` cycles first. Designs
+    with at most ``exhaustive_bits`` data input bits get every input pattern from a
+    counting loop. Wider or clocked ones get seeded random vectors whose bits are steered
+    towards the transitions (0->1, 1->0) not yet seen, so full input toggle coverage
+    is reached within two vectors; the run then stops once ``stall_vectors`` vectors
+    in a row add no output toggle, or after ``max_vectors``.
+    """
+
+    settings = settings or StimulusSettings.from_env()
+    design = describe_ports(design_code)
+    if design is None:
+        return ""
+
+    inputs = design.data_inputs
+    outputs = design.outputs
+    input_bits = sum(port.width for port in inputs)
+    output_bits = sum(port.width for port in outputs)
+    # Every input pattern says little about a sequential design's state, so clocked
+    # designs always run until their outputs stop toggling.
+    exhaustive = design.clock is None and input_bits <= settings.exhaustive_bits
+    vectors = (1 << input_bits) if exhaustive else settings.max_vectors
+    monitored = vectors <= MONITOR_MAX_VECTORS
+    # Output toggles drive the stop condition of random runs and the summary of long ones.
+    tracked = output_bits > 0 and not (exhaustive and monitored)
+
+    stimulus_target = "{" + ", ".join(port.name for port in inputs) + "}"
+    output_value = "{" + ", ".join(port.name for port in outputs) + "}"
+    if design.clock:
+        step = f"@(negedge {design.clock});"
+    else:
+        step = f"#{PERIOD};"
+
+    lines = [
+        "module testbench;",
+        "    // Inputs",
+    ]
+    lines.extend(f"    reg {port.declaration};" for port in design.ports if port.direction == "input")
+    lines.append("")
+    lines.append("    // Outputs")
+    lines.extend(f"    wire {port.declaration};" for port in outputs)
+    lines.append("")
+    lines.append("    integer tb_i;")
+    # Designs without data inputs only run their clock, so they need no stimulus registers.
+    if inputs and not exhaustive:
+        lines.extend(
+            [
+                "    integer tb_seed, tb_vectors, tb_stall;",
+                f"    reg [{input_bits - 1}:0] tb_stim, tb_next, tb_rose, tb_fell;",
+            ]
+        )
+    if tracked:
+        lines.extend(
+            [
+                "    integer tb_covered;",
+                f"    reg [{output_bits - 1}:0] tb_out_prev, tb_out_rose, tb_out_fell;",
+                f"    reg [{2 * output_bits - 1}:0] tb_out_seen;",
+            ]
+        )
+
+    port_lines = [f"        .{port.name}({port.name})" for port in design.ports]
+    lines.extend(
+        [
+            "",
+            "    // Instantiate the module",
+            f"    {design.module} uut (",
+            ",\n".join(port_lines),
+            "    );",
+            "",
+        ]
+    )
+    if design.clock:
+        lines.extend(
+            [
+                "    // Clock",
+                f"    always #{PERIOD // 2} {design.clock} = ~{design.clock};",
+                "",
+            ]
+        )
+
+    # Only the DUT and the nets on its ports go to the waveform, not the tb_* helpers.
+    dump_targets = ", ".join([*(port.name for port in design.ports), "uut"])
+    lines.extend(
+        [
+            "    initial begin",
+            "        // Initialize VCD dump",
+            f"        $dumpfile(\"{vcd_file}\");",
+            f"        $dumpvars(0, {dump_targets});",
+            "",
+            "        // Initialize inputs",
+        ]
+    )
+    lines.extend(
+        f"        {port.name} = 0;" for port in design.ports if port.direction == "input" and port.name != design.reset
+    )
+    if design.reset:
+        asserted, released = ("0", "1") if design.reset_active_low else ("1", "0")
+        lines.append(f"        {design.reset} = {asserted};")
+        lines.append(f"        repeat ({RESET_CYCLES}) {step}" if design.clock else f"        #{PERIOD * RESET_CYCLES};")
+        lines.append(f"        {design.reset} = {released};")
+    if tracked:
+        lines.extend(
+            [
+                "        tb_out_rose = 0;",
+                "        tb_out_fell = 0;",
+            ]
+        )
+    lines.append(f"        {step}")
+
+    def apply_and_track(indent: str) -> List[str]:
+        # Accumulates the 0->1 and 1->0 transitions seen on each output bit over one step.
+        if not tracked:
+            return [f"{indent}{step}"]
+        return [
+            f"{indent}tb_out_prev = {output_value};",
+            f"{indent}{step}",
+            f"{indent}tb_out_seen = {{tb_out_rose, tb_out_fell}};",
+            f"{indent}tb_out_rose = tb_out_rose | ({output_value} & ~tb_out_prev);",
+            f"{indent}tb_out_fell = tb_out_fell | (~{output_value} & tb_out_prev);",
+        ]
+
+    lines.append("")
+    if not inputs:
+        lines.append("        // No data inputs: let the design run")
+        lines.append(f"        repeat ({IDLE_CYCLES if design.clock else 1}) {step}")
+    elif exhaustive:
+        lines.extend(
+            [
+                f"        // Every input pattern ({vectors} vectors)",
+                f"        for (tb_i = 0; tb_i < {vectors}; tb_i = tb_i + 1) begin",
+                f"            {stimulus_target} = tb_i;",
+            ]
+        )
+        lines.extend(apply_and_track("            "))
+        lines.append("        end")
+    else:
+        words = (input_bits + 31) // 32
+        random_value = "{" + ", ".join(["$random(tb_seed)"] * words) + "}" if words > 1 else "$random(tb_seed)"
+        lines.extend(
+            [
+                "        // Seeded random vectors steered towards untoggled input bits",
+                f"        tb_seed = {settings.seed};",
+                "        tb_stim = 0;",
+                "        tb_rose = 0;",
+                "        tb_fell = 0;",
+                "        tb_vectors = 0;",
+                "        tb_stall = 0;",
+                f"        while (tb_vectors < {settings.max_vectors} && tb_stall < {settings.stall_vectors}) begin",
+                f"            tb_next = {random_value};",
+                "            tb_next = (tb_next | (~tb_rose & ~tb_stim)) & ~(~tb_fell & tb_stim);",
+                "            tb_rose = tb_rose | (tb_next & ~tb_stim);",
+                "            tb_fell = tb_fell | (~tb_next & tb_stim);",
+                "            tb_stim = tb_next;",
+                f"            {stimulus_target} = tb_stim;",
+                "            tb_vectors = tb_vectors + 1;",
+            ]
+        )
+        lines.extend(apply_and_track("            "))
+        if tracked:
+            lines.extend(
+                [
+                    "            if ({tb_out_rose, tb_out_fell} !== tb_out_seen) tb_stall = 0;",
+                    "            else tb_stall = tb_stall + 1;",
+                ]
+            )
+        else:
+            lines.append("            tb_stall = tb_stall + 1;")
+        lines.append("        end")
+
+    if tracked:
+        lines.extend(
+            [
+                "",
+                "        // Toggle coverage summary",
+                "        tb_covered = 0;",
+                f"        for (tb_i = 0; tb_i < {output_bits}; tb_i = tb_i + 1)",
+                "            if (tb_out_rose[tb_i] === 1'b1 && tb_out_fell[tb_i] === 1'b1) tb_covered = tb_covered + 1;",
+                f"        $display(\"Output toggle coverage: %0d/{output_bits} bits\", tb_covered);",
+            ]
+        )
+
+    lines.extend(
+        [
+            "",
+            "        // Finish simulation",
+            f"        #{PERIOD};",
+            "        $finish;",
+            "    end",
+        ]
+    )
+
+    if monitored:
+        monitored_ports = [port.name for port in design.ports if port.name != design.clock]
+        monitor_signature = " ".join(f"{name}=%b" for name in monitored_ports)
+        monitor_signals = ", ".join(["$time", *monitored_ports])
+        lines.extend(
+            [
+                "",
+                "    // Monitor outputs",
+                "    initial begin",
+                f"        $monitor(\"Time=%0t: {monitor_signature}\", {monitor_signals});",
+                "    end",
+            ]
+        )
+    lines.extend(["endmodule", ""])
+    return "\n".join(lines)
@@ -0,0 +1,254 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from verilog_templates import TEMPLATES
+from waveform_binary import binary_path_for, read_binary_waveform
+from waveform_blobs import WaveformBlobStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised.
+    fcntl = None  # type: ignore[assignment]
+
+# Bump when the stored layout or the shape of a simulation result changes.
+ARTIFACT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+BUILD_LOCK_NAME = ".build.lock"
+
+_build_thread_lock = threading.Lock()
+
+
+class TemplateArtifacts:
+    """Prebuilt simulation results of the bundled templates.
+
+    :meth:`build` simulates every template with its testbench once and keeps the
+    persisted waveform (with its index, pyramid and binary sidecars), the log and
+    the signal list, keyed on :data:`ARTIFACT_VERSION`, the simulation engine and
+    the exact sources. :meth:`serve` answers a request for the same sources from
+    those artifacts: the waveform is decoded from the memory-mapped binary and
+    linked into the uploads directory, so nothing is compiled, run or parsed.
+
+    Nothing is built implicitly: run ``python template_artifacts.py`` at install
+    time, or let the development server start a build in a simulation worker.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.blobs = WaveformBlobStore(directory)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._manifest_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(design_code: str, testbench_code: str, engine: str) -> str:
+        digest = hashlib.sha256()
+        for part in (str(ARTIFACT_VERSION), engine, design_code, testbench_code):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def entries(self, reload: bool = False) -> Dict[str, Dict[str, Any]]:
+        """The manifest, re-read whenever another process has rebuilt it (or on ``reload``)."""
+
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if reload or mtime != self._manifest_mtime:
+                try:
+                    with open(self.manifest_path, "r", encoding="utf-8") as handle:
+                        manifest = json.load(handle)
+                except (OSError, ValueError) as exc:
+                    print(f"Template artifact manifest unreadable: {exc}")
+                    manifest = {}
+                current = manifest.get("version") == ARTIFACT_VERSION
+                self._entries = manifest.get("entries", {}) if current else {}
+                self._manifest_mtime = mtime
+            return self._entries
+
+    def missing(self, engine: str, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Templates without an artifact for ``engine``."""
+
+        entries = self.entries()
+        return [
+            name
+            for name in (TEMPLATES if names is None else names)
+            if self.make_key(TEMPLATES[name]["code"], TEMPLATES[name]["testbench"], engine) not in entries
+        ]
+
+    def serve(
+        self,
+        design_code: str,
+        testbench_code: str,
+        engine: str,
+        persist_waveform_dir: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """The stored result for exactly these sources, or None."""
+
+        entries = self.entries()
+        if not entries:
+            return None
+        entry = entries.get(self.make_key(design_code, testbench_code, engine))
+        if entry is None:
+            return None
+
+        filename = entry["waveform_file"]
+        try:
+            waveform = read_binary_waveform(binary_path_for(self.blobs.path_for(filename)))
+        except (OSError, ValueError) as exc:
+            print(f"Template artifact {entry['template']} unusable: {exc}")
+            return None
+
+        response: Dict[str, Any] = {
+            "success": True,
+            "waveform": waveform,
+            "signals": entry["signals"],
+            "log": entry["log"],
+        }
+        if persist_waveform_dir:
+            try:
+                WaveformBlobStore(persist_waveform_dir).adopt(self.blobs, filename)
+                response["waveform_file"], response["waveform_url"] = filename, f"/uploads/{filename}"
+            except Exception as exc:  # noqa: BLE001
+                print(f"Waveform persistence error: {exc}")
+        return response
+
+    def build(
+        self,
+        simulator: Any,
+        names: Optional[Iterable[str]] = None,
+        missing_only: bool = False,
+    ) -> Dict[str, Any]:
+        """Simulate ``names`` (default: every template) with ``simulator`` and store the results.
+
+        ``simulator`` is a ``VerilogSimulator``; its own artifact lookup is bypassed
+        for the build. Artifacts of other templates and engines are kept. Builds of
+        one directory run one at a time, each starting from the current manifest, so
+        with ``missing_only`` a template another process just built is skipped.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._build_locked():
+            return self._build(simulator, names, missing_only)
+
+    def _build(self, simulator: Any, names: Optional[Iterable[str]], missing_only: bool) -> Dict[str, Any]:
+        engine = simulator.engine_tag()
+        previous = dict(self.entries(reload=True))
+        selected = self.missing(engine, names) if missing_only else list(TEMPLATES if names is None else names)
+        entries = dict(previous)
+        failures: Dict[str, str] = {}
+        started = time.perf_counter()
+
+        prebuilt, simulator.template_artifacts = simulator.template_artifacts, None
+        try:
+            for name in selected:
+                template = TEMPLATES[name]
+                result = simulator.simulate(template["code"], template["testbench"], persist_waveform_dir=self.directory)
+                if not result.get("success") or not result.get("waveform_file"):
+                    failures[name] = result.get("error", "no waveform was produced")
+                    continue
+                key = self.make_key(template["code"], template["testbench"], engine)
+                entries[key] = {
+                    "template": name,
+                    "engine": engine,
+                    "waveform_file": result["waveform_file"],
+                    "signals": result["signals"],
+                    "log": result.get("log", ""),
+                }
+        finally:
+            simulator.template_artifacts = prebuilt
+
+        staging = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(staging, "w", encoding="utf-8") as handle:
+            json.dump({"version": ARTIFACT_VERSION, "entries": entries}, handle)
+        os.replace(staging, self.manifest_path)
+
+        # Every simulation above took a reference; drop the ones the replaced entries held.
+        for key, entry in previous.items():
+            if key in entries and entries[key] is not entry:
+                self.blobs.release(entry["waveform_file"])
+
+        return {
+            "engine": engine,
+            "built": len(selected) - len(failures),
+            "failed": failures,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    @contextmanager
+    def _build_locked(self) -> Iterator[None]:
+        with _build_thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, BUILD_LOCK_NAME), "a", encoding="utf-8") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def default_template_artifacts() -> Optional[TemplateArtifacts]:
+    """Artifacts under ``TEMPLATE_ARTIFACTS_DIR``; an empty value disables them."""
+
+    directory = os.getenv(
+        "TEMPLATE_ARTIFACTS_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "template_artifacts"),
+    )
+    return TemplateArtifacts(directory) if directory else None
+
+
+def ensure_built(simulator: Any) -> Optional[Dict[str, Any]]:
+    """Build the artifacts missing for ``simulator``'s engine (e.g. after a toolchain upgrade)."""
+
+    artifacts = simulator.template_artifacts
+    if artifacts is None or not artifacts.missing(simulator.engine_tag()):
+        return None
+    report = artifacts.build(simulator, missing_only=True)
+    return report if report["built"] or report["failed"] else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from simulator import VerilogSimulator
+
+    parser = argparse.ArgumentParser(description="Precompute the simulation results of the bundled templates.")
+    parser.add_argument("templates", nargs="*", help="template names (default: all)")
+    parser.add_argument("--missing", action="store_true", help="only build templates without a current artifact")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.templates if name not in TEMPLATES]
+    if unknown:
+        print(f"Unknown templates: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    simulator = VerilogSimulator()
+    artifacts = simulator.template_artifacts
+    if artifacts is None:
+        print("TEMPLATE_ARTIFACTS_DIR is empty; template artifacts are disabled", file=sys.stderr)
+        return 2
+    report = artifacts.build(simulator, args.templates or None, missing_only=args.missing)
+    print(
+        f"{report['built']} template artifacts for {report['engine']} in {report['seconds']}s"
+        f" under {artifacts.directory}"
+    )
+    for name, error in report["failed"].items():
+        print(f"  {name}: {error}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
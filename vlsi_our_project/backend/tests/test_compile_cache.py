@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+from compile_cache import CompileCache
+from simulator import VerilogSimulator
+
+DESIGN = "module dut(input a, output y);\n  assign y = ~a;\nendmodule\n"
+TESTBENCH = "module tb;\n  reg a;\n  wire y;\n  dut uut(.a(a), .y(y));\nendmodule\n"
+
+# Stands in for iverilog: reports the version in VERSION, logs each compile and
+# writes an image that names the version it was built with.
+FAKE_IVERILOG = """#!{python}
+import os, sys
+here = os.path.dirname(os.path.abspath(__file__))
+version = open(os.path.join(here, "VERSION")).read()
+if sys.argv[1] == "-V":
+    print(version)
+    sys.exit(0)
+with open(os.path.join(here, "compiles.log"), "a") as log:
+    log.write("compile\\n")
+with open(sys.argv[sys.argv.index("-o") + 1], "w") as image:
+    image.write("image from " + version)
+"""
+
+
+@pytest.fixture
+def toolchain(tmp_path):
+    directory = tmp_path / "toolchain"
+    directory.mkdir()
+    iverilog = directory / "iverilog"
+    iverilog.write_text(FAKE_IVERILOG.format(python=sys.executable))
+    iverilog.chmod(0o755)
+    (directory / "VERSION").write_text("Icarus Verilog version 12.0")
+    return directory
+
+
+def _simulator(toolchain, cache_dir):
+    simulator = VerilogSimulator()
+    simulator.iverilog_path = str(toolchain / "iverilog")
+    simulator.compile_cache = CompileCache(str(cache_dir), 1024 * 1024)
+    return simulator
+
+
+def _compile(simulator, workdir, design=DESIGN):
+    workdir.mkdir(exist_ok=True)
+    compiled = workdir / "design.vvp"
+    if compiled.exists():
+        compiled.unlink()
+    assert simulator._compile_cached(str(workdir), design, TESTBENCH, str(compiled)) is None
+    return compiled.read_text()
+
+
+def _compiles(toolchain):
+    log = toolchain / "compiles.log"
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_second_compile_of_the_same_sources_is_a_hit(toolchain, tmp_path):
+    simulator = _simulator(toolchain, tmp_path / "cache")
+    assert _compile(simulator, tmp_path / "run1") == "image from Icarus Verilog version 12.0"
+    assert _compile(simulator, tmp_path / "run2") == "image from Icarus Verilog version 12.0"
+    assert _compiles(toolchain) == 1
+
+    _compile(simulator, tmp_path / "run3", DESIGN.replace("~a", "a"))
+    assert _compiles(toolchain) == 2
+
+
+def test_a_toolchain_change_invalidates_cached_images(toolchain, tmp_path):
+    _compile(_simulator(toolchain, tmp_path / "cache"), tmp_path / "run1")
+    (toolchain / "VERSION").write_text("Icarus Verilog version 13.0")
+    upgraded = _simulator(toolchain, tmp_path / "cache")
+    assert _compile(upgraded, tmp_path / "run2") == "image from Icarus Verilog version 13.0"
+    assert _compiles(toolchain) == 2
+
+    upgraded.iverilog_flags = [*upgraded.iverilog_flags, "-Wall"]
+    _compile(upgraded, tmp_path / "run3")
+    assert _compiles(toolchain) == 3
+
+
+def test_least_recently_used_images_are_evicted(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"), 350)
+    for index, key in enumerate(("old", "used", "new")):
+        image = tmp_path / f"{key}.vvp"
+        image.write_bytes(b"x" * 100)
+        cache.store(key, str(image))
+        os.utime(cache._entry_path(key), (1000 + index, 1000 + index))
+    # A hit makes the oldest entry the most recently used one.
+    assert cache.fetch("old", str(tmp_path / "fetched.vvp"))
+
+    cache.store("newest", str(tmp_path / "new.vvp"))
+    assert sorted(os.listdir(cache.cache_dir)) == ["new.vvp", "newest.vvp", "old.vvp"]
+    assert not cache.fetch("used", str(tmp_path / "miss.vvp"))
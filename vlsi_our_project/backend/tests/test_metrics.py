@@ -0,0 +1,73 @@
+import pytest
+
+from metrics import MetricsRegistry, PhaseTimer, begin_request_timings, end_request_timings, record_phase
+
+
+def _samples(text):
+    """``{series: value}`` from Prometheus text, skipping HELP and TYPE lines."""
+
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = value
+    return samples
+
+
+def test_counters_and_gauges_render_with_escaped_labels():
+    registry = MetricsRegistry()
+    registry.describe("jobs_total", "counter", "Jobs seen.")
+    registry.describe("workers", "gauge", "Worker processes.")
+    registry.inc("jobs_total", {"outcome": "done"})
+    registry.inc("jobs_total", {"outcome": "done"}, 2)
+    registry.inc("jobs_total", {"outcome": 'say "hi"\\\n'})
+    registry.set("workers", 4)
+
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "# HELP jobs_total Jobs seen.\n# TYPE jobs_total counter\n" in text
+    assert "# TYPE workers gauge\n" in text
+    samples = _samples(text)
+    assert samples['jobs_total{outcome="done"}'] == "3"
+    assert samples['jobs_total{outcome="say \\"hi\\"\\\\\\n"}'] == "1"
+    assert samples["workers"] == "4"
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.describe("latency_seconds", "histogram", "Latency.", buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.7, 0.7, 2.0):
+        registry.observe("latency_seconds", value, {"phase": "run"})
+
+    samples = _samples(registry.render())
+    assert [samples[f'latency_seconds_bucket{{phase="run",le="{bound}"}}'] for bound in ("0.1", "0.5", "1", "+Inf")] == [
+        "2", "3", "5", "6",
+    ]
+    assert samples['latency_seconds_count{phase="run"}'] == "6"
+    assert float(samples['latency_seconds_sum{phase="run"}']) == pytest.approx(3.85)
+
+
+def test_request_timings_collect_the_phases_of_one_request():
+    token = begin_request_timings()
+    record_phase("simulator", "compile", 0.25)
+    record_phase("simulator", "compile", 0.5)
+    record_phase("executor", "queue_wait", 0.125)
+    assert end_request_timings(token) == {"simulator.compile": 0.75, "executor.queue_wait": 0.125}
+
+    timer = PhaseTimer()
+    timer.start("compile")
+    timer.start("run")
+    assert list(timer.finish()) == ["compile", "run"]
+
+
+def test_metrics_endpoint_serves_the_prometheus_text(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIM_JOBS_DIR", str(tmp_path / "jobs"))
+    import app
+
+    response = app.app.test_client().get("/api/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    samples = _samples(response.get_data(as_text=True))
+    assert samples["vlsi_simulation_workers"] == str(app.sim_executor.workers)
+    assert 'vlsi_simulations_total{outcome="rejected"}' in samples
+    assert "vlsi_uploads_bytes" in samples
@@ -0,0 +1,127 @@
+import pytest
+
+from native_sim import SimulationTimeout, run_native
+from vcd_index import load_signals
+
+
+def _log(tmp_path, body, extra=""):
+    source = f"{extra}\nmodule tb;\n{body}\nendmodule\n"
+    return run_native(source, str(tmp_path)).log.splitlines()
+
+
+def test_nonblocking_assignments_swap_and_blocking_ones_do_not(tmp_path):
+    body = """
+  reg clk = 0;
+  reg a = 1, b = 0, c = 1, d = 0;
+  always @(posedge clk) begin a <= b; b <= a; end
+  always @(posedge clk) begin c = d; d = c; end
+  initial begin
+    #1 clk = 1;
+    #1 $display("%b%b %b%b", a, b, c, d);
+    $finish;
+  end"""
+    assert _log(tmp_path, body) == ["01 00"]
+
+
+def test_display_sees_old_values_and_strobe_sees_nonblocking_updates(tmp_path):
+    body = """
+  reg [3:0] q = 4'd3;
+  initial begin
+    q <= 4'd9;
+    $display("display %0d", q);
+    $strobe("strobe %0d", q);
+    #1 $finish;
+  end"""
+    assert _log(tmp_path, body) == ["display 3", "strobe 9"]
+
+
+def test_four_state_operators(tmp_path):
+    body = """
+  reg u;
+  reg [3:0] v;
+  initial begin
+    $display("%b %b %b %b", u, u & 1'b0, u | 1'b1, u ^ 1'b1);
+    v = 4'b10x1;
+    $display("%b %b %b", v + 4'd1, v == 4'b1001, v === 4'b10x1);
+    $finish;
+  end"""
+    assert _log(tmp_path, body) == ["x 0 1 x", "xxxx x 1"]
+
+
+def test_widths_wrap_and_signed_shifts_extend(tmp_path):
+    body = """
+  reg [3:0] count = 4'd15;
+  reg signed [7:0] s = -8'sd6;
+  initial begin
+    count = count + 1;
+    $display("%0d %0d %0d %b", count, s >>> 1, s >> 1, {2'b10, 3'b011});
+    $finish;
+  end"""
+    assert _log(tmp_path, body) == ["0 -3 125 10011"]
+
+
+def test_casez_wildcards_pick_the_first_match(tmp_path):
+    body = """
+  reg [3:0] req;
+  reg [1:0] grant;
+  always @* casez (req)
+    4'b1???: grant = 2'd3;
+    4'b01??: grant = 2'd2;
+    4'b001?: grant = 2'd1;
+    default: grant = 2'd0;
+  endcase
+  initial begin
+    req = 4'b0110; #1 $display("%0d", grant);
+    req = 4'b1001; #1 $display("%0d", grant);
+    req = 4'b0000; #1 $display("%0d", grant);
+    $finish;
+  end"""
+    assert _log(tmp_path, body) == ["2", "3", "0"]
+
+
+def test_hierarchy_and_continuous_assignments(tmp_path):
+    design = """
+module half_adder(input a, input b, output sum, output carry);
+  assign sum = a ^ b;
+  assign carry = a & b;
+endmodule
+"""
+    body = """
+  reg a, b;
+  wire s, c;
+  half_adder uut(.a(a), .b(b), .sum(s), .carry(c));
+  initial begin
+    a = 1; b = 1;
+    #1 $display("%b%b %m", c, s);
+    $finish;
+  end"""
+    assert _log(tmp_path, body, design) == ["10 tb"]
+
+
+def test_finish_stops_time_and_the_vcd_matches_the_run(tmp_path):
+    source = """
+module tb;
+  reg clk = 0;
+  reg [1:0] n = 0;
+  always #5 clk = ~clk;
+  always @(posedge clk) n <= n + 1;
+  initial begin
+    $dumpfile("dump.vcd");
+    $dumpvars(0, tb);
+    #32 $finish;
+    $display("never printed");
+  end
+endmodule
+"""
+    result = run_native(source, str(tmp_path))
+    assert result.finished and result.end_time == 32
+    assert "never printed" not in result.log
+    store = load_signals(result.vcd_file, ["tb.n"])
+    assert store.times("tb.n").tolist() == [0, 5, 15, 25]
+    assert store.values("tb.n") == ["00", "01", "10", "11"]
+
+
+def test_runaway_simulation_times_out(tmp_path):
+    source = "module tb;\n  reg clk = 0;\n  always #1 clk = ~clk;\nendmodule\n"
+    with pytest.raises(SimulationTimeout):
+        run_native(source, str(tmp_path), timeout=0.5)
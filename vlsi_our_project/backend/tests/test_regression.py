@@ -0,0 +1,89 @@
+import pytest
+
+from regression import _compare, canonical_waveform, run_regression
+from sim_executor import SimulationExecutor, SimulationQueueFull
+
+# The same simulation as two engines might dump it: separate identifiers for the
+# port and the net inside uut, or one shared identifier, and an x->0 glitch at #0.
+SEPARATE_IDS = """$scope module tb $end
+$var reg 1 ! a $end
+$scope module uut $end
+$var wire 1 " a $end
+$var wire 1 # y $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+x!
+0!
+0"
+1#
+#5
+1!
+1"
+0#
+#10
+"""
+
+SHARED_IDS = """$scope module tb $end
+$var reg 1 ! a $end
+$scope module uut $end
+$var wire 1 ! a $end
+$var wire 1 $ y $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+1$
+#5
+1!
+0$
+#5
+1$
+0$
+#10
+"""
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_canonical_waveform_is_keyed_by_path(tmp_path):
+    waveform = canonical_waveform(_write(tmp_path, "separate.vcd", SEPARATE_IDS))
+    assert sorted(waveform["signals"]) == ["tb.a", "tb.uut.a", "tb.uut.y"]
+    assert waveform["signals"]["tb.a"] == {"width": 1, "times": [0, 5], "values": ["0", "1"]}
+    assert waveform["end_time"] == 10
+
+
+def test_identifier_layout_does_not_matter(tmp_path):
+    separate = canonical_waveform(_write(tmp_path, "separate.vcd", SEPARATE_IDS))
+    shared = canonical_waveform(_write(tmp_path, "shared.vcd", SHARED_IDS))
+    assert _compare(separate, shared) is None
+
+
+def test_compare_reports_the_first_difference(tmp_path):
+    expected = canonical_waveform(_write(tmp_path, "separate.vcd", SEPARATE_IDS))
+    changed = canonical_waveform(_write(tmp_path, "changed.vcd", SEPARATE_IDS.replace("#5\n1!", "#5\n0!")))
+    assert _compare(expected, changed) == "tb.a differs at t=5"
+
+
+def test_regression_runs_in_the_executor_pool_one_slot_per_template():
+    executor = SimulationExecutor(workers=1, queue_size=0, result_timeout=120)
+    try:
+        report = run_regression(["counter_4bit", "and_gate"], executor=executor)
+        assert report["summary"]["passed"], report["templates"]
+        assert report["summary"]["workers"] == 1
+        assert executor.metrics()["submitted"] == 2
+
+        started_at = executor.acquire_slot()
+        try:
+            with pytest.raises(SimulationQueueFull):
+                run_regression(["counter_4bit"], executor=executor)
+        finally:
+            executor.release_slot(started_at)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from result_cache import RESULT_SUFFIX, ResultCache
+from simulator import VerilogSimulator
+from vcd_index import load_signals
+from vcd_samples import SAMPLE_NAMES, write_sample_vcd
+from verilog_templates import TEMPLATES
+from waveform_blobs import WaveformBlobStore
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    simulator = VerilogSimulator()
+    simulator.engine = "native"
+    simulator.template_artifacts = None
+    simulator.result_cache = None
+    return simulator
+
+
+def _simulate(simulator, name, uploads):
+    template = TEMPLATES[name]
+    result = simulator.simulate(template["code"], template["testbench"], persist_waveform_dir=str(uploads))
+    assert result["success"], result.get("error")
+    return result
+
+
+def _stores(tmp_path, count):
+    results = []
+    for index in range(count):
+        vcd_file = write_sample_vcd(tmp_path / f"dump{index}.vcd", steps=200 + index)
+        results.append({"success": True, "waveform": load_signals(vcd_file, SAMPLE_NAMES), "signals": [], "log": ""})
+    return results
+
+
+def test_memory_tier_evicts_the_least_recently_used_result(tmp_path):
+    results = _stores(tmp_path, 3)
+    budget = results[0]["waveform"].nbytes() + results[1]["waveform"].nbytes() + results[2]["waveform"].nbytes() // 2
+    cache = ResultCache(None, budget, 0)
+    cache.store("a", results[0])
+    cache.store("b", results[1])
+    assert cache.fetch("a")["waveform"] is results[0]["waveform"]
+    cache.store("c", results[2])
+
+    assert cache.fetch("b") is None
+    assert cache.fetch("a") is not None and cache.fetch("c") is not None
+    metrics = cache.metrics()
+    assert metrics["memory_evictions"] == 1
+    assert metrics["memory_entries"] == 2 and metrics["memory_bytes"] <= budget
+    assert (metrics["memory_hits"], metrics["misses"]) == (3, 1)
+
+
+def test_failed_results_are_not_kept(tmp_path):
+    cache = ResultCache(None, 1 << 20, 0)
+    cache.store("failed", {"success": False, "error": "Compilation error"})
+    assert cache.fetch("failed") is None
+
+
+def test_disk_tier_round_trips_a_result_into_another_uploads_dir(simulator, tmp_path):
+    first_uploads, second_uploads = tmp_path / "uploads1", tmp_path / "uploads2"
+    result = _simulate(simulator, "counter_4bit", first_uploads)
+    writer = ResultCache(str(tmp_path / "results"), 0, 64 << 20)
+    writer.store("key", result, str(first_uploads))
+    assert os.path.exists(tmp_path / "results" / ("key" + RESULT_SUFFIX))
+
+    # A fresh cache (another web worker) has nothing in memory and reads the disk tier.
+    reader = ResultCache(str(tmp_path / "results"), 1 << 20, 64 << 20)
+    cached = reader.fetch("key", str(second_uploads))
+    assert cached is not None
+    assert cached["waveform"].to_columnar() == result["waveform"].to_columnar()
+    assert (cached["signals"], cached["log"]) == (result["signals"], result["log"])
+    assert cached["waveform_file"] == result["waveform_file"]
+    assert cached["waveform_url"] == f"/uploads/{result['waveform_file']}"
+    assert os.path.exists(second_uploads / result["waveform_file"])
+    assert WaveformBlobStore(str(second_uploads)).refcount(result["waveform_file"]) == 1
+    assert reader.metrics()["disk_hits"] == 1
+
+    # The disk hit was promoted into memory.
+    assert reader.fetch("key") is not None and reader.metrics()["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_old_results_and_releases_their_waveform(simulator, tmp_path):
+    uploads = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    first = _simulate(simulator, "counter_4bit", uploads)
+    second = _simulate(simulator, "fsm_template", uploads)
+    # Room for the second result alone, measured in a cache of its own.
+    alone = tmp_path / "alone"
+    ResultCache(str(alone), 0, 64 << 20).store("second", second, str(uploads))
+    budget = sum(entry.stat().st_size for entry in os.scandir(alone))
+
+    ResultCache(str(results_dir), 0, 64 << 20).store("first", first, str(uploads))
+    cache = ResultCache(str(results_dir), 0, budget)
+    cache.store("second", second, str(uploads))
+
+    assert sorted(name for name in os.listdir(results_dir) if name.endswith(RESULT_SUFFIX)) == ["second" + RESULT_SUFFIX]
+    assert not os.path.exists(results_dir / first["waveform_file"])
+    assert cache.fetch("first", str(tmp_path / "elsewhere")) is None
+    assert cache.metrics()["disk_evictions"] == 1
@@ -0,0 +1,55 @@
+import os
+import time
+
+from scratch_pool import ScratchPool
+
+
+def _settled(pool, free):
+    """Wait for the cleaner thread to process every returned directory."""
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if pool._dirty.empty() and pool._free.qsize() == free:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_released_directories_are_emptied_and_reused(tmp_path):
+    pool = ScratchPool(str(tmp_path / "scratch"), 2)
+    with pool.lease() as first:
+        assert os.path.dirname(os.path.dirname(first)) == str(tmp_path / "scratch")
+        os.makedirs(os.path.join(first, "nested", "deeper"))
+        with open(os.path.join(first, "nested", "waveform.vcd"), "w") as handle:
+            handle.write("$end\n")
+        with open(os.path.join(first, "design.vvp"), "w") as handle:
+            handle.write("image")
+    assert _settled(pool, 2)
+
+    seen = set()
+    for _ in range(4):
+        with pool.lease() as path:
+            assert os.listdir(path) == []
+            seen.add(path)
+        assert _settled(pool, 2)
+    assert first in seen and len(seen) <= 2
+
+
+def test_directories_beyond_the_pool_size_are_removed(tmp_path):
+    pool = ScratchPool(str(tmp_path / "scratch"), 1)
+    with pool.lease() as pooled, pool.lease() as extra:
+        assert pooled != extra
+        assert os.path.isdir(pooled) and os.path.isdir(extra)
+        open(os.path.join(extra, "log.txt"), "w").close()
+    assert _settled(pool, 1)
+    # The first one back refills the pool; the other is deleted.
+    assert os.path.isdir(extra) and os.listdir(extra) == []
+    assert not os.path.exists(pooled)
+
+
+def test_size_zero_uses_a_temporary_directory_per_run(tmp_path):
+    pool = ScratchPool(str(tmp_path / "scratch"), 0)
+    with pool.lease() as path:
+        assert os.path.isdir(path)
+    assert not os.path.exists(path)
+    assert not os.path.exists(tmp_path / "scratch")
@@ -0,0 +1,121 @@
+from regression import canonical_waveform
+from sim_batch import DONE_MARKER, RUN_MARKER, BatchRun, split_log, split_vcd
+from simulator import VerilogSimulator
+from vcd_reader import iter_vcd_events
+
+RUNS = [BatchRun(0, "short_tb", "run0", 0), BatchRun(1, "long_tb", "run1", 0)]
+
+BATCH_VCD = """$timescale 1ns $end
+$scope module __batch $end
+$var wire 1 ! __batch_done_0 $end
+$var wire 1 " __batch_done_1 $end
+$scope module run0 $end
+$var reg 1 # clk $end
+$upscope $end
+$scope module run1 $end
+$var reg 1 $ clk $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+0"
+0#
+0$
+#5
+1#
+1$
+#10
+0#
+0$
+1!
+#15
+1#
+1$
+#20
+1"
+0#
+0$
+#25
+1#
+"""
+
+
+def _times(path):
+    with open(path, encoding="utf-8") as handle:
+        return [int(line[1:]) for line in handle if line.startswith("#")]
+
+
+def test_split_vcd_cuts_each_run_at_its_own_done_time(tmp_path):
+    vcd_file = tmp_path / "batch.vcd"
+    vcd_file.write_text(BATCH_VCD)
+    paths = split_vcd(str(vcd_file), RUNS, str(tmp_path))
+    assert _times(paths[0]) == [0, 5, 10]
+    assert _times(paths[1]) == [0, 5, 10, 15, 20]
+    with open(paths[0], encoding="utf-8") as handle:
+        assert "$scope module short_tb $end" in handle.read()
+
+
+def test_split_vcd_reads_the_batch_like_the_vcd_reader(tmp_path):
+    # Comments, $dumpoff blocks, named-block scopes and range selects in the batch dump.
+    vcd_file = tmp_path / "batch.vcd"
+    vcd_file.write_text(
+        BATCH_VCD.replace("$var reg 1 # clk $end", "$var reg 1 # clk $end\n$scope begin blk $end\n$var wire 4 % bus [3:0] $end\n$upscope $end")
+        .replace("#5\n1#", "#5\n$comment 0# b1111 % $end\nb1010 %\n$dumpoff\nx#\nbx %\n$end\n#7\n$dumpon\n1#")
+    )
+    paths = split_vcd(str(vcd_file), RUNS, str(tmp_path))
+    with open(paths[0], encoding="utf-8") as handle:
+        text = handle.read()
+    assert "$scope begin blk $end\n$var wire 4 % bus [3:0] $end\n$upscope $end" in text
+    assert "b1111" not in text
+    assert _times(paths[0]) == [0, 5, 7, 10]
+    assert "#5\nb1010 %\nx#\nbx %\n#7\n1#\n" in text
+    assert [event[1] for event in iter_vcd_events(paths[1]) if event[0] == "time"] == [0, 7, 10, 15, 20]
+
+
+def test_split_log_drops_output_after_a_run_finished():
+    log = "".join(
+        [
+            RUN_MARKER.format(0), "a0\n", RUN_MARKER.format(1), "b0\n",
+            DONE_MARKER.format(0), RUN_MARKER.format(0), "a1\n",
+            RUN_MARKER.format(1), "b1\n", DONE_MARKER.format(1), "chatter\n",
+        ]
+    )
+    shared, logs = split_log(log, RUNS)
+    assert logs == {0: "a0\n", 1: "b0\nb1\n"}
+    assert shared == "chatter\n"
+
+
+DESIGN = "module inv(input a, output y);\n  assign y = ~a;\nendmodule\n"
+
+
+def _testbench(name, stop):
+    return f"""module {name};
+  reg clk;
+  wire y;
+  inv uut(.a(clk), .y(y));
+  initial clk = 0;
+  always #5 clk = ~clk;
+  always @(posedge clk) $display("{name} t=%0t y=%b", $time, y);
+  initial begin
+    $dumpfile("dump.vcd");
+    $dumpvars(0, {name});
+    #{stop} $finish;
+  end
+endmodule
+"""
+
+
+def test_batched_runs_match_running_alone(tmp_path):
+    simulator = VerilogSimulator()
+    simulator.template_artifacts = None
+    testbenches = [_testbench("short_tb", 22), _testbench("long_tb", 61)]
+    batch = simulator.simulate_batch(DESIGN, testbenches, persist_waveform_dir=str(tmp_path / "batch"))
+    assert batch["batched"] == [0, 1]
+    for testbench, batched in zip(testbenches, batch["results"]):
+        alone = simulator.simulate(DESIGN, testbench, persist_waveform_dir=str(tmp_path / "alone"))
+        assert batched["log"] == alone["log"]
+        assert batched["waveform"].end_time == alone["waveform"].end_time
+        assert canonical_waveform(str(tmp_path / "batch" / batched["waveform_file"])) == canonical_waveform(
+            str(tmp_path / "alone" / alone["waveform_file"])
+        )
@@ -0,0 +1,52 @@
+import pytest
+
+from sim_executor import SimulationExecutor, SimulationQueueFull
+
+AND_GATE = "module and_gate(input a, input b, output y);\n  assign y = a & b;\nendmodule\n"
+
+
+@pytest.fixture
+def executor():
+    executor = SimulationExecutor(workers=1, queue_size=0, result_timeout=120)
+    yield executor
+    executor.shutdown()
+
+
+def test_truth_table_returns_one_page_from_a_worker(executor):
+    result = executor.truth_table(AND_GATE, offset=2, limit=1)
+    assert result["success"], result
+    assert result["module"] == "and_gate"
+    assert [port["name"] for port in result["inputs"]] == ["a", "b"]
+    assert result["total_rows"] == 4
+    assert len(result["rows"]) == 1
+    assert "table" not in result
+
+
+def test_truth_table_takes_an_admission_slot(executor):
+    started_at = executor.acquire_slot()
+    try:
+        with pytest.raises(SimulationQueueFull):
+            executor.truth_table(AND_GATE)
+    finally:
+        executor.release_slot(started_at)
+
+
+def test_truth_table_rejects_too_many_inputs(executor):
+    wide = "module wide(input [20:0] a, output y);\n  assign y = ^a;\nendmodule\n"
+    result = executor.truth_table(wide)
+    assert not result["success"]
+    assert "exceed the truth-table limit" in result["error"]
+
+
+def test_runs_outside_the_pool_are_capped_at_the_worker_count():
+    executor = SimulationExecutor(workers=1, queue_size=4)
+    try:
+        started_at = executor.acquire_slot()
+        with pytest.raises(SimulationQueueFull):
+            executor.acquire_slot()
+        # The queue slots are still free for pool work.
+        assert executor.truth_table(AND_GATE)["success"]
+        executor.release_slot(started_at)
+        executor.release_slot(executor.acquire_slot())
+    finally:
+        executor.shutdown()
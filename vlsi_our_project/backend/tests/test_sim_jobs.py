@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from sim_jobs import JobStore, _kill_on_cancel
+from waveform_blobs import WaveformBlobStore
+
+
+def test_concurrent_updates_keep_every_field(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = store.create()
+
+    def write(number):
+        for _ in range(20):
+            store.update(job["id"], **{f"field{number}": number})
+
+    threads = [threading.Thread(target=write, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stored = store.get(job["id"])
+    assert all(stored[f"field{number}"] == number for number in range(8))
+
+
+def test_cancelled_queued_job_never_starts(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = store.create()
+    assert store.request_cancel(job["id"])["status"] == "cancelled"
+    assert not store.mark_running(job["id"])
+    assert store.get(job["id"])["status"] == "cancelled"
+
+
+def test_cancel_kills_the_process_through_its_handle(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = store.create()
+    assert store.mark_running(job["id"])
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    watcher = threading.Thread(target=_kill_on_cancel, args=(store, job["id"], process))
+    watcher.start()
+
+    store.request_cancel(job["id"])
+    watcher.join(timeout=5)
+    assert not watcher.is_alive()
+    assert process.wait(timeout=5) != 0
+
+
+def test_sweep_removes_old_jobs_and_releases_their_waveform(tmp_path):
+    uploads = tmp_path / "uploads"
+    source = tmp_path / "waveform.vcd"
+    source.write_text("$timescale 1ns $end\n$var wire 1 ! a $end\n$enddefinitions $end\n#0\n0!\n")
+    blobs = WaveformBlobStore(str(uploads))
+    filename, _ = blobs.add(str(source))
+    blobs.acquire(filename)
+
+    store = JobStore(str(tmp_path / "jobs"), str(uploads))
+    old, fresh = store.create(), store.create()
+    store.save_result(old["id"], {"success": True, "waveform_file": filename})
+    stale = time.time() - 120
+    os.utime(os.path.join(store.jobs_dir, f"{old['id']}.json"), (stale, stale))
+
+    assert store.sweep(60) == 1
+    assert store.get(old["id"]) is None and store.load_result(old["id"]) is None
+    assert store.get(fresh["id"]) is not None
+    assert blobs.refcount(filename) == 1
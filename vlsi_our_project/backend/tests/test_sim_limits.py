@@ -0,0 +1,56 @@
+import sys
+import threading
+
+import pytest
+
+from sim_limits import ResourceLimits, SimulationBudgetExceeded, run_limited
+
+resource = pytest.importorskip("resource")
+
+LIMITS = ResourceLimits(cpu_seconds=1, memory_bytes=0, file_bytes=4096, log_bytes=0, waveform_bytes=0)
+
+
+def test_rlimits_are_in_place_before_the_child_runs(tmp_path):
+    script = "import resource; print(resource.getrlimit(resource.RLIMIT_CPU), resource.getrlimit(resource.RLIMIT_FSIZE))"
+    result = run_limited([sys.executable, "-c", script], str(tmp_path), LIMITS, timeout=30)
+    assert result.stdout.split() == ["(1,", "2)", "(4096,", "4096)"]
+
+
+def test_cpu_limit_is_reported_as_budget_exceeded(tmp_path):
+    with pytest.raises(SimulationBudgetExceeded) as raised:
+        run_limited([sys.executable, "-c", "while True: pass"], str(tmp_path), LIMITS, timeout=30)
+    assert raised.value.limit == "cpu_seconds"
+
+
+def test_file_limit_is_reported_as_budget_exceeded(tmp_path):
+    # Python ignores SIGXFSZ; restore the default that iverilog and vvp run with.
+    script = "import signal; signal.signal(signal.SIGXFSZ, signal.SIG_DFL); open('big.out', 'wb').write(b'x' * 65536)"
+    with pytest.raises(SimulationBudgetExceeded) as raised:
+        run_limited([sys.executable, "-c", script], str(tmp_path), LIMITS, timeout=30)
+    assert raised.value.limit == "file_bytes"
+
+
+@pytest.fixture
+def other_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+def test_threaded_processes_set_rlimits_through_an_exec_shim(tmp_path, other_thread):
+    command, preexec_fn = LIMITS.command(["vvp", "design.vvp"])
+    assert preexec_fn is None and command[-2:] == ["vvp", "design.vvp"]
+
+    script = "import resource; print(resource.getrlimit(resource.RLIMIT_CPU), resource.getrlimit(resource.RLIMIT_FSIZE))"
+    result = run_limited([sys.executable, "-c", script], str(tmp_path), LIMITS, timeout=30)
+    assert result.stdout.split() == ["(1,", "2)", "(4096,", "4096)"]
+
+
+def test_exec_shim_restores_sigxfsz_for_the_simulator(tmp_path, other_thread):
+    # The shim itself runs in Python, which ignores SIGXFSZ; the program it execs must not.
+    with pytest.raises(SimulationBudgetExceeded) as raised:
+        run_limited(["sh", "-c", "exec head -c 65536 /dev/zero > big.out"], str(tmp_path), LIMITS, timeout=30)
+    assert raised.value.limit == "file_bytes"
@@ -0,0 +1,83 @@
+import glob
+import os
+
+import pytest
+
+from conftest import EXAMPLES_DIR
+from simulator import VerilogSimulator
+from stimulus import _scanned_ports, describe_ports, generate_testbench
+
+EXAMPLES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.v")))
+
+# Module under test per example; files with their own testbench must not pick it.
+EXPECTED_DUT = {
+    "all_circuits.v": "xor_gate",
+    "combinational_circuits.v": "priority_encoder_4to2",
+    "counter_4bit.v": "counter_4bit",
+    "d_flip_flop.v": "d_flip_flop",
+    "full_adder.v": "half_adder",
+    "half_adder.v": "half_adder",
+    "logic_gates.v": "xor_gate",
+}
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    simulator = VerilogSimulator()
+    simulator.engine = "native"
+    simulator.template_artifacts = None
+    return simulator
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_examples_pick_a_module_with_ports(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        design = describe_ports(handle.read())
+    assert design is not None
+    assert design.module == EXPECTED_DUT[os.path.basename(path)]
+    assert design.ports
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_examples_simulate_without_a_testbench(simulator, path):
+    with open(path, "r", encoding="utf-8") as handle:
+        source = handle.read()
+    result = simulator.simulate(source)
+    assert result["success"], result.get("error")
+    names = {signal["name"] for signal in result["signals"]}
+    assert {port.name for port in describe_ports(source).ports} <= names
+
+
+def test_header_scan_skips_portless_modules():
+    source = "module tb();\nendmodule\nmodule dut(input a, output [3:0] y);\nendmodule\n"
+    module, ports = _scanned_ports(source)
+    assert module == "dut"
+    assert [(port.name, port.width) for port in ports] == [("a", 1), ("y", 4)]
+
+
+def test_generated_testbench_monitors_the_dut_ports():
+    with open(os.path.join(EXAMPLES_DIR, "half_adder.v"), "r", encoding="utf-8") as handle:
+        testbench = generate_testbench(handle.read(), "waveform.vcd")
+    assert "half_adder uut (" in testbench
+    assert 'Time=%0t: a=%b b=%b sum=%b carry=%b' in testbench
+
+
+@pytest.mark.parametrize("name", ["counter_4bit.v", "half_adder.v", "combinational_circuits.v"])
+def test_testbench_helpers_stay_out_of_the_waveform(simulator, name):
+    with open(os.path.join(EXAMPLES_DIR, name), "r", encoding="utf-8") as handle:
+        source = handle.read()
+    result = simulator.simulate(source)
+    assert result["success"], result.get("error")
+    assert not [signal["name"] for signal in result["signals"] if signal["name"].startswith("tb_")]
+
+
+def test_designs_without_data_inputs_declare_no_stimulus_registers(simulator):
+    source = (
+        "module free_counter(input clk, input rst, output reg [3:0] count);\n"
+        "  always @(posedge clk) count <= rst ? 4'd0 : count + 4'd1;\n"
+        "endmodule\n"
+    )
+    testbench = generate_testbench(source, "waveform.vcd")
+    assert "[-1:0]" not in testbench
+    assert "tb_stim" not in testbench
+    assert simulator.simulate(source)["success"]
@@ -0,0 +1,31 @@
+import json
+import os
+import threading
+
+from simulator import VerilogSimulator
+from template_artifacts import TemplateArtifacts
+from verilog_templates import TEMPLATES
+
+
+def test_concurrent_builds_share_one_manifest(tmp_path):
+    reports = []
+
+    def build():
+        simulator = VerilogSimulator()
+        simulator.template_artifacts = TemplateArtifacts(str(tmp_path))
+        reports.append(simulator.template_artifacts.build(simulator, missing_only=True))
+
+    threads = [threading.Thread(target=build) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(report["built"] for report in reports) == [0, len(TEMPLATES)]
+    with open(os.path.join(tmp_path, "manifest.json"), encoding="utf-8") as handle:
+        entries = json.load(handle)["entries"]
+    assert sorted(entry["template"] for entry in entries.values()) == sorted(TEMPLATES)
+    # Each stored waveform is referenced once per manifest entry, not once per build.
+    for entry in entries.values():
+        references = sum(1 for other in entries.values() if other["waveform_file"] == entry["waveform_file"])
+        assert TemplateArtifacts(str(tmp_path)).blobs.refcount(entry["waveform_file"]) == references
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from uploads_manager import UploadsManager, UploadsPolicy
+from waveform_blobs import WaveformBlobStore
+
+VCD = "$timescale 1ns $end\n$var wire 1 ! a $end\n$enddefinitions $end\n#0\n0!\n#5\n1!\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "waveform.vcd"
+    path.write_text(VCD)
+    return str(path)
+
+
+def _manager(directory, user_max_bytes=0, max_bytes=0):
+    return UploadsManager(str(directory), UploadsPolicy(max_bytes, user_max_bytes, 0, 0))
+
+
+def _persist(manager, source, owner):
+    """What a request does: store the waveform (one reference), then record its holder."""
+
+    filename, _ = manager.blobs.add(source)
+    manager.record(filename, owner)
+    return filename
+
+
+def test_each_holder_keeps_one_reference(tmp_path, source):
+    manager = _manager(tmp_path / "uploads")
+    for owner in ("gh:1", "gh:1", None, "gh:2", None):
+        filename = _persist(manager, source, owner)
+    assert manager.blobs.refcount(filename) == 3
+
+
+def test_quota_eviction_releases_only_that_owners_reference(tmp_path, source):
+    manager = _manager(tmp_path / "uploads", user_max_bytes=1)
+    filename = _persist(manager, source, "gh:1")
+    _persist(manager, source, None)
+
+    manager.sweep()
+    path = manager.blobs.path_for(filename)
+    assert os.path.exists(path)
+    assert manager.blobs.refcount(filename) == 1
+
+    manager.policy = UploadsPolicy(1, 0, 0, 0)
+    manager.sweep()
+    assert not os.path.exists(path)
+
+
+def test_job_result_fetch_takes_its_own_reference(tmp_path, source):
+    manager = _manager(tmp_path / "uploads")
+    # The worker's reference belongs to the job until the job is cleaned up.
+    filename, _ = WaveformBlobStore(manager.directory).add(source)
+    for _ in range(2):
+        manager.blobs.acquire(filename)
+        manager.record(filename, "gh:1")
+    assert manager.blobs.refcount(filename) == 2
+    manager.blobs.release(filename)
+    assert manager.blobs.refcount(filename) == 1
+
+
+def _distinct(tmp_path, count):
+    sources = []
+    for number in range(count):
+        path = tmp_path / f"waveform{number}.vcd"
+        path.write_text(VCD + f"#{10 + number}\n0!\n")
+        sources.append(str(path))
+    return sources
+
+
+def _accessed(manager, filename, seconds):
+    path = manager.blobs.path_for(filename)
+    os.utime(path, (seconds, os.stat(path).st_mtime))
+
+
+def test_shared_files_are_split_between_holders(tmp_path, source):
+    manager = _manager(tmp_path / "uploads")
+    filename = _persist(manager, source, "gh:1")
+    _persist(manager, source, "gh:2")
+    manager.sweep()
+    stored = next(stored for stored in manager.scan() if stored.name == filename)
+    assert stored.share == stored.size // 2
+    assert manager._usage == {"gh:1": stored.share, "gh:2": stored.share}
+    assert manager.usage()["bytes"] == stored.size
+
+
+def test_global_limit_keeps_files_other_holders_still_reference(tmp_path):
+    manager = _manager(tmp_path / "uploads")
+    shared, heavy, light = _distinct(tmp_path, 3)
+    with open(heavy, "a") as handle:
+        handle.writelines(f"#{20 + step}\n{step % 2}!\n" for step in range(5000))
+    shared_name = _persist(manager, shared, "gh:1")
+    _persist(manager, shared, "gh:2")
+    heavy_name = _persist(manager, heavy, "gh:1")
+    light_name = _persist(manager, light, "gh:2")
+    for seconds, filename in enumerate((shared_name, heavy_name, light_name), start=1000):
+        _accessed(manager, filename, seconds)
+    total = sum(stored.size for stored in manager.scan())
+
+    # gh:1 is charged most: its oldest hold only hands the shared file to gh:2,
+    # so the next one (the heavy file) is what actually frees space.
+    manager.policy = UploadsPolicy(total - 1, 0, 0, 0)
+    manager.sweep()
+    assert manager.blobs.refcount(shared_name) == 1
+    assert not os.path.exists(manager.blobs.path_for(heavy_name))
+    assert os.path.exists(manager.blobs.path_for(light_name))
+
+
+def test_global_limit_leaves_files_held_by_a_job(tmp_path, source):
+    manager = _manager(tmp_path / "uploads", max_bytes=1)
+    filename, _ = manager.blobs.add(source)
+    manager.sweep()
+    assert os.path.exists(manager.blobs.path_for(filename))
@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vcd_index import load_signals, load_vcd_index, write_vcd_index
+from vcd_samples import SAMPLE_NAMES, SAMPLE_WINDOWS, expected_window, traces, write_sample_vcd
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    return write_sample_vcd(tmp_path / "dump.vcd")
+
+
+def test_index_windows_match_the_whole_waveform(vcd_file):
+    full = traces(load_signals(vcd_file, SAMPLE_NAMES))
+    index = write_vcd_index(vcd_file, checkpoint_bytes=8192)
+    assert len(index["checkpoints"]) > 10
+    assert load_vcd_index(vcd_file) == index
+
+    for start, end in SAMPLE_WINDOWS:
+        window = load_signals(vcd_file, SAMPLE_NAMES, start, end, index)
+        assert traces(window) == expected_window(full, start, end), (start, end)
+
+
+def test_concurrent_writers_leave_one_complete_index(vcd_file):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        indexes = list(pool.map(lambda _: write_vcd_index(vcd_file, checkpoint_bytes=8192), range(8)))
+    assert load_vcd_index(vcd_file) == indexes[0]
+    assert [name for name in os.listdir(os.path.dirname(vcd_file)) if name.endswith(".tmp")] == []
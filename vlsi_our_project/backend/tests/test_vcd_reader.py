@@ -0,0 +1,25 @@
+import pytest
+
+from vcd_reader import VcdTokenizer, iter_vcd_events
+from vcd_samples import write_sample_vcd
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    return write_sample_vcd(tmp_path / "dump.vcd")
+
+
+def test_tokenizer_is_independent_of_block_boundaries(vcd_file):
+    whole = list(iter_vcd_events(vcd_file))
+    with open(vcd_file, "rb") as handle:
+        data = handle.read()
+    tokenizer = VcdTokenizer()
+    chunked = []
+    for begin in range(0, len(data), 97):
+        chunked.extend(tokenizer.feed(data[begin:begin + 97]))
+    chunked.extend(tokenizer.finish())
+    assert chunked == whole
+    variables = [event[1] for event in whole if event[0] == "var"]
+    assert [(".".join([*var.scope, var.name]), var.width) for var in variables] == [
+        ("tb.clk", 1), ("tb.level", 64), ("tb.uut.bus", 8), ("tb.uut.wide", 70)
+    ]
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from vcd_index import load_signals
+from vcd_samples import SAMPLE_NAMES, SAMPLE_STEPS, traces, write_sample_vcd
+from waveform_binary import BLOCK_VALUES, binary_path_for, open_binary_waveform, write_binary_waveform
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    return write_sample_vcd(tmp_path / "dump.vcd")
+
+
+def test_binary_sidecar_round_trips_and_serves_the_same_windows(vcd_file):
+    full_store = load_signals(vcd_file, SAMPLE_NAMES)
+    full = traces(full_store)
+    assert SAMPLE_STEPS >= 3 * BLOCK_VALUES
+    windows = [(0, 100), (12_345, 23_456), (BLOCK_VALUES * 5, BLOCK_VALUES * 5), (SAMPLE_STEPS * 5 - 50, None)]
+    from_vcd = [traces(load_signals(vcd_file, SAMPLE_NAMES, start, end)) for start, end in windows]
+
+    write_binary_waveform(binary_path_for(vcd_file), full_store)
+    binary = open_binary_waveform(vcd_file)
+    assert binary is not None
+    with binary:
+        assert traces(binary.to_store()) == full
+        assert binary.markers().tolist() == [step * 5 for step in range(SAMPLE_STEPS)]
+        for name in SAMPLE_NAMES:
+            original, stored = full_store.trace(name), binary.trace(name)
+            assert np.array_equal(original.aval, stored.aval)
+    for (start, end), expected in zip(windows, from_vcd):
+        assert traces(load_signals(vcd_file, SAMPLE_NAMES, start, end)) == expected, (start, end)
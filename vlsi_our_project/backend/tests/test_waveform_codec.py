@@ -0,0 +1,39 @@
+import pytest
+
+from vcd_index import load_signals, write_vcd_index
+from vcd_reader import iter_vcd_events
+from vcd_samples import SAMPLE_NAMES, SAMPLE_WINDOWS, expected_window, traces, write_sample_vcd
+from waveform_codec import compress_vcd, is_compressed, open_vcd, write_seek_points
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    return write_sample_vcd(tmp_path / "dump.vcd")
+
+
+def test_compressed_vcd_reads_and_seeks_like_the_original(vcd_file, tmp_path):
+    compressed = str(tmp_path / "dump.vcd.gz")
+    points = compress_vcd(vcd_file, compressed, 6, flush_bytes=4096)
+    write_seek_points(compressed, points)
+    # Flushes happen at read-chunk boundaries, so there is one seek point per chunk.
+    assert is_compressed(compressed) and len(points) > 3
+    with open(vcd_file, "rb") as handle:
+        original = handle.read()
+    with open_vcd(compressed) as handle:
+        assert handle.read() == original
+        for offset in (0, 1, points[1][0] - 1, points[1][0], points[2][0] + 1000, len(original) - 3):
+            handle.seek(offset)
+            assert handle.read(64) == original[offset:offset + 64]
+    assert list(iter_vcd_events(compressed)) == list(iter_vcd_events(vcd_file))
+
+
+def test_index_windows_over_a_compressed_vcd_match_the_whole_waveform(vcd_file, tmp_path):
+    full = traces(load_signals(vcd_file, SAMPLE_NAMES))
+    packed = str(tmp_path / "packed.vcd")
+    write_seek_points(packed, compress_vcd(vcd_file, packed, 6, flush_bytes=8192))
+    index = write_vcd_index(packed, checkpoint_bytes=8192)
+    assert len(index["checkpoints"]) > 10
+
+    for start, end in SAMPLE_WINDOWS:
+        window = load_signals(packed, SAMPLE_NAMES, start, end, index)
+        assert traces(window) == expected_window(full, start, end), (start, end)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from simulator import VerilogSimulator, _StreamDecoder
+from vcd_index import load_signals, write_vcd_index
+from vcd_reader import iter_vcd_events
+from waveform_binary import binary_path_for, open_binary_waveform, write_binary_waveform
+
+# ``data`` is declared by the testbench (!) and again inside uut ($) under another
+# identifier; ``y`` and ``out`` are one net (%) under two names.
+ALIASED_VCD = """$timescale 1ns $end
+$scope module tb $end
+$var reg 4 ! data [3:0] $end
+$var wire 1 % y $end
+$scope module uut $end
+$var wire 4 $ data [3:0] $end
+$var wire 1 % out $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+b1101 !
+b1101 $
+0%
+#10
+b0110 !
+b0110 $
+1%
+#20
+b0000 $
+"""
+
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    path = tmp_path / "waveform.vcd"
+    path.write_text(ALIASED_VCD)
+    return str(path)
+
+
+def test_a_name_keeps_one_transition_per_change(vcd_file):
+    store = VerilogSimulator()._parse_vcd(vcd_file)
+    assert [signal["name"] for signal in store.signals] == ["data", "y", "out"]
+    assert store.times("data").tolist() == [0, 10]
+    assert store.values("data") == ["1101", "0110"]
+    assert store.values("y") == store.values("out") == ["0", "1"]
+
+
+def test_stream_decoder_names_match_the_parsed_result(vcd_file):
+    decoder = _StreamDecoder()
+    events = list(decoder.decode(list(iter_vcd_events(vcd_file))))
+    changes = [change for name, payload in events if name == "changes" for change in payload["changes"]]
+    assert [change for change in changes if change[1] == "data"] == [[0, "data", "1101"], [10, "data", "0110"]]
+    assert len([change for change in changes if change[1] == "out"]) == 2
+
+
+def test_binary_sidecar_serves_owned_names_only(vcd_file):
+    write_binary_waveform(binary_path_for(vcd_file), VerilogSimulator()._parse_vcd(vcd_file))
+    index = write_vcd_index(vcd_file)
+
+    from_binary = load_signals(vcd_file, ["data", "out"], index=index)
+    assert from_binary.values("data") == ["1101", "0110"]
+    assert from_binary.values("out") == ["0", "1"]
+
+    # tb.uut.data is another identifier; it comes from the VCD, with its own last change.
+    nested = load_signals(vcd_file, ["tb.uut.data"], index=index)
+    assert nested.times("tb.uut.data").tolist() == [0, 10, 20]
+
+    with open_binary_waveform(vcd_file) as binary:
+        assert np.array_equal(binary.trace("data").times, from_binary.times("data"))
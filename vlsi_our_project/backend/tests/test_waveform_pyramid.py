@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from vcd_index import load_signals
+from vcd_samples import SAMPLE_NAMES, write_sample_vcd
+from waveform_pyramid import WaveformPyramid, _numeric_values, load_pyramid, pyramid_path_for
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return load_signals(write_sample_vcd(tmp_path_factory.mktemp("pyramid") / "dump.vcd"), SAMPLE_NAMES)
+
+
+@pytest.fixture(scope="module")
+def pyramid(store):
+    return WaveformPyramid.from_store(store)
+
+
+def test_levels_double_their_buckets_and_shrink(pyramid):
+    for name in SAMPLE_NAMES:
+        buckets, levels = pyramid.buckets[name], pyramid.levels[name]
+        assert buckets[0] == 1 and len(buckets) > 2, name
+        for depth in range(1, len(buckets)):
+            assert buckets[depth] > buckets[depth - 1]
+            assert buckets[depth] & (buckets[depth] - 1) == 0
+            assert len(levels[depth]["ids"]) <= len(levels[depth - 1]["ids"]) * 3 // 4
+
+
+@pytest.mark.parametrize("pixels", [1, 10, 100, 1000, 100_000])
+def test_query_picks_the_coarsest_level_within_one_bucket_per_pixel(pyramid, pixels):
+    start, end = 1_000, 51_000
+    target = (end - start) / pixels
+    for name, rows in pyramid.query(None, start, end, pixels).items():
+        buckets = pyramid.buckets[name]
+        assert buckets[rows["level"]] == rows["bucket"] <= max(target, 1)
+        if rows["level"] + 1 < len(buckets):
+            assert buckets[rows["level"] + 1] > target
+        if rows["level"]:
+            # One row per non-empty bucket touching the window.
+            assert len(rows["times"]) <= (end - start) // rows["bucket"] + 2
+
+
+@pytest.mark.parametrize("name", SAMPLE_NAMES)
+def test_rows_summarise_the_raw_transitions(store, pyramid, name):
+    trace = store.trace(name)
+    times = trace.times
+    values, xz = _numeric_values(trace)
+    start, end = 7_777, 40_000
+    for pixels in (3, 40, 200):
+        rows = pyramid.query([name], start, end, pixels)[name]
+        bucket = rows["bucket"]
+        assert rows["level"] > 0
+        for row, bucket_start in enumerate(rows["times"]):
+            inside = np.flatnonzero((times >= bucket_start) & (times < bucket_start + bucket))
+            assert len(inside) == rows["count"][row]
+            # The value held on entry is part of what the bucket shows.
+            shown = values[inside] if inside[0] == 0 else values[inside[0] - 1:inside[-1] + 1]
+            assert rows["min"][row] == shown.min()
+            assert rows["max"][row] == shown.max()
+            assert rows["last"][row] == values[inside[-1]]
+            assert rows["xz"][row] == bool(xz[inside].any())
+        assert rows["times"][0] + bucket > start and rows["times"][-1] <= end
+
+
+def test_initial_value_is_the_last_change_before_the_window(store, pyramid):
+    rows = pyramid.query(["tb.clk"], 1_002, 2_000, 10)["tb.clk"]
+    assert rows["initial"] == float(store.values("tb.clk")[200])
+
+
+def test_saved_pyramid_answers_the_same_queries(tmp_path, store, pyramid):
+    vcd_file = str(tmp_path / "dump.vcd")
+    open(vcd_file, "w").close()
+    pyramid.save(pyramid_path_for(vcd_file))
+    loaded = load_pyramid(vcd_file, lambda: pytest.fail("the saved pyramid is up to date"))
+    for pixels in (5, 500, 50_000):
+        assert loaded.query(None, 0, 61_440, pixels) == pyramid.query(None, 0, 61_440, pixels)
+    with pytest.raises(KeyError):
+        pyramid.query(["tb.missing"], 0, 10, 10)
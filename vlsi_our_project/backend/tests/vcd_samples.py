@@ -0,0 +1,76 @@
+"""A synthetic VCD shared by the waveform format tests."""
+
+import random
+
+SAMPLE_NAMES = ["tb.clk", "tb.uut.bus", "tb.uut.wide", "tb.level"]
+SAMPLE_STEPS = 12_288
+SAMPLE_WINDOWS = ((0, 100), (12_345, 23_456), (30_001, 30_001), (SAMPLE_STEPS * 5 - 50, SAMPLE_STEPS * 5 + 50))
+
+
+def write_sample_vcd(path, steps=SAMPLE_STEPS):
+    """A dump with a scalar, an 8-bit bus with x/z, a 70-bit vector and a real."""
+
+    generator = random.Random(7)
+    lines = [
+        "$date today $end",
+        "$timescale 1ps $end",
+        "$scope module tb $end",
+        "$var reg 1 ! clk $end",
+        "$var real 64 $ level $end",
+        "$scope module uut $end",
+        "$var wire 8 \" bus [7:0] $end",
+        "$var wire 70 # wide [69:0] $end",
+        "$upscope $end",
+        "$upscope $end",
+        "$enddefinitions $end",
+        "#0",
+        "$dumpvars",
+        "0!",
+        "bx \"",
+        "b0 #",
+        "r0 $",
+        "$end",
+    ]
+    for step in range(1, steps):
+        lines.append(f"#{step * 5}")
+        lines.append(f"{step % 2}!")
+        if step % 3 == 0:
+            bits = "".join(generator.choice("0101xz") for _ in range(8))
+            lines.append(f"b{bits} \"")
+        if step % 7 == 0:
+            lines.append(f"b{generator.getrandbits(70):b} #")
+        if step % 11 == 0:
+            lines.append(f"r{generator.uniform(-1, 1)!r} $")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def traces(store):
+    return {name: (store.times(name).tolist(), store.values(name)) for name in store.names}
+
+
+def expected_window(full, start, end):
+    """What a window query must return, derived from the whole waveform.
+
+    A window without any timestamp of the dump in it comes back empty.
+    """
+
+    markers = full["tb.clk"][0]
+    if not any(start <= time <= end for time in markers):
+        return {name: ([], []) for name in full}
+    expected = {}
+    for name, (times, values) in full.items():
+        window_times, window_values = [], []
+        for index, time in enumerate(times):
+            if time > end:
+                break
+            if time < start:
+                if index + 1 == len(times) or times[index + 1] > start:
+                    window_times, window_values = [start], [values[index]]
+                continue
+            if window_times and window_times[-1] == start and time == start:
+                window_times, window_values = [], []
+            window_times.append(time)
+            window_values.append(values[index])
+        expected[name] = (window_times, window_values)
+    return expected
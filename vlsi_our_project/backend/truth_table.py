@@ -0,0 +1,757 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hdl_parser import UnsupportedConstruct
+from native_sim import Driver, Expr, NativeSimulator, Signal
+
+
+# Every page request evaluates all 2**bits rows, so keep the table to about a million rows.
+MAX_INPUT_BITS = int(os.getenv("TRUTH_TABLE_MAX_INPUTS", "20"))
+# Rows evaluated per vectorized pass; bounds the size of every temporary array.
+CHUNK_ROWS = 1 << 16
+# Exhaustive VCDs grow with rows x signals, so only smaller tables get one.
+MAX_VCD_ROWS = 1 << 16
+ROW_PERIOD = 10
+MAX_LOOP_ITERATIONS = 4096
+
+# A vector is a pair of uint64 arrays: known bit values and the mask of x bits.
+# Bits that are x are always 0 in the value array.
+Vector = Tuple[np.ndarray, np.ndarray]
+
+_ONE = np.uint64(1)
+_ZERO = np.uint64(0)
+
+
+def _mask(width: int) -> np.uint64:
+    return np.uint64((1 << width) - 1)
+
+
+def _dtype_for(width: int) -> Any:
+    for dtype, bits in ((np.uint8, 8), (np.uint16, 16), (np.uint32, 32)):
+        if width <= bits:
+            return dtype
+    return np.uint64
+
+
+def _to_signed(value: np.ndarray, width: int) -> np.ndarray:
+    signed = value.astype(np.int64)
+    if width < 64:
+        sign = np.int64(1 << (width - 1))
+        signed = (signed ^ sign) - sign
+    return signed
+
+
+def _resize(vector: Vector, width: int, signed: bool, target_width: int, target_signed: bool) -> Vector:
+    value, unknown = vector
+    if target_width > width and signed and target_signed:
+        extension = _mask(target_width) ^ _mask(width)
+        top = np.uint64(width - 1)
+        value = value | np.where((value >> top) & _ONE, extension, _ZERO)
+        unknown = unknown | np.where((unknown >> top) & _ONE, extension, _ZERO)
+    mask = _mask(target_width)
+    return value & mask, unknown & mask
+
+
+def _all_unknown_where(rows: np.ndarray, value: np.ndarray, width: int) -> Vector:
+    unknown = np.where(rows, _mask(width), _ZERO)
+    return value & _mask(width) & ~unknown, unknown
+
+
+def _truth(vector: Vector) -> Tuple[np.ndarray, np.ndarray]:
+    """(definitely true, definitely false) per row; rows in neither are x."""
+
+    value, unknown = vector
+    return value != 0, (value | unknown) == 0
+
+
+def _from_truth(true: np.ndarray, false: np.ndarray) -> Vector:
+    unknown = ~(true | false)
+    return true.astype(np.uint64), unknown.astype(np.uint64)
+
+
+def _parity(value: np.ndarray) -> np.ndarray:
+    for shift in (32, 16, 8, 4, 2, 1):
+        value = value ^ (value >> np.uint64(shift))
+    return value & _ONE
+
+
+def _select(vector: Vector, width: int, offset: Any, select_width: int) -> Vector:
+    """Bits ``[offset, offset+select_width)`` of a vector; out-of-range bits read as x.
+
+    ``offset`` is an int or a per-row int64 array.
+    """
+
+    value, unknown = vector
+    if np.ndim(offset) == 0 and 0 <= offset and offset + select_width <= width:
+        shift = np.uint64(offset)
+        mask = _mask(select_width)
+        return (value >> shift) & mask, (unknown >> shift) & mask
+
+    out_value = np.zeros_like(value)
+    out_unknown = np.zeros_like(unknown)
+    for lane in range(select_width):
+        position = np.asarray(offset, dtype=np.int64) + lane
+        inside = (position >= 0) & (position < width)
+        shift = np.clip(position, 0, 63).astype(np.uint64)
+        lane_shift = np.uint64(lane)
+        out_value |= np.where(inside, (value >> shift) & _ONE, _ZERO) << lane_shift
+        out_unknown |= np.where(inside, (unknown >> shift) & _ONE, _ONE) << lane_shift
+    return out_value & ~out_unknown, out_unknown
+
+
+class TruthTable:
+    """Exhaustive input/output table of a combinational module.
+
+    Row ``i`` applies the input bits of ``i`` with the first input port as the most
+    significant field. Output columns are stored in the smallest unsigned dtype.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        inputs: List[Tuple[str, int]],
+        outputs: List[Tuple[str, int]],
+        values: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    ) -> None:
+        self.module = module
+        self.inputs = inputs
+        self.outputs = outputs
+        self.values = values
+        self.input_bits = sum(width for _, width in inputs)
+        self.row_count = 1 << self.input_bits
+
+    def _input_shifts(self) -> Dict[str, int]:
+        shifts: Dict[str, int] = {}
+        remaining = self.input_bits
+        for name, width in self.inputs:
+            remaining -= width
+            shifts[name] = remaining
+        return shifts
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        stop = self.row_count if stop is None else stop
+        shifts = self._input_shifts()
+        if name in shifts:
+            width = dict(self.inputs)[name]
+            rows = np.arange(start, stop, dtype=np.uint64)
+            value = (rows >> np.uint64(shifts[name])) & _mask(width)
+            return value, np.zeros_like(value)
+        value, unknown = self.values[name]
+        return value[start:stop].astype(np.uint64), unknown[start:stop].astype(np.uint64)
+
+    def rows(self, offset: int = 0, limit: int = 256) -> List[Dict[str, str]]:
+        """Rows ``[offset, offset+limit)`` as ``{signal: bit string}`` dictionaries."""
+
+        start = max(0, min(offset, self.row_count))
+        stop = min(self.row_count, start + max(0, limit))
+        columns = [
+            (name, width, *self.column(name, start, stop))
+            for name, width in self.inputs + self.outputs
+        ]
+        table = []
+        for index in range(stop - start):
+            table.append({
+                name: _bit_string(int(value[index]), int(unknown[index]), width)
+                for name, width, value, unknown in columns
+            })
+        return table
+
+    def write_vcd(self, path: str) -> None:
+        """Write the table as a waveform with one row every ``ROW_PERIOD`` ns."""
+
+        if self.row_count > MAX_VCD_ROWS:
+            raise ValueError(f"truth tables with more than {MAX_VCD_ROWS} rows are not dumped to VCD")
+
+        signals = self.inputs + self.outputs
+        codes = [chr(33 + index % 94) + "!" * (index // 94) for index in range(len(signals))]
+        change_rows: List[np.ndarray] = []
+        change_signals: List[np.ndarray] = []
+        columns = []
+        for index, (name, width) in enumerate(signals):
+            value, unknown = self.column(name)
+            columns.append((value, unknown))
+            changed = np.flatnonzero((value[1:] != value[:-1]) | (unknown[1:] != unknown[:-1])) + 1
+            change_rows.append(changed)
+            change_signals.append(np.full(changed.shape, index))
+        rows = np.concatenate(change_rows)
+        which = np.concatenate(change_signals)
+        order = np.lexsort((which, rows))
+
+        def line(signal_index: int, row: int) -> str:
+            width = signals[signal_index][1]
+            value, unknown = columns[signal_index]
+            bits = _bit_string(int(value[row]), int(unknown[row]), width)
+            return f"{bits}{codes[signal_index]}" if width == 1 else f"b{bits} {codes[signal_index]}"
+
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(f"$date\n\t{datetime.now().strftime('%a %b %d %H:%M:%S %Y')}\n$end\n")
+            handle.write("$version\n\tvlsi-assistant truth table\n$end\n")
+            handle.write("$timescale\n\t1ns\n$end\n")
+            handle.write(f"$scope module {self.module} $end\n")
+            for code, (name, width) in zip(codes, signals):
+                kind = "reg" if (name, width) in self.inputs else "wire"
+                reference = f"{name} [{width - 1}:0]" if width > 1 else name
+                handle.write(f"$var {kind} {width} {code} {reference} $end\n")
+            handle.write("$upscope $end\n$enddefinitions $end\n#0\n$dumpvars\n")
+            handle.write("".join(line(index, 0) + "\n" for index in range(len(signals))))
+            handle.write("$end\n")
+
+            current = None
+            chunk: List[str] = []
+            for position in order:
+                row = int(rows[position])
+                if row != current:
+                    chunk.append(f"#{row * ROW_PERIOD}")
+                    current = row
+                chunk.append(line(int(which[position]), row))
+            chunk.append(f"#{self.row_count * ROW_PERIOD}")
+            handle.write("\n".join(chunk) + "\n")
+
+
+def _bit_string(value: int, unknown: int, width: int) -> str:
+    bits = format(value, f"0{width}b")
+    if not unknown:
+        return bits
+    marks = format(unknown, f"0{width}b")
+    return "".join("x" if mark == "1" else bit for bit, mark in zip(bits, marks))
+
+
+class _Evaluator:
+    """Evaluates bound ``native_sim`` expressions and statements over a chunk of rows."""
+
+    def __init__(self, state: Dict[Signal, Vector], rows: int) -> None:
+        self.state = state
+        self.rows = rows
+
+    def constant(self, value: int, unknown: int = 0) -> Vector:
+        return (
+            np.full(self.rows, np.uint64(value), dtype=np.uint64),
+            np.full(self.rows, np.uint64(unknown), dtype=np.uint64),
+        )
+
+    def signal(self, signal: Signal) -> Vector:
+        return self.state[signal]
+
+    def eval(self, expr: Expr, width: int, signed: bool) -> Vector:
+        op = expr.op
+        args = expr.args
+        if op == "sig":
+            signal = args[0]
+            return _resize(self.signal(signal), signal.width, signal.signed, width, signed)
+        if op in ("const", "str"):
+            logic = args[0] if op == "const" else args[1]
+            if logic.width > 64:
+                raise UnsupportedConstruct("constants wider than 64 bits are not supported")
+            vector = self.constant(logic.aval & ~logic.bval, logic.bval)
+            return _resize(vector, logic.width, logic.signed, width, signed)
+        if op == "binary":
+            return self._binary(expr, width, signed)
+        if op == "unary":
+            return self._unary(expr, width, signed)
+        if op == "cond":
+            cond, then, other = args
+            true, false = _truth(self.eval(cond, cond.width, cond.signed))
+            then_value, then_unknown = self.eval(then, width, signed)
+            other_value, other_unknown = self.eval(other, width, signed)
+            # An x condition merges both branches bit by bit.
+            merged_unknown = then_unknown | other_unknown | (then_value ^ other_value)
+            unknown = np.where(true, then_unknown, np.where(false, other_unknown, merged_unknown))
+            value = np.where(true, then_value, np.where(false, other_value, then_value & ~merged_unknown))
+            return value, unknown
+        if op == "concat":
+            value = np.zeros(self.rows, dtype=np.uint64)
+            unknown = np.zeros(self.rows, dtype=np.uint64)
+            for item in args:
+                item_value, item_unknown = self.eval(item, item.width, item.signed)
+                shift = np.uint64(item.width)
+                value = (value << shift) | item_value
+                unknown = (unknown << shift) | item_unknown
+            return _resize((value, unknown), expr.width, False, width, signed)
+        if op in ("bit", "part", "ipart"):
+            return _resize(self._select(expr), expr.width, False, width, signed)
+        if op in ("signed", "unsigned"):
+            operand = args[0]
+            vector = self.eval(operand, operand.width, operand.signed)
+            return _resize(vector, operand.width, op == "signed", width, signed)
+        raise UnsupportedConstruct(f"{op} is not available in a combinational truth table")
+
+    def _select(self, expr: Expr) -> Vector:
+        signal = expr.args[0]
+        source = self.signal(signal) if signal.kind != "param" else self.constant(signal.aval, 0)
+        if expr.op == "part":
+            return _select(source, signal.width, expr.args[1], expr.width)
+
+        index = expr.args[1]
+        ascending = expr.op == "bit" or expr.args[2]
+        if index.op == "const" and not index.args[0].bval:
+            base = index.args[0].to_int()
+            low = base if ascending else base - (expr.width - 1)
+            high = low + expr.width - 1
+            offset = low - signal.lsb if signal.msb >= signal.lsb else signal.lsb - high
+            return _select(source, signal.width, offset, expr.width)
+
+        offset, known = self._offset(signal, index, expr.width, ascending)
+        value, unknown = _select(source, signal.width, offset, expr.width)
+        return np.where(known, value, _ZERO), np.where(known, unknown, _mask(expr.width))
+
+    def _offset(self, signal: Signal, index_expr: Expr, width: int, ascending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-row bit offset of a variable select and the rows where the index is known."""
+
+        value, unknown = self.eval(index_expr, index_expr.width, index_expr.signed)
+        index = _to_signed(value, index_expr.width) if index_expr.signed else value.astype(np.int64)
+        low = index if ascending else index - (width - 1)
+        high = low + (width - 1)
+        if signal.msb >= signal.lsb:
+            offset = low - signal.lsb
+        else:
+            offset = signal.lsb - high
+        return offset, unknown == 0
+
+    def _binary(self, expr: Expr, width: int, signed: bool) -> Vector:
+        name, left, right = expr.args
+        if name in ("&", "|", "^", "~^", "^~"):
+            left_value, left_unknown = self.eval(left, width, signed)
+            right_value, right_unknown = self.eval(right, width, signed)
+            mask = _mask(width)
+            if name == "&":
+                known_zero = (~left_value & ~left_unknown) | (~right_value & ~right_unknown)
+                unknown = (left_unknown | right_unknown) & ~known_zero & mask
+                return left_value & right_value & ~unknown, unknown
+            if name == "|":
+                known_one = (left_value & ~left_unknown) | (right_value & ~right_unknown)
+                unknown = (left_unknown | right_unknown) & ~known_one & mask
+                return (left_value | right_value) & ~unknown, unknown
+            unknown = left_unknown | right_unknown
+            value = left_value ^ right_value
+            if name != "^":
+                value = ~value & mask
+            return value & ~unknown, unknown
+
+        if name in ("+", "-", "*", "/", "%"):
+            left_value, left_unknown = self.eval(left, width, signed)
+            right_value, right_unknown = self.eval(right, width, signed)
+            invalid = (left_unknown | right_unknown) != 0
+            if name == "+":
+                value = left_value + right_value
+            elif name == "-":
+                value = left_value - right_value
+            elif name == "*":
+                value = left_value * right_value
+            else:
+                invalid = invalid | (right_value == 0)
+                divisor = np.where(right_value == 0, _ONE, right_value)
+                if signed:
+                    numerator = _to_signed(left_value, width)
+                    denominator = _to_signed(divisor, width)
+                    quotient = np.abs(numerator) // np.abs(denominator)
+                    if name == "/":
+                        value = np.where((numerator < 0) != (denominator < 0), -quotient, quotient)
+                    else:
+                        remainder = np.abs(numerator) - quotient * np.abs(denominator)
+                        value = np.where(numerator < 0, -remainder, remainder)
+                    value = value.astype(np.uint64)
+                else:
+                    value = left_value // divisor if name == "/" else left_value % divisor
+            return _all_unknown_where(invalid, value, width)
+
+        if name == "**":
+            base, base_unknown = self.eval(left, width, signed)
+            exponent_value, exponent_unknown = self.eval(right, right.width, right.signed)
+            if right.signed and np.any(_to_signed(exponent_value, right.width) < 0):
+                raise UnsupportedConstruct("negative exponents are not supported in truth tables")
+            result = np.ones(self.rows, dtype=np.uint64)
+            square = base.copy()
+            remaining = exponent_value.copy()
+            while np.any(remaining):
+                result = np.where(remaining & _ONE, result * square, result)
+                square = square * square
+                remaining = remaining >> _ONE
+            return _all_unknown_where((base_unknown | exponent_unknown) != 0, result, width)
+
+        if name in ("==", "!=", "===", "!==", "<", "<=", ">", ">="):
+            operand_width = max(left.width, right.width)
+            operand_signed = left.signed and right.signed
+            left_value, left_unknown = self.eval(left, operand_width, operand_signed)
+            right_value, right_unknown = self.eval(right, operand_width, operand_signed)
+            if name in ("===", "!=="):
+                same = (left_value == right_value) & (left_unknown == right_unknown)
+                result = same if name == "===" else ~same
+                return _resize(_from_truth(result, ~result), 1, False, width, False)
+            any_unknown = (left_unknown | right_unknown) != 0
+            if name in ("==", "!="):
+                differs = ((left_value ^ right_value) & ~(left_unknown | right_unknown)) != 0
+                equal = ~differs & ~any_unknown
+                true, false = (equal, differs) if name == "==" else (differs, equal)
+                return _resize(_from_truth(true, false), 1, False, width, False)
+            if operand_signed:
+                left_number = _to_signed(left_value, operand_width)
+                right_number = _to_signed(right_value, operand_width)
+            else:
+                left_number, right_number = left_value, right_value
+            compare = {
+                "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+            }[name](left_number, right_number)
+            true = compare & ~any_unknown
+            false = ~compare & ~any_unknown
+            return _resize(_from_truth(true, false), 1, False, width, False)
+
+        if name in ("&&", "||"):
+            left_true, left_false = _truth(self.eval(left, left.width, left.signed))
+            right_true, right_false = _truth(self.eval(right, right.width, right.signed))
+            if name == "&&":
+                true, false = left_true & right_true, left_false | right_false
+            else:
+                true, false = left_true | right_true, left_false & right_false
+            return _resize(_from_truth(true, false), 1, False, width, False)
+
+        # Shifts: the amount is self-determined and unsigned.
+        value, unknown = self.eval(left, width, signed)
+        amount, amount_unknown = self.eval(right, right.width, False)
+        mask = _mask(width)
+        too_far = amount >= np.uint64(width)
+        shift = np.minimum(amount, np.uint64(63))
+        if name in ("<<", "<<<"):
+            shifted_value = (value << shift) & mask
+            shifted_unknown = (unknown << shift) & mask
+        else:
+            shifted_value = value >> shift
+            shifted_unknown = unknown >> shift
+            if name == ">>>" and signed:
+                top = np.uint64(width - 1)
+                fill = mask ^ (mask >> shift)
+                shifted_value = shifted_value | np.where((value >> top) & _ONE, fill, _ZERO)
+                shifted_unknown = shifted_unknown | np.where((unknown >> top) & _ONE, fill, _ZERO)
+                too_far = np.zeros_like(too_far)
+        shifted_value = np.where(too_far, _ZERO, shifted_value)
+        shifted_unknown = np.where(too_far, _ZERO, shifted_unknown)
+        unknown_amount = amount_unknown != 0
+        return np.where(unknown_amount, _ZERO, shifted_value), np.where(unknown_amount, mask, shifted_unknown)
+
+    def _unary(self, expr: Expr, width: int, signed: bool) -> Vector:
+        name, operand = expr.args
+        mask = _mask(width)
+        if name in ("~", "-", "+"):
+            value, unknown = self.eval(operand, width, signed)
+            if name == "~":
+                return ~value & mask & ~unknown, unknown
+            if name == "-":
+                return _all_unknown_where(unknown != 0, (_ZERO - value) & mask, width)
+            return value, unknown
+
+        value, unknown = self.eval(operand, operand.width, operand.signed)
+        operand_mask = _mask(operand.width)
+        if name == "!":
+            true, false = _truth((value, unknown))
+            result = (false, true)
+        elif name in ("&", "~&"):
+            known_zero = (~value & ~unknown & operand_mask) != 0
+            all_one = value == operand_mask
+            result = (all_one, known_zero)
+        elif name in ("|", "~|"):
+            known_one = value != 0
+            all_zero = (value | unknown) == 0
+            result = (known_one, all_zero)
+        else:
+            parity = _parity(value) == 1
+            known = unknown == 0
+            result = (parity & known, ~parity & known)
+        true, false = result
+        if name.startswith("~") or name == "^~":
+            true, false = false, true
+        return _resize(_from_truth(true, false), 1, False, width, False)
+
+    # -- statements -----------------------------------------------------------
+
+    def assign(self, lhs: Any, vector: Vector, width: int, active: Optional[np.ndarray]) -> None:
+        position = width
+        for target in self._flatten(lhs):
+            target_width = self._target_width(target)
+            position -= target_width
+            part = _select(vector, width, position, target_width)
+            self._write(target, part, active)
+
+    def _flatten(self, lhs: Any) -> List[Any]:
+        if lhs[0] == "concat":
+            return [target for part in lhs[1] for target in self._flatten(part)]
+        return [lhs]
+
+    @staticmethod
+    def _target_width(target: Any) -> int:
+        kind = target[0]
+        if kind == "sig":
+            return target[1].width
+        if kind == "bit":
+            return 1
+        return target[3]
+
+    def _write(self, target: Any, part: Vector, active: Optional[np.ndarray]) -> None:
+        kind, signal = target[0], target[1]
+        old_value, old_unknown = self.state[signal]
+        signal_mask = _mask(signal.width)
+        if kind == "sig":
+            new_value, new_unknown = part
+            field = np.full(self.rows, signal_mask, dtype=np.uint64)
+        else:
+            if kind == "part":
+                offset = np.full(self.rows, target[2], dtype=np.int64)
+                known = np.ones(self.rows, dtype=bool)
+                width = target[3]
+            elif kind == "bit":
+                offset, known = self._offset(signal, target[2], 1, True)
+                width = 1
+            else:
+                offset, known = self._offset(signal, target[2], target[3], target[4])
+                width = target[3]
+            shift = np.clip(offset, 0, 63).astype(np.uint64)
+            below = np.clip(-offset, 0, 63).astype(np.uint64)
+            field = np.where(offset >= 0, _mask(width) << shift, _mask(width) >> below) & signal_mask
+            field = np.where(known, field, _ZERO)
+            value, unknown = part
+            new_value = np.where(offset >= 0, value << shift, value >> below)
+            new_unknown = np.where(offset >= 0, unknown << shift, unknown >> below)
+        merged_value = (old_value & ~field) | (new_value & field)
+        merged_unknown = (old_unknown & ~field) | (new_unknown & field)
+        if active is not None:
+            merged_value = np.where(active, merged_value, old_value)
+            merged_unknown = np.where(active, merged_unknown, old_unknown)
+        self.state[signal] = (merged_value, merged_unknown)
+
+    def execute(self, stmt: Any, active: np.ndarray) -> None:
+        """Run a bound statement on the rows selected by ``active``."""
+
+        if stmt is None or not np.any(active):
+            return
+        op = stmt[0]
+        if op == "block":
+            for item in stmt[1]:
+                self.execute(item, active)
+        elif op == "assign":
+            _, lhs, rhs, _, delay, width, _ = stmt
+            if delay is not None:
+                raise UnsupportedConstruct("delayed assignments are not combinational")
+            vector = self.eval(rhs, max(width, rhs.width), rhs.signed)
+            self.assign(lhs, _resize(vector, max(width, rhs.width), False, width, False), width, active)
+        elif op == "if":
+            true, _ = _truth(self.eval(stmt[1], stmt[1].width, stmt[1].signed))
+            self.execute(stmt[2], active & true)
+            self.execute(stmt[3], active & ~true)
+        elif op == "case":
+            self._case(stmt, active)
+        elif op == "for":
+            _, init, cond, step, body = stmt
+            self.execute(init, active)
+            self._loop(cond, body, step, active)
+        elif op == "while":
+            self._loop(stmt[1], stmt[2], None, active)
+        elif op == "repeat":
+            count_value, count_unknown = self.eval(stmt[1], stmt[1].width, stmt[1].signed)
+            counts = np.where(count_unknown != 0, np.int64(0), count_value.astype(np.int64))
+            for iteration in range(int(counts.max(initial=0))):
+                self.execute(stmt[2], active & (counts > iteration))
+        elif op == "task":
+            return
+        else:
+            raise UnsupportedConstruct(f"'{op}' statements are not combinational")
+
+    def _loop(self, cond: Expr, body: Any, step: Any, active: np.ndarray) -> None:
+        running = active
+        for _ in range(MAX_LOOP_ITERATIONS):
+            true, _ = _truth(self.eval(cond, cond.width, cond.signed))
+            running = running & true
+            if not np.any(running):
+                return
+            self.execute(body, running)
+            self.execute(step, running)
+        raise UnsupportedConstruct(f"loop did not terminate within {MAX_LOOP_ITERATIONS} iterations")
+
+    def _case(self, stmt: Any, active: np.ndarray) -> None:
+        _, kind, subject, items, default, width, signed = stmt
+        subject_value, subject_unknown = self.eval(subject, width, signed)
+        remaining = active
+        for labels, body in items:
+            matched = np.zeros(self.rows, dtype=bool)
+            for label in labels:
+                label_value, label_unknown = self.eval(label, width, signed)
+                if kind == "case":
+                    hit = (label_value == subject_value) & (label_unknown == subject_unknown)
+                else:
+                    # x and z collapse to x here, so casez treats them like casex.
+                    care = ~(label_unknown | subject_unknown) & _mask(width)
+                    hit = ((label_value ^ subject_value) & care) == 0
+                matched = matched | hit
+            self.execute(body, remaining & matched)
+            remaining = remaining & ~matched
+        self.execute(default, remaining)
+
+
+def _node_targets(lhs: Any) -> List[Signal]:
+    if lhs[0] == "concat":
+        return [signal for part in lhs[1] for signal in _node_targets(part)]
+    return [lhs[1]]
+
+
+def _statement_targets(stmt: Any, found: Dict[Signal, None]) -> None:
+    if stmt is None:
+        return
+    op = stmt[0]
+    if op == "assign":
+        for signal in _node_targets(stmt[1]):
+            found[signal] = None
+    elif op == "block":
+        for item in stmt[1]:
+            _statement_targets(item, found)
+    elif op == "if":
+        _statement_targets(stmt[2], found)
+        _statement_targets(stmt[3], found)
+    elif op == "case":
+        for _, body in stmt[3]:
+            _statement_targets(body, found)
+        _statement_targets(stmt[4], found)
+    elif op == "for":
+        _statement_targets(stmt[1], found)
+        _statement_targets(stmt[3], found)
+        _statement_targets(stmt[4], found)
+    elif op in ("while", "repeat"):
+        _statement_targets(stmt[2], found)
+
+
+class TruthTableEngine:
+    """Compiles a combinational design once and evaluates it for every input pattern.
+
+    Continuous assignments, gate primitives, port connections and ``always @*``
+    blocks are ordered topologically and evaluated as NumPy vector operations,
+    ``CHUNK_ROWS`` input patterns per pass.
+    """
+
+    def __init__(self, design_code: str, top: Optional[str] = None, max_input_bits: int = MAX_INPUT_BITS) -> None:
+        simulator = NativeSimulator(design_code, "")
+        roots = [scope for scope in simulator.scopes if len(scope.path) == 1]
+        if top is not None:
+            roots = [scope for scope in roots if scope.path[0] == top]
+        if len(roots) != 1:
+            names = ", ".join(scope.path[0] for scope in roots) or top
+            raise UnsupportedConstruct(f"cannot choose a top-level module ({names}); pass top")
+        self.scope = roots[0]
+        module = self.scope.module
+
+        self.inputs: List[Signal] = []
+        self.outputs: List[Signal] = []
+        for port in module.ports:
+            signal = self.scope.names[port]
+            direction = self.scope.directions[port]
+            if direction == "inout":
+                raise UnsupportedConstruct("inout ports are not supported")
+            (self.inputs if direction == "input" else self.outputs).append(signal)
+        if any(signal.width > 64 for signal in simulator.signals):
+            raise UnsupportedConstruct("signals wider than 64 bits are not supported")
+        input_bits = sum(signal.width for signal in self.inputs)
+        if input_bits > max_input_bits:
+            raise UnsupportedConstruct(f"{input_bits} input bits exceed the truth-table limit of {max_input_bits}")
+
+        self.signals = simulator.signals
+        self.nodes = self._order(simulator)
+
+    def _order(self, simulator: NativeSimulator) -> List[Any]:
+        nodes: List[Any] = list(simulator.drivers)
+        for process in simulator.processes:
+            body = process.body
+            if process.name != "always" or body is None or body[0] != "event":
+                raise UnsupportedConstruct("only continuous assignments and always @* blocks are combinational")
+            if any(edge != "any" for edge, _ in body[1]):
+                raise UnsupportedConstruct("edge-triggered always blocks are sequential")
+            nodes.append(body[2])
+
+        writes: List[List[Signal]] = []
+        reads: List[List[Signal]] = []
+        for node in nodes:
+            if isinstance(node, Driver):
+                writes.append(_node_targets(node.lhs))
+                found: Dict[Signal, None] = {}
+                simulator._read_signals_expr(node.rhs, found)
+                simulator._read_lhs_indices(node.lhs, found)
+                reads.append(list(found))
+            else:
+                targets: Dict[Signal, None] = {}
+                _statement_targets(node, targets)
+                writes.append(list(targets))
+                reads.append(simulator._read_signals_stmt(node))
+
+        writers: Dict[Signal, List[int]] = {}
+        for index, targets in enumerate(writes):
+            for signal in targets:
+                writers.setdefault(signal, []).append(index)
+
+        dependents: List[List[int]] = [[] for _ in nodes]
+        pending = [0] * len(nodes)
+        for index, sources in enumerate(reads):
+            producers = {producer for signal in sources for producer in writers.get(signal, []) if producer != index}
+            for producer in producers:
+                dependents[producer].append(index)
+            pending[index] = len(producers)
+
+        ready = [index for index, count in enumerate(pending) if count == 0]
+        ordered: List[Any] = []
+        while ready:
+            index = ready.pop(0)
+            ordered.append(nodes[index])
+            for dependent in dependents[index]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if len(ordered) != len(nodes):
+            raise UnsupportedConstruct("combinational loop detected")
+        return ordered
+
+    def evaluate(self) -> TruthTable:
+        input_bits = sum(signal.width for signal in self.inputs)
+        row_count = 1 << input_bits
+        results = {
+            signal.name: (
+                np.empty(row_count, dtype=_dtype_for(signal.width)),
+                np.empty(row_count, dtype=_dtype_for(signal.width)),
+            )
+            for signal in self.outputs
+        }
+
+        for start in range(0, row_count, CHUNK_ROWS):
+            stop = min(row_count, start + CHUNK_ROWS)
+            rows = np.arange(start, stop, dtype=np.uint64)
+            evaluator = _Evaluator({}, stop - start)
+            for signal in self.signals:
+                evaluator.state[signal] = evaluator.constant(signal.aval & ~signal.bval, signal.bval)
+            remaining = input_bits
+            for signal in self.inputs:
+                remaining -= signal.width
+                value = (rows >> np.uint64(remaining)) & _mask(signal.width)
+                evaluator.state[signal] = (value, np.zeros_like(value))
+
+            every_row = np.ones(stop - start, dtype=bool)
+            for node in self.nodes:
+                if isinstance(node, Driver):
+                    rhs = node.rhs
+                    context = max(node.width, rhs.width)
+                    vector = _resize(evaluator.eval(rhs, context, rhs.signed), context, False, node.width, False)
+                    evaluator.assign(node.lhs, vector, node.width, None)
+                else:
+                    evaluator.execute(node, every_row)
+
+            for signal in self.outputs:
+                value, unknown = evaluator.state[signal]
+                results[signal.name][0][start:stop] = value
+                results[signal.name][1][start:stop] = unknown
+
+        return TruthTable(
+            self.scope.path[0],
+            [(signal.name, signal.width) for signal in self.inputs],
+            [(signal.name, signal.width) for signal in self.outputs],
+            results,
+        )
+
+
+def build_truth_table(design_code: str, top: Optional[str] = None) -> TruthTable:
+    """Exhaustive truth table of a combinational design (see :class:`TruthTableEngine`)."""
+
+    return TruthTableEngine(design_code, top).evaluate()
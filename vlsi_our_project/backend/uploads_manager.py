@@ -0,0 +1,307 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from waveform_blobs import OWNERS_SUFFIX, REFS_SUFFIX, SIDECAR_SUFFIXES, WaveformBlobStore, touch
+
+
+# Staging and temporary files older than this are left over from a crashed writer.
+STALE_TEMP_SECONDS = 3600
+# Holder key of the requests made without a signed-in user.
+ANONYMOUS = ""
+_TEMP_PREFIXES = (".staging-", ".mock_")
+
+
+class UploadsPolicy(NamedTuple):
+    """Limits for the uploads directory; 0 disables a limit."""
+
+    max_bytes: int
+    user_max_bytes: int
+    ttl_seconds: int
+    sweep_seconds: int
+
+    @classmethod
+    def from_env(cls) -> "UploadsPolicy":
+        return cls(
+            max_bytes=int(float(os.getenv("UPLOADS_MAX_MB", "2048")) * 1024 * 1024),
+            user_max_bytes=int(float(os.getenv("UPLOADS_USER_MAX_MB", "256")) * 1024 * 1024),
+            ttl_seconds=int(float(os.getenv("UPLOADS_TTL_HOURS", "168")) * 3600),
+            sweep_seconds=int(os.getenv("UPLOADS_SWEEP_SECONDS", "300")),
+        )
+
+
+class StoredFile(NamedTuple):
+    """One upload or persisted waveform together with its sidecars."""
+
+    name: str
+    size: int
+    accessed_ns: int
+    holders: List[str]
+
+    @property
+    def owners(self) -> List[str]:
+        return [holder for holder in self.holders if holder != ANONYMOUS]
+
+    @property
+    def share(self) -> int:
+        """Bytes charged to each holder: a shared file is split evenly between them."""
+
+        return self.size // max(len(self.holders), 1)
+
+
+class UploadsManager:
+    """Keeps ``uploads/`` within its TTL, per-user and global size limits.
+
+    Every file is accounted together with its sidecars (index, pyramid, binary,
+    reference counts). Its access time is the LRU clock: :meth:`accessed` bumps it
+    when a file is served, and eviction removes the least recently used files first.
+
+    Holders are the users whose requests produced or re-used a file, plus
+    :data:`ANONYMOUS` for requests without one; each holds one reference on the
+    file (see :meth:`record`) and is charged an even share of its size. Going over
+    a user's quota drops that user's references on their oldest files; going over
+    the global limit deletes files nobody holds, then drops the oldest reference of
+    whichever holder is charged most. Either way a file is only deleted with its
+    last reference, so a waveform a job still holds survives. The TTL is the
+    exception: a file nobody has read for that long is deleted whoever holds it.
+    """
+
+    def __init__(self, directory: str, policy: UploadsPolicy) -> None:
+        self.directory = directory
+        self.policy = policy
+        self.blobs = WaveformBlobStore(directory)
+        self.last_sweep: Dict[str, Any] = {}
+        self._usage: Dict[str, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def accessed(self, filename: str) -> None:
+        touch(self.blobs.path_for(filename))
+
+    def record(self, filename: str, owner: Optional[str]) -> None:
+        """Hand the reference a request by ``owner`` (None when anonymous) took on ``filename`` to its holder.
+
+        Storing or re-using a waveform (``WaveformBlobStore.add``, ``adopt`` or
+        ``acquire``) and saving an upload each take one reference for the request.
+        The first such request of a holder keeps it; later ones release theirs.
+        """
+
+        path = self.blobs.path_for(filename)
+        touch(path)
+        holder = ANONYMOUS if owner is None else owner
+        with self.blobs.locked():
+            if not os.path.exists(path):
+                return
+            holders = self._read_holders(path)
+            held = holder in holders
+            if not held:
+                self._write_holders(path, holders + [holder])
+        if held:
+            self.blobs.release(filename)
+            return
+        size = self._unit_size(path)
+        with self._lock:
+            # Only a trigger for the sweeper, which recomputes everything exactly.
+            if not holders:
+                self._total += size
+            over_user = False
+            if owner is not None:
+                self._usage[owner] = self._usage.get(owner, 0) + size // (len(holders) + 1)
+                over_user = bool(self.policy.user_max_bytes) and self._usage[owner] > self.policy.user_max_bytes
+            over_total = self.policy.max_bytes and self._total > self.policy.max_bytes
+        if over_user or over_total:
+            self._wake.set()
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"bytes": self._total, "owners": len(self._usage), "last_sweep": dict(self.last_sweep)}
+
+    def scan(self) -> List[StoredFile]:
+        """Every stored file with its total size; stale temporaries and orphans are removed."""
+
+        try:
+            with os.scandir(self.directory) as listing:
+                stats = {entry.name: entry.stat() for entry in listing if entry.is_file(follow_symlinks=False)}
+        except FileNotFoundError:
+            return []
+
+        now = time.time()
+        files: List[StoredFile] = []
+        for name, stat in stats.items():
+            sidecar_of = next(
+                (name[: -len(suffix)] for suffix in SIDECAR_SUFFIXES if suffix and name.endswith(suffix)),
+                None,
+            )
+            if sidecar_of is not None or name.startswith(".") or name.endswith(".tmp"):
+                if sidecar_of is not None:
+                    leftover = sidecar_of not in stats
+                else:
+                    leftover = name.startswith(_TEMP_PREFIXES) or name.endswith(".tmp")
+                if leftover and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    self._remove_quietly(name)
+                continue
+            path = self.blobs.path_for(name)
+            size = sum(stats[name + suffix].st_size for suffix in SIDECAR_SUFFIXES if name + suffix in stats)
+            holders = self._read_holders(path) if name + OWNERS_SUFFIX in stats else []
+            files.append(StoredFile(name, size, stat.st_atime_ns, holders))
+        return files
+
+    def sweep(self) -> Dict[str, Any]:
+        """Apply the TTL, then per-user quotas, then the global limit (see the class docstring)."""
+
+        now_ns = time.time_ns()
+        files = self.scan()
+        removed: Dict[str, int] = {}
+
+        def evict(stored: StoredFile) -> None:
+            if self.blobs.discard(stored.name, stored.accessed_ns):
+                removed[stored.name] = stored.size
+
+        if self.policy.ttl_seconds:
+            cutoff = now_ns - self.policy.ttl_seconds * 1_000_000_000
+            for stored in files:
+                if stored.accessed_ns < cutoff:
+                    evict(stored)
+        files = [stored for stored in files if stored.name not in removed]
+
+        if self.policy.user_max_bytes:
+            owned: Dict[str, List[StoredFile]] = {}
+            for stored in files:
+                for owner in stored.owners:
+                    owned.setdefault(owner, []).append(stored)
+            for owner, owner_files in owned.items():
+                # Shares are read as we go: an earlier owner letting go makes them grow.
+                usage = sum(stored.share for stored in owner_files if owner in stored.holders)
+                for stored in sorted(owner_files, key=lambda item: item.accessed_ns):
+                    if usage <= self.policy.user_max_bytes:
+                        break
+                    if owner not in stored.holders:
+                        continue
+                    usage -= stored.share
+                    if self._drop_holder(stored, owner):
+                        removed[stored.name] = stored.size
+            files = [stored for stored in files if stored.name not in removed]
+
+        total = sum(stored.size for stored in files)
+        if self.policy.max_bytes and total > self.policy.max_bytes:
+            total -= self._evict_over_limit(files, total, removed)
+            files = [stored for stored in files if stored.name not in removed]
+
+        usage: Dict[str, int] = {}
+        for stored in files:
+            for owner in stored.owners:
+                usage[owner] = usage.get(owner, 0) + stored.share
+        report = {
+            "time": now_ns // 1_000_000_000,
+            "files": len(files),
+            "bytes": total,
+            "removed": len(removed),
+            "freed_bytes": sum(removed.values()),
+        }
+        with self._lock:
+            self._usage = usage
+            self._total = total
+            self.last_sweep = report
+        return report
+
+    def start(self) -> None:
+        """Run :meth:`sweep` every ``sweep_seconds`` (and when a quota is exceeded) in the background."""
+
+        if self.policy.sweep_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._sweep_loop, name="uploads-sweeper", daemon=True)
+        self._thread.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Uploads sweep error: {exc}")
+            self._wake.wait(self.policy.sweep_seconds)
+            self._wake.clear()
+
+    def _evict_over_limit(self, files: List[StoredFile], total: int, removed: Dict[str, int]) -> int:
+        """Bring ``total`` under the global limit; returns the bytes freed.
+
+        Files from before holder tracking (no holders and no reference count) go
+        first, least recently used first. After that the holder charged most drops
+        its least recently used reference until the total fits or nobody holds
+        anything; files held only by a job are left to the job's cleanup.
+        """
+
+        freed = 0
+        held: Dict[str, List[StoredFile]] = {}
+        for stored in sorted(files, key=lambda item: item.accessed_ns):
+            if stored.holders:
+                for holder in stored.holders:
+                    held.setdefault(holder, []).append(stored)
+            elif total - freed > self.policy.max_bytes and not os.path.exists(self.blobs.path_for(stored.name) + REFS_SUFFIX):
+                if self.blobs.discard(stored.name, stored.accessed_ns):
+                    removed[stored.name] = stored.size
+                    freed += stored.size
+
+        charges = {holder: sum(stored.share for stored in held_files) for holder, held_files in held.items()}
+        while total - freed > self.policy.max_bytes and charges:
+            holder = max(charges, key=lambda key: charges[key])
+            stored = held[holder].pop(0)
+            share = stored.share
+            if held[holder]:
+                charges[holder] -= share
+            else:
+                del held[holder], charges[holder]
+            others = [other for other in stored.holders if other != holder]
+            for other in others:
+                charges[other] += stored.size // len(others) - share
+            if self._drop_holder(stored, holder):
+                removed[stored.name] = stored.size
+                freed += stored.size
+        return freed
+
+    def _drop_holder(self, stored: StoredFile, holder: str) -> bool:
+        """Release ``holder``'s reference on ``stored``; True when that deleted the file."""
+
+        path = self.blobs.path_for(stored.name)
+        if holder in stored.holders:
+            stored.holders.remove(holder)
+        with self.blobs.locked():
+            holders = self._read_holders(path)
+            if holder not in holders:
+                return False
+            holders.remove(holder)
+            self._write_holders(path, holders)
+        return self.blobs.release(stored.name) == 0
+
+    def _unit_size(self, path: str) -> int:
+        size = 0
+        for suffix in SIDECAR_SUFFIXES:
+            try:
+                size += os.path.getsize(path + suffix)
+            except OSError:
+                pass
+        return size
+
+    def _remove_quietly(self, name: str) -> None:
+        try:
+            os.remove(self.blobs.path_for(name))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_holders(path: str) -> List[str]:
+        try:
+            with open(path + OWNERS_SUFFIX, "r", encoding="utf-8") as handle:
+                return list(json.load(handle))
+        except (OSError, ValueError):
+            return []
+
+    @staticmethod
+    def _write_holders(path: str, holders: List[str]) -> None:
+        staging = f"{path}{OWNERS_SUFFIX}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(staging, "w", encoding="utf-8") as handle:
+            json.dump(holders, handle)
+        os.replace(staging, path + OWNERS_SUFFIX)
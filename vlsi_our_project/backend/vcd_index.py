@@ -0,0 +1,225 @@
+import bisect
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from vcd_reader import REAL_VAR_TYPES, iter_vcd_events
+from waveform_binary import open_binary_waveform
+from waveform_store import SignalChannel, WaveformBuilder, WaveformStore
+
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+DEFAULT_CHECKPOINT_BYTES = 1024 * 1024
+
+
+def index_path_for(vcd_file: str) -> str:
+    return vcd_file + INDEX_SUFFIX
+
+
+def build_vcd_index(vcd_file: str, checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES) -> Dict[str, Any]:
+    """Scan a VCD once and describe its signals plus periodic seek checkpoints.
+
+    Each checkpoint records the byte offset of a ``#time`` line together with the
+    last value of every identifier before it, so a reader can seek there and still
+    know the state of any signal at that time.
+    """
+
+    stat = os.stat(vcd_file)
+    signals: List[Dict[str, Any]] = []
+    checkpoints: List[Dict[str, Any]] = []
+    state: Dict[str, str] = {}
+    timescale = ""
+    end_time = 0
+    last_checkpoint_offset = -checkpoint_bytes
+
+    for event in iter_vcd_events(vcd_file):
+        kind = event[0]
+        if kind == "change":
+            state[event[1]] = event[2]
+        elif kind == "time":
+            end_time = event[1]
+            if event[2] - last_checkpoint_offset >= checkpoint_bytes:
+                checkpoints.append({"time": event[1], "offset": event[2], "values": dict(state)})
+                last_checkpoint_offset = event[2]
+        elif kind == "var":
+            var = event[1]
+            signals.append(
+                {
+                    "name": var.name,
+                    "path": ".".join([*var.scope, var.name]),
+                    "scope": ".".join(var.scope),
+                    "id": var.id_code,
+                    "type": var.var_type,
+                    "width": var.width,
+                }
+            )
+        elif kind == "timescale":
+            timescale = event[1]
+
+    return {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "timescale": timescale,
+        "end_time": end_time,
+        "signals": signals,
+        "checkpoints": checkpoints,
+    }
+
+
+def write_vcd_index(vcd_file: str, checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES) -> Dict[str, Any]:
+    index = build_vcd_index(vcd_file, checkpoint_bytes)
+    path = index_path_for(vcd_file)
+    staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(staging, "w", encoding="utf-8") as handle:
+        json.dump(index, handle, separators=(",", ":"))
+    os.replace(staging, path)
+    return index
+
+
+def load_vcd_index(vcd_file: str) -> Dict[str, Any]:
+    """Return the sidecar index, rebuilding it when missing or out of date."""
+
+    try:
+        with open(index_path_for(vcd_file), "r", encoding="utf-8") as handle:
+            index = json.load(handle)
+        stat = os.stat(vcd_file)
+        if (
+            index.get("version") == INDEX_VERSION
+            and index.get("size") == stat.st_size
+            and index.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return index
+    except (OSError, ValueError):
+        pass
+    return write_vcd_index(vcd_file)
+
+
+def _resolve_signals(index: Dict[str, Any], requested: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    by_path = {entry["path"]: entry for entry in index["signals"]}
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for entry in index["signals"]:
+        by_name.setdefault(entry["name"], entry)
+
+    resolved: Dict[str, Dict[str, Any]] = {}
+    for label in requested:
+        entry = by_path.get(label) or by_name.get(label)
+        if entry is None:
+            raise KeyError(label)
+        resolved[label] = entry
+    return resolved
+
+
+def _load_from_binary(
+    vcd_file: str,
+    index: Dict[str, Any],
+    resolved: Dict[str, Dict[str, Any]],
+    start: Optional[int],
+    end: Optional[int],
+) -> Optional[WaveformStore]:
+    """Serve the window from the ``.vwf`` sidecar when it holds every requested signal.
+
+    The sidecar has one trace per name, taken from the first identifier declaring it
+    (see ``VerilogSimulator._parse_vcd``); other identifiers are read from the VCD.
+    """
+
+    binary = open_binary_waveform(vcd_file)
+    if binary is None:
+        return None
+    with binary:
+        owners: Dict[str, str] = {}
+        for entry in index["signals"]:
+            owners.setdefault(entry["name"], entry["id"])
+        traces: Dict[str, str] = {}
+        for label, entry in resolved.items():
+            if owners[entry["name"]] != entry["id"] or entry["name"] not in binary:
+                return None
+            traces[label] = entry["name"]
+        signals = [{"name": label, "id": entry["id"], "width": entry["width"]} for label, entry in resolved.items()]
+        return binary.window(traces, start, end, signals)
+
+
+def load_signals(
+    vcd_file: str,
+    names: Iterable[str],
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    index: Optional[Dict[str, Any]] = None,
+) -> WaveformStore:
+    """Load only ``names`` over ``[start, end]`` by seeking to the nearest checkpoint.
+
+    Signals are matched by hierarchical path (``tb.uut.q``) or bare name. Values that
+    were set before ``start`` are reported at ``start``. Raises KeyError for unknown
+    signals.
+    """
+
+    if index is None:
+        index = load_vcd_index(vcd_file)
+    resolved = _resolve_signals(index, names)
+    if index["checkpoints"]:
+        stored = _load_from_binary(vcd_file, index, resolved, start, end)
+        if stored is not None:
+            return stored
+
+    builder = WaveformBuilder(
+        [{"name": label, "id": entry["id"], "width": entry["width"]} for label, entry in resolved.items()]
+    )
+    channels: Dict[str, List[SignalChannel]] = {}
+    for label, entry in resolved.items():
+        channel = builder.channel(label, entry["width"], entry["type"] in REAL_VAR_TYPES)
+        channels.setdefault(entry["id"], []).append(channel)
+
+    checkpoints = index["checkpoints"]
+    if not checkpoints:
+        return builder.build()
+
+    window_start = start if start is not None else checkpoints[0]["time"]
+    position = bisect.bisect_right([checkpoint["time"] for checkpoint in checkpoints], window_start) - 1
+    checkpoint = checkpoints[max(position, 0)]
+
+    state = {id_code: value for id_code, value in checkpoint["values"].items() if id_code in channels}
+    carried: Optional[Dict[str, str]] = None
+    in_window = False
+    current_time = checkpoint["time"]
+
+    def flush_carried() -> None:
+        for id_code, value in (carried or {}).items():
+            for channel in channels[id_code]:
+                channel.append(window_start, value)
+
+    for event in iter_vcd_events(vcd_file, start_offset=checkpoint["offset"]):
+        kind = event[0]
+        if kind == "change":
+            if event[1] not in channels:
+                continue
+            if not in_window:
+                state[event[1]] = event[2]
+                continue
+            if carried is not None and current_time == window_start:
+                carried.pop(event[1], None)
+            for channel in channels[event[1]]:
+                channel.append(current_time, event[2])
+        elif kind == "time":
+            current_time = event[1]
+            if end is not None and current_time > end:
+                break
+            if in_window:
+                if carried is not None:
+                    flush_carried()
+                    carried = None
+            elif current_time >= window_start:
+                in_window = True
+                carried = state
+                if current_time > window_start:
+                    flush_carried()
+                    carried = None
+            builder.advance(current_time)
+
+    if carried is not None:
+        flush_carried()
+    builder.advance(window_start)
+    if end is not None:
+        builder.end_time = min(builder.end_time, end)
+    return builder.build()
@@ -0,0 +1,167 @@
+from typing import Any, BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from waveform_codec import open_vcd
+
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+SCALAR_VALUES = "01xXzZ"
+VECTOR_PREFIXES = "bBrR"
+DUMP_KEYWORDS = {"$dumpvars", "$dumpon", "$dumpoff", "$dumpall", "$end"}
+REAL_VAR_TYPES = {"real", "realtime"}
+
+
+class VcdVar(NamedTuple):
+    """A ``$var`` declaration from the VCD header.
+
+    ``select`` is the bit or range select written after the name (``[7:0]``), if any.
+    """
+
+    id_code: str
+    name: str
+    var_type: str
+    width: int
+    scope: Tuple[str, ...]
+    select: str = ""
+
+
+# Events yielded by the tokenizer:
+#   ("timescale", "1ns")
+#   ("scope", "module", "uut")
+#   ("upscope",)
+#   ("var", VcdVar)
+#   ("enddefinitions",)
+#   ("time", timestamp, byte_offset_of_the_line)
+#   ("change", id_code, raw_value)   raw_value is "1", "b1010", "r1.5", ...
+VcdEvent = Tuple[Any, ...]
+
+
+class VcdTokenizer:
+    """Incremental VCD tokenizer that turns raw byte blocks into events.
+
+    Only the current partial line and the open ``$command`` are buffered, so memory
+    use does not depend on the size of the dump.
+    """
+
+    def __init__(self, offset: int = 0) -> None:
+        self._pending = b""
+        self._offset = offset
+        self._command: Optional[str] = None
+        self._command_tokens: List[str] = []
+        self._scope: List[str] = []
+        self._value: Optional[str] = None
+
+    def feed(self, data: bytes) -> Iterator[VcdEvent]:
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            yield from self._process_line(line, self._offset)
+            self._offset += len(line) + 1
+
+    def finish(self) -> Iterator[VcdEvent]:
+        if self._pending:
+            line, self._pending = self._pending, b""
+            yield from self._process_line(line, self._offset)
+            self._offset += len(line)
+
+    def _process_line(self, line: bytes, line_offset: int) -> Iterator[VcdEvent]:
+        for token in line.decode("utf-8", "replace").split():
+            if self._command is not None:
+                if token == "$end":
+                    yield from self._close_command()
+                else:
+                    self._command_tokens.append(token)
+                continue
+
+            if self._value is not None:
+                yield ("change", token, self._value)
+                self._value = None
+                continue
+
+            head = token[0]
+            if head == "#":
+                yield ("time", int(token[1:]), line_offset)
+            elif head in SCALAR_VALUES:
+                yield ("change", token[1:], head.lower())
+            elif head in VECTOR_PREFIXES:
+                self._value = token
+            elif head == "$" and token not in DUMP_KEYWORDS:
+                self._command = token
+                self._command_tokens = []
+
+    def _close_command(self) -> Iterator[VcdEvent]:
+        command, tokens = self._command, self._command_tokens
+        self._command = None
+        self._command_tokens = []
+
+        if command == "$var" and len(tokens) >= 4:
+            try:
+                width = int(tokens[1])
+            except ValueError:
+                width = 1
+            yield ("var", VcdVar(tokens[2], tokens[3], tokens[0], width, tuple(self._scope), " ".join(tokens[4:])))
+        elif command == "$scope" and tokens:
+            self._scope.append(tokens[-1])
+            yield ("scope", tokens[0] if len(tokens) > 1 else "module", tokens[-1])
+        elif command == "$upscope" and self._scope:
+            self._scope.pop()
+            yield ("upscope",)
+        elif command == "$timescale":
+            yield ("timescale", "".join(tokens))
+        elif command == "$enddefinitions":
+            yield ("enddefinitions",)
+
+
+def iter_vcd_events(
+    vcd_file: str,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    start_offset: int = 0,
+) -> Iterator[VcdEvent]:
+    """Stream events from a VCD file (plain or compressed), reading it in fixed-size blocks."""
+
+    tokenizer = VcdTokenizer(offset=start_offset)
+    with open_vcd(vcd_file) as handle:
+        if start_offset:
+            handle.seek(start_offset)
+        while True:
+            block = handle.read(block_size)
+            if not block:
+                break
+            yield from tokenizer.feed(block)
+    yield from tokenizer.finish()
+
+
+class VcdTail:
+    """Follow a VCD that another process is still writing.
+
+    Each :meth:`poll` tokenizes only the bytes appended since the previous call; a
+    trailing partial line is held back until it is completed or :meth:`close` is
+    called.
+    """
+
+    def __init__(self, vcd_file: str) -> None:
+        self.vcd_file = vcd_file
+        self._handle: Optional[BinaryIO] = None
+        self._tokenizer = VcdTokenizer()
+
+    def poll(self, block_size: int = DEFAULT_BLOCK_SIZE) -> List[VcdEvent]:
+        if self._handle is None:
+            try:
+                self._handle = open(self.vcd_file, "rb")
+            except OSError:
+                return []
+
+        events: List[VcdEvent] = []
+        while True:
+            block = self._handle.read(block_size)
+            if not block:
+                return events
+            events.extend(self._tokenizer.feed(block))
+
+    def close(self) -> List[VcdEvent]:
+        events = self.poll()
+        events.extend(self._tokenizer.finish())
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        return events
@@ -1,6 +1,8 @@
 import re
 from typing import Dict, List, Any
 
+from metrics import instrumented
+
 class VerilogParser:
     """
     Verilog code parser for syntax checking and basic analysis
@@ -15,6 +17,7 @@ class VerilogParser:
             'endgenerate', 'genvar', 'integer', 'real', 'time'
         }
         
+    @instrumented("parser")
     def parse(self, code: str) -> Dict[str, Any]:
         """
         Parse Verilog code and return analysis results
@@ -0,0 +1,312 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from waveform_store import SignalTrace, WaveformStore, plane_dtype
+
+
+# Layout of a ``.vwf`` file (all integers little-endian):
+#   "VWF1" | u32 meta length | meta JSON (end_time, signals, [name, width, real] per trace)
+#   per trace, per block of up to BLOCK_VALUES changes:
+#       time deltas as LEB128 varints (the first is relative to the block's first time)
+#       values: aval bits packed LSB-first, then bval bits when the block has x/z
+#               (reals: raw float64)
+#   time markers: every distinct timestamp, as varint deltas
+#   block table: one _BLOCK_DTYPE row per block, sorted by trace then time
+#   footer: _FOOTER
+# Traces are addressed by their index in the meta list, so names are stored once.
+BINARY_SUFFIX = ".vwf"
+MAGIC = b"VWF1"
+BLOCK_VALUES = 4096
+HAS_BVAL = 1
+
+_META_LENGTH = struct.Struct("<I")
+_FOOTER = struct.Struct("<QIQQQ4s")  # table offset, blocks, markers offset, bytes, count, magic
+_BLOCK_DTYPE = np.dtype(
+    [
+        ("trace", "<u4"),
+        ("count", "<u4"),
+        ("first", "<i8"),
+        ("last", "<i8"),
+        ("offset", "<u8"),
+        ("time_bytes", "<u4"),
+        ("flags", "<u4"),
+    ]
+)
+_SHIFTS = np.arange(64, dtype=np.uint64)
+
+
+def binary_path_for(vcd_file: str) -> str:
+    return vcd_file + BINARY_SUFFIX
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """LEB128-encode non-negative integers (vectorised over byte positions)."""
+
+    values = np.asarray(values, dtype=np.uint64)
+    if not len(values):
+        return b""
+    lengths = np.ones(len(values), dtype=np.int64)
+    for position in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * position))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    encoded = np.empty(int(ends[-1]), dtype=np.uint8)
+    for position in range(int(lengths.max())):
+        selected = lengths > position
+        payload = (values[selected] >> np.uint64(7 * position)) & np.uint64(0x7F)
+        more = (lengths[selected] > position + 1).astype(np.uint64) << np.uint64(7)
+        encoded[starts[selected] + position] = (payload | more).astype(np.uint8)
+    return encoded.tobytes()
+
+
+def decode_varints(data: np.ndarray, count: int) -> np.ndarray:
+    """Decode ``count`` LEB128 integers from a uint8 array."""
+
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64)
+    if len(data) == count:
+        return data.astype(np.uint64)
+    ends = np.flatnonzero(data < 0x80)[:count]
+    starts = np.r_[0, ends[:-1] + 1]
+    data = data[: ends[-1] + 1]
+    owner = np.repeat(np.arange(count), ends - starts + 1)
+    shifts = (np.arange(len(data)) - starts[owner]).astype(np.uint64) * np.uint64(7)
+    return np.add.reduceat((data & 0x7F).astype(np.uint64) << shifts, starts)
+
+
+def _pack_plane(plane: np.ndarray, width: int) -> bytes:
+    count = len(plane)
+    words = plane.reshape(count, -1).astype(np.uint64)
+    bits = ((words[:, :, None] >> _SHIFTS) & np.uint64(1)).astype(np.uint8).reshape(count, -1)[:, :width]
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def _unpack_plane(data: np.ndarray, count: int, width: int) -> np.ndarray:
+    bits = np.unpackbits(data, count=count * width, bitorder="little").reshape(count, width)
+    words = (width + 63) // 64
+    if words == 1:
+        plane = (bits.astype(np.uint64) << _SHIFTS[:width]).sum(axis=1, dtype=np.uint64)
+        return plane.astype(plane_dtype(width))
+    padded = np.zeros((count, words * 64), dtype=np.uint64)
+    padded[:, :width] = bits
+    return (padded.reshape(count, words, 64) << _SHIFTS).sum(axis=2, dtype=np.uint64)
+
+
+def write_binary_waveform(path: str, store: WaveformStore) -> None:
+    """Serialise ``store`` to ``path``; raises ValueError if a trace's times go backwards."""
+
+    names = store.names
+    meta = json.dumps(
+        {
+            "end_time": store.end_time,
+            "signals": store.signals,
+            "traces": [[name, store.trace(name).width, store.trace(name).real] for name in names],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    rows: List[tuple] = []
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, "wb") as handle:
+        handle.write(MAGIC + _META_LENGTH.pack(len(meta)) + meta)
+        offset = len(MAGIC) + _META_LENGTH.size + len(meta)
+        for trace_id, name in enumerate(names):
+            trace = store.trace(name)
+            for begin in range(0, len(trace), BLOCK_VALUES):
+                times = trace.times[begin:begin + BLOCK_VALUES]
+                deltas = np.diff(times, prepend=times[0])
+                if (deltas < 0).any():
+                    raise ValueError(f"times of {name} are not sorted")
+                time_bytes = encode_varints(deltas)
+                flags = 0
+                if trace.real:
+                    value_bytes = trace.aval[begin:begin + BLOCK_VALUES].astype("<f8").tobytes()
+                else:
+                    value_bytes = _pack_plane(trace.aval[begin:begin + BLOCK_VALUES], trace.width)
+                    bval = trace.bval[begin:begin + BLOCK_VALUES]
+                    if bval.any():
+                        value_bytes += _pack_plane(bval, trace.width)
+                        flags |= HAS_BVAL
+                rows.append((trace_id, len(times), times[0], times[-1], offset, len(time_bytes), flags))
+                handle.write(time_bytes)
+                handle.write(value_bytes)
+                offset += len(time_bytes) + len(value_bytes)
+
+        markers = np.unique(
+            np.concatenate([store.times(name) for name in names] + [np.array([store.end_time], dtype=np.int64)])
+        )
+        marker_bytes = encode_varints(np.diff(markers, prepend=0))
+        handle.write(marker_bytes)
+        table = np.array(rows, dtype=_BLOCK_DTYPE)
+        handle.write(table.tobytes())
+        handle.write(
+            _FOOTER.pack(offset + len(marker_bytes), len(table), offset, len(marker_bytes), len(markers), MAGIC)
+        )
+    os.replace(staging, path)
+
+
+class BinaryWaveform:
+    """Memory-mapped ``.vwf`` reader; only the blocks a query touches are decoded."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[: len(MAGIC)] != MAGIC or self._map[-len(MAGIC):] != MAGIC:
+                raise ValueError(f"{path} is not a binary waveform")
+            (meta_length,) = _META_LENGTH.unpack_from(self._map, len(MAGIC))
+            start = len(MAGIC) + _META_LENGTH.size
+            meta = json.loads(self._map[start:start + meta_length].decode("utf-8"))
+            table_offset, blocks, self._markers_offset, self._markers_bytes, self._markers_count, _ = (
+                _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+            )
+            self._blocks: Optional[np.ndarray] = np.frombuffer(
+                self._map, dtype=_BLOCK_DTYPE, count=blocks, offset=table_offset
+            )
+        except Exception:
+            self._map.close()
+            raise
+        self.end_time: int = meta["end_time"]
+        self.signals: List[Dict[str, Any]] = meta["signals"]
+        self._traces: List[List[Any]] = meta["traces"]
+        self._ids = {entry[0]: trace_id for trace_id, entry in enumerate(self._traces)}
+        self._markers: Optional[np.ndarray] = None
+
+    @property
+    def names(self) -> List[str]:
+        return [entry[0] for entry in self._traces]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+    def markers(self) -> np.ndarray:
+        """Every distinct timestamp in the waveform, ascending."""
+
+        if self._markers is None:
+            data = np.frombuffer(self._map, dtype=np.uint8, count=self._markers_bytes, offset=self._markers_offset)
+            self._markers = np.cumsum(decode_varints(data, self._markers_count)).astype(np.int64)
+        return self._markers
+
+    def trace(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> SignalTrace:
+        """Decode one trace; with ``start``/``end`` only the blocks covering the window
+        (plus the value held at ``start``) are read, so the result may overhang it."""
+
+        trace_id = self._ids[name]
+        _, width, real = self._traces[trace_id]
+        table = self._blocks
+        lower, upper = np.searchsorted(table["trace"], [trace_id, trace_id + 1])
+        rows = table[lower:upper]
+        first_block, last_block = 0, len(rows)
+        if start is not None:
+            first_block = max(int(np.searchsorted(rows["first"], start, "left")) - 1, 0)
+        if end is not None:
+            last_block = int(np.searchsorted(rows["first"], end, "right"))
+
+        parts = [self._decode_block(row, width, real) for row in rows[first_block:last_block]]
+        times = np.concatenate([part[0] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+        if real:
+            aval = np.concatenate([part[1] for part in parts]) if parts else np.zeros(0, dtype=np.float64)
+            return SignalTrace(times, aval, None, width, real=True)
+        words = (width + 63) // 64
+        empty_shape = (0,) if words == 1 else (0, words)
+        dtype = plane_dtype(width)
+        aval = np.concatenate([part[1] for part in parts]) if parts else np.zeros(empty_shape, dtype=dtype)
+        bval = np.concatenate([part[2] for part in parts]) if parts else np.zeros(empty_shape, dtype=dtype)
+        return SignalTrace(times, aval, bval, width)
+
+    def _decode_block(self, row: np.void, width: int, real: bool) -> tuple:
+        count = int(row["count"])
+        offset = int(row["offset"])
+        time_bytes = int(row["time_bytes"])
+        deltas = decode_varints(np.frombuffer(self._map, dtype=np.uint8, count=time_bytes, offset=offset), count)
+        times = np.cumsum(deltas).astype(np.int64) + int(row["first"])
+        offset += time_bytes
+        if real:
+            return times, np.frombuffer(self._map, dtype="<f8", count=count, offset=offset).astype(np.float64), None
+        plane_bytes = (count * width + 7) // 8
+        aval = _unpack_plane(np.frombuffer(self._map, dtype=np.uint8, count=plane_bytes, offset=offset), count, width)
+        if int(row["flags"]) & HAS_BVAL:
+            data = np.frombuffer(self._map, dtype=np.uint8, count=plane_bytes, offset=offset + plane_bytes)
+            bval = _unpack_plane(data, count, width)
+        else:
+            bval = np.zeros_like(aval)
+        return times, aval, bval
+
+    def to_store(self) -> WaveformStore:
+        store = WaveformStore(self.signals, self.end_time)
+        for name in self.names:
+            store.add_trace(name, self.trace(name))
+        return store
+
+    def window(
+        self,
+        traces: Dict[str, str],
+        start: Optional[int],
+        end: Optional[int],
+        signals: List[Dict[str, Any]],
+    ) -> WaveformStore:
+        """The stored traces named by ``traces`` (label -> trace name) over ``[start, end]``.
+
+        Matches ``vcd_index.load_signals``: a value set before ``start`` is reported at
+        ``start`` and ``end_time`` is the last timestamp inside the window.
+        """
+
+        markers = self.markers()
+        window_start = start if start is not None else (int(markers[0]) if len(markers) else 0)
+        upper = len(markers) if end is None else int(np.searchsorted(markers, end, "right"))
+        end_time = max(0, window_start, int(markers[upper - 1]) if upper else 0)
+        if end is not None:
+            end_time = min(end_time, end)
+        entered = int(np.searchsorted(markers, window_start, "left")) < upper
+
+        store = WaveformStore(signals, end_time)
+        for label, name in traces.items():
+            trace = self.trace(name, window_start, end)
+            times = trace.times
+            lower = int(np.searchsorted(times, window_start, "left"))
+            upper_index = len(times) if end is None else int(np.searchsorted(times, end, "right"))
+            carried = entered and lower > 0 and (lower == len(times) or times[lower] > window_start)
+            indices = np.arange(lower - 1 if carried else lower, upper_index if entered else lower)
+            clipped = times[indices]
+            if carried:
+                clipped[0] = window_start
+            bval = trace.bval[indices] if trace.bval is not None else None
+            store.add_trace(label, SignalTrace(clipped, trace.aval[indices], bval, trace.width, trace.real))
+        return store
+
+    def close(self) -> None:
+        self._blocks = None
+        self._markers = None
+        self._map.close()
+
+    def __enter__(self) -> "BinaryWaveform":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def open_binary_waveform(vcd_file: str) -> Optional[BinaryWaveform]:
+    """The ``.vwf`` sidecar of ``vcd_file`` when present and not older than the VCD."""
+
+    path = binary_path_for(vcd_file)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(vcd_file):
+            return None
+        return BinaryWaveform(path)
+    except (OSError, ValueError, KeyError, struct.error) as exc:
+        if not isinstance(exc, FileNotFoundError):
+            print(f"Binary waveform read error: {exc}")
+        return None
+
+
+def read_binary_waveform(path: str) -> WaveformStore:
+    """Load a whole ``.vwf`` file into a :class:`WaveformStore`."""
+
+    with BinaryWaveform(path) as binary:
+        return binary.to_store()
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from vcd_index import INDEX_SUFFIX
+from waveform_binary import BINARY_SUFFIX
+from waveform_codec import SEEK_SUFFIX, compress_vcd, compression_level, write_seek_points
+from waveform_pyramid import PYRAMID_SUFFIX
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised.
+    fcntl = None  # type: ignore[assignment]
+
+
+REFS_SUFFIX = ".refs"
+OWNERS_SUFFIX = ".owners"
+LOCK_NAME = ".waveform_refs.lock"
+HASH_CHUNK = 1024 * 1024
+# Part of every file name: bump when the sidecars derived from a waveform change, so
+# stored waveforms are indexed again under a new name instead of serving stale data.
+BLOB_VERSION = 2
+_DATE_RE = re.compile(rb"\A\s*\$date\b.*?\$end\s*", re.DOTALL)
+
+# Files stored next to a waveform and deleted with it ("" is the waveform itself).
+SIDECAR_SUFFIXES = ("", REFS_SUFFIX, OWNERS_SUFFIX, INDEX_SUFFIX, PYRAMID_SUFFIX, SEEK_SUFFIX, BINARY_SUFFIX)
+
+_thread_lock = threading.Lock()
+
+
+def touch(path: str) -> None:
+    """Mark ``path`` as just used by bumping only its access time.
+
+    The modification time is left alone because the index, pyramid and binary
+    sidecars use it to detect a changed waveform.
+    """
+
+    try:
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    except OSError:
+        pass
+
+
+class WaveformBlobStore:
+    """Content-addressed, reference-counted VCD files in the uploads directory.
+
+    A waveform is stored once as ``waveform_<sha256>.vcd`` however many results
+    point at it, gzip-compressed unless ``WAVEFORM_COMPRESSION_LEVEL`` is 0 (readers
+    go through ``waveform_codec.open_vcd``). Every :meth:`add` takes a reference and :meth:`release` drops one;
+    the file and its index/pyramid sidecars are deleted with the last reference.
+    Files from before content addressing (no ``.refs`` sidecar) count as one
+    reference.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def digest(path: str) -> str:
+        """SHA-256 of the VCD, ignoring the ``$date`` header iverilog stamps on every run."""
+
+        digest = hashlib.sha256(f"v{BLOB_VERSION}:".encode("ascii"))
+        with open(path, "rb") as handle:
+            first = handle.read(HASH_CHUNK)
+            digest.update(_DATE_RE.sub(b"", first, count=1))
+            for chunk in iter(lambda: handle.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def add(self, source: str) -> Tuple[str, bool]:
+        """Store ``source`` (or find its twin) and take a reference.
+
+        Returns the stored file name and whether this call created it. New content is
+        compressed into place, or (with compression off) hard-linked in when ``source``
+        is on the same filesystem and copied otherwise.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"waveform_{self.digest(source)}.vcd"
+        destination = self.path_for(filename)
+        # Stage outside the lock; only the rename and the count update are serialised.
+        staging, points = (None, None) if os.path.exists(destination) else self._stage(source)
+        try:
+            with self.locked():
+                created = not os.path.exists(destination)
+                if not created:
+                    touch(destination)
+                else:
+                    if staging is None:
+                        staging, points = self._stage(source)
+                    if points is not None:
+                        write_seek_points(destination, points)
+                    os.replace(staging, destination)
+                    staging = None
+                self._write_refs(destination, 1 if created else self._read_refs(destination) + 1)
+        finally:
+            if staging is not None:
+                os.remove(staging)
+        return filename, created
+
+    def adopt(self, source: "WaveformBlobStore", filename: str) -> bool:
+        """Take a reference on ``filename``, linking it and its sidecars in from ``source`` if absent.
+
+        Returns whether the file was brought in. Files are hard-linked when both
+        stores share a filesystem and copied (with their timestamps, which the
+        sidecars' staleness checks compare) otherwise.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        destination = self.path_for(filename)
+        with self.locked():
+            created = not os.path.exists(destination)
+            if created:
+                if not os.path.exists(source.path_for(filename)):
+                    raise FileNotFoundError(source.path_for(filename))
+                # The waveform itself goes last so it is never visible without its sidecars.
+                for suffix in (SEEK_SUFFIX, INDEX_SUFFIX, PYRAMID_SUFFIX, BINARY_SUFFIX, ""):
+                    origin = source.path_for(filename + suffix)
+                    if os.path.exists(origin):
+                        self._link_into(origin, destination + suffix)
+            else:
+                touch(destination)
+            self._write_refs(destination, 1 if created else self._read_refs(destination) + 1)
+        return created
+
+    def acquire(self, filename: str) -> int:
+        """Take another reference on a stored waveform; returns the new count."""
+
+        destination = self.path_for(filename)
+        with self.locked():
+            if not os.path.exists(destination):
+                raise FileNotFoundError(destination)
+            count = self._read_refs(destination) + 1
+            self._write_refs(destination, count)
+        return count
+
+    def release(self, filename: str) -> int:
+        """Drop a reference; the waveform and its sidecars go with the last one."""
+
+        destination = self.path_for(filename)
+        with self.locked():
+            count = max(0, self._read_refs(destination) - 1)
+            if count:
+                self._write_refs(destination, count)
+                return count
+            self._remove(destination)
+        return 0
+
+    def discard(self, filename: str, accessed_ns: Optional[int] = None) -> bool:
+        """Delete a stored file and its sidecars whatever its reference count (eviction).
+
+        With ``accessed_ns``, the file is kept (and False returned) if it has been
+        touched since that access time was observed.
+        """
+
+        destination = self.path_for(filename)
+        with self.locked():
+            if accessed_ns is not None:
+                try:
+                    if os.stat(destination).st_atime_ns != accessed_ns:
+                        return False
+                except FileNotFoundError:
+                    pass
+            self._remove(destination)
+        return True
+
+    def refcount(self, filename: str) -> int:
+        return self._read_refs(self.path_for(filename))
+
+    @staticmethod
+    def _remove(destination: str) -> None:
+        for suffix in SIDECAR_SUFFIXES:
+            try:
+                os.remove(destination + suffix)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _link_into(origin: str, destination: str) -> None:
+        staging = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(origin, staging)
+        except OSError:
+            shutil.copy2(origin, staging)
+        os.replace(staging, destination)
+
+    def _stage(self, source: str) -> Tuple[str, Optional[List[List[int]]]]:
+        staging = self.path_for(f".staging-{uuid.uuid4().hex}.vcd")
+        level = compression_level()
+        if level > 0:
+            return staging, compress_vcd(source, staging, level)
+        try:
+            os.link(source, staging)
+        except OSError:
+            shutil.copyfile(source, staging)
+        return staging, None
+
+    @staticmethod
+    def _read_refs(destination: str) -> int:
+        try:
+            with open(destination + REFS_SUFFIX, "r", encoding="utf-8") as handle:
+                return int(handle.read().strip() or 0)
+        except FileNotFoundError:
+            return 1 if os.path.exists(destination) else 0
+        except ValueError:
+            return 1
+
+    @staticmethod
+    def _write_refs(destination: str, count: int) -> None:
+        staging = f"{destination}{REFS_SUFFIX}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(staging, "w", encoding="utf-8") as handle:
+            handle.write(str(count))
+        os.replace(staging, destination + REFS_SUFFIX)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Serialise changes to the directory across threads and worker processes."""
+
+        with _thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path_for(LOCK_NAME), "a", encoding="utf-8") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,161 @@
+import bisect
+import gzip
+import json
+import os
+import struct
+import zlib
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Fixed 10-byte gzip header: deflate, no flags, mtime 0 (so equal content gives equal
+# bytes), unknown OS.
+GZIP_HEADER = GZIP_MAGIC + b"\x08\x00\x00\x00\x00\x00\x00\xff"
+SEEK_SUFFIX = ".gzi"
+# Same spacing as the vcd_index checkpoints, so a checkpoint seek inflates at most
+# about one block before reaching its offset.
+DEFAULT_FLUSH_BYTES = 1024 * 1024
+STREAM_CHUNK = 64 * 1024
+
+
+def compression_level() -> int:
+    """``WAVEFORM_COMPRESSION_LEVEL`` (zlib 1-9); 0 stores persisted waveforms uncompressed."""
+
+    return int(os.getenv("WAVEFORM_COMPRESSION_LEVEL", "6"))
+
+
+def seek_path_for(vcd_file: str) -> str:
+    return vcd_file + SEEK_SUFFIX
+
+
+def is_compressed(vcd_file: str) -> bool:
+    try:
+        with open(vcd_file, "rb") as handle:
+            return handle.read(2) == GZIP_MAGIC
+    except OSError:
+        return False
+
+
+def compress_vcd(source: str, destination: str, level: int, flush_bytes: int = DEFAULT_FLUSH_BYTES) -> List[List[int]]:
+    """Gzip ``source`` into ``destination`` as one member with a full flush every ``flush_bytes``.
+
+    The output is an ordinary gzip file any client can decode. Each full flush is a
+    point where inflation can restart without earlier data; the returned
+    ``[uncompressed offset, compressed offset]`` pairs are what
+    :func:`write_seek_points` stores so :func:`open_vcd` can seek cheaply.
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    points = [[0, len(GZIP_HEADER)]]
+    crc = 0
+    size = 0
+    written = len(GZIP_HEADER)
+    pending = 0
+    with open(source, "rb") as reader, open(destination, "wb") as writer:
+        writer.write(GZIP_HEADER)
+        for chunk in iter(lambda: reader.read(STREAM_CHUNK), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            pending += len(chunk)
+            data = compressor.compress(chunk)
+            if pending >= flush_bytes:
+                data += compressor.flush(zlib.Z_FULL_FLUSH)
+                pending = 0
+                points.append([size, written + len(data)])
+            writer.write(data)
+            written += len(data)
+        writer.write(compressor.flush() + struct.pack("<II", crc, size & 0xFFFFFFFF))
+    return points
+
+
+def write_seek_points(vcd_file: str, points: List[List[int]]) -> None:
+    staging = seek_path_for(vcd_file) + f".{os.getpid()}.tmp"
+    with open(staging, "w", encoding="utf-8") as handle:
+        json.dump(points, handle, separators=(",", ":"))
+    os.replace(staging, seek_path_for(vcd_file))
+
+
+def _load_seek_points(vcd_file: str) -> Optional[List[List[int]]]:
+    try:
+        with open(seek_path_for(vcd_file), "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+class _IndexedGzipReader:
+    """Read-only view of a :func:`compress_vcd` file that seeks via its flush points."""
+
+    def __init__(self, vcd_file: str, points: List[List[int]]) -> None:
+        self._raw = open(vcd_file, "rb")
+        self._offsets = [point[0] for point in points]
+        self._points = points
+        self._buffer = b""
+        self._position = 0
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.seek(0)
+
+    def seek(self, offset: int) -> int:
+        uncompressed, compressed = self._points[max(bisect.bisect_right(self._offsets, offset) - 1, 0)]
+        self._raw.seek(compressed)
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._buffer = b""
+        self._position = 0
+        remaining = offset - uncompressed
+        while remaining > 0:
+            skipped = self.read(min(remaining, STREAM_CHUNK))
+            if not skipped:
+                break
+            remaining -= len(skipped)
+        return offset - remaining
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) - self._position < size:
+            if self._inflater.eof:
+                break
+            chunk = self._raw.read(STREAM_CHUNK)
+            if not chunk:
+                break
+            self._buffer = self._buffer[self._position:] + self._inflater.decompress(chunk)
+            self._position = 0
+        end = len(self._buffer) if size < 0 else self._position + size
+        data = self._buffer[self._position:end]
+        self._position += len(data)
+        return data
+
+    def close(self) -> None:
+        self._raw.close()
+
+    def __enter__(self) -> "_IndexedGzipReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def open_vcd(vcd_file: str) -> Union[BinaryIO, _IndexedGzipReader]:
+    """Open a VCD for binary reading whether it is stored plain or gzip-compressed.
+
+    Offsets passed to ``seek`` and reported by readers are always positions in the
+    uncompressed text.
+    """
+
+    if not is_compressed(vcd_file):
+        return open(vcd_file, "rb")
+    points = _load_seek_points(vcd_file)
+    if points:
+        return _IndexedGzipReader(vcd_file, points)
+    return gzip.open(vcd_file, "rb")  # type: ignore[return-value]
+
+
+def iter_decompressed(vcd_file: str) -> Iterator[bytes]:
+    """Stream the uncompressed bytes of a compressed waveform, one block at a time."""
+
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    with open(vcd_file, "rb") as handle:
+        for chunk in iter(lambda: handle.read(STREAM_CHUNK), b""):
+            data = inflater.decompress(chunk)
+            if data:
+                yield data
+        data = inflater.flush()
+        if data:
+            yield data
@@ -0,0 +1,232 @@
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from waveform_store import SignalTrace, WaveformStore
+
+
+PYRAMID_SUFFIX = ".pyr.npz"
+PYRAMID_VERSION = 1
+MAX_FINE_BUCKETS = 1 << 16
+MIN_COARSE_BUCKETS = 256
+LEVEL_FIELDS = ("ids", "min", "max", "last", "count", "xz")
+RAW_FIELDS = ("ids", "last", "xz")
+
+
+def pyramid_path_for(vcd_file: str) -> str:
+    return vcd_file + PYRAMID_SUFFIX
+
+
+def _numeric_values(trace: SignalTrace) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a trace to one float per change plus an x/z flag, for min/max summaries.
+
+    Buses wider than 64 bits are summarised by their least significant word.
+    """
+
+    count = len(trace)
+    if trace.real:
+        return trace.aval.astype(np.float64), np.zeros(count, dtype=bool)
+    aval = trace.aval.reshape(count, -1)[:, 0]
+    xz = trace.bval.reshape(count, -1).any(axis=1)
+    return aval.astype(np.float64), xz
+
+
+def _group_starts(ids: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+
+
+def _first_level(times: np.ndarray, values: np.ndarray, xz: np.ndarray, bucket: int) -> Dict[str, np.ndarray]:
+    ids = times // bucket
+    starts = _group_starts(ids)
+    ends = np.r_[starts[1:], len(ids)] - 1
+    # The value held on entry to a bucket is part of what the bucket displays.
+    carried = values[np.maximum(starts - 1, 0)]
+    return {
+        "ids": ids[starts],
+        "min": np.minimum(np.minimum.reduceat(values, starts), carried),
+        "max": np.maximum(np.maximum.reduceat(values, starts), carried),
+        "last": values[ends],
+        "count": np.diff(np.r_[starts, len(ids)]).astype(np.int64),
+        "xz": np.logical_or.reduceat(xz, starts),
+    }
+
+
+def _coarser_level(level: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    ids = level["ids"] // 2
+    starts = _group_starts(ids)
+    ends = np.r_[starts[1:], len(ids)] - 1
+    return {
+        "ids": ids[starts],
+        "min": np.minimum.reduceat(level["min"], starts),
+        "max": np.maximum.reduceat(level["max"], starts),
+        "last": level["last"][ends],
+        "count": np.add.reduceat(level["count"], starts),
+        "xz": np.logical_or.reduceat(level["xz"], starts),
+    }
+
+
+class WaveformPyramid:
+    """Multi-resolution min/max summaries of every signal in a waveform.
+
+    Level 0 holds the raw transitions. Each further level groups them into buckets
+    twice as wide as the previous one and keeps, per non-empty bucket, the min/max
+    value, the value at the bucket end, the number of transitions and whether any
+    x/z bits were seen, so zoomed-out views never hide a glitch. Levels that would
+    not shrink the row count by at least a quarter are skipped.
+    """
+
+    def __init__(self, end_time: int) -> None:
+        self.end_time = end_time
+        self.widths: Dict[str, int] = {}
+        self.buckets: Dict[str, List[int]] = {}
+        self.levels: Dict[str, List[Dict[str, np.ndarray]]] = {}
+
+    @classmethod
+    def from_store(cls, store: WaveformStore) -> "WaveformPyramid":
+        span = max(store.end_time, 1)
+        base_bucket = 1
+        while span // base_bucket > MAX_FINE_BUCKETS:
+            base_bucket *= 2
+
+        pyramid = cls(store.end_time)
+        for name in store.names:
+            trace = store.trace(name)
+            values, xz = _numeric_values(trace)
+            levels = [
+                {
+                    "ids": trace.times,
+                    "min": values,
+                    "max": values,
+                    "last": values,
+                    "count": np.ones(len(values), dtype=np.int64),
+                    "xz": xz,
+                }
+            ]
+            buckets = [1]
+
+            if len(values) > MIN_COARSE_BUCKETS:
+                level, bucket = _first_level(trace.times, values, xz, base_bucket), base_bucket
+                while True:
+                    if len(level["ids"]) <= len(levels[-1]["ids"]) * 3 // 4:
+                        levels.append(level)
+                        buckets.append(bucket)
+                    if len(level["ids"]) <= MIN_COARSE_BUCKETS:
+                        break
+                    level, bucket = _coarser_level(level), bucket * 2
+
+            pyramid.widths[name] = trace.width
+            pyramid.buckets[name] = buckets
+            pyramid.levels[name] = levels
+        return pyramid
+
+    def save(self, path: str) -> None:
+        arrays: Dict[str, np.ndarray] = {}
+        names = list(self.levels)
+        for position, name in enumerate(names):
+            for depth, level in enumerate(self.levels[name]):
+                for field in RAW_FIELDS if depth == 0 else LEVEL_FIELDS:
+                    arrays[f"{position}/{depth}/{field}"] = level[field]
+        meta = {
+            "version": PYRAMID_VERSION,
+            "end_time": self.end_time,
+            "signals": [
+                {"name": name, "width": self.widths[name], "buckets": self.buckets[name]}
+                for name in names
+            ],
+        }
+        arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+
+        staging = path + ".tmp.npz"
+        np.savez_compressed(staging, **arrays)
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: str) -> "WaveformPyramid":
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != PYRAMID_VERSION:
+                raise ValueError("Unsupported pyramid version")
+            pyramid = cls(meta["end_time"])
+            for position, entry in enumerate(meta["signals"]):
+                pyramid.widths[entry["name"]] = entry["width"]
+                pyramid.buckets[entry["name"]] = entry["buckets"]
+                raw = {field: archive[f"{position}/0/{field}"] for field in RAW_FIELDS}
+                raw.update(min=raw["last"], max=raw["last"], count=np.ones(len(raw["last"]), dtype=np.int64))
+                pyramid.levels[entry["name"]] = [raw] + [
+                    {field: archive[f"{position}/{depth}/{field}"] for field in LEVEL_FIELDS}
+                    for depth in range(1, len(entry["buckets"]))
+                ]
+        return pyramid
+
+    def query(
+        self,
+        names: Optional[Iterable[str]],
+        start: int,
+        end: int,
+        pixels: int,
+    ) -> Dict[str, Any]:
+        """Return at most ~2 rows per pixel per signal covering ``[start, end]``.
+
+        Raises KeyError for unknown signal names.
+        """
+
+        end = max(end, start + 1)
+        target = (end - start) / max(pixels, 1)
+        selected = list(names) if names else list(self.levels)
+
+        result: Dict[str, Any] = {}
+        for name in selected:
+            depth = 0
+            for candidate, bucket in enumerate(self.buckets[name]):
+                if bucket <= target:
+                    depth = candidate
+            result[name] = self._slice(name, depth, start, end)
+        return result
+
+    def _slice(self, name: str, depth: int, start: int, end: int) -> Dict[str, Any]:
+        levels = self.levels[name]
+        raw = levels[0]
+        level = levels[depth]
+        bucket = self.buckets[name][depth]
+
+        before = int(np.searchsorted(raw["ids"], start, side="left")) - 1
+        initial = None
+        if before >= 0:
+            initial = None if raw["xz"][before] else raw["last"][before].item()
+
+        bucket_times = level["ids"] * bucket
+        lower = int(np.searchsorted(bucket_times, start - bucket + 1, side="left"))
+        upper = int(np.searchsorted(bucket_times, end, side="right"))
+        window = slice(lower, upper)
+        return {
+            "width": self.widths[name],
+            "level": depth,
+            "bucket": bucket,
+            "initial": initial,
+            "times": bucket_times[window].tolist(),
+            "min": level["min"][window].tolist(),
+            "max": level["max"][window].tolist(),
+            "last": level["last"][window].tolist(),
+            "count": level["count"][window].tolist(),
+            "xz": level["xz"][window].tolist(),
+        }
+
+
+def write_pyramid(vcd_file: str, store: WaveformStore) -> WaveformPyramid:
+    pyramid = WaveformPyramid.from_store(store)
+    pyramid.save(pyramid_path_for(vcd_file))
+    return pyramid
+
+
+def load_pyramid(vcd_file: str, store_loader: Callable[[], WaveformStore]) -> WaveformPyramid:
+    """Load the sidecar pyramid, rebuilding it from ``store_loader()`` if needed."""
+
+    path = pyramid_path_for(vcd_file)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(vcd_file):
+            return WaveformPyramid.load(path)
+    except (OSError, ValueError, KeyError):
+        pass
+    return write_pyramid(vcd_file, store_loader())
@@ -0,0 +1,285 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Four-state bits are stored as two planes, following the VPI aval/bval convention:
+#   0 -> (0, 0)   1 -> (1, 0)   z -> (0, 1)   x -> (1, 1)
+_AVAL_TABLE = str.maketrans("01xXzZ", "011100")
+_BVAL_TABLE = str.maketrans("01xXzZ", "001111")
+_BIT_CHARS = np.frombuffer(b"01zx", dtype=np.uint8)
+_WORD_BITS = 64
+_WORD_MASK = (1 << _WORD_BITS) - 1
+
+# (max width, array typecode, numpy dtype) for single-word planes.
+_PLANE_TYPES: Tuple[Tuple[int, str, Any], ...] = (
+    (8, "B", np.uint8),
+    (16, "H", np.uint16),
+    (32, "L" if array("L").itemsize == 4 else "I", np.uint32),
+    (64, "Q", np.uint64),
+)
+
+
+def decode_bits(raw: str, width: int) -> Tuple[int, int]:
+    """Decode a VCD scalar/vector value (``"1"``, ``"b10x1"``) into aval/bval planes."""
+
+    digits = raw[1:] if raw[:1] in ("b", "B") else raw
+    if not digits:
+        raise ValueError(f"empty value {raw!r}")
+    aval = int(digits.translate(_AVAL_TABLE), 2)
+    bval = int(digits.translate(_BVAL_TABLE), 2)
+
+    if len(digits) < width and digits[0] in "xXzZ":
+        # VCD left-extends x/z values with the leading bit, everything else with 0.
+        extension = ((1 << width) - 1) ^ ((1 << len(digits)) - 1)
+        bval |= extension
+        if digits[0] in "xX":
+            aval |= extension
+
+    mask = (1 << width) - 1
+    return aval & mask, bval & mask
+
+
+def format_value(raw: str, width: int, real: bool = False) -> Any:
+    """Format one raw VCD value the way :meth:`SignalTrace.formatted` reports it."""
+
+    if real:
+        return float(raw[1:] if raw[:1] in ("r", "R") else raw)
+    aval, bval = decode_bits(raw, width)
+    return "".join(
+        "01zx"[((aval >> bit) & 1) + 2 * ((bval >> bit) & 1)] for bit in range(width - 1, -1, -1)
+    )
+
+
+def _plane_type(width: int) -> Tuple[str, Any]:
+    for max_width, typecode, dtype in _PLANE_TYPES:
+        if width <= max_width:
+            return typecode, dtype
+    return "Q", np.uint64
+
+
+def plane_dtype(width: int) -> Any:
+    """numpy dtype of the aval/bval planes of a ``width``-bit signal (uint64 words past 64 bits)."""
+
+    return _plane_type(width)[1]
+
+
+class SignalTrace:
+    """Frozen value changes of a single signal."""
+
+    __slots__ = ("times", "aval", "bval", "width", "real")
+
+    def __init__(
+        self,
+        times: np.ndarray,
+        aval: np.ndarray,
+        bval: Optional[np.ndarray],
+        width: int,
+        real: bool = False,
+    ) -> None:
+        self.times = times
+        self.aval = aval
+        self.bval = bval
+        self.width = width
+        self.real = real
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        planes = self.aval.nbytes + (self.bval.nbytes if self.bval is not None else 0)
+        return int(self.times.nbytes + planes)
+
+    def formatted(self) -> List[Any]:
+        """Values as the API reports them: floats for reals, MSB-first bit strings otherwise."""
+
+        if self.real:
+            return self.aval.tolist()
+        count = len(self.times)
+        if count == 0:
+            return []
+
+        words = self.aval.reshape(count, -1).astype(np.uint64)
+        shifts = np.arange(_WORD_BITS, dtype=np.uint64)
+        a_bits = ((words[:, :, None] >> shifts) & np.uint64(1)).reshape(count, -1)[:, : self.width]
+        b_words = self.bval.reshape(count, -1).astype(np.uint64)
+        b_bits = ((b_words[:, :, None] >> shifts) & np.uint64(1)).reshape(count, -1)[:, : self.width]
+
+        chars = _BIT_CHARS[(a_bits + 2 * b_bits)[:, ::-1]]
+        text = chars.tobytes().decode("ascii")
+        width = self.width
+        return [text[index:index + width] for index in range(0, count * width, width)]
+
+
+class SignalChannel:
+    """Append-only buffers for one signal while a waveform is being built."""
+
+    __slots__ = ("width", "real", "words", "times", "aval", "bval")
+
+    def __init__(self, width: int = 1, real: bool = False) -> None:
+        self.width = max(width, 1)
+        self.real = real
+        self.words = (self.width + _WORD_BITS - 1) // _WORD_BITS
+        self.times = array("q")
+        if real:
+            self.aval = array("d")
+            self.bval: Optional[array] = None
+        else:
+            typecode = _plane_type(self.width)[0]
+            self.aval = array(typecode)
+            self.bval = array(typecode)
+
+    def append(self, timestamp: int, raw: str) -> None:
+        """Record a raw VCD value; undecodable values are dropped."""
+
+        try:
+            if self.real:
+                self.aval.append(float(raw[1:] if raw[:1] in ("r", "R") else raw))
+                self.times.append(timestamp)
+                return
+            aval, bval = decode_bits(raw, self.width)
+        except ValueError:
+            return
+
+        self.times.append(timestamp)
+        if self.words == 1:
+            self.aval.append(aval)
+            self.bval.append(bval)
+        else:
+            for word in range(self.words):
+                shift = word * _WORD_BITS
+                self.aval.append((aval >> shift) & _WORD_MASK)
+                self.bval.append((bval >> shift) & _WORD_MASK)
+
+    def freeze(self) -> SignalTrace:
+        times = np.frombuffer(self.times, dtype=np.int64)
+        if self.real:
+            return SignalTrace(times, np.frombuffer(self.aval, dtype=np.float64), None, 64, real=True)
+
+        dtype = _plane_type(self.width)[1]
+        aval = np.frombuffer(self.aval, dtype=dtype)
+        bval = np.frombuffer(self.bval, dtype=dtype)
+        if self.words > 1:
+            aval = aval.reshape(-1, self.words)
+            bval = bval.reshape(-1, self.words)
+        return SignalTrace(times, aval, bval, self.width)
+
+
+class WaveformStore:
+    """Columnar waveform storage: per signal, sorted int64 times and bit-packed values.
+
+    The list-of-dicts shape used by the API (``[{"time": t, name: value}, ...]``) is
+    only materialised on request via :meth:`to_waveform_data`.
+    """
+
+    def __init__(self, signals: Optional[List[Dict[str, Any]]] = None, end_time: int = 0) -> None:
+        self.signals: List[Dict[str, Any]] = signals or []
+        self.end_time = end_time
+        self._traces: Dict[str, SignalTrace] = {}
+
+    def add_trace(self, name: str, trace: SignalTrace) -> None:
+        self._traces[name] = trace
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._traces)
+
+    def trace(self, name: str) -> SignalTrace:
+        return self._traces[name]
+
+    def times(self, name: str) -> np.ndarray:
+        return self._traces[name].times
+
+    def values(self, name: str) -> List[Any]:
+        return self._traces[name].formatted()
+
+    def transition_count(self) -> int:
+        return int(sum(len(trace) for trace in self._traces.values()))
+
+    def nbytes(self) -> int:
+        return int(sum(trace.nbytes for trace in self._traces.values()))
+
+    def to_waveform_data(self) -> List[Dict[str, Any]]:
+        """Expand to one dict per timestamp holding the signals that changed there."""
+
+        names = self.names
+        if not names:
+            return []
+
+        all_times = np.concatenate([self.times(name) for name in names] + [np.array([self.end_time])])
+        unique_times, inverse = np.unique(all_times, return_inverse=True)
+        points: List[Dict[str, Any]] = [{"time": timestamp} for timestamp in unique_times.tolist()]
+
+        offset = 0
+        for name in names:
+            count = len(self._traces[name])
+            slots = inverse[offset:offset + count].tolist()
+            for slot, value in zip(slots, self.values(name)):
+                points[slot][name] = value
+            offset += count
+
+        return points
+
+    def to_columnar(self) -> Dict[str, Any]:
+        """Compact JSON shape: one ``times``/``values`` pair of arrays per signal."""
+
+        return {
+            "end_time": self.end_time,
+            "signals": {
+                name: {
+                    "width": self._traces[name].width,
+                    "times": self.times(name).tolist(),
+                    "values": self.values(name),
+                }
+                for name in self.names
+            },
+        }
+
+    @classmethod
+    def from_waveform_data(
+        cls,
+        waveform_data: Iterable[Dict[str, Any]],
+        signals: List[Dict[str, Any]],
+    ) -> "WaveformStore":
+        points = list(waveform_data)
+        widths: Dict[str, int] = {}
+        for point in points:
+            for name, value in point.items():
+                if name != "time":
+                    widths[name] = max(widths.get(name, 1), len(str(value).lstrip("bB")))
+
+        builder = WaveformBuilder(signals)
+        for point in points:
+            timestamp = int(point.get("time", 0))
+            builder.advance(timestamp)
+            for name, value in point.items():
+                if name != "time":
+                    builder.channel(name, widths[name]).append(timestamp, str(value))
+        return builder.build()
+
+
+class WaveformBuilder:
+    """Accumulates value changes in compact buffers and freezes them into a store."""
+
+    def __init__(self, signals: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.signals: List[Dict[str, Any]] = signals if signals is not None else []
+        self.end_time = 0
+        self._channels: Dict[str, SignalChannel] = {}
+
+    def channel(self, name: str, width: int = 1, real: bool = False) -> SignalChannel:
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = SignalChannel(width, real)
+        return channel
+
+    def advance(self, timestamp: int) -> None:
+        if timestamp > self.end_time:
+            self.end_time = timestamp
+
+    def build(self) -> WaveformStore:
+        store = WaveformStore(self.signals, self.end_time)
+        for name, channel in self._channels.items():
+            store.add_trace(name, channel.freeze())
+        return store